@@ -8,7 +8,9 @@ import os
 import sys
 import yaml
 import json
+import hashlib
 from flask import Flask, request, jsonify, send_file, Response
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 from datetime import datetime
 import logging
@@ -62,7 +64,24 @@ MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "5"))
 # ========================================
 # FLASK APP
 # ========================================
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    jsonify tramite oacommon.json_dumps (orjson se installato)
+
+    I valori non JSON diventano str(); l'indentazione resta solo in debug
+    (o con JSONIFY compact=False), come nel provider di default.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return oacommon.json_dumps(obj, pretty=bool(kwargs.get("indent")),
+                                   sort_keys=kwargs.get("sort_keys", self.sort_keys))
+
+    def loads(self, s, **kwargs):
+        return oacommon.json_loads(s)
+
+
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # ========================================
@@ -171,6 +190,7 @@ def index():
             "execute": "/execute?WORKFLOW=filename.yaml",
             "workflows": "/workflows",
             "executions": "/executions/<execution_id>",
+            "execution_logs": "/executions/<execution_id>/logs?offset=0&limit=200",
             "stats": "/stats",
             "health": "/health"
         }
@@ -213,9 +233,11 @@ def execute():
         return jsonify({"error": f"Workflow file not found: {workflow_name}"}), 404
 
     try:
-        # Carica YAML
-        with open(workflow_file, "r", encoding="utf-8") as f:
-            yaml_content = yaml.safe_load(f)
+        # Carica YAML (l'hash dei byte fa da chiave per la cache dei placeholder risolti)
+        with open(workflow_file, "rb") as f:
+            raw_content = f.read()
+        yaml_content = yaml.safe_load(raw_content.decode("utf-8"))
+        content_hash = hashlib.sha256(raw_content).hexdigest()
 
         # Validazione supporta entrambe le sintassi
         has_tasks = False
@@ -233,7 +255,7 @@ def execute():
 
         # Risolvi placeholder
         if active_wallet:
-            yaml_content = resolve_dict_placeholders(yaml_content, active_wallet)
+            yaml_content = resolve_dict_placeholders(yaml_content, active_wallet, cache_key=content_hash)
 
         # Genera workflow_id
         workflow_id = f"flask_{os.path.basename(workflow_name).replace('.yaml', '').replace('.yml', '')}"
@@ -412,6 +434,30 @@ def get_execution(execution_id: str):
         "results": execution.results
     })
 
+@app.route("/executions/<execution_id>/logs", methods=["GET"])
+def get_execution_logs(execution_id: str):
+    """
+    Log di una specifica esecuzione
+    Query params:
+        - offset: indice prima riga (default 0)
+        - limit: numero massimo di righe (default 200)
+    """
+    try:
+        offset = int(request.args.get("offset", 0))
+        limit = int(request.args.get("limit", 200))
+    except ValueError:
+        return jsonify({"error": "offset and limit must be integers"}), 400
+
+    logs = workflow_manager.get_execution_logs(execution_id, offset, limit)
+
+    if logs is None:
+        return jsonify({"error": f"Execution not found: {execution_id}"}), 404
+
+    return jsonify({
+        "execution_id": execution_id,
+        **logs
+    })
+
 @app.route("/stats", methods=["GET"])
 def get_stats():
     """Statistiche del workflow manager"""
@@ -8,7 +8,7 @@ import os
 import inspect
 import sys
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Callable, List, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -16,6 +16,7 @@ from logger_config import AutomatorLogger, TaskLogger
 import oacommon
 from taskstore import TaskResultStore
 from wallet import Wallet, PlainWallet, resolve_dict_placeholders
+from module_index import get_module_index
 
 logger = AutomatorLogger.get_logger("automator")
 
@@ -76,6 +77,20 @@ class WorkflowContext:
     def __init__(self):
         self.results: Dict[str, TaskResult] = {}
         self.global_data: Dict[str, Any] = {}
+        self._cleanups: List[Callable[[], None]] = []
+
+    def add_cleanup(self, callback: Callable[[], None]):
+        """Registra una funzione da eseguire a fine workflow (anche in caso di errore)"""
+        self._cleanups.append(callback)
+
+    def run_cleanups(self):
+        """Esegue le funzioni registrate con add_cleanup, in ordine inverso, una sola volta"""
+        while self._cleanups:
+            callback = self._cleanups.pop()
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Workflow cleanup failed: {e}")
 
     def set_task_result(self, task_name: str, result: TaskResult):
         self.results[task_name] = result
@@ -117,7 +132,27 @@ class WorkflowEngine:
         self.debug2 = debug2
         self.tasks_map = {t.get("name"): t for t in tasks if t.get("name")}
 
+    def preflight(self) -> List[Dict[str, str]]:
+        """
+        Valida moduli, funzioni e parametri obbligatori dei task senza importare
+        alcun modulo (usa l'indice di modules/)
+
+        Returns:
+            lista di issue {'task', 'level', 'message'}
+        """
+        issues = get_module_index(module_path).validate_tasks(self.tasks)
+        for item in issues:
+            log = logger.error if item["level"] == "error" else logger.warning
+            log(f"  Preflight [{item['task']}]: {item['message']}")
+        return issues
+
     def execute(self) -> Tuple[bool, WorkflowContext]:
+        try:
+            return self._execute()
+        finally:
+            self.context.run_cleanups()
+
+    def _execute(self) -> Tuple[bool, WorkflowContext]:
         logger.info("=" * 70)
         logger.info("WORKFLOW ENGINE - EXECUTION START")
         logger.info("=" * 70)
@@ -316,8 +351,8 @@ class WorkflowEngine:
             if key not in ["name", "on_success", "on_failure"] and "." in key:
                 module_name, func_name = key.split(".", 1)
                 params = task_def.get(key) or {}
-                if not isinstance(params, dict):
-                    params = {}
+                # Copia: la definizione può essere condivisa (es. documento risolto in cache)
+                params = dict(params) if isinstance(params, dict) else {}
                 return module_name, func_name, params
 
         raise ValueError(f"Invalid task definition: no module.function found in {task_def}")
@@ -469,6 +504,8 @@ def main():
                          help="file log level (default: DEBUG)")
     myparser.add_argument("--dry-run", action="store_true",
                          help="show workflow map without executing")
+    myparser.add_argument("--skip-preflight", action="store_true",
+                         help="skip module/parameter validation before execution")
     myparser.add_argument("--use-manager", action="store_true",
                          help="use workflow manager (experimental)")
     myparser.add_argument("--stats", action="store_true",
@@ -685,14 +722,23 @@ def main():
         print_workflow_map(tasks)
         analyze_workflow_paths(tasks)
 
-        if args.dry_run:
-            logger.info("DRY-RUN mode - workflow execution skipped")
-            return 0
-
         gdict["envconfig"] = ENV_CONFIG
 
         taskstore = TaskResultStore()
         engine = WorkflowEngine(tasks, gdict, taskstore, DEBUG, DEBUG2)
+
+        if not args.skip_preflight:
+            issues = engine.preflight()
+            errors = [i for i in issues if i["level"] == "error"]
+            if errors:
+                logger.critical(f"Preflight failed: {len(errors)} error(s), workflow not executed")
+                return 6
+            logger.info(f"Preflight OK ({len(issues)} warning(s))")
+
+        if args.dry_run:
+            logger.info("DRY-RUN mode - workflow execution skipped")
+            return 0
+
         workflow_success, context = engine.execute()
 
         now_end = datetime.now()
@@ -9,49 +9,31 @@ With function list at the top of each module
 
 import os
 import re
-import ast
 from pathlib import Path
 
+from module_index import get_module_index, parse_module
 
-def extract_module_docs(file_path):
-    """Extracts docstring from Python file"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
 
-
-    try:
-        tree = ast.parse(content)
-    except:
+def _module_docs(module_info):
+    """Converts a ModuleInfo from the module index to the README data format"""
+    if module_info.error:
         return None
 
-
-    module_name = Path(file_path).stem
-    functions = []
-
-
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            has_trace = any(
-                (isinstance(d, ast.Name) and 'trace' in d.id) or
-                (isinstance(d, ast.Attribute) and d.attr == 'trace')
-                for d in node.decorator_list
-            )
-
-
-            if has_trace and ast.get_docstring(node):
-                docstring = ast.get_docstring(node)
-                functions.append({
-                    'name': node.name,
-                    'docstring': docstring
-                })
-
-
     return {
-        'module': module_name,
-        'functions': functions
+        'module': module_info.name,
+        'functions': [
+            {'name': func.name, 'docstring': func.docstring, 'required_params': func.required_params}
+            for func in sorted(module_info.functions.values(), key=lambda f: f.lineno)
+            if func.docstring
+        ]
     }
 
 
+def extract_module_docs(file_path):
+    """Extracts docstring from Python file"""
+    return _module_docs(parse_module(str(file_path)))
+
+
 def parse_docstring(docstring):
     """Converts docstring to markdown format"""
     lines = docstring.strip().split('\n')
@@ -486,21 +468,22 @@ def generate_html(modules_data):
 
 def main():
     """Generates README.md and README.html from modules"""
-    module_files = sorted(Path('./modules').glob('oa-*.py'))
+    # Shared module index (cached by mtime, no module import)
+    module_infos = get_module_index('./modules').modules()
 
 
-    if not module_files:
+    if not module_infos:
         print("❌ No oa-*.py modules found")
         return
 
 
-    print(f"📦 Found {len(module_files)} modules")
+    print(f"📦 Found {len(module_infos)} modules")
 
 
     modules_data = []
-    for file_path in module_files:
-        print(f"   Processing {file_path.name}...")
-        data = extract_module_docs(file_path)
+    for module_info in module_infos:
+        print(f"   Processing {Path(module_info.path).name}...")
+        data = _module_docs(module_info)
         if data and data['functions']:
             modules_data.append(data)
             print(f"   ✓ {len(data['functions'])} functions found")
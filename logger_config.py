@@ -3,11 +3,156 @@ Open-Automator Logging Configuration Module
 Gestisce la configurazione centralizzata del logging per tutti i moduli
 """
 
+import json
 import logging
 import logging.handlers
+import threading
+import contextvars
+import itertools
+from collections import deque
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Any
+
+
+# Execution id dell'esecuzione workflow corrente (propagato per thread/contesto)
+current_execution_id: contextvars.ContextVar = contextvars.ContextVar('oa_execution_id', default=None)
+
+
+class ExecutionContextFilter(logging.Filter):
+    """Filtro che aggiunge al record l'execution id del contesto corrente"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.execution_id = current_execution_id.get()
+        return True
+
+
+class ExecutionLogHandler(logging.Handler):
+    """
+    Handler che cattura i log per singola esecuzione workflow
+
+    Mantiene per ogni execution id un ring buffer limitato in memoria; le righe
+    più vecchie che escono dal buffer vengono riversate su un file dedicato
+    (<spill_dir>/<execution_id>.log). A fine esecuzione il buffer viene
+    svuotato sul file e la memoria liberata; il file viene cancellato quando
+    l'esecuzione esce dalla history (discard).
+    """
+
+    def __init__(self, spill_dir: str = './logs/executions', buffer_size: int = 1000,
+                 level: int = logging.INFO):
+        super().__init__(level)
+        self.spill_dir = Path(spill_dir)
+        self.buffer_size = max(1, buffer_size)
+        self._buffers: Dict[str, deque] = {}
+        self._spilled: Dict[str, int] = {}
+        self._finished: Dict[str, int] = {}
+        self._buffer_lock = threading.Lock()
+        self.addFilter(ExecutionContextFilter())
+        self.setFormatter(logging.Formatter(
+            fmt='%(asctime)s | %(levelname)-8s | %(name)s | %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+
+    def _spill_path(self, execution_id: str) -> Path:
+        return self.spill_dir / f'{execution_id}.log'
+
+    def _spill(self, execution_id: str, lines) -> None:
+        """Appende righe al file dell'esecuzione (chiamato con lock acquisito)"""
+        if not lines:
+            return
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._spill_path(execution_id), 'a', encoding='utf-8') as f:
+            for line in lines:
+                # Una riga JSON per record: i messaggi multi-riga restano indirizzabili per indice
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+        self._spilled[execution_id] = self._spilled.get(execution_id, 0) + len(lines)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        execution_id = getattr(record, 'execution_id', None)
+        if execution_id is None:
+            return
+        try:
+            line = self.format(record)
+            with self._buffer_lock:
+                if execution_id in self._finished:
+                    return
+                buffer = self._buffers.get(execution_id)
+                if buffer is None:
+                    buffer = self._buffers[execution_id] = deque()
+                if len(buffer) >= self.buffer_size:
+                    # Riversa su file a blocchi per non riaprire il file a ogni riga
+                    batch = max(1, self.buffer_size // 10)
+                    self._spill(execution_id, [buffer.popleft() for _ in range(min(batch, len(buffer)))])
+                buffer.append(line)
+        except Exception:
+            self.handleError(record)
+
+    def finish(self, execution_id: str) -> None:
+        """Riversa il buffer residuo su file e libera la memoria dell'esecuzione"""
+        with self._buffer_lock:
+            buffer = self._buffers.pop(execution_id, None)
+            if buffer:
+                self._spill(execution_id, list(buffer))
+            self._finished[execution_id] = self._spilled.pop(execution_id, 0)
+
+    def discard(self, execution_id: str) -> None:
+        """Dimentica un'esecuzione e ne cancella il file su disco"""
+        with self._buffer_lock:
+            self._buffers.pop(execution_id, None)
+            self._spilled.pop(execution_id, None)
+            self._finished.pop(execution_id, None)
+        try:
+            self._spill_path(execution_id).unlink(missing_ok=True)
+        except OSError:
+            pass  # niente log da qui: il record tornerebbe a questo handler
+
+    def tail(self, execution_id: str, limit: Optional[int] = None) -> list:
+        """Ritorna le ultime righe ancora nel ring buffer in memoria"""
+        with self._buffer_lock:
+            lines = list(self._buffers.get(execution_id, ()))
+        return lines[-limit:] if limit else lines
+
+    def get_logs(self, execution_id: str, offset: int = 0, limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Ritorna una pagina dei log di un'esecuzione
+
+        Args:
+            execution_id: id dell'esecuzione
+            offset: indice della prima riga (0 = più vecchia)
+            limit: numero massimo di righe (None = tutte)
+
+        Returns:
+            dict con 'lines', 'offset', 'limit', 'total'
+        """
+        offset = max(0, int(offset))
+        with self._buffer_lock:
+            if execution_id in self._finished:
+                spilled = self._finished[execution_id]
+                buffered = []
+            else:
+                spilled = self._spilled.get(execution_id, 0)
+                buffered = list(self._buffers.get(execution_id, ()))
+
+        total = spilled + len(buffered)
+        end = total if limit is None else min(total, offset + max(0, int(limit)))
+        lines = []
+
+        if offset < spilled and offset < end:
+            path = self._spill_path(execution_id)
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in itertools.islice(f, offset, min(end, spilled)):
+                        lines.append(json.loads(line))
+
+        if end > spilled:
+            lines.extend(buffered[max(0, offset - spilled):end - spilled])
+
+        return {
+            'lines': lines,
+            'offset': offset,
+            'limit': limit,
+            'total': total
+        }
 
 
 class AutomatorLogger:
@@ -16,6 +161,8 @@ class AutomatorLogger:
     _loggers = {}
     _file_handler = None
     _console_handler = None
+    _execution_handler = None
+    _log_dir = './logs'
 
     @classmethod
     def setup_logging(cls, 
@@ -38,6 +185,7 @@ class AutomatorLogger:
         # Crea directory log se non esiste
         log_path = Path(log_dir)
         log_path.mkdir(parents=True, exist_ok=True)
+        cls._log_dir = str(log_path)
 
         # Nome file log con timestamp
         log_file = log_path / f'automator_{datetime.now().strftime("%Y%m%d")}.log'
@@ -109,6 +257,36 @@ class AutomatorLogger:
         if cls._file_handler:
             cls._file_handler.setLevel(getattr(logging, level.upper()))
 
+    @classmethod
+    def get_execution_handler(cls, buffer_size: int = 1000) -> ExecutionLogHandler:
+        """
+        Ottiene l'handler per i log per-esecuzione, agganciandolo al root logger
+        se necessario (setup_logging rimuove gli handler esistenti)
+
+        Args:
+            buffer_size: righe mantenute in memoria per esecuzione (solo alla creazione)
+
+        Returns:
+            ExecutionLogHandler condiviso dal processo
+        """
+        if cls._execution_handler is None:
+            cls._execution_handler = ExecutionLogHandler(
+                spill_dir=str(Path(cls._log_dir) / 'executions'),
+                buffer_size=buffer_size
+            )
+
+        root_logger = logging.getLogger()
+        if cls._execution_handler not in root_logger.handlers:
+            root_logger.addHandler(cls._execution_handler)
+
+        return cls._execution_handler
+
+    @classmethod
+    def get_execution_logs(cls, execution_id: str, offset: int = 0,
+                           limit: Optional[int] = None) -> Dict[str, Any]:
+        """Ritorna una pagina dei log di un'esecuzione (vedi ExecutionLogHandler.get_logs)"""
+        return cls.get_execution_handler().get_logs(execution_id, offset, limit)
+
 
 class TaskLogger:
     """Context manager per logging di singoli task con indicazione finale esito"""
@@ -0,0 +1,444 @@
+"""
+Module Index - Registro dei moduli oa-*.py
+
+Scansiona la directory modules/ una sola volta e mantiene un indice
+(moduli, funzioni, parametri obbligatori, docstring) estratto dall'AST,
+senza importare alcun modulo. L'indice è invalidato per file tramite mtime
+e persistito in modules/__pycache__ per i run successivi della CLI.
+
+Usato da automator (preflight), WebUI (grafo/validazione) e generate_readme.
+"""
+
+import os
+import ast
+import json
+import threading
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Optional, List
+
+from logger_config import AutomatorLogger
+
+logger = AutomatorLogger.get_logger('oa-module-index')
+
+# Versione del formato della cache su disco (da incrementare se cambia l'estrazione)
+INDEX_CACHE_VERSION = 2
+INDEX_CACHE_FILE = 'oa-module-index.json'
+
+# Chiavi di un task che non sono parametri della funzione
+TASK_RESERVED_KEYS = ("name", "module", "function", "on_success", "on_failure")
+
+
+# ========================================
+# DATACLASSES
+# ========================================
+
+@dataclass
+class FunctionInfo:
+    """Funzione di un modulo (decorata con @oacommon.trace)"""
+    name: str
+    docstring: str = ""
+    required_params: List[str] = field(default_factory=list)
+    # Parametri che la funzione può ricavare da sola (es. da 'input' del task precedente)
+    derived_params: List[str] = field(default_factory=list)
+    # Parametri controllati solo in un ramo (if/else, except, cicli): non obbligatori
+    optional_params: List[str] = field(default_factory=list)
+    lineno: int = 0
+
+    @property
+    def summary(self) -> str:
+        """Prima riga della docstring"""
+        return self.docstring.split('\n')[0].strip() if self.docstring else ""
+
+
+@dataclass
+class ModuleInfo:
+    """Modulo oa-*.py indicizzato"""
+    name: str
+    path: str
+    mtime_ns: int
+    docstring: str = ""
+    functions: Dict[str, FunctionInfo] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        """Converte in dizionario serializzabile"""
+        data = asdict(self)
+        data['functions'] = {name: asdict(func) for name, func in self.functions.items()}
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ModuleInfo':
+        """Ricostruisce da dizionario (cache su disco)"""
+        functions = {name: FunctionInfo(**func) for name, func in data.get('functions', {}).items()}
+        return cls(
+            name=data['name'],
+            path=data['path'],
+            mtime_ns=data['mtime_ns'],
+            docstring=data.get('docstring', ""),
+            functions=functions,
+            error=data.get('error'),
+        )
+
+
+# ========================================
+# ESTRAZIONE DA AST
+# ========================================
+
+def _is_trace_decorator(decorator) -> bool:
+    """True se il decoratore è @trace / @oacommon.trace"""
+    return ((isinstance(decorator, ast.Name) and 'trace' in decorator.id) or
+            (isinstance(decorator, ast.Attribute) and decorator.attr == 'trace'))
+
+
+def _string_list(node) -> Optional[List[str]]:
+    """Ritorna la lista di stringhe di un literal list/tuple, None altrimenti"""
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = [elt.value for elt in node.elts
+                  if isinstance(elt, ast.Constant) and isinstance(elt.value, str)]
+        if len(values) == len(node.elts):
+            return values
+    return None
+
+
+def _param_subscript_key(node) -> Optional[str]:
+    """Ritorna 'x' per un nodo param['x'], None altrimenti"""
+    if (isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name)
+            and node.value.id == 'param'):
+        key = node.slice
+        if isinstance(key, ast.Constant) and isinstance(key.value, str):
+            return key.value
+    return None
+
+
+def _unconditional_nodes(statements) -> List[ast.AST]:
+    """
+    Nodi eseguiti sempre, in ordine, scendendo nei blocchi try/with
+
+    Il corpo di if/else, cicli e handler except è condizionale: ne restano
+    solo le espressioni sempre valutate (condizione dell'if, iterabile del for).
+    """
+    nodes: List[ast.AST] = []
+    for stmt in statements:
+        if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        if isinstance(stmt, (ast.If, ast.While)):
+            nodes.extend(ast.walk(stmt.test))
+        elif isinstance(stmt, (ast.For, ast.AsyncFor)):
+            nodes.extend(ast.walk(stmt.iter))
+        elif isinstance(stmt, ast.Try):
+            nodes.extend(_unconditional_nodes(stmt.body))
+            nodes.extend(_unconditional_nodes(stmt.finalbody))
+        elif isinstance(stmt, (ast.With, ast.AsyncWith)):
+            for item in stmt.items:
+                nodes.extend(ast.walk(item.context_expr))
+            nodes.extend(_unconditional_nodes(stmt.body))
+        else:
+            nodes.extend(ast.walk(stmt))
+    return nodes
+
+
+def _extract_function(node: ast.FunctionDef) -> FunctionInfo:
+    """Estrae parametri obbligatori e derivati dal corpo di una funzione"""
+    list_vars: Dict[str, List[str]] = {}
+    checks: List[ast.Call] = []
+    derived: List[str] = []
+
+    for child in ast.walk(node):
+        if isinstance(child, ast.Assign):
+            values = _string_list(child.value)
+            for target in child.targets:
+                if isinstance(target, ast.Name) and values is not None:
+                    list_vars[target.id] = values
+                key = _param_subscript_key(target)
+                if key and key not in derived:
+                    derived.append(key)
+        elif isinstance(child, ast.Call):
+            func = child.func
+            name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+            if name == 'checkandloadparam':
+                checks.append(child)
+            elif (name == 'setdefault' and isinstance(func, ast.Attribute)
+                  and isinstance(func.value, ast.Name) and func.value.id == 'param'
+                  and child.args and isinstance(child.args[0], ast.Constant)):
+                key = child.args[0].value
+                if isinstance(key, str) and key not in derived:
+                    derived.append(key)
+
+    # Obbligatori solo i controlli sempre eseguiti, non quelli dentro un ramo
+    unconditional = {id(child) for child in _unconditional_nodes(node.body)}
+    required: List[str] = []
+    optional: List[str] = []
+    for call in sorted(checks, key=lambda call: (call.lineno, call.col_offset)):
+        target = required if id(call) in unconditional else optional
+        # checkandloadparam(self, myself, *params, param=param)
+        for arg in call.args[2:]:
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                values = [arg.value]
+            elif isinstance(arg, ast.Starred) and isinstance(arg.value, ast.Name):
+                values = list_vars.get(arg.value.id, [])
+            else:
+                values = _string_list(arg) or []
+            for value in values:
+                if value not in target:
+                    target.append(value)
+
+    return FunctionInfo(
+        name=node.name,
+        docstring=ast.get_docstring(node) or "",
+        required_params=required,
+        derived_params=[p for p in derived if p in required],
+        optional_params=[p for p in optional if p not in required],
+        lineno=node.lineno,
+    )
+
+
+def parse_module(file_path: str) -> ModuleInfo:
+    """
+    Indicizza un singolo file oa-*.py tramite AST (nessun import)
+
+    Returns:
+        ModuleInfo; in caso di errore di sintassi ModuleInfo.error è valorizzato
+    """
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    mtime_ns = os.stat(file_path).st_mtime_ns
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=file_path)
+    except (SyntaxError, UnicodeDecodeError) as e:
+        logger.warning(f"Cannot index module {name}: {e}")
+        return ModuleInfo(name=name, path=file_path, mtime_ns=mtime_ns, error=str(e))
+
+    functions = {}
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and any(_is_trace_decorator(d) for d in node.decorator_list):
+            functions[node.name] = _extract_function(node)
+
+    return ModuleInfo(
+        name=name,
+        path=file_path,
+        mtime_ns=mtime_ns,
+        docstring=ast.get_docstring(tree) or "",
+        functions=functions,
+    )
+
+
+# ========================================
+# INDICE
+# ========================================
+
+def extract_tasks(content: Any) -> List[Dict]:
+    """
+    Estrae la lista dei task da un workflow (sintassi nuova o vecchia)
+
+    Returns:
+        lista task, vuota se la struttura non è riconosciuta
+    """
+    if isinstance(content, dict) and isinstance(content.get('tasks'), list):
+        return content['tasks']
+    if (isinstance(content, list) and content and isinstance(content[0], dict)
+            and isinstance(content[0].get('tasks'), list)):
+        return content[0]['tasks']
+    return []
+
+
+def task_target(task: Dict):
+    """
+    Ritorna (modulo, funzione, parametri) di un task senza eseguirlo
+
+    Supporta sia {module: ..., function: ...} che {modulo.funzione: {...}}.
+    Ritorna (None, None, {}) se il task non referenzia alcuna funzione.
+    """
+    if "module" in task and "function" in task:
+        params = {k: v for k, v in task.items() if k not in TASK_RESERVED_KEYS}
+        return task["module"], task["function"], params
+
+    for key, value in task.items():
+        if key not in TASK_RESERVED_KEYS and isinstance(key, str) and "." in key:
+            module_name, func_name = key.split(".", 1)
+            return module_name, func_name, dict(value) if isinstance(value, dict) else {}
+
+    return None, None, {}
+
+
+class ModuleIndex:
+    """Indice dei moduli di una directory, invalidato per mtime"""
+
+    def __init__(self, modules_dir: str = 'modules', cache_file: Optional[str] = None):
+        self.modules_dir = os.path.abspath(modules_dir)
+        self.cache_file = cache_file or os.path.join(self.modules_dir, '__pycache__', INDEX_CACHE_FILE)
+        self._lock = threading.RLock()
+        self._modules: Dict[str, ModuleInfo] = {}
+        self._loaded_cache = False
+        self.stats = {'parsed': 0, 'reused': 0}
+
+    def _load_cache(self):
+        """Carica l'indice persistito (se compatibile)"""
+        self._loaded_cache = True
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != INDEX_CACHE_VERSION:
+                return
+            self._modules = {name: ModuleInfo.from_dict(info) for name, info in data['modules'].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            self._modules = {}
+
+    def _save_cache(self):
+        """Persiste l'indice; errori di scrittura sono ignorati (cache best-effort)"""
+        data = {
+            'version': INDEX_CACHE_VERSION,
+            'modules': {name: info.to_dict() for name, info in self._modules.items()},
+        }
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            logger.debug(f"Module index cache not saved ({self.cache_file}): {e}")
+
+    def refresh(self) -> 'ModuleIndex':
+        """
+        Allinea l'indice al contenuto di modules_dir
+
+        Solo i file nuovi o con mtime cambiato vengono ri-parsati.
+        """
+        with self._lock:
+            if not self._loaded_cache:
+                self._load_cache()
+
+            try:
+                entries = [e for e in os.scandir(self.modules_dir)
+                           if e.is_file() and e.name.startswith('oa-') and e.name.endswith('.py')]
+            except OSError as e:
+                logger.warning(f"Cannot scan modules directory {self.modules_dir}: {e}")
+                entries = []
+
+            modules = {}
+            changed = False
+            for entry in entries:
+                name = entry.name[:-3]
+                cached = self._modules.get(name)
+                mtime_ns = entry.stat().st_mtime_ns
+                if cached and cached.mtime_ns == mtime_ns and cached.path == entry.path:
+                    modules[name] = cached
+                    self.stats['reused'] += 1
+                else:
+                    modules[name] = parse_module(entry.path)
+                    self.stats['parsed'] += 1
+                    changed = True
+
+            if changed or set(modules) != set(self._modules):
+                self._modules = modules
+                self._save_cache()
+            else:
+                self._modules = modules
+
+            return self
+
+    def modules(self) -> List[ModuleInfo]:
+        """Moduli indicizzati ordinati per nome"""
+        self.refresh()
+        with self._lock:
+            return [self._modules[name] for name in sorted(self._modules)]
+
+    def get_module(self, name: str) -> Optional[ModuleInfo]:
+        """Ritorna il modulo indicizzato o None"""
+        self.refresh()
+        with self._lock:
+            return self._modules.get(name)
+
+    def get_function(self, module_name: str, func_name: str) -> Optional[FunctionInfo]:
+        """Ritorna la funzione indicizzata o None"""
+        module = self.get_module(module_name)
+        return module.functions.get(func_name) if module else None
+
+    def to_dict(self) -> dict:
+        """Indice serializzabile (per API)"""
+        return {info.name: info.to_dict() for info in self.modules()}
+
+    def validate_tasks(self, tasks: List[Dict]) -> List[Dict[str, str]]:
+        """
+        Valida i riferimenti a moduli/funzioni e i parametri obbligatori dei task
+
+        Un parametro mancante è un errore, salvo che la funzione possa ricavarlo
+        da sola (es. dall'output del task precedente): in tal caso è un warning.
+
+        Returns:
+            lista di issue {'task', 'level': 'error'|'warning', 'message'}
+        """
+        self.refresh()
+        issues = []
+
+        def issue(task_name, level, message):
+            issues.append({'task': task_name, 'level': level, 'message': message})
+
+        names = {t.get("name") for t in tasks if isinstance(t, dict) and t.get("name")}
+
+        for position, task in enumerate(tasks, 1):
+            if not isinstance(task, dict):
+                issue(f"#{position}", 'error', "Task definition is not a mapping")
+                continue
+
+            task_name = task.get("name") or f"#{position}"
+            if not task.get("name"):
+                issue(task_name, 'warning', "Task has no name")
+
+            for key in ("on_success", "on_failure"):
+                target = task.get(key)
+                if target and target != "end" and target not in names:
+                    issue(task_name, 'error', f"{key} references unknown task '{target}'")
+
+            module_name, func_name, params = task_target(task)
+            if not module_name:
+                issue(task_name, 'error', "No module.function found in task definition")
+                continue
+
+            with self._lock:
+                module = self._modules.get(module_name)
+            if module is None:
+                issue(task_name, 'error', f"Unknown module '{module_name}'")
+                continue
+            if module.error:
+                issue(task_name, 'error', f"Module '{module_name}' cannot be parsed: {module.error}")
+                continue
+
+            func = module.functions.get(func_name)
+            if func is None:
+                issue(task_name, 'error', f"Unknown function '{module_name}.{func_name}'")
+                continue
+
+            for param_name in func.required_params:
+                if param_name in params:
+                    continue
+                if param_name in func.derived_params:
+                    issue(task_name, 'warning',
+                          f"Parameter '{param_name}' not set, expected from previous task output")
+                else:
+                    issue(task_name, 'error',
+                          f"Missing required parameter '{param_name}' for {module_name}.{func_name}")
+
+        return issues
+
+    def validate_workflow(self, content: Any) -> List[Dict[str, str]]:
+        """Valida un workflow completo (sintassi nuova o vecchia)"""
+        tasks = extract_tasks(content)
+        if not tasks:
+            return [{'task': '', 'level': 'error', 'message': "Invalid workflow structure - missing tasks"}]
+        return self.validate_tasks(tasks)
+
+
+_indexes: Dict[str, ModuleIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_module_index(modules_dir: str = 'modules') -> ModuleIndex:
+    """Ritorna l'indice (condiviso nel processo) per modules_dir"""
+    key = os.path.abspath(modules_dir)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = ModuleIndex(key)
+    return index
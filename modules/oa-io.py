@@ -12,7 +12,6 @@ import zipfile
 import glob
 import json
 import re
-from jinja2 import Environment, BaseLoader
 import inspect
 import logging
 from logger_config import AutomatorLogger
@@ -826,4 +825,118 @@ def loadvarfromjson(self, param):
         if task_store and task_id:
             task_store.set_result(task_id, task_success, error_msg)
 
-    return task_success, output_data
\ No newline at end of file
+    return task_success, output_data
+@oacommon.trace
+def streamjson(self, param):
+    """
+    Reads a large JSON array or JSON Lines file one record at a time
+
+    Counts the records, optionally converts the file to another path/format
+    while reading it; memory use does not depend on the file size.
+
+    Args:
+        param: dict with:
+            - filename: JSON file (can use input from previous task) - supports {WALLET:key}, {ENV:var}
+              (.jsonl/.ndjson = JSON Lines, otherwise a top-level array; .gz supported)
+            - format: (optional) json or jsonl (default: from the file extension)
+            - dstfile: (optional) file the records are copied to - supports {WALLET:key}, {ENV:var}
+            - dstformat: (optional) json or jsonl (default: from the dstfile extension)
+            - preview: (optional) number of records returned in output (default: 10)
+            - input: (optional) data from previous task
+            - workflow_context: (optional) workflow context
+            - task_id: (optional) unique task id
+            - task_store: (optional) TaskResultStore instance
+
+    Returns:
+        tuple: (success, dict) with filename, format, count, preview and dstfile
+
+    Example YAML:
+        # Count the records of an export and show the first ones
+        - name: inspect_export
+          module: oa-io
+          function: streamjson
+          filename: "/data/export/orders.json"
+          preview: 5
+
+        # Convert a JSON array export to compressed JSON Lines
+        - name: convert_export
+          module: oa-io
+          function: streamjson
+          filename: "/data/export/orders.json"
+          dstfile: "/data/export/orders.jsonl.gz"
+    """
+    func_name = myself()
+    logger.info("Streaming JSON file")
+
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
+
+    try:
+        # If filename not specified, use input from previous task
+        if 'filename' not in param and 'input' in param:
+            prev_input = param.get('input')
+            if isinstance(prev_input, dict):
+                if 'file' in prev_input:
+                    param['filename'] = prev_input['file']
+                elif 'filepath' in prev_input:
+                    param['filename'] = prev_input['filepath']
+                elif 'filename' in prev_input:
+                    param['filename'] = prev_input['filename']
+                logger.info(f"Using filename from previous task: {param.get('filename')}")
+
+        if not oacommon.checkandloadparam(self, myself, 'filename', param=param):
+            raise ValueError(f"Missing required parameters for {func_name}")
+
+        # Get wallet for placeholder resolution
+        wallet = gdict.get('_wallet')
+
+        filename = oacommon.get_param(param, 'filename', wallet)
+        fmt = oacommon.json_stream_format(filename, param.get('format'))
+        dstfile = oacommon.get_param(param, 'dstfile', wallet) if 'dstfile' in param else None
+        preview_size = int(param.get('preview', 10))
+
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"JSON file not found: {filename}")
+
+        logger.info(f"Reading {fmt}: {filename}")
+
+        records = oacommon.iter_json_records(filename, fmt)
+        preview = []
+        count = 0
+
+        if dstfile:
+            with oacommon.JsonRecordWriter(dstfile, param.get('dstformat')) as writer:
+                for record in records:
+                    if count < preview_size:
+                        preview.append(record)
+                    writer.write(record)
+                    count += 1
+            logger.info(f"Written {count} records to {dstfile} ({writer.format})")
+        else:
+            for record in records:
+                if count < preview_size:
+                    preview.append(record)
+                count += 1
+
+        logger.info(f"Streamed {count} records")
+
+        output_data = {
+            'filename': filename,
+            'format': fmt,
+            'count': count,
+            'preview': preview,
+            'dstfile': dstfile
+        }
+
+    except Exception as e:
+        task_success = False
+        error_msg = str(e)
+        logger.error(f"Failed to stream JSON file: {e}", exc_info=True)
+    finally:
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
+
+    return task_success, output_data
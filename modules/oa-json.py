@@ -9,19 +9,1320 @@ import oacommon
 import inspect
 import json
 import logging
+import re
+import math
+import heapq
+import hashlib
+import random
+import importlib.util
+from operator import eq, ne, gt, lt, ge, le
 from logger_config import AutomatorLogger
 
-logger = AutomatorLogger.getlogger("oa-json")
+logger = AutomatorLogger.get_logger("oa-json")
+
+# Optional: columnar backend for filter/aggregate/sort on large datasets
+numpy = oacommon.lazy_import("numpy")
+# Optional: JSON Schema keywords beyond the built-in fast path
+jsonschema = oacommon.lazy_import("jsonschema")
 
 gdict = {}
 
 myself = lambda: inspect.stack()[1][3]
 
-def setgdict(self, gdictparam):
+def setgdict(self, gdict_param):
     """Sets the global dictionary"""
     global gdict
-    gdict = gdictparam
-    self.gdict = gdictparam
+    gdict = gdict_param
+    self.gdict = gdict_param
+
+
+# ========================================
+# COMPILED FILTER EXPRESSIONS
+# ========================================
+
+FILTER_OPERATORS = (
+    "==", "!=", ">", "<", ">=", "<=", "contains", "not_contains", "startswith",
+    "endswith", "regex", "in", "not_in", "exists", "not_exists"
+)
+
+_COMPARATORS = {"==": eq, "!=": ne, ">": gt, "<": lt, ">=": ge, "<=": le}
+
+# Marker for absent fields (distinct from an explicit null)
+_MISSING = object()
+
+
+def _fold(value):
+    """Lowercases strings, leaves everything else untouched"""
+    return value.lower() if isinstance(value, str) else value
+
+
+def _to_number(value):
+    if type(value) is int or type(value) is float:
+        return value
+    return float(value)
+
+
+def fieldGetter(field, default=None):
+    """
+    Returns a function reading a (dotted) field from a dict
+
+    "address.city" walks nested objects, numeric parts index lists
+    ("items.0.sku"). A literal key containing dots takes precedence.
+    Absent fields return 'default'.
+    """
+    field = str(field)
+    if "." not in field:
+        return lambda item: item.get(field, default)
+
+    parts = [int(part) if part.lstrip("-").isdigit() else part for part in field.split(".")]
+
+    def get(item):
+        value = item.get(field, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = item
+        for part in parts:
+            if isinstance(value, dict):
+                value = value.get(str(part), _MISSING)
+            elif isinstance(value, list) and isinstance(part, int) and -len(value) <= part < len(value):
+                value = value[part]
+            else:
+                return default
+            if value is _MISSING:
+                return default
+        return value
+
+    return get
+
+
+def _predicate_parts(node, wallet):
+    """Resolved (field, operator, value) of a predicate node"""
+    if "field" not in node:
+        raise ValueError(f"Filter predicate without 'field': {node}")
+
+    field = oacommon.get_param(node, "field", wallet)
+    operator = oacommon.get_param(node, "operator", wallet) if "operator" in node else node.get("op", "==")
+    value = oacommon.get_param(node, "value", wallet) if "value" in node else None
+    return field, operator, value
+
+
+def _compile_predicate(node, case_sensitive, wallet):
+    """Compiles a single {field, operator, value} predicate into a closure"""
+    field, operator, value = _predicate_parts(node, wallet)
+    case_sensitive = node.get("case_sensitive", case_sensitive)
+    fold = (lambda v: v) if case_sensitive else _fold
+
+    if operator in ("exists", "not_exists"):
+        get = fieldGetter(field, _MISSING)
+        if operator == "exists":
+            return lambda item: get(item) is not _MISSING
+        return lambda item: get(item) is _MISSING
+
+    get = fieldGetter(field)
+
+    if operator in ("==", "!="):
+        compare = _COMPARATORS[operator]
+        target = fold(value)
+        if case_sensitive:
+            return lambda item: compare(get(item), target)
+        return lambda item: compare(_fold(get(item)), target)
+
+    if operator in _COMPARATORS:
+        compare = _COMPARATORS[operator]
+        try:
+            target = _to_number(value)
+            coerce = _to_number
+        except (ValueError, TypeError):
+            # Non-numeric bound (e.g. ISO dates): compare values as they are
+            target = fold(value)
+            coerce = fold
+
+        def match(item):
+            try:
+                return compare(coerce(get(item)), target)
+            except (ValueError, TypeError):
+                return False
+        return match
+
+    if operator in ("contains", "not_contains"):
+        target = fold(value)
+        text = fold(str(value))
+
+        def contains(item):
+            item_value = get(item)
+            if item_value is None:
+                return False
+            if isinstance(item_value, (list, tuple)):
+                return target in map(fold, item_value)
+            return text in fold(str(item_value))
+
+        if operator == "contains":
+            return contains
+        return lambda item: not contains(item)
+
+    if operator in ("startswith", "endswith"):
+        text = fold(str(value))
+
+        def affix(item):
+            item_value = get(item)
+            if item_value is None:
+                return False
+            item_value = fold(str(item_value))
+            return item_value.startswith(text) if operator == "startswith" else item_value.endswith(text)
+        return affix
+
+    if operator == "regex":
+        pattern = re.compile(str(value), 0 if case_sensitive else re.IGNORECASE)
+
+        def search(item):
+            item_value = get(item)
+            return item_value is not None and pattern.search(str(item_value)) is not None
+        return search
+
+    if operator in ("in", "not_in"):
+        members = value
+        if isinstance(members, str):
+            try:
+                members = json.loads(members)
+            except json.JSONDecodeError:
+                members = [member.strip() for member in members.split(",")]
+        if not isinstance(members, (list, tuple, set)):
+            members = [members]
+        members = [fold(member) for member in members]
+        try:
+            members = frozenset(members)
+        except TypeError:
+            pass  # unhashable members (objects/lists): linear lookup
+
+        def member(item):
+            try:
+                return fold(get(item)) in members
+            except TypeError:
+                return False
+
+        if operator == "in":
+            return member
+        return lambda item: not member(item)
+
+    raise ValueError(f"Unsupported operator: {operator} (supported: {', '.join(FILTER_OPERATORS)})")
+
+
+def _all_of(predicates):
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def match(item):
+        for predicate in predicates:
+            if not predicate(item):
+                return False
+        return True
+    return match
+
+
+def _any_of(predicates):
+    if len(predicates) == 1:
+        return predicates[0]
+
+    def match(item):
+        for predicate in predicates:
+            if predicate(item):
+                return True
+        return False
+    return match
+
+
+def compileFilter(spec, case_sensitive=True, wallet=None):
+    """
+    Compiles a filter expression into a single predicate function
+
+    The expression is a tree of:
+        - {field, operator, value[, case_sensitive]}: a predicate
+        - {and: [...]}, {or: [...]}, {not: expr}: boolean combinations
+        - [expr, ...]: shorthand for {and: [...]}
+
+    Placeholders are resolved, comparison values coerced and 'in' lists
+    turned into sets once, at compile time.
+
+    Returns:
+        function(dict) -> bool
+
+    Raises:
+        ValueError on malformed expressions or unknown operators
+    """
+    if isinstance(spec, list):
+        return _all_of([compileFilter(node, case_sensitive, wallet) for node in spec] or [lambda item: True])
+
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid filter expression: {spec!r}")
+
+    if "and" in spec:
+        return compileFilter(list(spec["and"]), case_sensitive, wallet)
+    if "or" in spec:
+        nodes = spec["or"]
+        if not nodes:
+            return lambda item: False
+        return _any_of([compileFilter(node, case_sensitive, wallet) for node in nodes])
+    if "not" in spec:
+        predicate = compileFilter(spec["not"], case_sensitive, wallet)
+        return lambda item: not predicate(item)
+
+    return _compile_predicate(spec, case_sensitive, wallet)
+
+
+# ========================================
+# COLUMNAR BACKEND (optional NumPy)
+# ========================================
+
+JSON_BACKENDS = ("auto", "python", "numpy")
+
+# With backend 'auto', datasets smaller than this stay on the pure-Python path
+NUMPY_MIN_ROWS = 10000
+
+_NAN = float("nan")
+_numpy_installed = None
+
+
+def _numpy_available():
+    global _numpy_installed
+    if _numpy_installed is None:
+        _numpy_installed = importlib.util.find_spec("numpy") is not None
+    return _numpy_installed
+
+
+def _use_numpy(backend, rows):
+    """Decides whether an operation on 'rows' records runs on NumPy columns"""
+    backend = backend or "auto"
+    if backend not in JSON_BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend} (supported: {', '.join(JSON_BACKENDS)})")
+    if backend == "python":
+        return False
+    if not _numpy_available():
+        if backend == "numpy":
+            logger.warning("NumPy not installed, using the pure-Python backend")
+        return False
+    return backend == "numpy" or rows >= NUMPY_MIN_ROWS
+
+
+def _float_or_nan(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def numericColumn(records, field):
+    """
+    Reads a field of every record into a float64 array
+
+    Missing, null and non-numeric values become NaN.
+    """
+    values = list(map(fieldGetter(field), records))
+    try:
+        # Numbers, numeric strings and None (-> NaN) convert in one call
+        return numpy.array(values, dtype=float)
+    except (TypeError, ValueError):
+        return numpy.fromiter(map(_float_or_nan, values), dtype=float, count=len(values))
+
+
+def _group_codes(records, group_by):
+    """
+    Group names (in order of first appearance) and per-record group codes
+    """
+    keys = list(map(fieldGetter(group_by, "null"), records))
+    uniques = None
+    try:
+        uniques = list(dict.fromkeys(keys))
+    except TypeError:
+        pass  # unhashable keys (objects/lists)
+    if uniques is None or not all(type(key) is str for key in uniques):
+        # Same grouping as the Python backend: by string form
+        keys = list(map(str, keys))
+        uniques = list(dict.fromkeys(keys))
+    position = {key: index for index, key in enumerate(uniques)}
+    codes = numpy.fromiter(map(position.__getitem__, keys), dtype=numpy.intp, count=len(keys))
+    return uniques, codes
+
+
+def _numpy_aggregate(records, operation, field, group_by):
+    """sum/avg/min/max/count over NumPy columns, optionally grouped"""
+    if operation == "count":
+        names, codes = _group_codes(records, group_by)
+        counts = numpy.bincount(codes, minlength=len(names))
+        return {name: int(count) for name, count in zip(names, counts)}
+
+    values = numericColumn(records, field)
+    valid = ~numpy.isnan(values)
+    skipped = int(numpy.count_nonzero(~valid))
+    if skipped:
+        logger.debug(f"Skipped {skipped} null/non-numeric value(s)")
+
+    if not group_by:
+        values = values[valid]
+        if not values.size:
+            return 0
+        reducer = {"sum": numpy.sum, "avg": numpy.mean, "min": numpy.min, "max": numpy.max}[operation]
+        return float(reducer(values))
+
+    names, codes = _group_codes(records, group_by)
+    # Python backend order: groups by first row with a non-null value,
+    # numeric or not (groups without numeric values are left out below)
+    get = fieldGetter(field)
+    non_null = numpy.fromiter((get(item) is not None for item in records), dtype=bool, count=len(records))
+    first_seen = numpy.full(len(names), len(codes))
+    numpy.minimum.at(first_seen, codes[non_null], numpy.flatnonzero(non_null))
+
+    codes, values = codes[valid], values[valid]
+    present = numpy.bincount(codes, minlength=len(names))
+    ordered = [code for code in numpy.argsort(first_seen, kind="stable").tolist() if present[code]]
+    if not ordered:
+        return {}
+
+    if operation in ("sum", "avg"):
+        totals = numpy.bincount(codes, weights=values, minlength=len(names))
+        if operation == "avg":
+            totals = totals / numpy.maximum(present, 1)
+        return {names[code]: float(totals[code]) for code in ordered}
+
+    reducer = numpy.minimum if operation == "min" else numpy.maximum
+    reduced = numpy.full(len(names), numpy.inf if operation == "min" else -numpy.inf)
+    reducer.at(reduced, codes, values)
+    return {names[code]: float(reduced[code]) for code in ordered}
+
+
+def _numpy_sort_order(records, sort_by, numeric, reverse):
+    """Stable argsort of the records on one key (same ordering as jsonsort)"""
+    if numeric:
+        keys = numericColumn(records, sort_by)
+        keys[numpy.isnan(keys)] = numpy.inf
+        return numpy.argsort(-keys if reverse else keys, kind="stable")
+
+    get = fieldGetter(sort_by)
+    keys = numpy.array(["" if value is None else str(value).lower() for value in map(get, records)])
+    if not reverse:
+        return numpy.argsort(keys, kind="stable")
+    # Descending but stable: sort the reversed array, then flip back
+    last = len(keys) - 1
+    return (last - numpy.argsort(keys[::-1], kind="stable"))[::-1]
+
+
+def _numpy_filter_mask(spec, records, case_sensitive, wallet, columns):
+    """
+    Boolean mask of the records matching a filter expression
+
+    Numeric range predicates (>, <, >=, <=) are evaluated on float
+    columns (read once per field and shared through 'columns'); other
+    predicates run the compiled closure once per record.
+    """
+    if isinstance(spec, list):
+        spec = {"and": spec}
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid filter expression: {spec!r}")
+
+    if "and" in spec or "or" in spec:
+        nodes = spec["and"] if "and" in spec else spec["or"]
+        masks = [_numpy_filter_mask(node, records, case_sensitive, wallet, columns) for node in nodes]
+        if not masks:
+            return numpy.full(len(records), "and" in spec, dtype=bool)
+        combine = numpy.logical_and if "and" in spec else numpy.logical_or
+        return combine.reduce(masks)
+    if "not" in spec:
+        return ~_numpy_filter_mask(spec["not"], records, case_sensitive, wallet, columns)
+
+    field, operator, value = _predicate_parts(spec, wallet)
+    if operator in (">", "<", ">=", "<="):
+        try:
+            target = _to_number(value)
+        except (ValueError, TypeError):
+            target = None
+        if target is not None:
+            if field not in columns:
+                columns[field] = numericColumn(records, field)
+            return _COMPARATORS[operator](columns[field], target)
+
+    predicate = _compile_predicate(spec, case_sensitive, wallet)
+    return numpy.fromiter(map(predicate, records), dtype=bool, count=len(records))
+
+
+# ========================================
+# STREAMING AGGREGATION AND SKETCHES
+# ========================================
+
+AGGREGATION_OPS = ("count", "sum", "avg", "min", "max", "distinct", "percentile", "median")
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value):
+    """64-bit hash of a value (splitmix64 finalizer over hash())"""
+    try:
+        x = hash(value) & _MASK64
+    except TypeError:
+        x = hash(json.dumps(value, sort_keys=True, default=str)) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+class DistinctSketch:
+    """
+    Distinct-value counter with bounded memory
+
+    Counts exactly with a set up to 'limit' values, then switches to a
+    HyperLogLog of 2^precision registers (~1.04/sqrt(2^precision)
+    relative error, 4096 bytes with the default precision 12).
+    """
+
+    def __init__(self, precision=12, limit=None):
+        self.precision = min(16, max(4, int(precision)))
+        self.size = 1 << self.precision
+        self.limit = self.size if limit is None else int(limit)
+        self.values = set()
+        self.registers = None
+
+    def add(self, value):
+        if self.registers is None:
+            try:
+                self.values.add(value)
+            except TypeError:
+                self.values.add(json.dumps(value, sort_keys=True, default=str))
+            if len(self.values) > self.limit:
+                self.registers = bytearray(self.size)
+                for known in self.values:
+                    self._register(known)
+                self.values = None
+        else:
+            self._register(value)
+
+    def _register(self, value):
+        hashed = _mix64(value)
+        bits = 64 - self.precision
+        index = hashed >> bits
+        rank = bits - (hashed & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    @property
+    def exact(self):
+        return self.registers is None
+
+    def count(self):
+        if self.registers is None:
+            return len(self.values)
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+
+class QuantileSketch:
+    """
+    Quantile sketch with bounded memory (KLL-style compactors)
+
+    Exact (linear interpolation) up to 'k' values; beyond that each full
+    level is sorted and every other value promoted with double weight,
+    keeping O(k log(n/k)) values with a rank error around 1/k.
+    """
+
+    def __init__(self, k=256, seed=0):
+        self.k = max(8, int(k))
+        self.levels = [[]]
+        self.count = 0
+        self._random = random.Random(seed)
+
+    def add(self, value):
+        self.levels[0].append(value)
+        self.count += 1
+        if len(self.levels[0]) >= self.k:
+            self._compact()
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels) and len(self.levels[level]) >= self.k:
+            buffer = sorted(self.levels[level])
+            # An odd leftover stays on this level with its own weight
+            self.levels[level] = [buffer.pop()] if len(buffer) % 2 else []
+            if level + 1 == len(self.levels):
+                self.levels.append([])
+            self.levels[level + 1].extend(buffer[self._random.getrandbits(1)::2])
+            level += 1
+
+    @property
+    def exact(self):
+        return len(self.levels) == 1
+
+    def quantile(self, q):
+        """Value at quantile q (0..1), None when empty"""
+        if not self.count:
+            return None
+        q = min(1.0, max(0.0, float(q)))
+        if self.exact:
+            values = sorted(self.levels[0])
+            position = q * (len(values) - 1)
+            lower = int(position)
+            upper = min(lower + 1, len(values) - 1)
+            return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+        weighted = sorted(
+            (value, 1 << level) for level, buffer in enumerate(self.levels) for value in buffer
+        )
+        target = q * sum(weight for _, weight in weighted)
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return weighted[-1][0]
+
+
+class _CountAccumulator:
+    """Rows (no field) or non-null values of a field"""
+
+    def __init__(self, spec):
+        self.get = spec["getter"]
+        self.n = 0
+
+    def add(self, item):
+        if self.get is None or self.get(item) is not None:
+            self.n += 1
+
+    def result(self, spec):
+        return self.n
+
+
+class _NumericAccumulator:
+    """Running count/sum/min/max of a field, shared by sum, avg, min and max"""
+
+    def __init__(self, spec):
+        self.get = spec["getter"]
+        self.n = 0
+        self.total = 0.0
+        self.low = None
+        self.high = None
+        self.skipped = 0
+
+    def add(self, item):
+        value = self.get(item)
+        if value is None:
+            return
+        if type(value) is not float and type(value) is not int:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                self.skipped += 1
+                return
+        if self.n:
+            if value < self.low:
+                self.low = value
+            elif value > self.high:
+                self.high = value
+        else:
+            self.low = self.high = value
+        self.n += 1
+        self.total += value
+
+    def result(self, spec):
+        op = spec["op"]
+        if op == "sum":
+            return self.total
+        if op == "avg":
+            return self.total / self.n if self.n else None
+        return self.low if op == "min" else self.high
+
+
+class _DistinctAccumulator:
+
+    def __init__(self, spec):
+        self.get = spec["getter"]
+        self.sketch = DistinctSketch(spec.get("precision", 12), spec.get("exact_limit"))
+
+    def add(self, item):
+        value = self.get(item)
+        if value is not None:
+            self.sketch.add(value)
+
+    def result(self, spec):
+        return self.sketch.count()
+
+
+class _PercentileAccumulator:
+    """Quantile sketch of a field, shared by all its percentiles"""
+
+    def __init__(self, spec):
+        self.get = spec["getter"]
+        self.sketch = QuantileSketch(spec.get("sketch_size", 256))
+        self.skipped = 0
+
+    def add(self, item):
+        value = self.get(item)
+        if value is None:
+            return
+        try:
+            value = _to_number(value)
+        except (TypeError, ValueError):
+            self.skipped += 1
+            return
+        self.sketch.add(value)
+
+    def result(self, spec):
+        return self.sketch.quantile(spec["q"])
+
+
+_ACCUMULATORS = {
+    "count": _CountAccumulator, "sum": _NumericAccumulator, "avg": _NumericAccumulator,
+    "min": _NumericAccumulator, "max": _NumericAccumulator, "distinct": _DistinctAccumulator,
+    "percentile": _PercentileAccumulator, "median": _PercentileAccumulator
+}
+
+
+def _accumulator_slot(spec):
+    """Aggregations with the same slot share one accumulator per group"""
+    kind = _ACCUMULATORS[spec["op"]]
+    options = (spec.get("precision"), spec.get("exact_limit"), spec.get("sketch_size"))
+    return kind, spec.get("field"), options
+
+
+def _aggregation_specs(aggregations):
+    """Validates aggregations [{op, field, as, ...}] and fills in defaults"""
+    if isinstance(aggregations, dict):
+        aggregations = [aggregations]
+    specs = []
+    for aggregation in aggregations or []:
+        spec = dict(aggregation)
+        op = spec.get("op") or spec.get("operation")
+        if op not in AGGREGATION_OPS:
+            raise ValueError(f"Unsupported aggregation: {op} (supported: {', '.join(AGGREGATION_OPS)})")
+        field = spec.get("field")
+        if op != "count" and not field:
+            raise ValueError(f"Field is required for {op} aggregation")
+        spec["op"] = op
+        if op in ("percentile", "median"):
+            p = 50 if op == "median" else spec.get("p", spec.get("percentile"))
+            if p is None:
+                raise ValueError("Percentile aggregation requires 'p' (0-100)")
+            spec["q"] = float(p) / 100
+            spec.setdefault("as", f"p{float(p):g}_{field}")
+        spec.setdefault("as", f"{op}_{field}" if field else op)
+        specs.append(spec)
+    if not specs:
+        raise ValueError("At least one aggregation is required")
+    aliases = [spec["as"] for spec in specs]
+    if len(set(aliases)) != len(aliases):
+        raise ValueError(f"Duplicate aggregation names: {aliases}")
+    return specs
+
+
+def _legacy_aggregations(operation, field):
+    """The single operation/field form as aggregations for aggregateRecords"""
+    if operation == "group":
+        raise ValueError("Operation 'group' keeps every record in memory: not supported with fromfile")
+    if operation not in ("count", "sum", "avg", "min", "max"):
+        raise ValueError(f"Unsupported operation: {operation}")
+    if operation == "count":
+        return [{"op": "count", "as": "count"}]
+    aggregations = [{"op": operation, "field": field, "as": operation}]
+    if operation != "min":
+        # Shares the accumulator: None when a group has no numeric values
+        aggregations.append({"op": "min", "field": field, "as": "min"})
+    return aggregations
+
+
+def _legacy_result(result, operation, group_by):
+    """
+    aggregateRecords output in the shape of the operation/field form
+
+    {group: value} with group_by (str keys, "null" for a missing key,
+    groups without numeric values left out), otherwise the value (0
+    without numeric values).
+    """
+    if not group_by:
+        value = result[operation]
+        return 0 if value is None else value
+    groups = {}
+    for row in result:
+        if operation == "count" or row["min"] is not None:
+            key = row[group_by]
+            groups["null" if key is None else str(key)] = row[operation]
+    return groups
+
+
+def aggregateRecords(records, aggregations, group_by=None):
+    """
+    Computes several aggregations, grouped by several keys, in one pass
+
+    Only running accumulators are kept per group (count/sum/min/max,
+    distinct and quantile sketches), so 'records' can be any iterable,
+    including a generator over a file.
+
+    Args:
+        records: iterable of dicts (other items are skipped)
+        aggregations: [{op, field, as, p, sketch_size, precision, exact_limit}]
+        group_by: None, a field or a list of fields (dotted paths allowed)
+
+    Returns:
+        tuple (result, rows): one dict per group in order of first
+        appearance (a single dict without group_by), and the number of
+        records aggregated
+    """
+    specs = _aggregation_specs(aggregations)
+    slots = {}
+    for spec in specs:
+        slots.setdefault(_accumulator_slot(spec), spec)
+    slot_specs = [dict(spec, getter=fieldGetter(spec["field"]) if spec.get("field") else None)
+                  for spec in slots.values()]
+    slot_index = {slot: index for index, slot in enumerate(slots)}
+    outputs = [(spec["as"], slot_index[_accumulator_slot(spec)], spec) for spec in specs]
+
+    if isinstance(group_by, str):
+        group_by = [group_by]
+    group_by = list(group_by or [])
+    key_getters = [fieldGetter(key) for key in group_by]
+    if len(key_getters) == 1:
+        get_key = key_getters[0]
+        key_of = lambda item: (get_key(item),)
+    else:
+        key_of = lambda item: tuple([get(item) for get in key_getters])
+
+    def new_group():
+        return [_ACCUMULATORS[spec["op"]](spec) for spec in slot_specs]
+
+    groups = {}
+    rows = 0
+    for item in records:
+        if not isinstance(item, dict):
+            continue
+        rows += 1
+        key = key_of(item)
+        try:
+            accumulators = groups.get(key)
+        except TypeError:
+            # Unhashable group values (objects/lists): group by their JSON form
+            key = tuple(json.dumps(value, sort_keys=True, default=str) for value in key)
+            accumulators = groups.get(key)
+        if accumulators is None:
+            accumulators = groups[key] = new_group()
+        for accumulator in accumulators:
+            accumulator.add(item)
+
+    skipped = sum(getattr(acc, "skipped", 0) for accumulators in groups.values() for acc in accumulators)
+    if skipped:
+        logger.warning(f"Skipped {skipped} non-numeric value(s)")
+
+    if not group_by:
+        accumulators = groups.get(()) or new_group()
+        return {name: accumulators[index].result(spec) for name, index, spec in outputs}, rows
+
+    result = []
+    for key, accumulators in groups.items():
+        row = dict(zip(group_by, key))
+        row.update((name, accumulators[index].result(spec)) for name, index, spec in outputs)
+        result.append(row)
+    return result, rows
+
+
+# ========================================
+# HASH JOIN
+# ========================================
+
+JOIN_TYPES = ("inner", "left", "right", "outer")
+
+# Output keys of other oa-json / oa-pg / oa-network tasks holding record lists
+_RECORD_KEYS = ("joined", "filtered", "sorted", "transformed", "extracted", "rows", "json", "data", "items", "result")
+
+
+def _row_stream(value):
+    """The streamed rows of a previous task (e.g. oa-pg select with stream: true), or None"""
+    if isinstance(value, dict):
+        value = value.get("rows")
+    return value if callable(getattr(value, "iterrows", None)) else None
+
+
+def _as_records(value, label):
+    """Record list from a list, a JSON string or a previous task output"""
+    if isinstance(value, str):
+        value = json.loads(value)
+    rows = _row_stream(value)
+    if rows is not None:
+        value = list(rows.iterrows())
+    if isinstance(value, dict):
+        for key in _RECORD_KEYS:
+            if isinstance(value.get(key), list):
+                value = value[key]
+                break
+    if not isinstance(value, list):
+        raise ValueError(f"{label} must be an array of objects")
+    return [item for item in value if isinstance(item, dict)]
+
+
+def _join_key_function(keys):
+    """
+    Returns item -> join key (the value for one key, a tuple for several)
+
+    Records with a null or missing key part get None and never match.
+    """
+    getters = [fieldGetter(key) for key in keys]
+    if len(getters) == 1:
+        return getters[0]
+
+    def key_of(item):
+        key = tuple([get(item) for get in getters])
+        return None if None in key else key
+    return key_of
+
+
+def _hashable_key(key):
+    return json.dumps(key, sort_keys=True, default=str)
+
+
+class JoinIndex:
+    """Hash index of a record list on one or more keys: key -> record positions"""
+
+    def __init__(self, records, keys):
+        self.records = records
+        self.keys = list(keys)
+        self.index = {}
+        key_of = _join_key_function(self.keys)
+        for position, item in enumerate(records):
+            key = key_of(item)
+            if key is None:
+                continue
+            try:
+                positions = self.index.get(key)
+            except TypeError:
+                key = _hashable_key(key)
+                positions = self.index.get(key)
+            if positions is None:
+                self.index[key] = [position]
+            else:
+                positions.append(position)
+
+    def lookup(self, key):
+        try:
+            return self.index.get(key, ())
+        except TypeError:
+            return self.index.get(_hashable_key(key), ())
+
+    def __repr__(self):
+        return f"<JoinIndex on {self.keys}: {len(self.index)} keys, {len(self.records)} records>"
+
+
+def joinRecords(left, right, left_on, right_on=None, how="inner", suffix="_right", right_index=None):
+    """
+    Hash join of two record lists
+
+    The index is built on the smaller side (or 'right_index' is reused)
+    and probed once per record of the other side: O(n + m). Output rows
+    follow the left order; with 'right'/'outer' the unmatched right
+    records follow at the end.
+
+    Args:
+        left, right: lists of dicts
+        left_on, right_on: key fields (dotted paths allowed); right_on defaults to left_on
+        how: inner, left, right or outer
+        suffix: appended to right fields that collide with left fields
+        right_index: optional JoinIndex of 'right' on right_on
+
+    Returns:
+        tuple (rows, stats)
+    """
+    if how not in JOIN_TYPES:
+        raise ValueError(f"Unsupported join type: {how} (supported: {', '.join(JOIN_TYPES)})")
+    right_on = list(right_on or left_on)
+    left_on = list(left_on)
+    if not left_on or len(left_on) != len(right_on):
+        raise ValueError(f"Join keys mismatch: {left_on} / {right_on}")
+
+    matches = [None] * len(left)
+    if right_index is not None or len(right) <= len(left):
+        index = right_index or JoinIndex(right, right_on)
+        side = "right"
+        left_key = _join_key_function(left_on)
+        for position, item in enumerate(left):
+            key = left_key(item)
+            if key is not None:
+                matches[position] = index.lookup(key)
+    else:
+        index = JoinIndex(left, left_on)
+        side = "left"
+        right_key = _join_key_function(right_on)
+        for right_position, item in enumerate(right):
+            key = right_key(item)
+            if key is None:
+                continue
+            for position in index.lookup(key):
+                if matches[position] is None:
+                    matches[position] = []
+                matches[position].append(right_position)
+
+    # Same-named key fields are not repeated from the right side
+    shared_keys = {right_key for left_key, right_key in zip(left_on, right_on) if left_key == right_key}
+
+    def merge(left_item, right_item):
+        row = dict(left_item)
+        for key, value in right_item.items():
+            if key in shared_keys:
+                continue
+            row[key + suffix if key in left_item else key] = value
+        return row
+
+    joined = []
+    matched_left = 0
+    matched_right = set() if how in ("right", "outer") else None
+    for position, item in enumerate(left):
+        found = matches[position]
+        if found:
+            matched_left += 1
+            for right_position in found:
+                joined.append(merge(item, right[right_position]))
+            if matched_right is not None:
+                matched_right.update(found)
+        elif how in ("left", "outer"):
+            joined.append(dict(item))
+
+    if matched_right is not None:
+        joined.extend(dict(item) for position, item in enumerate(right) if position not in matched_right)
+
+    stats = {"index_side": side, "index_keys": len(index.index), "matched_left": matched_left}
+    return joined, stats
+
+
+def _join_index_registry(param):
+    """Join indexes persisted in the workflow context (None without a context)"""
+    context = param.get("workflow_context")
+    if context is None or not hasattr(context, "get_global"):
+        return None
+    registry = context.get_global("_json_join_indexes")
+    if registry is None:
+        registry = {}
+        context.set_global("_json_join_indexes", registry)
+    return registry
+
+
+# ========================================
+# MULTI-KEY / TOP-K SORT
+# ========================================
+
+_INF = float("inf")
+
+
+class _Descending:
+    """Sort key component with inverted ordering (descending strings in mixed sorts)"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _float_or_inf(value):
+    if type(value) is not int and type(value) is not float:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return _INF
+    # NaN ("nan") does not compare: sorted last, as in _numpy_sort_order
+    return _INF if value != value else value
+
+
+def _sort_specs(sort_by, reverse=False, numeric=None):
+    """
+    Normalizes sort_by into [{field, reverse, numeric}]
+
+    Accepts a field, "-field" (descending), a comma-separated string, or a
+    list of those and/or {field, order: asc|desc, numeric} dicts. 'reverse'
+    flips every key.
+    """
+    if isinstance(sort_by, str):
+        sort_by = [part.strip() for part in sort_by.split(",") if part.strip()]
+    elif isinstance(sort_by, dict):
+        sort_by = [sort_by]
+    specs = []
+    for key in sort_by or []:
+        if isinstance(key, dict):
+            field = key.get("field")
+            descending = str(key.get("order", "asc")).lower() == "desc" or bool(key.get("reverse", False))
+            key_numeric = key.get("numeric", numeric)
+        else:
+            field = str(key)
+            descending = field.startswith("-")
+            field = field.lstrip("-")
+            key_numeric = numeric
+        if not field:
+            raise ValueError(f"Invalid sort key: {key!r}")
+        specs.append({"field": field, "reverse": descending != bool(reverse), "numeric": key_numeric})
+    if not specs:
+        raise ValueError("sort_by requires at least one field")
+    return specs
+
+
+def _is_numeric(values):
+    """True when there are values and every non-null one is a number or a numeric string"""
+    present = False
+    for value in values:
+        if value is None:
+            continue
+        if type(value) is not int and type(value) is not float:
+            if not isinstance(value, str):
+                return False
+            try:
+                float(value)
+            except ValueError:
+                return False
+        present = True
+    return present
+
+
+def _sort_column(records, spec, descending):
+    """
+    Decorated key of every record for one sort key (computed once)
+
+    Numeric keys: float, missing/non-numeric last (inf); otherwise
+    lowercased strings, missing first (""). Auto-detection is numeric when
+    every non-null value is a number or a numeric string ("25").
+    'descending' negates numbers and wraps strings, for sorts mixing
+    directions.
+    """
+    get = fieldGetter(spec["field"])
+    try:
+        values = list(map(get, records))
+    except AttributeError:
+        values = [get(item) if isinstance(item, dict) else None for item in records]
+    numeric = spec["numeric"]
+    if numeric is None:
+        numeric = _is_numeric(values)
+
+    if numeric:
+        column = [_INF if value is None else _float_or_inf(value) for value in values]
+        if descending:
+            column = [-value for value in column]
+    else:
+        column = ["" if value is None else str(value).lower() for value in values]
+        if descending:
+            column = [_Descending(value) for value in column]
+    return column, numeric
+
+
+def sortOrder(records, specs, limit=None):
+    """
+    Stable multi-key sort order of 'records', optionally only the first 'limit'
+
+    Keys are decorated once per record; with a limit smaller than the
+    input a heap-based partial sort (O(n log k)) replaces the full sort.
+
+    Returns:
+        tuple (positions, numeric flags per key)
+    """
+    n = len(records)
+    uniform = len({spec["reverse"] for spec in specs}) == 1
+    reverse = specs[0]["reverse"] if uniform else False
+
+    columns, numeric = [], []
+    for spec in specs:
+        column, is_numeric = _sort_column(records, spec, spec["reverse"] and not uniform)
+        columns.append(column)
+        numeric.append(is_numeric)
+    keys = columns[0] if len(columns) == 1 else list(zip(*columns))
+
+    if limit is not None and limit < n:
+        select = heapq.nlargest if reverse else heapq.nsmallest
+        positions = select(max(0, limit), range(n), key=keys.__getitem__)
+    else:
+        positions = sorted(range(n), key=keys.__getitem__, reverse=reverse)
+    return positions, numeric
+
+
+# ========================================
+# STREAMING FILE INPUT / OUTPUT
+# ========================================
+
+class _CountingIterator:
+    """Iterator wrapper counting the items consumed from a stream"""
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = next(self._iterator)
+        self.count += 1
+        return item
+
+
+def _stream_source(param, wallet):
+    """
+    Records of 'fromfile' or of a streamed input read one at a time, or None
+
+    The file is a top-level JSON array (or a single value) or JSON Lines
+    (.jsonl/.ndjson, optionally .gz); 'fromformat' overrides the extension.
+    A lazy row stream in 'input' (oa-pg select with stream: true) is
+    iterated once, so the query runs a single time for this task.
+    """
+    if oacommon.checkparam("fromfile", param):
+        path = oacommon.get_param(param, "fromfile", wallet)
+        logger.info(f"Streaming records from {path}")
+        return _CountingIterator(oacommon.iter_json_records(path, param.get("fromformat")))
+
+    rows = _row_stream(param.get("input")) if "data" not in param else None
+    if rows is None:
+        return None
+    logger.info(f"Streaming records from previous task: {rows!r}")
+    return _CountingIterator(rows.iterrows())
+
+
+def _emit(param, wallet, items):
+    """
+    Collects the results, or writes them one at a time to 'tofile'
+
+    Returns:
+        tuple (list of items or None when written to file, count, file path)
+    """
+    if not oacommon.checkparam("tofile", param):
+        items = list(items)
+        return items, len(items), None
+
+    path = oacommon.get_param(param, "tofile", wallet)
+    with oacommon.JsonRecordWriter(path, param.get("toformat")) as writer:
+        for item in items:
+            writer.write(item)
+    logger.info(f"Written {writer.count} record(s) to {path}")
+    return None, writer.count, path
+
+
+# ========================================
+# SCHEMA VALIDATION
+# ========================================
+
+# Compiled validators by schema hash (the oldest is dropped beyond this size)
+SCHEMA_CACHE_SIZE = 128
+_schema_cache = {}
+
+# Keywords checked by the pure-Python fast path (title/description are annotations)
+_SIMPLE_SCHEMA_KEYWORDS = {"type", "required", "properties", "items", "$schema", "$id", "title", "description"}
+
+_JSON_TYPES = {
+    "object": lambda value: isinstance(value, dict),
+    "array": lambda value: isinstance(value, list),
+    "string": lambda value: isinstance(value, str),
+    "boolean": lambda value: isinstance(value, bool),
+    "null": lambda value: value is None,
+    "number": lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    # As in current JSON Schema drafts, 1.0 is an integer
+    "integer": lambda value: (isinstance(value, int) and not isinstance(value, bool))
+                             or (isinstance(value, float) and value.is_integer()),
+}
+
+
+def _schema_error(message, path, validator):
+    return {"message": message, "path": path, "validator": validator}
+
+
+# Drafts where 1.0 is not an integer: left to jsonschema
+_LEGACY_SCHEMA_DRAFTS = ("draft-03", "draft-04")
+
+
+def _is_simple_schema(schema):
+    """True if 'schema' only uses type/required/properties/items"""
+    if not isinstance(schema, dict) or not set(schema) <= _SIMPLE_SCHEMA_KEYWORDS:
+        return False
+    if any(draft in str(schema.get("$schema", "")) for draft in _LEGACY_SCHEMA_DRAFTS):
+        return False
+    types = schema.get("type", [])
+    types = [types] if isinstance(types, str) else types
+    if not isinstance(types, list) or not all(name in _JSON_TYPES for name in types):
+        return False
+    required = schema.get("required", [])
+    if not isinstance(required, list) or not all(isinstance(name, str) for name in required):
+        return False
+    properties = schema.get("properties", {})
+    if not isinstance(properties, dict) or not all(map(_is_simple_schema, properties.values())):
+        return False
+    return "items" not in schema or _is_simple_schema(schema["items"])
+
+
+def _compile_simple_schema(schema):
+    """Checker of a simple schema: check(instance, path, errors)"""
+    types = schema.get("type", [])
+    types = [types] if isinstance(types, str) else types
+    type_checks = [_JSON_TYPES[name] for name in types]
+    type_label = ", ".join(repr(name) for name in types)
+    required = schema.get("required", [])
+    properties = [(name, _compile_simple_schema(sub)) for name, sub in schema.get("properties", {}).items()]
+    check_item = _compile_simple_schema(schema["items"]) if "items" in schema else None
+
+    def check(instance, path, errors):
+        if type_checks and not any(is_type(instance) for is_type in type_checks):
+            errors.append(_schema_error(f"{instance!r} is not of type {type_label}", path, "type"))
+        if isinstance(instance, dict):
+            for name in required:
+                if name not in instance:
+                    errors.append(_schema_error(f"{name!r} is a required property", path, "required"))
+            for name, check_property in properties:
+                if name in instance:
+                    check_property(instance[name], path + [name], errors)
+        elif check_item is not None and isinstance(instance, list):
+            for index, item in enumerate(instance):
+                check_item(item, path + [index], errors)
+
+    return check
+
+
+def _simple_validator(schema):
+    check = _compile_simple_schema(schema)
+
+    def validate(instance):
+        errors = []
+        check(instance, [], errors)
+        return errors
+
+    return validate
+
+
+def _jsonschema_validator(schema):
+    if importlib.util.find_spec("jsonschema") is None:
+        raise ImportError("jsonschema library not installed. Run: pip install jsonschema")
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    compiled = validator_class(schema)
+
+    def validate(instance):
+        return [_schema_error(error.message, list(error.absolute_path), error.validator)
+                for error in compiled.iter_errors(instance)]
+
+    return validate
+
+
+def schemaValidator(schema):
+    """
+    Compiled validator for 'schema', cached by schema hash
+
+    Schemas using only type/required/properties/items are checked in pure
+    Python; any other keyword needs jsonschema (the validator class for the
+    schema's draft, with the schema itself checked once when compiled).
+
+    Returns:
+        tuple (validate(instance) -> list of {message, path, validator}, backend)
+    """
+    key = hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    cached = _schema_cache.get(key)
+    if cached is None:
+        if _is_simple_schema(schema):
+            cached = (_simple_validator(schema), "python")
+        else:
+            cached = (_jsonschema_validator(schema), "jsonschema")
+        if len(_schema_cache) >= SCHEMA_CACHE_SIZE:
+            _schema_cache.pop(next(iter(_schema_cache)))
+        _schema_cache[key] = cached
+    return cached
 
 @oacommon.trace
 def jsonfilter(self, param):
@@ -31,15 +1332,26 @@ def jsonfilter(self, param):
     Args:
         param (dict) with:
             - data: optional JSON data (can use input from previous task)
-            - field: field to filter on - supports {WALLET:key}, {ENV:var}
-            - operator: ==, !=, >, <, >=, <=, contains, in, exists, not_exists
+            - where: optional filter expression (see compileFilter): predicates
+              combined with and/or/not, dotted paths for nested fields
+            - field: field to filter on (single predicate form) - supports {WALLET:key}, {ENV:var}
+            - operator: ==, !=, >, <, >=, <=, contains, not_contains, startswith,
+              endswith, regex, in, not_in, exists, not_exists
             - value: comparison value - supports {WALLET:key}, {ENV:var}
             - case_sensitive: optional (default: True)
-            - saveonvar: optional save result to variable
+            - backend: optional auto, python or numpy (default: auto = NumPy columns
+              from NUMPY_MIN_ROWS items when NumPy is installed)
+            - fromfile: optional JSON array or JSON Lines file streamed one record at
+              a time instead of data/input (.jsonl/.ndjson = JSON Lines, .gz supported)
+            - fromformat: optional json or jsonl (default: from the file extension)
+            - tofile: optional file the matches are written to incrementally
+              (output 'filtered' is then None and 'file' holds the path)
+            - toformat: optional json or jsonl (default: from the file extension)
+            - saveonvar: optional save result to variable (the file path with tofile)
             - input: optional data from previous task
-            - workflowcontext: optional workflow context
-            - taskid: optional unique task id
-            - taskstore: optional TaskResultStore instance
+            - workflow_context: optional workflow context
+            - task_id: optional unique task id
+            - task_store: optional TaskResultStore instance
 
     Returns:
         tuple (success, filtered_data)
@@ -91,164 +1403,161 @@ def jsonfilter(self, param):
           field: category
           operator: "=="
           value: "{WALLET:target_category}"
+
+        # Several conditions in a single pass (compiled once)
+        - name: filter_orders
+          module: oa-json
+          function: jsonfilter
+          where:
+            and:
+              - {field: status, operator: "==", value: "paid"}
+              - {field: total, operator: ">=", value: 100}
+              - or:
+                  - {field: customer.address.country, operator: in, value: [IT, FR, DE]}
+                  - not: {field: customer.vip, operator: exists}
+
+        # Multi-GB export: stream the file, write the matches as they are found
+        - name: filter_export
+          module: oa-json
+          function: jsonfilter
+          fromfile: /data/export/orders.jsonl
+          where: {field: status, operator: "==", value: "failed"}
+          tofile: /data/export/failed_orders.jsonl
     """
-    funcname = myself()
+    func_name = myself()
     logger.info("JSON Filter operation")
 
-    taskid = param.get("taskid")
-    taskstore = param.get("taskstore")
-    tasksuccess = True
-    errormsg = ""
-    outputdata = None
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
 
     try:
-        wallet = gdict.get("wallet")
+        wallet = gdict.get("_wallet")
 
-        # Data propagation: retrieve JSON data
+        # Data propagation: stream from file or retrieve JSON data
+        stream = _stream_source(param, wallet)
         data = None
-        if "data" in param:
+        if stream is not None:
+            data = stream
+        elif "data" in param:
             data = param["data"]
             # If it's JSON string, parse it
             if isinstance(data, str):
                 data = json.loads(data)
         elif "input" in param:
-            previnput = param.get("input")
-            if isinstance(previnput, dict):
+            prev_input = param.get("input")
+            if isinstance(prev_input, dict):
                 # Look for common fields
-                if "json" in previnput:
-                    data = previnput["json"]
-                elif "data" in previnput:
-                    data = previnput["data"]
-                elif "rows" in previnput:
-                    data = previnput["rows"]
-                elif "content" in previnput:
+                if "json" in prev_input:
+                    data = prev_input["json"]
+                elif "filtered" in prev_input:
+                    data = prev_input["filtered"]
+                elif "data" in prev_input:
+                    data = prev_input["data"]
+                elif "rows" in prev_input:
+                    data = prev_input["rows"]
+                elif "content" in prev_input:
                     # Might be JSON string
-                    content = previnput["content"]
+                    content = prev_input["content"]
                     if isinstance(content, str):
                         data = json.loads(content)
                     else:
                         data = content
                 else:
                     # Use all input
-                    data = previnput
-            elif isinstance(previnput, list):
-                data = previnput
-            elif isinstance(previnput, str):
-                data = json.loads(previnput)
+                    data = prev_input
+            elif isinstance(prev_input, list):
+                data = prev_input
+            elif isinstance(prev_input, str):
+                data = json.loads(prev_input)
 
             logger.info("Using data from previous task")
 
         if data is None:
             raise ValueError("No data to filter: provide 'data' or pipe from previous task")
 
-        if not isinstance(data, list):
+        if stream is None and not isinstance(data, list):
             raise ValueError("Filter operation requires array/list data")
 
-        # Validate parameters
-        requiredparams = ["field", "operator", "value"]
-        if not oacommon.checkandloadparam(self, myself, requiredparams, param=param):
-            raise ValueError(f"Missing required parameters for {funcname}")
-
-        # Extract parameters with placeholder support
-        field = oacommon.getparam(param, "field", wallet) or gdict.get("field")
-        operator = oacommon.getparam(param, "operator", wallet) or gdict.get("operator")
-        value = oacommon.getparam(param, "value", wallet)
-        if value is None:
-            value = param.get("value")
-
         case_sensitive = param.get("case_sensitive", True)
 
-        logger.info(f"Filter: {field} {operator} {value}")
-        logger.debug(f"Input data: {len(data)} items")
-
-        # Apply filter
-        filtered = []
-
-        for item in data:
-            if not isinstance(item, dict):
-                logger.warning(f"Skipping non-dict item: {type(item)}")
-                continue
-
-            item_value = item.get(field)
-
-            # Convert for case-insensitive comparison if needed
-            if not case_sensitive and isinstance(item_value, str) and isinstance(value, str):
-                item_value = item_value.lower()
-                compare_value = value.lower()
-            else:
-                compare_value = value
-
-            # Apply operator
-            match = False
-
-            try:
-                if operator == "==":
-                    match = item_value == compare_value
-                elif operator == "!=":
-                    match = item_value != compare_value
-                elif operator == ">":
-                    match = float(item_value) > float(compare_value)
-                elif operator == "<":
-                    match = float(item_value) < float(compare_value)
-                elif operator == ">=":
-                    match = float(item_value) >= float(compare_value)
-                elif operator == "<=":
-                    match = float(item_value) <= float(compare_value)
-                elif operator == "contains":
-                    match = compare_value in str(item_value)
-                elif operator == "in":
-                    # value must be a list
-                    if isinstance(compare_value, str):
-                        compare_value = json.loads(compare_value)
-                    match = item_value in compare_value
-                elif operator == "exists":
-                    match = field in item
-                elif operator == "not_exists":
-                    match = field not in item
-                else:
-                    raise ValueError(f"Unsupported operator: {operator}")
+        if "where" in param:
+            spec = param["where"]
+            if isinstance(spec, str):
+                spec = json.loads(spec)
+            filter_info = {"where": spec}
+            logger.info(f"Filter expression: {spec}")
+        else:
+            # Single predicate form: field operator value
+            required_params = ["field", "operator"]
+            if not oacommon.checkandloadparam(self, myself, *required_params, param=param):
+                raise ValueError(f"Missing required parameters for {func_name}: 'where' or 'field'/'operator'")
+            spec = {key: param[key] for key in ("field", "operator", "value") if key in param}
+            filter_info = {
+                "field": oacommon.get_param(param, "field", wallet),
+                "operator": oacommon.get_param(param, "operator", wallet),
+                "value": oacommon.get_param(param, "value", wallet) if "value" in param else None
+            }
+            logger.info(f"Filter: {filter_info['field']} {filter_info['operator']} {filter_info['value']}")
+
+        if stream is None:
+            logger.debug(f"Input data: {len(data)} items")
+
+        # A stream is filtered record by record: columns would need the whole file
+        backend = "numpy" if stream is None and _use_numpy(param.get("backend"), len(data)) else "python"
+        if backend == "numpy":
+            records = [item for item in data if isinstance(item, dict)]
+            mask = _numpy_filter_mask(spec, records, case_sensitive, wallet, {})
+            filtered = [records[index] for index in numpy.flatnonzero(mask).tolist()]
+            skipped = len(data) - len(records)
+        else:
+            predicate = compileFilter(spec, case_sensitive, wallet)
+            filtered = (item for item in data if isinstance(item, dict) and predicate(item))
+            skipped = None
 
-                if match:
-                    filtered.append(item)
+        filtered, count, tofile = _emit(param, wallet, filtered)
+        original_count = stream.count if stream is not None else len(data)
 
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Comparison error for item {item}: {e}")
-                continue
+        if skipped is None and stream is None and count < original_count:
+            skipped = sum(1 for item in data if not isinstance(item, dict))
+        if skipped:
+            logger.warning(f"Skipped {skipped} non-dict item(s)")
 
-        logger.info(f"Filtered: {len(data)} -> {len(filtered)} items")
+        logger.info(f"Filtered: {original_count} -> {count} items")
 
         # Save to variable if requested
         if oacommon.checkparam("saveonvar", param):
             saveonvar = param["saveonvar"]
-            gdict[saveonvar] = filtered
+            gdict[saveonvar] = filtered if tofile is None else tofile
             logger.debug(f"Result saved to variable {saveonvar}")
 
-        outputdata = {
+        output_data = {
             "filtered": filtered,
-            "count": len(filtered),
-            "original_count": len(data),
-            "filter": {
-                "field": field,
-                "operator": operator,
-                "value": value
-            }
+            "count": count,
+            "original_count": original_count,
+            "filter": filter_info,
+            "backend": backend
         }
+        if tofile:
+            output_data["file"] = tofile
 
     except json.JSONDecodeError as e:
-        tasksuccess = False
-        errormsg = f"Invalid JSON: {str(e)}"
-        logger.error(errormsg)
+        task_success = False
+        error_msg = f"Invalid JSON: {str(e)}"
+        logger.error(error_msg)
 
     except Exception as e:
-        tasksuccess = False
-        errormsg = str(e)
+        task_success = False
+        error_msg = str(e)
         logger.error(f"JSON filter failed: {e}", exc_info=True)
 
     finally:
-        if taskstore and taskid:
-            taskstore.setresult(taskid, tasksuccess, errormsg)
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
 
-    return tasksuccess, outputdata
+    return task_success, output_data
 
 @oacommon.trace
 def jsonextract(self, param):
@@ -261,9 +1570,13 @@ def jsonextract(self, param):
             - fields: list of fields to extract - supports {WALLET:key}, {ENV:var}
             - flatten: optional flatten nested objects (default: False)
             - keep_nulls: optional keep null fields (default: False)
-            - saveonvar: optional save result
+            - fromfile: optional JSON array or JSON Lines file streamed one record at a time
+            - fromformat: optional json or jsonl (default: from the file extension)
+            - tofile: optional file the extracted records are written to incrementally
+            - toformat: optional json or jsonl (default: from the file extension)
+            - saveonvar: optional save result (the file path with tofile)
             - input: optional data from previous task
-            - taskid, taskstore, workflowcontext
+            - task_id, task_store, workflow_context
 
     Returns:
         tuple (success, extracted_data)
@@ -312,40 +1625,51 @@ def jsonextract(self, param):
             - name
             - optional_field
           keep_nulls: true
+
+        # Project a large JSON Lines file without loading it
+        - name: extract_ids
+          module: oa-json
+          function: jsonextract
+          fromfile: /data/export/users.jsonl.gz
+          fields: "id,email"
+          tofile: /data/export/user_emails.json
     """
-    funcname = myself()
+    func_name = myself()
     logger.info("JSON Extract operation")
 
-    taskid = param.get("taskid")
-    taskstore = param.get("taskstore")
-    tasksuccess = True
-    errormsg = ""
-    outputdata = None
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
 
     try:
-        wallet = gdict.get("wallet")
+        wallet = gdict.get("_wallet")
 
-        # Data propagation
+        # Data propagation: stream from file or retrieve JSON data
+        stream = _stream_source(param, wallet)
         data = None
-        if "data" in param:
+        if stream is not None:
+            data = stream
+        elif "data" in param:
             data = param["data"]
             if isinstance(data, str):
                 data = json.loads(data)
         elif "input" in param:
-            previnput = param.get("input")
-            if isinstance(previnput, dict):
-                if "json" in previnput:
-                    data = previnput["json"]
-                elif "filtered" in previnput:
-                    data = previnput["filtered"]
-                elif "data" in previnput:
-                    data = previnput["data"]
+            prev_input = param.get("input")
+            if isinstance(prev_input, dict):
+                if "json" in prev_input:
+                    data = prev_input["json"]
+                elif "filtered" in prev_input:
+                    data = prev_input["filtered"]
+                elif "data" in prev_input:
+                    data = prev_input["data"]
                 else:
-                    data = previnput
-            elif isinstance(previnput, list):
-                data = previnput
-            elif isinstance(previnput, str):
-                data = json.loads(previnput)
+                    data = prev_input
+            elif isinstance(prev_input, list):
+                data = prev_input
+            elif isinstance(prev_input, str):
+                data = json.loads(prev_input)
 
             logger.info("Using data from previous task")
 
@@ -353,15 +1677,15 @@ def jsonextract(self, param):
             raise ValueError("No data to extract from")
 
         # Validate parameters
-        if not oacommon.checkandloadparam(self, myself, ["fields"], param=param):
-            raise ValueError(f"Missing required parameter 'fields' for {funcname}")
+        if not oacommon.checkandloadparam(self, myself, "fields", param=param):
+            raise ValueError(f"Missing required parameter 'fields' for {func_name}")
 
         fields = param.get("fields")
 
         # Support comma-separated string
         if isinstance(fields, str):
             # Resolve placeholder if present
-            fields = oacommon.getparam(param, "fields", wallet) or fields
+            fields = oacommon.get_param(param, "fields", wallet) or fields
             fields = [f.strip() for f in fields.split(",")]
 
         flatten = param.get("flatten", False)
@@ -370,17 +1694,14 @@ def jsonextract(self, param):
         logger.info(f"Extracting fields: {fields}")
         logger.debug(f"Flatten: {flatten}, Keep nulls: {keep_nulls}")
 
-        # Extract fields
-        extracted = None
-
-        if isinstance(data, dict):
-            # Single object
+        def extract_item(item):
+            """Extract the fields of a single object"""
             result = {}
             for field in fields:
                 # Support dot notation for nested fields
                 if "." in field and flatten:
                     parts = field.split(".")
-                    value = data
+                    value = item
                     for part in parts:
                         if isinstance(value, dict):
                             value = value.get(part)
@@ -388,40 +1709,25 @@ def jsonextract(self, param):
                             value = None
                             break
                 else:
-                    value = data.get(field)
+                    value = item.get(field)
 
                 if value is not None or keep_nulls:
                     result[field] = value
+            return result
 
-            extracted = result
-
-        elif isinstance(data, list):
-            # Array of objects
-            results = []
-            for item in data:
-                if not isinstance(item, dict):
-                    continue
-
-                result = {}
-                for field in fields:
-                    if "." in field and flatten:
-                        parts = field.split(".")
-                        value = item
-                        for part in parts:
-                            if isinstance(value, dict):
-                                value = value.get(part)
-                            else:
-                                value = None
-                                break
-                    else:
-                        value = item.get(field)
-
-                    if value is not None or keep_nulls:
-                        result[field] = value
+        # Extract fields
+        tofile = None
 
-                results.append(result)
+        if isinstance(data, dict):
+            # Single object
+            extracted = extract_item(data)
+            count = 1
 
-            extracted = results
+        elif stream is not None or isinstance(data, list):
+            # Array of objects (or a stream of them)
+            extracted, count, tofile = _emit(
+                param, wallet, (extract_item(item) for item in data if isinstance(item, dict))
+            )
 
         else:
             raise ValueError(f"Unsupported data type: {type(data)}")
@@ -431,25 +1737,27 @@ def jsonextract(self, param):
         # Save to variable
         if oacommon.checkparam("saveonvar", param):
             saveonvar = param["saveonvar"]
-            gdict[saveonvar] = extracted
+            gdict[saveonvar] = extracted if tofile is None else tofile
             logger.debug(f"Result saved to variable {saveonvar}")
 
-        outputdata = {
+        output_data = {
             "extracted": extracted,
             "fields": fields,
-            "count": len(extracted) if isinstance(extracted, list) else 1
+            "count": count
         }
+        if tofile:
+            output_data["file"] = tofile
 
     except Exception as e:
-        tasksuccess = False
-        errormsg = str(e)
+        task_success = False
+        error_msg = str(e)
         logger.error(f"JSON extract failed: {e}", exc_info=True)
 
     finally:
-        if taskstore and taskid:
-            taskstore.setresult(taskid, tasksuccess, errormsg)
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
 
-    return tasksuccess, outputdata
+    return task_success, output_data
 
 @oacommon.trace
 def jsontransform(self, param):
@@ -463,7 +1771,11 @@ def jsontransform(self, param):
             - functions: optional dict with custom functions
             - add_fields: optional dict with new static fields
             - remove_fields: optional list of fields to remove
-            - saveonvar: optional
+            - fromfile: optional JSON array or JSON Lines file streamed one record at a time
+            - fromformat: optional json or jsonl (default: from the file extension)
+            - tofile: optional file the transformed records are written to incrementally
+            - toformat: optional json or jsonl (default: from the file extension)
+            - saveonvar: optional (the file path with tofile)
             - input: optional data from previous task
 
     Returns:
@@ -526,40 +1838,52 @@ def jsontransform(self, param):
             status: "active"
           remove_fields:
             - first_name
+
+        # Convert a large JSON array export to JSON Lines while transforming it
+        - name: transform_export
+          module: oa-json
+          function: jsontransform
+          fromfile: /data/export/customers.json
+          mapping:
+            email: "lower:email"
+          tofile: /data/export/customers.jsonl
     """
-    funcname = myself()
+    func_name = myself()
     logger.info("JSON Transform operation")
 
-    taskid = param.get("taskid")
-    taskstore = param.get("taskstore")
-    tasksuccess = True
-    errormsg = ""
-    outputdata = None
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
 
     try:
-        wallet = gdict.get("wallet")
+        wallet = gdict.get("_wallet")
 
-        # Data propagation
+        # Data propagation: stream from file or retrieve JSON data
+        stream = _stream_source(param, wallet)
         data = None
-        if "data" in param:
+        if stream is not None:
+            data = stream
+        elif "data" in param:
             data = param["data"]
             if isinstance(data, str):
                 data = json.loads(data)
         elif "input" in param:
-            previnput = param.get("input")
-            if isinstance(previnput, dict):
-                if "extracted" in previnput:
-                    data = previnput["extracted"]
-                elif "filtered" in previnput:
-                    data = previnput["filtered"]
-                elif "json" in previnput:
-                    data = previnput["json"]
+            prev_input = param.get("input")
+            if isinstance(prev_input, dict):
+                if "extracted" in prev_input:
+                    data = prev_input["extracted"]
+                elif "filtered" in prev_input:
+                    data = prev_input["filtered"]
+                elif "json" in prev_input:
+                    data = prev_input["json"]
                 else:
-                    data = previnput
-            elif isinstance(previnput, list):
-                data = previnput
-            elif isinstance(previnput, str):
-                data = json.loads(previnput)
+                    data = prev_input
+            elif isinstance(prev_input, list):
+                data = prev_input
+            elif isinstance(prev_input, str):
+                data = json.loads(prev_input)
 
             logger.info("Using data from previous task")
 
@@ -626,7 +1950,7 @@ def jsontransform(self, param):
             for key, value in add_fields.items():
                 # Resolve placeholder in value
                 if isinstance(value, str):
-                    value = oacommon.getparam(f"{key}={value}", key, wallet) or value
+                    value = oacommon.get_param(add_fields, key, wallet) or value
                 result[key] = value
 
             # Remove specified fields
@@ -636,10 +1960,14 @@ def jsontransform(self, param):
             return result
 
         # Transform data
+        tofile = None
         if isinstance(data, dict):
             transformed = transform_item(data)
-        elif isinstance(data, list):
-            transformed = [transform_item(item) for item in data if isinstance(item, dict)]
+            count = 1
+        elif stream is not None or isinstance(data, list):
+            transformed, count, tofile = _emit(
+                param, wallet, (transform_item(item) for item in data if isinstance(item, dict))
+            )
         else:
             raise ValueError(f"Unsupported data type: {type(data)}")
 
@@ -648,24 +1976,26 @@ def jsontransform(self, param):
         # Save to variable
         if oacommon.checkparam("saveonvar", param):
             saveonvar = param["saveonvar"]
-            gdict[saveonvar] = transformed
+            gdict[saveonvar] = transformed if tofile is None else tofile
             logger.debug(f"Result saved to variable {saveonvar}")
 
-        outputdata = {
+        output_data = {
             "transformed": transformed,
-            "count": len(transformed) if isinstance(transformed, list) else 1
+            "count": count
         }
+        if tofile:
+            output_data["file"] = tofile
 
     except Exception as e:
-        tasksuccess = False
-        errormsg = str(e)
+        task_success = False
+        error_msg = str(e)
         logger.error(f"JSON transform failed: {e}", exc_info=True)
 
     finally:
-        if taskstore and taskid:
-            taskstore.setresult(taskid, tasksuccess, errormsg)
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
 
-    return tasksuccess, outputdata
+    return task_success, output_data
 
 @oacommon.trace
 def jsonmerge(self, param):
@@ -674,13 +2004,13 @@ def jsonmerge(self, param):
 
     Args:
         param (dict) with:
-            - sources: list of keys from workflowcontext or list of direct data
+            - sources: list of keys from workflow_context or list of direct data
             - merge_type: "dict" (merge objects), "array" (concatenate arrays), "deep" (deep merge)
             - overwrite: optional for dict merge (default: True)
             - unique: optional remove duplicates in array merge (default: False)
             - saveonvar: optional
             - input: optional data from previous task (added to merge)
-            - workflowcontext: optional workflow context
+            - workflow_context: optional workflow context
 
     Returns:
         tuple (success, merged_data)
@@ -727,17 +2057,17 @@ def jsonmerge(self, param):
             - static_data
           merge_type: dict
     """
-    funcname = myself()
+    func_name = myself()
     logger.info("JSON Merge operation")
 
-    taskid = param.get("taskid")
-    taskstore = param.get("taskstore")
-    tasksuccess = True
-    errormsg = ""
-    outputdata = None
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
 
     try:
-        wallet = gdict.get("wallet")
+        wallet = gdict.get("_wallet")
         merge_type = param.get("merge_type", "dict")
         overwrite = param.get("overwrite", True)
         unique = param.get("unique", False)
@@ -748,13 +2078,13 @@ def jsonmerge(self, param):
         # From sources
         if "sources" in param:
             sources = param["sources"]
-            workflowcontext = param.get("workflowcontext")
+            workflow_context = param.get("workflow_context")
 
             if isinstance(sources, list):
                 for source in sources:
-                    if isinstance(source, str) and workflowcontext:
-                        # Retrieve from workflowcontext
-                        data = workflowcontext.get_task_output(source)
+                    if isinstance(source, str) and workflow_context:
+                        # Retrieve from workflow_context
+                        data = workflow_context.get_task_output(source)
                         if data:
                             data_list.append(data)
                     else:
@@ -763,9 +2093,9 @@ def jsonmerge(self, param):
 
         # Add input if present
         if "input" in param:
-            previnput = param.get("input")
-            if previnput:
-                data_list.append(previnput)
+            prev_input = param.get("input")
+            if prev_input:
+                data_list.append(prev_input)
                 logger.info("Including input in merge")
 
         if len(data_list) < 2:
@@ -844,22 +2174,181 @@ def jsonmerge(self, param):
             gdict[saveonvar] = merged
             logger.debug(f"Result saved to variable {saveonvar}")
 
-        outputdata = {
+        output_data = {
             "merged": merged,
             "sources_count": len(data_list),
             "merge_type": merge_type
         }
 
     except Exception as e:
-        tasksuccess = False
-        errormsg = str(e)
+        task_success = False
+        error_msg = str(e)
         logger.error(f"JSON merge failed: {e}", exc_info=True)
 
     finally:
-        if taskstore and taskid:
-            taskstore.setresult(taskid, tasksuccess, errormsg)
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
 
-    return tasksuccess, outputdata
+    return task_success, output_data
+
+@oacommon.trace
+def jsonjoin(self, param):
+    """
+    Joins two arrays of objects on one or more keys (hash join)
+
+    Args:
+        param (dict) with:
+            - left: optional left records (default: data, or input from previous task)
+            - data: optional alias of left
+            - right: right records: array, JSON string or name of a previous task
+              (its output from workflow_context); omit it to reuse the index_name index
+            - on: key field or list of key fields present on both sides
+            - left_on / right_on: optional key fields when names differ
+            - how: optional inner, left, right or outer (default: inner)
+            - suffix: optional suffix for right fields clashing with left ones (default: _right)
+            - index_name: optional name to keep the right-side index in the workflow
+              context and reuse it in later tasks of the same execution (tasks without
+              'right'); a task passing 'right' rebuilds and replaces it
+            - rebuild_index: optional rebuild a persisted index (default: False)
+            - saveonvar: optional
+            - input: optional data from previous task
+            - workflow_context: optional workflow context
+
+    Returns:
+        tuple (success, joined_data)
+
+    Example YAML:
+        # Enrich DB rows with API results
+        - name: join_orders_customers
+          module: oa-json
+          function: jsonjoin
+          # left: rows from previous task
+          right: fetch_customers
+          on: customer_id
+          how: left
+          # Output: orders with the customer fields (clashing names get "_right")
+
+        # Composite keys with different names
+        - name: join_stock
+          module: oa-json
+          function: jsonjoin
+          left: "{WALLET:left_json}"
+          right:
+            - {sku: "A1", wh: "MI", qty: 4}
+          left_on: [product_code, warehouse]
+          right_on: [sku, wh]
+          how: outer
+
+        # Build the index once, reuse it in a later task (right can be omitted)
+        - name: index_customers
+          module: oa-json
+          function: jsonjoin
+          right: fetch_customers
+          on: customer_id
+          index_name: customers
+        - name: enrich_refunds
+          module: oa-json
+          function: jsonjoin
+          on: customer_id
+          index_name: customers
+    """
+    func_name = myself()
+    logger.info("JSON Join operation")
+
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
+
+    try:
+        wallet = gdict.get("_wallet")
+        workflow_context = param.get("workflow_context")
+
+        # Left side: left/data, else previous task output
+        left = None
+        for key in ("left", "data", "input"):
+            if param.get(key) is not None:
+                left = param[key]
+                if isinstance(left, str) and key != "input":
+                    left = oacommon.get_param(param, key, wallet)
+                break
+        if left is None:
+            raise ValueError("No left data to join: provide 'left'/'data' or pipe from previous task")
+        left = _as_records(left, "Left data")
+
+        # Join keys
+        left_on = param.get("left_on") or param.get("on")
+        right_on = param.get("right_on") or param.get("on")
+        if not left_on or not right_on:
+            raise ValueError(f"Missing join keys for {func_name}: 'on' or 'left_on'/'right_on'")
+        left_on = [left_on] if isinstance(left_on, str) else list(left_on)
+        right_on = [right_on] if isinstance(right_on, str) else list(right_on)
+
+        how = param.get("how", "inner")
+        suffix = param.get("suffix", "_right")
+
+        # Persisted right index
+        index_name = param.get("index_name")
+        registry = _join_index_registry(param) if index_name else None
+        if index_name and registry is None:
+            logger.warning("index_name requires a workflow context: the index will not be kept")
+        # An explicit right side always wins over the stored index
+        right_index = registry.get(index_name) if registry is not None and param.get("right") is None else None
+        if right_index is not None and (param.get("rebuild_index") or right_index.keys != right_on):
+            right_index = None
+        reused = right_index is not None
+
+        if reused:
+            right = right_index.records
+            logger.info(f"Reusing join index '{index_name}': {right_index}")
+        else:
+            right = param.get("right")
+            if right is None:
+                raise ValueError("No right data to join: provide 'right'")
+            if isinstance(right, str) and workflow_context is not None:
+                task_output = workflow_context.get_task_output(right)
+                right = task_output if task_output is not None else oacommon.get_param(param, "right", wallet)
+            right = _as_records(right, "Right data")
+            if index_name:
+                right_index = JoinIndex(right, right_on)
+                if registry is not None:
+                    registry[index_name] = right_index
+                    logger.info(f"Join index '{index_name}' stored: {right_index}")
+
+        logger.info(f"Join ({how}) {len(left)} x {len(right)} on {left_on} = {right_on}")
+
+        joined, stats = joinRecords(left, right, left_on, right_on, how, suffix, right_index)
+
+        logger.info(f"Joined: {len(joined)} rows (index on {stats['index_side']})")
+
+        # Save to variable
+        if oacommon.checkparam("saveonvar", param):
+            saveonvar = param["saveonvar"]
+            gdict[saveonvar] = joined
+            logger.debug(f"Result saved to variable {saveonvar}")
+
+        output_data = {
+            "joined": joined,
+            "count": len(joined),
+            "left_count": len(left),
+            "right_count": len(right),
+            "how": how,
+            "left_on": left_on,
+            "right_on": right_on,
+            "index": dict(stats, name=index_name, reused=reused)
+        }
+
+    except Exception as e:
+        task_success = False
+        error_msg = str(e)
+        logger.error(f"JSON join failed: {e}", exc_info=True)
+
+    finally:
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
+
+    return task_success, output_data
 
 @oacommon.trace
 def jsonaggregate(self, param):
@@ -871,7 +2360,20 @@ def jsonaggregate(self, param):
             - data: optional JSON array data (can use input)
             - operation: sum, avg, count, min, max, group
             - field: field to aggregate on - supports {WALLET:key}, {ENV:var}
-            - group_by: optional field for grouping
+            - group_by: optional field, or list of fields, for grouping
+            - aggregations: optional list of {op, field, as} computed together in a
+              single pass; op is count, sum, avg, min, max, distinct, percentile
+              (with p: 0-100) or median. distinct and percentile use bounded-memory
+              sketches (exact on small groups; tune with precision/exact_limit and
+              sketch_size). Result: one row per group with the group_by fields
+            - backend: optional auto, python or numpy (default: auto, operation only)
+            - fromfile: optional JSON array or JSON Lines file streamed one record at a
+              time and aggregated in a single pass; operation/field keep their result
+              shape ('group' is not supported)
+            - fromformat: optional json or jsonl (default: from the file extension)
+            - tofile: optional file the grouped rows are written to (group_by only;
+              operation/field write {group_by: group, operation: value} rows)
+            - toformat: optional json or jsonl (default: from the file extension)
             - saveonvar: optional
             - input: optional data from previous task
 
@@ -929,179 +2431,269 @@ def jsonaggregate(self, param):
           field: price
           operation: min
           # Find minimum price
+
+        # Report: several aggregations by (region, product) in one pass
+        - name: sales_report
+          module: oa-json
+          function: jsonaggregate
+          group_by: [region, product]
+          aggregations:
+            - {op: count, as: orders}
+            - {op: sum, field: amount, as: revenue}
+            - {op: avg, field: amount}
+            - {op: max, field: amount}
+            - {op: percentile, field: amount, p: 95, as: amount_p95}
+            - {op: distinct, field: customer_id, as: customers}
+          # Output: [{region: "EU", product: "A", orders: 12, revenue: 1530.0,
+          #           avg_amount: 127.5, max_amount: 400.0, amount_p95: 380.0, customers: 9}, ...]
+
+        # Same report over a multi-GB JSON Lines export, memory bounded by the groups
+        - name: sales_report_export
+          module: oa-json
+          function: jsonaggregate
+          fromfile: /data/export/sales.jsonl.gz
+          group_by: [region, product]
+          aggregations:
+            - {op: count, as: orders}
+            - {op: sum, field: amount, as: revenue}
+          tofile: /data/export/sales_report.json
     """
-    funcname = myself()
+    func_name = myself()
     logger.info("JSON Aggregate operation")
 
-    taskid = param.get("taskid")
-    taskstore = param.get("taskstore")
-    tasksuccess = True
-    errormsg = ""
-    outputdata = None
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
 
     try:
-        wallet = gdict.get("wallet")
+        wallet = gdict.get("_wallet")
 
-        # Data propagation
+        # Data propagation: stream from file or retrieve JSON data
+        stream = _stream_source(param, wallet)
         data = None
-        if "data" in param:
+        if stream is not None:
+            data = stream
+        elif "data" in param:
             data = param["data"]
             if isinstance(data, str):
                 data = json.loads(data)
         elif "input" in param:
-            previnput = param.get("input")
-            if isinstance(previnput, dict):
-                if "filtered" in previnput:
-                    data = previnput["filtered"]
-                elif "transformed" in previnput:
-                    data = previnput["transformed"]
-                elif "json" in previnput:
-                    data = previnput["json"]
+            prev_input = param.get("input")
+            if isinstance(prev_input, dict):
+                if "filtered" in prev_input:
+                    data = prev_input["filtered"]
+                elif "transformed" in prev_input:
+                    data = prev_input["transformed"]
+                elif "json" in prev_input:
+                    data = prev_input["json"]
                 else:
                     # Look for array inside input
-                    for key, value in previnput.items():
+                    for key, value in prev_input.items():
                         if isinstance(value, list):
                             data = value
                             break
-            elif isinstance(previnput, list):
-                data = previnput
+            elif isinstance(prev_input, list):
+                data = prev_input
 
             logger.info("Using data from previous task")
 
         if data is None:
             raise ValueError("No data to aggregate")
 
-        if not isinstance(data, list):
+        if stream is None and not isinstance(data, list):
             raise ValueError("Aggregate operation requires array data")
 
-        # Validate parameters
-        requiredparams = ["operation"]
-        if not oacommon.checkandloadparam(self, myself, requiredparams, param=param):
-            raise ValueError(f"Missing required parameters for {funcname}")
+        group_by = oacommon.get_param(param, "group_by", wallet) or param.get("group_by")
+        tofile = None
+
+        if "aggregations" in param or isinstance(group_by, list) or stream is not None:
+            # Several aggregations and/or group keys: one streaming pass
+            aggregations = param.get("aggregations")
+            operation = field = None
+            if aggregations is None:
+                if not oacommon.checkandloadparam(self, myself, "operation", param=param):
+                    raise ValueError(f"Missing required parameters for {func_name}: 'aggregations' or 'operation'")
+                operation = oacommon.get_param(param, "operation", wallet)
+                field = oacommon.get_param(param, "field", wallet) or param.get("field")
+                aggregations = _legacy_aggregations(operation, field)
+            elif isinstance(aggregations, str):
+                aggregations = json.loads(aggregations)
+
+            logger.info(f"Aggregations: {len(aggregations)}, Group by: {group_by}")
+            result, rows = aggregateRecords(data, aggregations, group_by)
+            groups = len(result) if group_by else 1
+            logger.info(f"Aggregation completed: {groups} group(s) from {rows} rows")
+            input_count = stream.count if stream is not None else len(data)
+
+            if operation is not None and not isinstance(group_by, list):
+                # operation/field form: same result shape as without streaming
+                result = _legacy_result(result, operation, group_by)
+                if group_by and oacommon.checkparam("tofile", param):
+                    items = ({group_by: key, operation: value} for key, value in result.items())
+                    result, _, tofile = _emit(param, wallet, items)
+                output_data = {
+                    "result": result,
+                    "operation": operation,
+                    "field": field,
+                    "group_by": group_by,
+                    "input_count": input_count,
+                    "backend": "python"
+                }
+            else:
+                if group_by:
+                    result, _, tofile = _emit(param, wallet, result)
+                output_data = {
+                    "result": result,
+                    "aggregations": aggregations,
+                    "group_by": group_by,
+                    "groups": groups,
+                    "input_count": input_count,
+                    "backend": "python"
+                }
+            if tofile:
+                output_data["file"] = tofile
 
-        operation = oacommon.getparam(param, "operation", wallet) or gdict.get("operation")
-        field = oacommon.getparam(param, "field", wallet) or param.get("field")
-        group_by = oacommon.getparam(param, "group_by", wallet) or param.get("group_by")
+        else:
+            # Validate parameters
+            required_params = ["operation"]
+            if not oacommon.checkandloadparam(self, myself, *required_params, param=param):
+                raise ValueError(f"Missing required parameters for {func_name}")
 
-        logger.info(f"Operation: {operation}, Field: {field}, Group by: {group_by}")
+            operation = oacommon.get_param(param, "operation", wallet) or gdict.get("operation")
+            field = oacommon.get_param(param, "field", wallet) or param.get("field")
 
-        result = None
+            logger.info(f"Operation: {operation}, Field: {field}, Group by: {group_by}")
 
-        if operation == "count":
-            if group_by:
-                # Count by group
-                counts = {}
-                for item in data:
-                    if isinstance(item, dict):
-                        group_value = item.get(group_by, "null")
-                        counts[str(group_value)] = counts.get(str(group_value), 0) + 1
-                result = counts
-            else:
-                result = len(data)
+            get_field = fieldGetter(field) if field else None
+            get_group = fieldGetter(group_by, "null") if group_by else None
 
-        elif operation in ["sum", "avg", "min", "max"]:
-            if not field:
-                raise ValueError(f"Field is required for {operation} operation")
+            vectorizable = (operation in ("sum", "avg", "min", "max") and field) or (operation == "count" and group_by)
+            backend = "numpy" if _use_numpy(param.get("backend"), len(data)) and vectorizable else "python"
 
-            if group_by:
-                # Aggregate by group
-                groups = {}
-                for item in data:
-                    if not isinstance(item, dict):
-                        continue
+            result = None
 
-                    group_value = str(item.get(group_by, "null"))
-                    field_value = item.get(field)
+            if backend == "numpy":
+                records = [item for item in data if isinstance(item, dict)]
+                result = _numpy_aggregate(records, operation, field, group_by)
 
-                    if field_value is not None:
-                        if group_value not in groups:
-                            groups[group_value] = []
-                        try:
-                            groups[group_value].append(float(field_value))
-                        except (ValueError, TypeError):
-                            logger.warning(f"Skipping non-numeric value: {field_value}")
-
-                # Calculate aggregation for each group
-                result = {}
-                for group, values in groups.items():
-                    if values:
-                        if operation == "sum":
-                            result[group] = sum(values)
-                        elif operation == "avg":
-                            result[group] = sum(values) / len(values)
-                        elif operation == "min":
-                            result[group] = min(values)
-                        elif operation == "max":
-                            result[group] = max(values)
+            elif operation == "count":
+                if group_by:
+                    # Count by group
+                    counts = {}
+                    for item in data:
+                        if isinstance(item, dict):
+                            group_value = get_group(item)
+                            counts[str(group_value)] = counts.get(str(group_value), 0) + 1
+                    result = counts
+                else:
+                    result = len(data)
+
+            elif operation in ["sum", "avg", "min", "max"]:
+                if not field:
+                    raise ValueError(f"Field is required for {operation} operation")
+
+                if group_by:
+                    # Aggregate by group
+                    groups = {}
+                    for item in data:
+                        if not isinstance(item, dict):
+                            continue
+
+                        group_value = str(get_group(item))
+                        field_value = get_field(item)
 
-            else:
-                # Aggregate on entire dataset
-                values = []
-                for item in data:
-                    if isinstance(item, dict):
-                        field_value = item.get(field)
                         if field_value is not None:
+                            if group_value not in groups:
+                                groups[group_value] = []
                             try:
-                                values.append(float(field_value))
+                                groups[group_value].append(float(field_value))
                             except (ValueError, TypeError):
                                 logger.warning(f"Skipping non-numeric value: {field_value}")
 
-                if values:
-                    if operation == "sum":
-                        result = sum(values)
-                    elif operation == "avg":
-                        result = sum(values) / len(values)
-                    elif operation == "min":
-                        result = min(values)
-                    elif operation == "max":
-                        result = max(values)
+                    # Calculate aggregation for each group
+                    result = {}
+                    for group, values in groups.items():
+                        if values:
+                            if operation == "sum":
+                                result[group] = sum(values)
+                            elif operation == "avg":
+                                result[group] = sum(values) / len(values)
+                            elif operation == "min":
+                                result[group] = min(values)
+                            elif operation == "max":
+                                result[group] = max(values)
+
                 else:
-                    result = 0
+                    # Aggregate on entire dataset
+                    values = []
+                    for item in data:
+                        if isinstance(item, dict):
+                            field_value = get_field(item)
+                            if field_value is not None:
+                                try:
+                                    values.append(float(field_value))
+                                except (ValueError, TypeError):
+                                    logger.warning(f"Skipping non-numeric value: {field_value}")
+
+                    if values:
+                        if operation == "sum":
+                            result = sum(values)
+                        elif operation == "avg":
+                            result = sum(values) / len(values)
+                        elif operation == "min":
+                            result = min(values)
+                        elif operation == "max":
+                            result = max(values)
+                    else:
+                        result = 0
 
-        elif operation == "group":
-            # Group elements
-            if not group_by:
-                raise ValueError("group_by is required for group operation")
+            elif operation == "group":
+                # Group elements
+                if not group_by:
+                    raise ValueError("group_by is required for group operation")
 
-            groups = {}
-            for item in data:
-                if isinstance(item, dict):
-                    group_value = str(item.get(group_by, "null"))
-                    if group_value not in groups:
-                        groups[group_value] = []
-                    groups[group_value].append(item)
+                groups = {}
+                for item in data:
+                    if isinstance(item, dict):
+                        group_value = str(get_group(item))
+                        if group_value not in groups:
+                            groups[group_value] = []
+                        groups[group_value].append(item)
 
-            result = groups
+                result = groups
 
-        else:
-            raise ValueError(f"Unsupported operation: {operation}")
+            else:
+                raise ValueError(f"Unsupported operation: {operation}")
 
-        logger.info(f"Aggregation completed: {operation}")
+            logger.info(f"Aggregation completed: {operation}")
+
+            output_data = {
+                "result": result,
+                "operation": operation,
+                "field": field,
+                "group_by": group_by,
+                "input_count": len(data),
+                "backend": backend
+            }
 
         # Save to variable
         if oacommon.checkparam("saveonvar", param):
             saveonvar = param["saveonvar"]
-            gdict[saveonvar] = result
+            gdict[saveonvar] = result if tofile is None else tofile
             logger.debug(f"Result saved to variable {saveonvar}")
 
-        outputdata = {
-            "result": result,
-            "operation": operation,
-            "field": field,
-            "group_by": group_by,
-            "input_count": len(data)
-        }
-
     except Exception as e:
-        tasksuccess = False
-        errormsg = str(e)
+        task_success = False
+        error_msg = str(e)
         logger.error(f"JSON aggregate failed: {e}", exc_info=True)
 
     finally:
-        if taskstore and taskid:
-            taskstore.setresult(taskid, tasksuccess, errormsg)
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
 
-    return tasksuccess, outputdata
+    return task_success, output_data
 
 @oacommon.trace
 def jsonvalidate(self, param):
@@ -1113,6 +2705,8 @@ def jsonvalidate(self, param):
             - data: optional JSON data (can use input)
             - schema: JSON Schema for validation
             - strict: optional fail on validation error (default: True)
+            - batch: optional validate each item of a list against the schema in a
+              single pass and report every invalid item (errors carry 'index')
             - saveonvar: optional
             - input: optional data from previous task
 
@@ -1177,26 +2771,35 @@ def jsonvalidate(self, param):
           strict: false
           # Continues even if validation fails
 
-    Note: Requires jsonschema library: pip install jsonschema
+        # Batch: one schema per item, every invalid item reported at once
+        - name: validate_rows
+          module: oa-json
+          function: jsonvalidate
+          batch: true
+          schema:
+            type: object
+            required: [id, email]
+            properties:
+              id: {type: integer}
+              email: {type: string}
+          strict: false
+          # Output: invalid: [3, 17], errors: [{index: 3, message: "'email' is a required property", ...}]
+
+    Note: validators are compiled once per schema and cached. Schemas using only
+    type/required/properties/items are checked without jsonschema; any other
+    keyword requires the jsonschema library: pip install jsonschema
     """
-    funcname = myself()
+    func_name = myself()
     logger.info("JSON Validate operation")
 
-    taskid = param.get("taskid")
-    taskstore = param.get("taskstore")
-    tasksuccess = True
-    errormsg = ""
-    outputdata = None
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
 
     try:
-        # Optional import of jsonschema
-        try:
-            import jsonschema
-            from jsonschema import validate, ValidationError
-        except ImportError:
-            raise ImportError("jsonschema library not installed. Run: pip install jsonschema")
-
-        wallet = gdict.get("wallet")
+        wallet = gdict.get("_wallet")
 
         # Data propagation
         data = None
@@ -1205,52 +2808,63 @@ def jsonvalidate(self, param):
             if isinstance(data, str):
                 data = json.loads(data)
         elif "input" in param:
-            previnput = param.get("input")
-            if isinstance(previnput, dict):
-                if "json" in previnput:
-                    data = previnput["json"]
-                elif "transformed" in previnput:
-                    data = previnput["transformed"]
+            prev_input = param.get("input")
+            if isinstance(prev_input, dict):
+                if "json" in prev_input:
+                    data = prev_input["json"]
+                elif "transformed" in prev_input:
+                    data = prev_input["transformed"]
                 else:
-                    data = previnput
-            elif isinstance(previnput, str):
-                data = json.loads(previnput)
+                    data = prev_input
+            elif isinstance(prev_input, str):
+                data = json.loads(prev_input)
             else:
-                data = previnput
+                data = prev_input
 
             logger.info("Using data from previous task")
 
         if data is None:
             raise ValueError("No data to validate")
 
-        if not oacommon.checkandloadparam(self, myself, ["schema"], param=param):
-            raise ValueError(f"Missing required parameter 'schema' for {funcname}")
+        if not oacommon.checkandloadparam(self, myself, "schema", param=param):
+            raise ValueError(f"Missing required parameter 'schema' for {func_name}")
 
         schema = param.get("schema")
+        if isinstance(schema, str):
+            schema = json.loads(schema)
         strict = param.get("strict", True)
+        batch = param.get("batch", False)
 
-        logger.info("Validating JSON against schema")
+        validate, backend = schemaValidator(schema)
+        logger.info(f"Validating JSON against schema ({backend})")
 
         # Validate
-        valid = True
-        errors = []
+        if batch:
+            if not isinstance(data, list):
+                raise ValueError("Batch validation requires array data")
+            errors = []
+            invalid = []
+            for index, item in enumerate(data):
+                item_errors = validate(item)
+                if item_errors:
+                    invalid.append(index)
+                    errors.extend(dict(error, index=index) for error in item_errors)
+        else:
+            errors = validate(data)
 
-        try:
-            validate(instance=data, schema=schema)
-            logger.info("✓ JSON validation passed")
+        valid = not errors
 
-        except ValidationError as e:
-            valid = False
-            errors.append({
-                "message": e.message,
-                "path": list(e.path),
-                "validator": e.validator
-            })
-            logger.warning(f"✗ JSON validation failed: {e.message}")
+        if valid:
+            logger.info("✓ JSON validation passed")
+        else:
+            summary = errors[0]["message"]
+            if batch:
+                summary = f"{len(invalid)} of {len(data)} item(s) invalid, first at index {invalid[0]}: {summary}"
+            logger.warning(f"✗ JSON validation failed: {summary}")
 
             if strict:
-                tasksuccess = False
-                errormsg = f"JSON validation failed: {e.message}"
+                task_success = False
+                error_msg = f"JSON validation failed: {summary}"
 
         # Save to variable
         if oacommon.checkparam("saveonvar", param):
@@ -1258,23 +2872,27 @@ def jsonvalidate(self, param):
             gdict[saveonvar] = {"valid": valid, "errors": errors}
             logger.debug(f"Result saved to variable {saveonvar}")
 
-        outputdata = {
+        output_data = {
             "valid": valid,
             "errors": errors,
             "data": data,
-            "strict_mode": strict
+            "strict_mode": strict,
+            "backend": backend
         }
+        if batch:
+            output_data["invalid"] = invalid
+            output_data["checked"] = len(data)
 
     except Exception as e:
-        tasksuccess = False
-        errormsg = str(e)
+        task_success = False
+        error_msg = str(e)
         logger.error(f"JSON validate failed: {e}", exc_info=True)
 
     finally:
-        if taskstore and taskid:
-            taskstore.setresult(taskid, tasksuccess, errormsg)
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
 
-    return tasksuccess, outputdata
+    return task_success, output_data
 
 @oacommon.trace
 def jsonsort(self, param):
@@ -1284,9 +2902,14 @@ def jsonsort(self, param):
     Args:
         param (dict) with:
             - data: optional JSON array data (can use input)
-            - sort_by: field for sorting - supports {WALLET:key}, {ENV:var}
-            - reverse: optional descending order (default: False)
-            - numeric: optional sort as numbers (default: auto-detect)
+            - sort_by: field for sorting - supports {WALLET:key}, {ENV:var}; several keys
+              as a list (or "a,-b"), each a field, "-field" for descending or
+              {field, order: asc|desc, numeric}
+            - reverse: optional descending order for all keys (default: False)
+            - numeric: optional sort as numbers (default: auto-detect, numeric when
+              every non-null value of the key is a number or a numeric string)
+            - limit: optional keep only the first N items (heap-based top-K, O(n log N))
+            - backend: optional auto, python or numpy (default: auto, single key only)
             - saveonvar: optional
             - input: optional data from previous task
 
@@ -1335,18 +2958,27 @@ def jsonsort(self, param):
           function: jsonsort
           sort_by: "{ENV:SORT_FIELD}"
           reverse: false
+
+        # Top 100 by revenue, ties by name (partial sort)
+        - name: top_customers
+          module: oa-json
+          function: jsonsort
+          sort_by:
+            - {field: revenue, order: desc}
+            - name
+          limit: 100
     """
-    funcname = myself()
+    func_name = myself()
     logger.info("JSON Sort operation")
 
-    taskid = param.get("taskid")
-    taskstore = param.get("taskstore")
-    tasksuccess = True
-    errormsg = ""
-    outputdata = None
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
 
     try:
-        wallet = gdict.get("wallet")
+        wallet = gdict.get("_wallet")
 
         # Data propagation
         data = None
@@ -1355,20 +2987,20 @@ def jsonsort(self, param):
             if isinstance(data, str):
                 data = json.loads(data)
         elif "input" in param:
-            previnput = param.get("input")
-            if isinstance(previnput, dict):
-                if "filtered" in previnput:
-                    data = previnput["filtered"]
-                elif "json" in previnput:
-                    data = previnput["json"]
+            prev_input = param.get("input")
+            if isinstance(prev_input, dict):
+                if "filtered" in prev_input:
+                    data = prev_input["filtered"]
+                elif "json" in prev_input:
+                    data = prev_input["json"]
                 else:
                     # Look for array
-                    for key, value in previnput.items():
+                    for key, value in prev_input.items():
                         if isinstance(value, list):
                             data = value
                             break
-            elif isinstance(previnput, list):
-                data = previnput
+            elif isinstance(prev_input, list):
+                data = prev_input
 
             logger.info("Using data from previous task")
 
@@ -1378,40 +3010,35 @@ def jsonsort(self, param):
         if not isinstance(data, list):
             raise ValueError("Sort operation requires array data")
 
-        if not oacommon.checkandloadparam(self, myself, ["sort_by"], param=param):
-            raise ValueError(f"Missing required parameter 'sort_by' for {funcname}")
+        if not oacommon.checkandloadparam(self, myself, "sort_by", param=param):
+            raise ValueError(f"Missing required parameter 'sort_by' for {func_name}")
 
-        sort_by = oacommon.getparam(param, "sort_by", wallet) or gdict.get("sort_by")
+        sort_by = oacommon.get_param(param, "sort_by", wallet) or gdict.get("sort_by")
         reverse = param.get("reverse", False)
         numeric = param.get("numeric", None)
+        limit = param.get("limit")
+        limit = int(limit) if limit is not None else None
+
+        specs = _sort_specs(sort_by, reverse, numeric)
+        logger.info(f"Sorting by: {sort_by}, Reverse: {reverse}, Limit: {limit}")
+
+        all_dicts = all(isinstance(item, dict) for item in data)
+        use_numpy = _use_numpy(param.get("backend"), len(data)) and all_dicts and len(specs) == 1
+        backend = "numpy" if use_numpy else "python"
+
+        if backend == "numpy":
+            spec = specs[0]
+            is_numeric = spec["numeric"]
+            if is_numeric is None:
+                is_numeric = _is_numeric(map(fieldGetter(spec["field"]), data))
+            numeric = [is_numeric]
+            order = _numpy_sort_order(data, spec["field"], is_numeric, spec["reverse"])
+            positions = (order[:limit] if limit is not None else order).tolist()
+        else:
+            positions, numeric = sortOrder(data, specs, limit)
 
-        logger.info(f"Sorting by: {sort_by}, Reverse: {reverse}")
-
-        # Determine if sorting as number
-        if numeric is None:
-            # Auto-detect: check first value
-            for item in data:
-                if isinstance(item, dict):
-                    value = item.get(sort_by)
-                    if value is not None:
-                        numeric = isinstance(value, (int, float))
-                        break
-
-        # Sort
-        def sort_key(item):
-            if isinstance(item, dict):
-                value = item.get(sort_by)
-                if value is None:
-                    return float('inf') if numeric else ''
-                if numeric:
-                    try:
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return float('inf')
-                return str(value).lower()
-            return item
-
-        sorted_data = sorted(data, key=sort_key, reverse=reverse)
+        sorted_data = [data[position] for position in positions]
+        numeric = numeric[0] if len(specs) == 1 else numeric
 
         logger.info(f"Sorted {len(sorted_data)} items")
 
@@ -1421,21 +3048,24 @@ def jsonsort(self, param):
             gdict[saveonvar] = sorted_data
             logger.debug(f"Result saved to variable {saveonvar}")
 
-        outputdata = {
+        output_data = {
             "sorted": sorted_data,
             "count": len(sorted_data),
             "sort_by": sort_by,
             "reverse": reverse,
-            "numeric": numeric
+            "numeric": numeric,
+            "limit": limit,
+            "input_count": len(data),
+            "backend": backend
         }
 
     except Exception as e:
-        tasksuccess = False
-        errormsg = str(e)
+        task_success = False
+        error_msg = str(e)
         logger.error(f"JSON sort failed: {e}", exc_info=True)
 
     finally:
-        if taskstore and taskid:
-            taskstore.setresult(taskid, tasksuccess, errormsg)
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
 
-    return tasksuccess, outputdata
\ No newline at end of file
+    return task_success, output_data
\ No newline at end of file
@@ -5,17 +5,30 @@ Manages network operations (HTTP, HTTPS) with data propagation
 Support for wallet, placeholder {WALLET:key}, {ENV:var} and {VAULT:key}
 """
 
-import requests
 import oacommon
 import inspect
 import http.client
+import http.cookiejar
+import re
+import os
 import json
+import time
+import hashlib
+import datetime
+import atexit
+import threading
 import logging
+from urllib.parse import urlparse, quote
+from concurrent.futures import ThreadPoolExecutor
 from logger_config import AutomatorLogger
+import ratelimit
 
 # Logger for this module
 logger = AutomatorLogger.get_logger('oa-network')
 
+# Heavy dependencies are imported on first use
+requests = oacommon.lazy_import('requests')
+
 gdict = {}
 myself = lambda: inspect.stack()[1][3]
 
@@ -25,6 +38,533 @@ def setgdict(self, gdict_param):
     gdict = gdict_param
     self.gdict = gdict_param
 
+
+# ----------------------------------------
+# HTTP session registry
+# ----------------------------------------
+
+# Defaults for the per-host sessions (overridable per task)
+SESSION_DEFAULTS = {
+    'session': True,            # reuse a pooled keep-alive session
+    'pool_maxsize': 10,         # max connections kept per host
+    'pool_block': False,        # wait for a free connection instead of opening extra ones
+    'keep_alive': True,         # False sends 'Connection: close'
+    'timeout': 30,
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _session_key(url):
+    """'scheme://host:port' of a URL"""
+    parsed = urlparse(url)
+    port = parsed.port or (443 if parsed.scheme == 'https' else 80)
+    return f"{parsed.scheme}://{parsed.hostname}:{port}"
+
+
+def get_session(url, options=None):
+    """
+    Returns the process-wide session for the scheme+host of url
+
+    Sessions keep connections alive across tasks and executions. Pool
+    options apply when the session for a host is created; a larger
+    pool_maxsize (e.g. httpbatch with a higher concurrency) replaces it with
+    a session of that size, so the pool only grows. Cookies are never
+    stored, so requests stay independent as with requests.get().
+    """
+    options = dict(SESSION_DEFAULTS, **(options or {}))
+    pool_maxsize = int(options['pool_maxsize'])
+    key = _session_key(url)
+    stale = None
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None or session.oa_pool_maxsize < pool_maxsize:
+            stale = session
+            session = requests.Session()
+            session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=pool_maxsize,
+                pool_block=bool(options['pool_block']),
+            )
+            session.mount(key.split('://')[0] + '://', adapter)
+            session.oa_pool_maxsize = pool_maxsize
+            _sessions[key] = session
+            logger.debug(f"Created HTTP session for {key} (pool_maxsize={pool_maxsize})")
+    if stale is not None:
+        # Idle connections close now; those in use are closed when released
+        stale.close()
+    return session
+
+
+def close_sessions():
+    """Closes every pooled session"""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
+
+
+def session_status():
+    """Hosts with an open session"""
+    with _sessions_lock:
+        return sorted(_sessions)
+
+
+atexit.register(close_sessions)
+
+
+def _session_options(param):
+    """Extracts session options from task params (falling back to defaults)"""
+    return {key: param.get(key, default) for key, default in SESSION_DEFAULTS.items()}
+
+
+def http_request(method, url, param=None, **kwargs):
+    """
+    Helper to send a request through the host session
+
+    With 'session: false' in param a one-off request is made instead.
+    Every request passes the shared rate limiter / circuit breaker of the
+    host (see ratelimit), which may raise ratelimit.RateLimitError.
+    """
+    options = _session_options(param or {})
+    kwargs.setdefault('timeout', options['timeout'])
+    if not options['keep_alive']:
+        kwargs['headers'] = dict(kwargs.get('headers') or {}, Connection='close')
+    if options['session']:
+        send = lambda: get_session(url, options).request(method, url, **kwargs)
+    else:
+        send = lambda: requests.request(method, url, **kwargs)
+    return ratelimit.guarded(url, ratelimit.guard_options(param or {}), send)
+
+# ----------------------------------------
+# Conditional-request cache
+# ----------------------------------------
+
+HTTP_CACHE_DIR = os.getenv(
+    'OA_HTTP_CACHE_DIR',
+    os.path.join(os.getenv('OA_DATA_DIR', os.path.join(os.getcwd(), 'data')), 'http-cache')
+)
+# Entries kept per cache directory; the least recently stored/revalidated go first
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv('OA_HTTP_CACHE_MAX_ENTRIES', '1000'))
+
+
+class HTTPCache:
+    """
+    On-disk cache of GET responses
+
+    Each entry is '<key>.json' (status, headers, validators, freshness) plus
+    '<key>.body'. The key covers the URL and the request headers, so
+    responses fetched with different credentials never mix. Beyond
+    max_entries the entries stored or revalidated longest ago are removed.
+    """
+
+    def __init__(self, directory, max_entries=None):
+        self.directory = directory
+        self.max_entries = HTTP_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        os.makedirs(directory, exist_ok=True)
+
+    def _key(self, url, headers):
+        material = json.dumps([url, sorted((str(k).lower(), str(v)) for k, v in (headers or {}).items())])
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+
+    def get(self, url, headers=None):
+        """Cached entry (metadata dict with 'body' bytes) or None"""
+        meta_path, body_path = self._paths(self._key(url, headers))
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry['body'] = f.read()
+        except (OSError, ValueError):
+            return None
+        return entry
+
+    def put(self, url, headers, response):
+        """Stores a 200 response if it carries validators or a max-age"""
+        max_age, no_store = _cache_control(response.headers)
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if no_store or response.status_code != 200 or not (etag or last_modified or max_age):
+            return False
+
+        entry = {
+            'url': url,
+            'status_code': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time(),
+            'max_age': max_age
+        }
+        meta_path, body_path = self._paths(self._key(url, headers))
+        # Body first, metadata last: a reader never sees metadata without body
+        for path, data, mode in ((body_path, response.content, 'wb'),
+                                 (meta_path, json.dumps(entry), 'w')):
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, mode) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        self._prune()
+        return True
+
+    def _prune(self):
+        """Removes the oldest entries beyond max_entries"""
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.json')]
+        except OSError:
+            return
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:excess]:
+            for path in self._paths(entry.name[:-len('.json')]):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # already removed by a concurrent prune
+        logger.debug(f"HTTP cache pruned {excess} entries from {self.directory}")
+
+    def refresh(self, url, headers, entry, response):
+        """Updates freshness of an entry after a 304 (max-age kept unless resent)"""
+        entry = {k: v for k, v in entry.items() if k != 'body'}
+        entry['stored_at'] = time.time()
+        if 'Cache-Control' in response.headers:
+            entry['max_age'], _ = _cache_control(response.headers)
+        entry['etag'] = response.headers.get('ETag', entry['etag'])
+        meta_path, _ = self._paths(self._key(url, headers))
+        tmp = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp, meta_path)
+
+    @staticmethod
+    def is_fresh(entry):
+        return bool(entry.get('max_age')) and time.time() - entry['stored_at'] < entry['max_age']
+
+    @staticmethod
+    def to_response(entry, url):
+        """Rebuilds a requests.Response from a cached entry"""
+        response = requests.models.Response()
+        response.status_code = entry['status_code']
+        response.reason = entry['reason']
+        response.headers.update(entry['headers'])
+        response._content = entry['body']
+        response.url = url
+        response.elapsed = datetime.timedelta(0)
+        return response
+
+
+def _cache_control(headers):
+    """(max_age or None, no_store) from a Cache-Control header"""
+    max_age, no_store = None, False
+    for directive in headers.get('Cache-Control', '').lower().split(','):
+        name, _, value = directive.strip().partition('=')
+        if name == 'no-store':
+            no_store = True
+        elif name == 'no-cache':
+            max_age = 0
+        elif name == 'max-age' and max_age is None:
+            try:
+                max_age = int(value.strip('"'))
+            except ValueError:
+                pass
+    return max_age, no_store
+
+
+_caches = {}
+
+
+def get_cache(directory=None):
+    """Returns the cache for a directory (default HTTP_CACHE_DIR)"""
+    directory = os.path.abspath(directory or HTTP_CACHE_DIR)
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches.setdefault(directory, HTTPCache(directory))
+    return cache
+
+
+def cached_get(url, param, stream=False, **kwargs):
+    """
+    Helper for GET requests honouring the 'cache' task option
+
+    Returns:
+        (response, cache_status) with cache_status None when the cache is
+        off, else 'fresh' (served without network), 'revalidated' (304) or
+        'miss'
+    """
+    option = param.get('cache', False)
+    if not option or stream:
+        return http_request('GET', url, param, stream=stream, **kwargs), None
+
+    cache = get_cache(option if isinstance(option, str) else None)
+    headers = kwargs.get('headers') or {}
+    entry = cache.get(url, headers)
+
+    if entry and HTTPCache.is_fresh(entry):
+        logger.info(f"HTTP cache fresh for {url}, no request sent")
+        return HTTPCache.to_response(entry, url), 'fresh'
+
+    if entry:
+        conditional = dict(headers)
+        if entry.get('etag'):
+            conditional['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            conditional['If-Modified-Since'] = entry['last_modified']
+        kwargs['headers'] = conditional
+
+    response = http_request('GET', url, param, **kwargs)
+
+    if entry and response.status_code == 304:
+        cache.refresh(url, headers, entry, response)
+        logger.info(f"HTTP 304 for {url}, serving cached body")
+        cached = HTTPCache.to_response(entry, url)
+        cached.elapsed = response.elapsed
+        return cached, 'revalidated'
+
+    if cache.put(url, headers, response):
+        logger.debug(f"Response of {url} stored in HTTP cache")
+    return response, 'miss'
+
+
+# ----------------------------------------
+# Pagination
+# ----------------------------------------
+
+PAGINATION_STYLES = ('link', 'cursor', 'offset', 'page')
+
+
+def _dig(data, path):
+    """Value at a dot path ('meta.next') of a JSON document, or None"""
+    for part in str(path).split('.'):
+        if isinstance(data, dict):
+            data = data.get(part)
+        elif isinstance(data, list) and part.isdigit() and int(part) < len(data):
+            data = data[int(part)]
+        else:
+            return None
+    return data
+
+
+def _page_items(data, path=None):
+    """Item array of a page: at 'path', the body itself, or a common wrapper key"""
+    if path:
+        items = _dig(data, path)
+    elif isinstance(data, list):
+        items = data
+    else:
+        items = next((data[key] for key in ('items', 'data', 'results', 'records')
+                      if isinstance(data, dict) and isinstance(data.get(key), list)), None)
+    if not isinstance(items, list):
+        raise ValueError("No item array found in page (set paginate.items)")
+    return items
+
+
+def _discard(future):
+    """Closes the response of a prefetched page that is not needed"""
+    if not future.cancel():
+        future.add_done_callback(lambda f: f.exception() is None and f.result().close())
+
+
+def fetchPages(url, param, tofile=None, **kwargs):
+    """
+    Helper to follow a paginated REST API and collect the items of every page
+
+    param['paginate'] is a style name or a dict with 'style' and options:
+    link (RFC 8288 Link header), cursor (cursor_path/cursor_param),
+    offset (offset_param/limit_param/limit) or page (page_param/start).
+    When the next request does not depend on the body (link, offset, page)
+    it is sent before the current page is parsed. Items are concatenated,
+    or written as JSON Lines to tofile.
+
+    Returns:
+        output dict with items (or file), count, pages and error
+    """
+    spec = param['paginate']
+    spec = {'style': spec} if isinstance(spec, str) else dict(spec)
+    style = spec.get('style', 'link')
+    if style not in PAGINATION_STYLES:
+        raise ValueError(f"Invalid pagination style '{style}' (use one of {', '.join(PAGINATION_STYLES)})")
+
+    limit = spec.get('limit')
+    limit_param = spec.get('limit_param', 'limit')
+    max_pages = int(spec.get('max_pages', 1000))
+    base_query = dict(spec.get('params') or {})
+    if limit is not None:
+        base_query[limit_param] = limit
+
+    if style == 'offset':
+        position = int(spec.get('start', 0))
+        position_param, step = spec.get('offset_param', 'offset'), int(limit or 0)
+        if not step:
+            raise ValueError("Offset pagination requires paginate.limit")
+    elif style == 'page':
+        position = int(spec.get('start', 1))
+        position_param, step = spec.get('page_param', 'page'), 1
+    cursor_path = spec.get('cursor_path', 'next_cursor')
+    cursor_param = spec.get('cursor_param', 'cursor')
+
+    def query_at(pos):
+        return dict(base_query, **{position_param: pos})
+
+    # The prefetch thread logs under the caller's execution id
+    @oacommon.in_context
+    def get(target, query):
+        return http_request('GET', target, param, params=query or None, **kwargs)
+
+    output_data = {'url': url, 'items': None, 'count': 0, 'pages': 0, 'status_code': None, 'error': None}
+    items = []
+    sink = open(tofile, 'w', encoding='utf-8') if tofile else None
+
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='oa-http-page')
+    pending = None
+    try:
+        pending = executor.submit(get, url, query_at(position) if style in ('offset', 'page') else base_query)
+        while pending is not None:
+            response = pending.result()
+            pending = None
+            output_data['pages'] += 1
+            output_data['status_code'] = response.status_code
+            if response.status_code >= 400:
+                output_data['error'] = (f"HTTP error {response.status_code} {response.reason} "
+                                        f"on page {output_data['pages']}")
+                response.close()
+                break
+
+            more = output_data['pages'] < max_pages
+            # Prefetch: next request known before parsing the body
+            if more and style == 'link' and response.links.get('next', {}).get('url'):
+                pending = executor.submit(get, response.links['next']['url'], None)
+            elif more and style in ('offset', 'page'):
+                position += step
+                pending = executor.submit(get, url, query_at(position))
+
+            data = oacommon.json_loads(response.content)
+            page = _page_items(data, spec.get('items'))
+
+            if style == 'cursor':
+                cursor = _dig(data, cursor_path)
+                if more and cursor and page:
+                    pending = executor.submit(get, url, dict(base_query, **{cursor_param: cursor}))
+            elif pending is not None and (not page or (limit is not None and style != 'link'
+                                                       and len(page) < int(limit))):
+                # Short or empty page: the prefetched one is past the end
+                _discard(pending)
+                pending = None
+
+            if sink:
+                for item in page:
+                    sink.write(oacommon.json_dumps(item) + '\n')
+            else:
+                items.extend(page)
+            output_data['count'] += len(page)
+            logger.debug(f"Page {output_data['pages']}: {len(page)} item(s)")
+    finally:
+        if pending is not None:
+            _discard(pending)
+        if sink:
+            sink.close()
+        executor.shutdown(wait=False)
+
+    if tofile:
+        output_data['file'] = tofile
+    else:
+        output_data['items'] = items
+    logger.info(f"Pagination ({style}) fetched {output_data['count']} item(s) in {output_data['pages']} page(s)")
+    return output_data
+
+
+# ----------------------------------------
+# Downloads
+# ----------------------------------------
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def saveResponse(response, filename, hash_algorithm=None, chunk_size=DOWNLOAD_CHUNK_SIZE):
+    """
+    Helper to stream a response body to filename in constant memory
+
+    The body goes to '<filename>.part' and is renamed when complete, so a
+    failed download never leaves a truncated file under the final name.
+
+    Returns:
+        (size, hexdigest or None)
+    """
+    digest = hashlib.new(hash_algorithm) if hash_algorithm else None
+    directory = os.path.dirname(os.path.abspath(filename))
+    os.makedirs(directory, exist_ok=True)
+    partial = filename + '.part'
+    size = 0
+    try:
+        with open(partial, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if not chunk:
+                    continue
+                f.write(chunk)
+                if digest:
+                    digest.update(chunk)
+                size += len(chunk)
+        os.replace(partial, filename)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        response.close()
+    return size, digest.hexdigest() if digest else None
+
+
+def _download_output(response, filename, param, url, wallet=None):
+    """Saves a streamed GET response to file and returns its output metadata"""
+    output_data = {
+        'status_code': response.status_code,
+        'reason': response.reason,
+        'headers': dict(response.headers),
+        'url': url,
+        'file': None,
+        'size': 0
+    }
+
+    if response.status_code >= 400:
+        # Keep only a prefix of the error body for the log, write nothing
+        detail = next(response.iter_content(chunk_size=1000), b'').decode('utf-8', errors='ignore')
+        response.close()
+        output_data['error'] = f"HTTP error {response.status_code} {response.reason}"
+        logger.error(f"Download of {url} failed: {output_data['error']} {detail}")
+        return output_data
+
+    hash_algorithm = param.get('hash')
+    if hash_algorithm and hash_algorithm not in hashlib.algorithms_available:
+        response.close()
+        raise ValueError(f"Unsupported hash algorithm '{hash_algorithm}'")
+
+    size, hexdigest = saveResponse(
+        response, filename, hash_algorithm, int(param.get('chunk_size', DOWNLOAD_CHUNK_SIZE))
+    )
+    output_data.update(file=filename, size=size,
+                       elapsed_ms=response.elapsed.total_seconds() * 1000)
+
+    if hexdigest:
+        output_data['hash'] = hexdigest
+        output_data['hash_algorithm'] = hash_algorithm
+        expected = oacommon.get_param(param, 'expected_hash', wallet) if param.get('expected_hash') else None
+        if expected and expected.lower() != hexdigest:
+            os.remove(filename)
+            raise ValueError(f"{hash_algorithm} mismatch for {url}: expected {expected}, got {hexdigest}")
+
+    logger.info(f"Downloaded {size} bytes to {filename}" + (f" ({hash_algorithm} {hexdigest})" if hexdigest else ""))
+    return output_data
+
+
 @oacommon.trace
 def httpget(self, param):
     """
@@ -38,6 +578,21 @@ def httpget(self, param):
             - printout: (optional) print response
             - saveonvar: (optional) save response to variable
             - headers: (optional) dict with custom headers - supports {WALLET:key} in values
+            - tofile: (optional) stream the body to this file instead of keeping it in the output
+            - hash: (optional) with tofile, hash computed while downloading (e.g. 'sha256')
+            - expected_hash: (optional) with hash, fail (and delete the file) on mismatch
+            - chunk_size: (optional) with tofile, bytes per read, default 1 MiB
+            - cache: (optional) true (or a directory) to cache responses on disk with
+              ETag/Last-Modified revalidation and Cache-Control max-age, default False;
+              at most OA_HTTP_CACHE_MAX_ENTRIES (default 1000) entries are kept
+            - session: (optional) reuse the pooled keep-alive session of the host, default True
+            - pool_maxsize: (optional) connections kept per host (the host pool only grows), default 10
+            - keep_alive: (optional) keep connections open between requests, default True
+            - timeout: (optional) request timeout in seconds, default 30
+            - rate_limit / rate_burst: (optional) requests per second (and burst) for this task,
+              on top of the host limit shared by every task (OA_RATE_LIMIT, default unlimited)
+            - circuit_failures / circuit_reset: (optional) consecutive 5xx/429/network errors that open
+              the host circuit (fail fast) and seconds before a probe, default 5 / 30
             - input: (optional) data from previous task
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -101,7 +656,7 @@ def httpget(self, param):
     output_data = None
 
     required_params = ['host', 'port', 'get']
-    connection = None
+    host, port = None, None
 
     try:
         # If host/port/get not specified, try to derive from input
@@ -114,7 +669,6 @@ def httpget(self, param):
                     param['port'] = prev_input['port']
                 if 'url' in prev_input:
                     # Parse complete URL
-                    from urllib.parse import urlparse
                     parsed = urlparse(prev_input['url'])
                     if not param.get('host'):
                         param['host'] = parsed.hostname
@@ -148,70 +702,75 @@ def httpget(self, param):
                         custom_headers[key] = value
                 logger.debug(f"Custom headers with placeholders resolved")
 
-        logger.info(f"HTTP GET: http://{host}:{port}{get_path}")
-
-        connection = http.client.HTTPConnection(host, port, timeout=30)
-
-        # Prepare headers
-        if custom_headers:
-            for key, value in custom_headers.items():
-                connection.putheader(key, value)
-
-        connection.request('GET', get_path)
-        response = connection.getresponse()
-
-        logger.info(f"HTTP Status: {response.status} {response.reason}")
-
-        # Read response body
-        response_body = response.read().decode('utf-8', errors='ignore')
-
-        # Try to parse as JSON
-        parsed_json = None
-        content_type = response.getheader('Content-Type', '')
-        if 'application/json' in content_type:
-            try:
-                parsed_json = json.loads(response_body)
-                logger.debug("Response parsed as JSON")
-            except json.JSONDecodeError:
-                logger.debug("Failed to parse response as JSON")
-
-        # Consider status >=400 as failure
-        if response.status >= 400:
-            task_success = False
-            error_msg = f"HTTP error {response.status} {response.reason}"
-
-        # Handle printout
-        if oacommon.checkparam('printout', param):
-            printout = param['printout']
-            if printout:
-                if len(response_body) > 1000:
-                    logger.info(f"Response (first 1000 chars):\n{response_body[:1000]}...")
-                else:
-                    logger.info(f"Response:\n{response_body}")
+        url = f"http://{host}:{port}{get_path}"
+        logger.info(f"HTTP GET: {url}")
 
-        # Save to variable (backward compatibility)
-        if oacommon.checkparam('saveonvar', param):
-            saveonvar = param['saveonvar']
-            gdict[saveonvar] = response_body
-            logger.debug(f"Response saved to variable: {saveonvar}")
+        tofile = oacommon.get_param(param, 'tofile', wallet) if param.get('tofile') else None
+        response, cache_status = cached_get(url, param, bool(tofile), headers=custom_headers)
 
-        logger.info(f"HTTP GET completed, response size: {len(response_body)} bytes")
-
-        # Output data for propagation
-        output_data = {
-            'status_code': response.status,
-            'reason': response.reason,
-            'content': response_body,
-            'size': len(response_body),
-            'headers': dict(response.getheaders()),
-            'url': f"http://{host}:{port}{get_path}"
-        }
-
-        # If parsed as JSON, add it too
-        if parsed_json is not None:
-            output_data['json'] = parsed_json
+        logger.info(f"HTTP Status: {response.status_code} {response.reason}")
 
-    except http.client.HTTPException as e:
+        if tofile:
+            output_data = _download_output(response, tofile, param, url, wallet)
+            if response.status_code >= 400:
+                task_success = False
+                error_msg = output_data['error']
+        else:
+            # Read response body
+            response_body = response.content.decode('utf-8', errors='ignore')
+
+            # Try to parse as JSON
+            parsed_json = None
+            content_type = response.headers.get('Content-Type', '')
+            if 'application/json' in content_type:
+                try:
+                    parsed_json = oacommon.json_loads(response_body)
+                    logger.debug("Response parsed as JSON")
+                except json.JSONDecodeError:
+                    logger.debug("Failed to parse response as JSON")
+
+            # Consider status >=400 as failure
+            if response.status_code >= 400:
+                task_success = False
+                error_msg = f"HTTP error {response.status_code} {response.reason}"
+
+            # Handle printout
+            if oacommon.checkparam('printout', param):
+                printout = param['printout']
+                if printout:
+                    if len(response_body) > 1000:
+                        logger.info(f"Response (first 1000 chars):\n{response_body[:1000]}...")
+                    else:
+                        logger.info(f"Response:\n{response_body}")
+
+            # Save to variable (backward compatibility)
+            if oacommon.checkparam('saveonvar', param):
+                saveonvar = param['saveonvar']
+                gdict[saveonvar] = response_body
+                logger.debug(f"Response saved to variable: {saveonvar}")
+
+            logger.info(f"HTTP GET completed, response size: {len(response_body)} bytes")
+
+            # Output data for propagation
+            output_data = {
+                'status_code': response.status_code,
+                'reason': response.reason,
+                'content': response_body,
+                'size': len(response_body),
+                'headers': dict(response.headers),
+                'url': url,
+                'elapsed_ms': response.elapsed.total_seconds() * 1000
+            }
+
+            # If parsed as JSON, add it too
+            if parsed_json is not None:
+                output_data['json'] = parsed_json
+
+            if cache_status:
+                output_data['cache'] = cache_status
+                output_data['from_cache'] = cache_status in ('fresh', 'revalidated')
+
+    except (http.client.HTTPException, requests.exceptions.ConnectionError) as e:
         task_success = False
         error_msg = str(e)
         logger.error(f"HTTP connection error to {host}:{port}: {e}", exc_info=True)
@@ -220,9 +779,6 @@ def httpget(self, param):
         error_msg = str(e)
         logger.error(f"HTTP GET request failed: {e}", exc_info=True)
     finally:
-        if connection:
-            connection.close()
-            logger.debug("HTTP connection closed")
         if task_store and task_id:
             task_store.set_result(task_id, task_success, error_msg)
 
@@ -242,6 +798,25 @@ def httpsget(self, param):
             - printout: (optional) print response
             - saveonvar: (optional) save response to variable
             - headers: (optional) dict with custom headers - supports {WALLET:key} in values (e.g., tokens)
+            - tofile: (optional) stream the body to this file instead of keeping it in the output
+            - hash: (optional) with tofile, hash computed while downloading (e.g. 'sha256')
+            - expected_hash: (optional) with hash, fail (and delete the file) on mismatch
+            - chunk_size: (optional) with tofile, bytes per read, default 1 MiB
+            - cache: (optional) true (or a directory) to cache responses on disk with
+              ETag/Last-Modified revalidation and Cache-Control max-age, default False;
+              at most OA_HTTP_CACHE_MAX_ENTRIES (default 1000) entries are kept
+            - paginate: (optional) follow all pages: 'link', 'cursor', 'offset', 'page' or a dict
+              {style, items, limit, limit_param, offset_param, page_param, start,
+               cursor_path, cursor_param, params, max_pages}; items of every page are
+              concatenated in 'items' (or written as JSON Lines to tofile)
+            - session: (optional) reuse the pooled keep-alive session of the host, default True
+            - pool_maxsize: (optional) connections kept per host (the host pool only grows), default 10
+            - keep_alive: (optional) keep connections open between requests, default True
+            - timeout: (optional) request timeout in seconds, default 30
+            - rate_limit / rate_burst: (optional) requests per second (and burst) for this task,
+              on top of the host limit shared by every task (OA_RATE_LIMIT, default unlimited)
+            - circuit_failures / circuit_reset: (optional) consecutive 5xx/429/network errors that open
+              the host circuit (fail fast) and seconds before a probe, default 5 / 30
             - input: (optional) data from previous task
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -300,6 +875,49 @@ def httpsget(self, param):
           port: 443
           get: "/posts/1"
           # Response automatically parsed as JSON if Content-Type is application/json
+
+        # Download a large artifact in constant memory, verifying its checksum
+        - name: download_release
+          module: oa-network
+          function: httpsget
+          host: "artifacts.example.com"
+          port: 443
+          get: "/releases/app-2.4.0.tar.gz"
+          tofile: "/data/downloads/app-2.4.0.tar.gz"
+          hash: sha256
+          expected_hash: "{WALLET:app_release_sha256}"
+
+        # Poll an API: unchanged data is served from the cache (304 or still fresh)
+        # and the output carries from_cache / cache ('fresh', 'revalidated', 'miss')
+        - name: poll_prices
+          module: oa-network
+          function: httpsget
+          host: "api.example.com"
+          port: 443
+          get: "/v1/prices"
+          cache: true
+
+        # All repositories of an organization (GitHub-style Link header)
+        - name: list_repos
+          module: oa-network
+          function: httpsget
+          host: "api.github.com"
+          port: 443
+          get: "/orgs/example/repos?per_page=100"
+          paginate: link
+
+        # Offset/limit API streamed to JSON Lines
+        - name: sync_contacts
+          module: oa-network
+          function: httpsget
+          host: "crm.example.com"
+          port: 443
+          get: "/api/contacts"
+          tofile: "/data/contacts.jsonl"
+          paginate:
+            style: offset
+            limit: 500
+            items: "data.contacts"
     """
     func_name = myself()
     logger.info("Executing HTTPS GET request")
@@ -323,7 +941,6 @@ def httpsget(self, param):
                     param['port'] = prev_input['port']
                 if 'url' in prev_input:
                     # Parse complete URL
-                    from urllib.parse import urlparse
                     parsed = urlparse(prev_input['url'])
                     if not param.get('host'):
                         param['host'] = parsed.hostname
@@ -374,58 +991,75 @@ def httpsget(self, param):
             import urllib3
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-        response = requests.get(url, verify=verify, headers=headers, timeout=30)
-
-        logger.info(f"HTTPS Status: {response.status_code} {response.reason}")
-
-        response_body = response.content.decode('utf-8', errors='ignore')
-
-        # Try to parse as JSON
-        parsed_json = None
-        content_type = response.headers.get('Content-Type', '')
-        if 'application/json' in content_type:
-            try:
-                parsed_json = response.json()
-                logger.debug("Response parsed as JSON")
-            except json.JSONDecodeError:
-                logger.debug("Failed to parse response as JSON")
-
-        # Consider status >=400 as failure
-        if response.status_code >= 400:
-            task_success = False
-            error_msg = f"HTTPS error {response.status_code} {response.reason}"
-
-        # Handle printout
-        if oacommon.checkparam('printout', param):
-            printout = param['printout']
-            if printout:
-                if len(response_body) > 1000:
-                    logger.info(f"Response (first 1000 chars):\n{response_body[:1000]}...")
-                else:
-                    logger.info(f"Response:\n{response_body}")
-
-        # Save to variable (backward compatibility)
-        if oacommon.checkparam('saveonvar', param):
-            saveonvar = param['saveonvar']
-            gdict[saveonvar] = response_body
-            logger.debug(f"Response saved to variable: {saveonvar}")
+        tofile = oacommon.get_param(param, 'tofile', wallet) if param.get('tofile') else None
+        if param.get('paginate'):
+            output_data = fetchPages(url, param, tofile, verify=verify, headers=headers)
+            if output_data.get('error'):
+                task_success = False
+                error_msg = output_data['error']
+        else:
+            response, cache_status = cached_get(url, param, bool(tofile), verify=verify, headers=headers)
 
-        logger.info(f"HTTPS GET completed, response size: {len(response_body)} bytes")
+            logger.info(f"HTTPS Status: {response.status_code} {response.reason}")
 
-        # Output data for propagation
-        output_data = {
-            'status_code': response.status_code,
-            'reason': response.reason,
-            'content': response_body,
-            'size': len(response_body),
-            'headers': dict(response.headers),
-            'url': url,
-            'elapsed_ms': response.elapsed.total_seconds() * 1000
-        }
-
-        # If parsed as JSON, add it too
-        if parsed_json is not None:
-            output_data['json'] = parsed_json
+            if tofile:
+                output_data = _download_output(response, tofile, param, url, wallet)
+                if response.status_code >= 400:
+                    task_success = False
+                    error_msg = output_data['error']
+            else:
+                response_body = response.content.decode('utf-8', errors='ignore')
+
+                # Try to parse as JSON
+                parsed_json = None
+                content_type = response.headers.get('Content-Type', '')
+                if 'application/json' in content_type:
+                    try:
+                        parsed_json = oacommon.json_loads(response.content)
+                        logger.debug("Response parsed as JSON")
+                    except ValueError:
+                        logger.debug("Failed to parse response as JSON")
+
+                # Consider status >=400 as failure
+                if response.status_code >= 400:
+                    task_success = False
+                    error_msg = f"HTTPS error {response.status_code} {response.reason}"
+
+                # Handle printout
+                if oacommon.checkparam('printout', param):
+                    printout = param['printout']
+                    if printout:
+                        if len(response_body) > 1000:
+                            logger.info(f"Response (first 1000 chars):\n{response_body[:1000]}...")
+                        else:
+                            logger.info(f"Response:\n{response_body}")
+
+                # Save to variable (backward compatibility)
+                if oacommon.checkparam('saveonvar', param):
+                    saveonvar = param['saveonvar']
+                    gdict[saveonvar] = response_body
+                    logger.debug(f"Response saved to variable: {saveonvar}")
+
+                logger.info(f"HTTPS GET completed, response size: {len(response_body)} bytes")
+
+                # Output data for propagation
+                output_data = {
+                    'status_code': response.status_code,
+                    'reason': response.reason,
+                    'content': response_body,
+                    'size': len(response_body),
+                    'headers': dict(response.headers),
+                    'url': url,
+                    'elapsed_ms': response.elapsed.total_seconds() * 1000
+                }
+
+                # If parsed as JSON, add it too
+                if parsed_json is not None:
+                    output_data['json'] = parsed_json
+
+                if cache_status:
+                    output_data['cache'] = cache_status
+                    output_data['from_cache'] = cache_status in ('fresh', 'revalidated')
 
     except requests.exceptions.SSLError as e:
         task_success = False
@@ -463,6 +1097,8 @@ def httppost(self, param):
             - data: data to send (can come from previous input) - supports {WALLET:key}
             - headers: (optional) dict with custom headers - supports {WALLET:key} in values
             - content_type: (optional) default 'application/json'
+            - session: (optional) reuse the pooled keep-alive session of the host, default True
+            - rate_limit, circuit_failures: (optional) task rate limit and host circuit breaker, as in httpsget
             - input: (optional) data from previous task
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -614,7 +1250,7 @@ def httppost(self, param):
         logger.info(f"HTTP POST: {url}")
         logger.debug(f"Data size: {len(post_body)} bytes")
 
-        response = requests.post(url, data=post_body, headers=headers, timeout=30)
+        response = http_request('POST', url, param, data=post_body, headers=headers)
 
         logger.info(f"HTTP Status: {response.status_code} {response.reason}")
 
@@ -624,7 +1260,7 @@ def httppost(self, param):
         parsed_json = None
         if 'application/json' in response.headers.get('Content-Type', ''):
             try:
-                parsed_json = response.json()
+                parsed_json = oacommon.json_loads(response.content)
             except:
                 pass
 
@@ -671,6 +1307,8 @@ def httpspost(self, param):
             - headers: (optional) dict with custom headers - supports {WALLET:key} in values (e.g., API key)
             - content_type: (optional) default 'application/json'
             - verify: (optional) verify SSL certificate, default True
+            - session: (optional) reuse the pooled keep-alive session of the host, default True
+            - rate_limit, circuit_failures: (optional) task rate limit and host circuit breaker, as in httpsget
             - input: (optional) data from previous task
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -827,7 +1465,7 @@ def httpspost(self, param):
         logger.info(f"HTTPS POST: {url}")
         logger.debug(f"Data size: {len(post_body)} bytes")
 
-        response = requests.post(url, data=post_body, headers=headers, verify=verify, timeout=30)
+        response = http_request('POST', url, param, data=post_body, headers=headers, verify=verify)
 
         logger.info(f"HTTPS Status: {response.status_code} {response.reason}")
 
@@ -836,7 +1474,7 @@ def httpspost(self, param):
         parsed_json = None
         if 'application/json' in response.headers.get('Content-Type', ''):
             try:
-                parsed_json = response.json()
+                parsed_json = oacommon.json_loads(response.content)
             except:
                 pass
 
@@ -872,3 +1510,206 @@ def httpspost(self, param):
             task_store.set_result(task_id, task_success, error_msg)
 
     return task_success, output_data
+
+
+# ----------------------------------------
+# Batch requests
+# ----------------------------------------
+
+def _resolve_values(value, wallet):
+    """Resolves placeholders in strings of a (nested) header/body structure"""
+    if isinstance(value, str):
+        return oacommon.get_param({'value': value}, 'value', wallet) or value
+    if isinstance(value, dict):
+        return {k: _resolve_values(v, wallet) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_resolve_values(v, wallet) for v in value]
+    return value
+
+
+_TEMPLATE_FIELD = re.compile(r'\{(\w+)\}')
+
+
+def _batch_specs(param, wallet):
+    """
+    Builds the request specs of httpbatch
+
+    Either 'requests' (list of {url, method, headers, params, json, data})
+    or 'url_template' filled with each item of 'values' ({value}, or the
+    keys of dict items; URL-quoted). Values default to the list in the
+    previous output.
+    """
+    method = param.get('method', 'GET').upper()
+    headers = _resolve_values(param.get('headers') or {}, wallet)
+
+    if param.get('requests') is not None:
+        specs = []
+        for item in param['requests']:
+            spec = {'url': item} if isinstance(item, str) else dict(item)
+            if not spec.get('url'):
+                raise ValueError(f"Request without url: {item!r}")
+            spec['url'] = _resolve_values(spec['url'], wallet)
+            spec['method'] = spec.get('method', method).upper()
+            spec['headers'] = dict(headers, **_resolve_values(spec.get('headers') or {}, wallet))
+            specs.append(spec)
+        return specs
+
+    # Not resolved up front: get_param would evaluate the {value} fields
+    template = param.get('url_template')
+    if not template:
+        raise ValueError("httpbatch requires 'requests' or 'url_template'")
+
+    values = param.get('values')
+    if values is None:
+        prev_input = param.get('input')
+        if isinstance(prev_input, dict):
+            prev_input = prev_input.get('json', prev_input.get('rows'))
+        values = prev_input
+    if not isinstance(values, list):
+        raise ValueError("url_template requires a list of 'values' (or a list from the previous task)")
+
+    body = param.get('json')
+    specs = []
+    for value in values:
+        fields = value if isinstance(value, dict) else {'value': value}
+        url = _TEMPLATE_FIELD.sub(
+            lambda m: quote(str(fields[m.group(1)]), safe='') if m.group(1) in fields else m.group(0),
+            template
+        )
+        spec = {'url': _resolve_values(url, wallet), 'method': method, 'headers': headers}
+        if body is not None:
+            spec['json'] = value if body == '{value}' else body
+        specs.append(spec)
+    return specs
+
+
+def _send_batch_request(index, spec, param, verify):
+    """Sends one request of a batch, never raising"""
+    result = {'index': index, 'url': spec['url'], 'method': spec['method']}
+    kwargs = {key: spec[key] for key in ('params', 'json', 'data') if spec.get(key) is not None}
+    started = time.monotonic()
+    try:
+        response = http_request(spec['method'], spec['url'], param,
+                                headers=spec['headers'], verify=verify, **kwargs)
+        result['status_code'] = response.status_code
+        result['ok'] = response.status_code < 400
+        if 'application/json' in response.headers.get('Content-Type', ''):
+            try:
+                result['json'] = oacommon.json_loads(response.content)
+            except ValueError:
+                result['content'] = response.content.decode('utf-8', errors='ignore')
+        else:
+            result['content'] = response.content.decode('utf-8', errors='ignore')
+        if not result['ok']:
+            result['error'] = f"HTTP error {response.status_code} {response.reason}"
+    except Exception as e:
+        result.update(status_code=None, ok=False, error=str(e))
+    result['elapsed_ms'] = (time.monotonic() - started) * 1000
+    return result
+
+
+@oacommon.trace
+def httpbatch(self, param):
+    """
+    Executes many HTTP(S) requests concurrently in a single task
+
+    Args:
+        param: dict with:
+            - requests: list of URLs or {url, method, headers, params, json, data} - supports {WALLET:key}, {ENV:var}
+            - url_template: (alternative) URL with {value} (or {key} for dict values) placeholders
+            - values: (optional) values for url_template, default: list from previous task output
+            - method: (optional) HTTP method, default GET
+            - headers: (optional) headers for every request - supports {WALLET:key} in values
+            - json: (optional) body for url_template requests ('{value}' sends the value itself)
+            - concurrency: (optional) requests in flight at the same time, default 8
+            - rate_limit: (optional) max requests per second per host for this task, on top of
+              the host limit shared by every task (see ratelimit), default unlimited
+            - verify: (optional) verify SSL certificate, default True
+            - timeout: (optional) per-request timeout in seconds, default 30
+            - fail_on_error: (optional) fail the task if any request fails, default True
+            - input: (optional) data from previous task
+            - workflow_context: (optional) workflow context
+            - task_id: (optional) unique task id
+            - task_store: (optional) TaskResultStore instance
+
+    Returns:
+        tuple: (success, output_dict) with one result per request, in request order
+
+    Example YAML:
+        # Enrich the ids returned by the previous task, 16 at a time, at most 50 requests/s
+        - name: fetch_customers
+          module: oa-network
+          function: httpbatch
+          url_template: "https://api.example.com/v1/customers/{value}"
+          concurrency: 16
+          rate_limit: 50
+          headers:
+            Authorization: "Bearer {VAULT:api_token}"
+
+        # Explicit list of requests
+        - name: health_checks
+          module: oa-network
+          function: httpbatch
+          fail_on_error: false
+          requests:
+            - "https://svc-a.internal/health"
+            - url: "https://svc-b.internal/status"
+              params: {verbose: 1}
+    """
+    func_name = myself()
+    logger.info("Executing HTTP batch")
+
+    task_id = param.get("task_id")
+    task_store = param.get("task_store")
+    task_success = True
+    error_msg = ""
+    output_data = None
+
+    try:
+        wallet = gdict.get('_wallet')
+        specs = _batch_specs(param, wallet)
+        concurrency = max(1, int(param.get('concurrency', 8)))
+        verify = param.get('verify', True)
+        if not verify:
+            logger.warning("SSL certificate verification DISABLED")
+            import urllib3
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+        # Host pools at least as large as the concurrency, so connections are reused
+        session_param = dict(param, pool_maxsize=param.get(
+            'pool_maxsize', max(concurrency, SESSION_DEFAULTS['pool_maxsize'])))
+
+        logger.info(f"Sending {len(specs)} request(s) with concurrency {concurrency}")
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='oa-http-batch') as executor:
+            results = list(executor.map(
+                oacommon.in_context(lambda item: _send_batch_request(item[0], item[1], session_param, verify)),
+                enumerate(specs)
+            ))
+        elapsed_ms = (time.monotonic() - started) * 1000
+
+        failed = [r for r in results if not r['ok']]
+        logger.info(f"HTTP batch completed: {len(results) - len(failed)} ok, {len(failed)} failed "
+                    f"in {elapsed_ms:.0f} ms")
+
+        if failed and param.get('fail_on_error', True):
+            task_success = False
+            error_msg = f"{len(failed)} of {len(results)} request(s) failed (first: {failed[0]['error']})"
+
+        output_data = {
+            'results': results,
+            'count': len(results),
+            'succeeded': len(results) - len(failed),
+            'failed': len(failed),
+            'elapsed_ms': elapsed_ms
+        }
+
+    except Exception as e:
+        task_success = False
+        error_msg = str(e)
+        logger.error(f"{func_name} failed: {e}", exc_info=True)
+    finally:
+        if task_store and task_id:
+            task_store.set_result(task_id, task_success, error_msg)
+
+    return task_success, output_data
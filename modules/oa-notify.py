@@ -7,13 +7,16 @@ Support for wallet, placeholder {WALLET:key}, {ENV:var} and {VAULT:key}
 
 import oacommon
 import inspect
-import requests
 import smtplib
 import ssl
 import json
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from logger_config import AutomatorLogger
+import ratelimit
+
+# Heavy dependencies are imported on first use
+requests = oacommon.lazy_import('requests')
 
 logger = AutomatorLogger.get_logger('oa-notify')
 logger.setLevel('DEBUG')
@@ -39,6 +42,9 @@ def sendtelegramnotify(self, param):
             - chatid: list of chat_ids - supports {WALLET:key}, {ENV:var}
             - message: message to send (can come from previous task input) - supports {WALLET:key}, {ENV:var}
             - printresponse: (optional) print response
+            - rate_limit: (optional) messages per second to the Telegram API for this task, on top
+              of the host limit (OA_RATE_LIMITS); repeated 5xx/429/network errors open a circuit
+              (see ratelimit)
             - input: (optional) data from previous task
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -135,7 +141,10 @@ def sendtelegramnotify(self, param):
             )
 
             try:
-                response = requests.get(send_text, timeout=10)
+                response = ratelimit.guarded(
+                    send_text, ratelimit.guard_options(param),
+                    lambda: requests.get(send_text, timeout=10)
+                )
 
                 if response.status_code != 200:
                     error_detail = f"Telegram API error for chat {cid}: {response.status_code} {response.reason}"
@@ -156,6 +165,13 @@ def sendtelegramnotify(self, param):
                         if param['printresponse']:
                             logger.info(f"Response: {response.json()}")
 
+            except ratelimit.RateLimitError as e:
+                error_detail = f"Not sent to chat {cid}: {str(e)}"
+                logger.error(error_detail)
+                failed_sends.append({
+                    'chat_id': cid,
+                    'error': error_detail
+                })
             except requests.exceptions.RequestException as e:
                 error_detail = f"Connection error for chat {cid}: {str(e)}"
                 logger.error(error_detail)
@@ -5,16 +5,35 @@ Manages PostgreSQL database operations with data propagation
 Support for wallet, placeholder {WALLET:key}, {ENV:var} and {VAULT:key}
 """
 
-import psycopg2
 import inspect
 import oacommon
-import tabulate
-import json
+import io
+import os
+import csv
+import time
+import uuid
+import atexit
+import hashlib
+import weakref
+import threading
 import logging
+from collections import deque
+from decimal import Decimal
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from logger_config import AutomatorLogger
 
 logger = AutomatorLogger.get_logger('oa-pg')
 
+# Heavy dependencies are imported on first use
+psycopg2 = oacommon.lazy_import('psycopg2')
+psycopg2_extras = oacommon.lazy_import('psycopg2.extras')
+tabulate = oacommon.lazy_import('tabulate')
+# Optional: only needed for columnar_backend numpy/arrow and toparquetfile
+numpy = oacommon.lazy_import('numpy')
+pyarrow = oacommon.lazy_import('pyarrow')
+pyarrow_parquet = oacommon.lazy_import('pyarrow.parquet')
+
 gdict = {}
 
 def setgdict(self, gdict_param):
@@ -24,44 +43,641 @@ def setgdict(self, gdict_param):
 
 myself = lambda: inspect.stack()[1][3]
 
-def executeFatchAll(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, statement):
+# ----------------------------------------
+# Connection pool
+# ----------------------------------------
+
+POOL_DEFAULTS = {
+    'pool': True,               # False = one connection per task (legacy behaviour)
+    'pool_min': 0,              # idle connections kept open after eviction
+    'pool_max': 10,             # max connections per (host, port, db, user)
+    'pool_idle_timeout': 300,   # seconds an idle connection is kept
+    'pool_check_after': 30,     # idle seconds after which a connection is pinged
+    'pool_timeout': 30,         # seconds to wait for a free connection
+}
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no pooled connection becomes available in time"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool for a single (host, port, db, user)
+
+    Connections are returned rolled back, pinged before reuse when they have
+    been idle for a while, and closed once idle past idle_timeout (keeping
+    at least minconn idle).
+    """
+
+    def __init__(self, connect_kwargs, minconn=0, maxconn=10, idle_timeout=300,
+                 check_after=30, timeout=30):
+        self.connect_kwargs = connect_kwargs
+        self.minconn = max(0, int(minconn))
+        self.maxconn = max(1, int(maxconn))
+        self.idle_timeout = float(idle_timeout)
+        self.check_after = float(check_after)
+        self.timeout = float(timeout)
+        self._idle = deque()  # (conn, last_used), most recently used on the right
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0, 'evicted': 0, 'waits': 0}
+
+    @staticmethod
+    def _is_closed(conn):
+        return getattr(conn, 'closed', 0) != 0
+
+    def _healthy(self, conn, idle_for):
+        """Checks a connection before handing it out again"""
+        if self._is_closed(conn):
+            return False
+        if idle_for < self.check_after:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception as e:
+            logger.debug(f"Pooled connection failed health check: {e}")
+            return False
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now):
+        """Closes connections idle for longer than idle_timeout (oldest first)"""
+        while len(self._idle) > self.minconn and now - self._idle[0][1] > self.idle_timeout:
+            conn, _ = self._idle.popleft()
+            self._close(conn)
+            self.stats['evicted'] += 1
+
+    def getconn(self):
+        """Borrows a connection, opening a new one if the pool is not full"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    self._evict_idle(now)
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        candidate = (conn, now - last_used)
+                        self._in_use += 1
+                        break
+                    if self._in_use < self.maxconn:
+                        self._in_use += 1
+                        break
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No PostgreSQL connection available within {self.timeout}s "
+                            f"(pool_max={self.maxconn})"
+                        )
+                    self.stats['waits'] += 1
+                    self._cond.wait(remaining)
+
+            if candidate is None:
+                break
+
+            # Health check outside the lock: a ping must not block other borrowers
+            conn, idle_for = candidate
+            if self._healthy(conn, idle_for):
+                with self._cond:
+                    self.stats['reused'] += 1
+                return conn
+            self._close(conn)
+            with self._cond:
+                self._in_use -= 1
+                self.stats['discarded'] += 1
+
+        # Connect outside the lock: handshakes must not serialize other borrowers
+        try:
+            conn = psycopg2.connect(**self.connect_kwargs)
+        except BaseException:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats['created'] += 1
+        return conn
+
+    def putconn(self, conn, discard=False):
+        """Returns a borrowed connection; broken connections are closed"""
+        if not discard and not self._is_closed(conn):
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+        else:
+            discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard:
+                self._close(conn)
+                self.stats['discarded'] += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._evict_idle(time.monotonic())
+            self._cond.notify()
+
+    def closeall(self):
+        """Closes all idle connections"""
+        with self._cond:
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._close(conn)
+
+    def status(self):
+        """Pool counters for monitoring"""
+        with self._cond:
+            return dict(self.stats, idle=len(self._idle), in_use=self._in_use, max=self.maxconn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport):
+    # Password digest in the key: a rotated password gets a fresh pool
+    digest = hashlib.sha256(str(pgdbpassword).encode()).hexdigest()[:16]
+    return (str(pgdbhost), str(pgdbport), str(pgdatabase), str(pgdbusername), digest)
+
+
+def get_pool(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, options=None):
+    """Returns the process-wide pool for the given connection parameters"""
+    options = dict(POOL_DEFAULTS, **(options or {}))
+    key = _pool_key(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                dict(host=pgdbhost, port=pgdbport, database=pgdatabase,
+                     user=pgdbusername, password=pgdbpassword),
+                minconn=options['pool_min'],
+                maxconn=options['pool_max'],
+                idle_timeout=options['pool_idle_timeout'],
+                check_after=options['pool_check_after'],
+                timeout=options['pool_timeout'],
+            )
+            _pools[key] = pool
+            logger.debug(f"Created connection pool for {pgdbhost}:{pgdbport}/{pgdatabase} (max={pool.maxconn})")
+    return pool
+
+
+def close_pools():
+    """Closes idle connections of every pool and forgets them"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.closeall()
+
+
+def pool_status():
+    """Status of every pool, keyed by 'user@host:port/db'"""
+    with _pools_lock:
+        items = list(_pools.items())
+    return {f"{k[3]}@{k[0]}:{k[1]}/{k[2]}": pool.status() for k, pool in items}
+
+
+atexit.register(close_pools)
+
+
+def _pool_options(param):
+    """Extracts pool options from task params (falling back to defaults)"""
+    options = {key: param.get(key, default) for key, default in POOL_DEFAULTS.items()}
+    # Values from the wallet/environment are strings: "false" disables the pool
+    options['pool'] = str(options['pool']).lower() in ('1', 'true', 'yes')
+    return options
+
+
+@contextmanager
+def pgconnection(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, pool_options=None):
+    """
+    Context manager yielding a connection, borrowed from the pool unless
+    pool_options['pool'] is false. Connection errors discard the connection.
+    """
+    options = dict(POOL_DEFAULTS, **(pool_options or {}))
+
+    if not options['pool']:
+        conn = psycopg2.connect(
+            host=pgdbhost,
+            port=pgdbport,
+            database=pgdatabase,
+            user=pgdbusername,
+            password=pgdbpassword
+        )
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    pool = get_pool(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, options)
+    conn = pool.getconn()
+    try:
+        yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        pool.putconn(conn, discard=True)
+        raise
+    except BaseException:
+        pool.putconn(conn)
+        raise
+    else:
+        pool.putconn(conn)
+
+
+def executeFatchAll(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, statement,
+                    pool_options=None, params=None):
     """Helper to execute SELECT and fetch all rows"""
-    conn = psycopg2.connect(
-        host=pgdbhost,
-        port=pgdbport,
-        database=pgdatabase,
-        user=pgdbusername,
-        password=pgdbpassword
-    )
-    cur = conn.cursor()
-    cur.execute(statement)
+    with pgconnection(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, pool_options) as conn:
+        cur = conn.cursor()
+        if params is None:
+            cur.execute(statement)
+        else:
+            cur.execute(statement, params)
 
-    # Also retrieve column names
-    columns = [desc[0] for desc in cur.description] if cur.description else []
-    rows = cur.fetchall()
+        # Also retrieve column names
+        columns = [desc[0] for desc in cur.description] if cur.description else []
+        rows = cur.fetchall()
 
-    cur.close()
-    conn.close()
+        cur.close()
 
     return rows, columns
 
-def executeStatement(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, statement):
+def executeStatement(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, statement,
+                     pool_options=None):
     """Helper to execute INSERT/UPDATE/DELETE"""
-    conn = psycopg2.connect(
-        host=pgdbhost,
-        port=pgdbport,
-        database=pgdatabase,
-        user=pgdbusername,
-        password=pgdbpassword
-    )
-    cur = conn.cursor()
-    cur.execute(statement)
-    conn.commit()
-    rows = cur.rowcount
-    cur.close()
-    conn.close()
+    with pgconnection(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport, pool_options) as conn:
+        cur = conn.cursor()
+        cur.execute(statement)
+        conn.commit()
+        rows = cur.rowcount
+        cur.close()
     return rows
 
+def iterFetchChunks(conn, statement, itersize=2000, params=None):
+    """
+    Helper to run a SELECT on a named (server-side) cursor
+
+    Yields (columns, rows) chunks of at most itersize rows, so memory stays
+    bounded regardless of the result size.
+    """
+    cur = conn.cursor(name=f"oa_pg_{uuid.uuid4().hex}")
+    cur.itersize = itersize
+    try:
+        cur.execute(statement, params)
+        while True:
+            rows = cur.fetchmany(itersize)
+            if not rows:
+                break
+            # Named cursors expose description only after the first fetch
+            columns = [desc[0] for desc in cur.description] if cur.description else []
+            yield columns, rows
+    finally:
+        cur.close()
+
+
+class RowStream:
+    """
+    Lazy, re-iterable stream of result chunks for the next task
+
+    The query runs when the stream is iterated (again at every iteration:
+    consumers read it once), on a pooled connection that is returned as
+    soon as the iteration ends. Each item is a list of rows
+    (dicts, or tuples when format is 'rows'), or a dict of column lists
+    when columnar is set.
+    """
+
+    def __init__(self, connection_args, statement, itersize=2000, as_dict=True, pool_options=None,
+                 columnar=False):
+        self.connection_args = connection_args
+        self.statement = statement
+        self.itersize = itersize
+        self.as_dict = as_dict
+        self.pool_options = pool_options
+        self.columnar = columnar
+        self.columns = []
+
+    def __iter__(self):
+        with pgconnection(*self.connection_args, pool_options=self.pool_options) as conn:
+            for columns, rows in iterFetchChunks(conn, self.statement, self.itersize):
+                self.columns = columns
+                if self.columnar:
+                    yield toColumnar(columns, rows)
+                elif self.as_dict:
+                    yield [dict(zip(columns, row)) for row in rows]
+                else:
+                    yield list(rows)
+
+    def __repr__(self):
+        statement = self.statement if len(self.statement) <= 60 else self.statement[:57] + '...'
+        return f"<RowStream itersize={self.itersize} statement={statement!r}>"
+
+    def iterrows(self):
+        """Iterates single rows instead of chunks"""
+        for chunk in self:
+            if self.columnar:
+                yield from (dict(zip(chunk, values)) for values in zip(*chunk.values()))
+            else:
+                yield from chunk
+
+
+# ----------------------------------------
+# Columnar results and file outputs
+# ----------------------------------------
+
+COLUMNAR_BACKENDS = ('list', 'numpy', 'arrow')
+STREAM_FORMATS = ('jsonl', 'json', 'csv', 'parquet')
+
+
+def toColumnar(columns, rows, backend='list'):
+    """
+    Helper to turn result rows into a dict of column arrays
+
+    backend 'list' returns plain lists, 'numpy' NumPy arrays (object dtype
+    when a column holds NULLs) and 'arrow' pyarrow Arrays. NumPy and pyarrow
+    are imported only when requested.
+    """
+    if backend not in COLUMNAR_BACKENDS:
+        raise ValueError(f"Invalid columnar_backend '{backend}' (use one of {', '.join(COLUMNAR_BACKENDS)})")
+
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+    result = {}
+    for name, column in zip(columns, values):
+        if backend == 'numpy':
+            result[name] = numpy.array(column, dtype=object if None in column else None)
+        elif backend == 'arrow':
+            result[name] = pyarrow.array(column)
+        else:
+            result[name] = list(column)
+    return result
+
+
+def _write_csv(chunks, filename):
+    """Writes (columns, rows) chunks incrementally as CSV with a header row"""
+    columns = []
+    count = 0
+    header = False
+    with open(filename, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for columns, rows in chunks:
+            if not header and columns:
+                writer.writerow(columns)
+                header = True
+            writer.writerows(rows)
+            count += len(rows)
+    return columns, count
+
+
+def _write_parquet(chunks, filename):
+    """Writes (columns, rows) chunks incrementally as row groups of a Parquet file"""
+    columns = []
+    count = 0
+    writer = None
+    try:
+        for columns, rows in chunks:
+            if not rows:
+                continue
+            data = toColumnar(columns, rows)
+            if writer is None:
+                table = pyarrow.table(data)
+                writer = pyarrow_parquet.ParquetWriter(filename, table.schema)
+            else:
+                table = pyarrow.table(data, schema=writer.schema)
+            writer.write_table(table)
+            count += len(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # No rows: still leave a (schema-less) empty file behind
+        pyarrow_parquet.write_table(pyarrow.table({name: [] for name in columns}), filename)
+    return columns, count
+
+
+def _write_stream(chunks, filename, stream_format='jsonl'):
+    """
+    Writes (columns, rows) chunks incrementally as JSON Lines, a JSON array,
+    CSV or Parquet
+
+    Returns:
+        (columns, row_count)
+    """
+    if stream_format == 'csv':
+        return _write_csv(chunks, filename)
+    if stream_format == 'parquet':
+        return _write_parquet(chunks, filename)
+
+    columns = []
+    count = 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        if stream_format == 'json':
+            f.write('[')
+        for columns, rows in chunks:
+            for row in rows:
+                line = oacommon.json_dumps(dict(zip(columns, row)))
+                if stream_format == 'json':
+                    f.write(('\n' if count == 0 else ',\n') + line)
+                else:
+                    f.write(line + '\n')
+                count += 1
+        if stream_format == 'json':
+            f.write('\n]\n')
+    return columns, count
+
+
+# ----------------------------------------
+# Partitioned (parallel) SELECT
+# ----------------------------------------
+
+def _partition_statement(statement, column, bounds):
+    """
+    Wraps a SELECT so that it returns a single partition
+
+    bounds is (low, high) as a half-open range [low, high) where either side
+    may be None (unbounded), or None for the rows where column IS NULL.
+    """
+    # The user statement becomes part of a parameterized query: escape '%'
+    base = statement.strip().rstrip(';').replace('%', '%%')
+    if bounds is None:
+        return f"SELECT * FROM ({base}) AS oa_part WHERE {column} IS NULL", ()
+
+    low, high = bounds
+    conditions, params = [], []
+    if low is not None:
+        conditions.append(f"{column} >= %s")
+        params.append(low)
+    if high is not None:
+        conditions.append(f"{column} < %s")
+        params.append(high)
+    where = ' AND '.join(conditions) or 'TRUE'
+    return f"SELECT * FROM ({base}) AS oa_part WHERE {where}", tuple(params)
+
+
+def _partition_ranges(connection_args, statement, column, partitions, pool_options=None):
+    """
+    Splits [min, max] of a numeric column into equal half-open ranges
+
+    Integer, float and NUMERIC (Decimal) columns are supported. The last range is unbounded above and a final partition collects NULLs,
+    so every row belongs to exactly one partition.
+    """
+    base = statement.strip().rstrip(';')
+    bounds_sql = f"SELECT min({column}), max({column}) FROM ({base}) AS oa_bounds"
+    rows, _ = executeFatchAll(*connection_args, bounds_sql, pool_options=pool_options)
+    low, high = rows[0] if rows else (None, None)
+
+    if low is None:
+        return [None]
+    if isinstance(low, Decimal) and isinstance(high, Decimal):
+        # NUMERIC columns: integral bounds as int, otherwise exact Decimal steps
+        if not (low.is_finite() and high.is_finite()):
+            raise ValueError(f"partition_by column '{column}' has NaN values (use explicit 'ranges')")
+        if low == low.to_integral_value() and high == high.to_integral_value():
+            low, high = int(low), int(high)
+    elif isinstance(low, bool) or not isinstance(low, (int, float)) \
+            or not isinstance(high, (int, float)):
+        raise ValueError(f"partition_by column '{column}' must be numeric (use explicit 'ranges')")
+
+    partitions = max(1, int(partitions))
+    if isinstance(low, int) and isinstance(high, int):
+        step = max(1, -(-(high - low + 1) // partitions))
+    else:
+        step = (high - low) / partitions or 1
+    cuts = [low + i * step for i in range(1, partitions) if low + i * step <= high]
+
+    edges = [low] + cuts
+    ranges = [(edges[i], edges[i + 1]) for i in range(len(edges) - 1)]
+    ranges.append((edges[-1], None))
+    ranges.append(None)
+    return ranges
+
+
+def _partition_spec(param, connection_args, statement, pool_options=None):
+    """Returns (column, ranges) from partition_by/partitions/ranges, or (None, None)"""
+    column = param.get('partition_by')
+    if not column:
+        return None, None
+
+    if param.get('ranges'):
+        ranges = []
+        for item in param['ranges']:
+            if not isinstance(item, (list, tuple)) or len(item) != 2:
+                raise ValueError(f"Invalid partition range {item!r}: expected [low, high]")
+            ranges.append((item[0], item[1]))
+        return column, ranges
+
+    return column, _partition_ranges(connection_args, statement, column,
+                                     param.get('partitions', 4), pool_options)
+
+
+def _partition_workers(param, ranges, pool_options):
+    """Number of concurrent partitions, bounded by the pool size"""
+    workers = int(param.get('parallel', len(ranges)))
+    if pool_options.get('pool', True):
+        workers = min(workers, int(pool_options.get('pool_max', POOL_DEFAULTS['pool_max'])))
+    return max(1, min(workers, len(ranges)))
+
+
+def fetchPartitions(connection_args, statement, column, ranges, workers, pool_options=None):
+    """
+    Helper to run the partitions of a SELECT concurrently
+
+    Returns:
+        (rows, columns) with rows merged in partition order
+    """
+    def run(bounds):
+        sql, params = _partition_statement(statement, column, bounds)
+        return executeFatchAll(*connection_args, sql, pool_options=pool_options, params=params)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='oa-pg-part') as executor:
+        results = list(executor.map(oacommon.in_context(run), ranges))
+
+    columns = next((cols for _, cols in results if cols), [])
+    rows = [row for part_rows, _ in results for row in part_rows]
+    return rows, columns
+
+
+def _shard_path(filename, index):
+    """Path of the shard file of a partition"""
+    base, ext = os.path.splitext(filename)
+    return f"{base}.part{index:03d}{ext}"
+
+
+def streamPartitions(connection_args, statement, column, ranges, workers, filename,
+                     stream_format='jsonl', itersize=2000, shard_output=False, pool_options=None):
+    """
+    Helper to stream the partitions of a SELECT concurrently into files
+
+    Every partition is written incrementally to its own shard. Unless
+    shard_output is set, shards are then concatenated in partition order
+    into filename and removed.
+
+    Returns:
+        (columns, row_count, files)
+    """
+    if stream_format == 'parquet' and not shard_output:
+        raise ValueError("Partitioned Parquet output requires shard_output")
+    shard_format = stream_format if shard_output or stream_format == 'csv' else 'jsonl'
+
+    def run(indexed):
+        index, bounds = indexed
+        sql, params = _partition_statement(statement, column, bounds)
+        shard = _shard_path(filename, index)
+        with pgconnection(*connection_args, pool_options=pool_options) as conn:
+            columns, count = _write_stream(iterFetchChunks(conn, sql, itersize, params), shard, shard_format)
+        return shard, columns, count
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='oa-pg-part') as executor:
+        results = list(executor.map(oacommon.in_context(run), enumerate(ranges)))
+
+    columns = next((cols for _, cols, _ in results if cols), [])
+    row_count = sum(count for _, _, count in results)
+    shards = [shard for shard, _, _ in results]
+
+    if shard_output:
+        return columns, row_count, shards
+
+    if stream_format == 'csv':
+        with open(filename, 'w', encoding='utf-8', newline='') as out:
+            writer = csv.writer(out)
+            if row_count:
+                writer.writerow(columns)
+            for shard in shards:
+                with open(shard, 'r', encoding='utf-8', newline='') as f:
+                    reader = csv.reader(f)
+                    next(reader, None)
+                    writer.writerows(reader)
+                os.remove(shard)
+        return columns, row_count, [filename]
+
+    written = 0
+    with open(filename, 'w', encoding='utf-8') as out:
+        if stream_format == 'json':
+            out.write('[')
+        for shard in shards:
+            with open(shard, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if stream_format == 'json':
+                        out.write(('\n' if written == 0 else ',\n') + line.rstrip('\n'))
+                    else:
+                        out.write(line)
+                    written += 1
+            os.remove(shard)
+        if stream_format == 'json':
+            out.write('\n]\n')
+
+    return columns, row_count, [filename]
+
+
 @oacommon.trace
 def select(self, param):
     """
@@ -77,8 +693,30 @@ def select(self, param):
             - statement: SQL query (can use input from previous task) - supports {WALLET:key}, {ENV:var}
             - printout: (optional) print result, default False
             - tojsonfile: (optional) JSON file path
+            - pretty: (optional) indent the JSON of format 'json' and tojsonfile, default False (compact)
             - saveonvar: (optional) save to variable
-            - format: (optional) 'rows', 'dict', 'json' - default 'dict'
+            - format: (optional) 'rows', 'dict', 'json', 'columnar' - default 'dict';
+              'columnar' returns {column: [values]} instead of a dict per row
+            - columnar_backend: (optional) 'list', 'numpy' or 'arrow' arrays for format columnar, default 'list'
+            - tocsvfile: (optional) CSV file path (header row + rows)
+            - toparquetfile: (optional) Parquet file path, requires pyarrow
+            - pool: (optional) reuse pooled connections, default True
+            - pool_max: (optional) max pooled connections per host/db/user, default 10
+            - pool_min: (optional) idle connections kept open, default 0
+            - pool_idle_timeout: (optional) seconds before idle connections are closed, default 300
+            - stream: (optional) use a server-side cursor, default False; rows are
+              written incrementally to tojsonfile, tocsvfile or toparquetfile (one of them),
+              or passed on as a lazy stream of chunks, read by oa-pg insert and by
+              oa-json filter/extract/transform/aggregate/join
+            - itersize: (optional) rows fetched per round trip in stream mode, default 2000
+            - stream_format: (optional) 'jsonl' or 'json' (array) for tojsonfile in stream mode, default 'jsonl'
+            - partition_by: (optional) column used to split the query into partitions run concurrently
+            - partitions: (optional) number of equal ranges of a numeric partition_by column, default 4
+            - ranges: (optional) explicit [low, high) ranges instead of partitions (null = unbounded)
+            - parallel: (optional) concurrent partitions, default one per partition (capped by pool_max)
+            - shard_output: (optional) in stream mode keep one file per partition
+              (<name>.partNNN<ext>, listed in 'files'; 'file' is then None) instead of
+              merging, default False
             - input: (optional) data from previous task
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -136,6 +774,61 @@ def select(self, param):
           pgdbport: 5432
           statement: "SELECT * FROM products WHERE category = '{WALLET:target_category}'"
 
+        # Stream a large export to JSON Lines with bounded memory
+        - name: export_events
+          module: oa-pg
+          function: select
+          pgdatabase: "analytics"
+          pgdbhost: "db-server"
+          pgdbusername: "readonly"
+          pgdbpassword: "{VAULT:readonly_pass}"
+          pgdbport: 5432
+          statement: "SELECT * FROM events"
+          stream: true
+          itersize: 5000
+          tojsonfile: "/data/events.jsonl"
+
+        # Parallel export: 8 id ranges streamed concurrently into shards
+        - name: export_orders_parallel
+          module: oa-pg
+          function: select
+          pgdatabase: "ecommerce"
+          pgdbhost: "prod-db"
+          pgdbusername: "{WALLET:reporting_user}"
+          pgdbpassword: "{VAULT:reporting_pass}"
+          pgdbport: 5432
+          statement: "SELECT * FROM orders"
+          partition_by: id
+          partitions: 8
+          stream: true
+          shard_output: true
+          tojsonfile: "/data/orders.jsonl"
+
+        # Column arrays for analytics and a Parquet copy written chunk by chunk
+        - name: daily_metrics
+          module: oa-pg
+          function: select
+          pgdatabase: "analytics"
+          pgdbhost: "db-server"
+          pgdbusername: "readonly"
+          pgdbpassword: "{VAULT:readonly_pass}"
+          pgdbport: 5432
+          statement: "SELECT day, region, revenue, orders FROM daily_metrics"
+          format: columnar
+          columnar_backend: numpy
+
+        - name: export_metrics_parquet
+          module: oa-pg
+          function: select
+          pgdatabase: "analytics"
+          pgdbhost: "db-server"
+          pgdbusername: "readonly"
+          pgdbpassword: "{VAULT:readonly_pass}"
+          pgdbport: 5432
+          statement: "SELECT * FROM daily_metrics"
+          stream: true
+          toparquetfile: "/data/daily_metrics.parquet"
+
         # Save to variable for next task
         - name: get_pending_tasks
           module: oa-pg
@@ -220,18 +913,40 @@ def select(self, param):
 
         printout = param.get('printout', False)
         format_type = param.get('format', 'dict')
+        pretty = param.get('pretty', False)
 
         logger.info(f"Executing SELECT on {pgdbhost}:{pgdbport}/{pgdatabase}")
         logger.debug(f"Statement: {statement[:100]}..." if len(statement) > 100 else f"Statement: {statement}")
 
-        resultset, columns = executeFatchAll(
-            pgdatabase=pgdatabase,
-            pgdbhost=pgdbhost,
-            pgdbpassword=pgdbpassword,
-            pgdbport=pgdbport,
-            pgdbusername=pgdbusername,
-            statement=statement
-        )
+        if param.get('stream', False):
+            output_data = _select_stream(
+                param, wallet, format_type,
+                (pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport), statement
+            )
+            if printout:
+                print(f"Rows streamed: {output_data['row_count']}")
+            logger.info(f"{func_name} completed successfully")
+            return task_success, output_data
+
+        connection_args = (pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport)
+        partition_column, ranges = _partition_spec(param, connection_args, statement, _pool_options(param))
+
+        if ranges:
+            workers = _partition_workers(param, ranges, _pool_options(param))
+            logger.info(f"Running {len(ranges)} partition(s) on '{partition_column}' with {workers} worker(s)")
+            resultset, columns = fetchPartitions(
+                connection_args, statement, partition_column, ranges, workers, _pool_options(param)
+            )
+        else:
+            resultset, columns = executeFatchAll(
+                pgdatabase=pgdatabase,
+                pgdbhost=pgdbhost,
+                pgdbpassword=pgdbpassword,
+                pgdbport=pgdbport,
+                pgdbusername=pgdbusername,
+                statement=statement,
+                pool_options=_pool_options(param)
+            )
 
         logger.info(f"Query returned {len(resultset)} row(s) with {len(columns)} column(s)")
 
@@ -245,13 +960,17 @@ def select(self, param):
                     row_dict[col_name] = row[i]
                 formatted_results.append(row_dict)
             logger.debug(f"Results formatted as list of dicts")
+        elif format_type == 'columnar':
+            # One array per column: no per-row dict, vectorizable downstream
+            formatted_results = toColumnar(columns, resultset, param.get('columnar_backend', 'list'))
+            logger.debug(f"Results formatted as columns")
         elif format_type == 'json':
             # JSON string
             temp_results = []
             for row in resultset:
                 row_dict = {columns[i]: row[i] for i in range(len(columns))}
                 temp_results.append(row_dict)
-            formatted_results = json.dumps(temp_results, default=str, indent=2)
+            formatted_results = oacommon.json_dumps(temp_results, pretty=pretty)
         else:  # 'rows'
             # Raw tuples
             formatted_results = resultset
@@ -280,9 +999,19 @@ def select(self, param):
                 for row in resultset:
                     row_dict = {columns[i]: row[i] for i in range(len(columns))}
                     temp_results.append(row_dict)
-                oacommon.writefile(filename=tojsonfile_param, data=json.dumps(temp_results, default=str, indent=2))
+                oacommon.writefile(filename=tojsonfile_param, data=oacommon.json_dumps(temp_results, pretty=pretty))
             logger.info(f"Result saved to JSON file: {tojsonfile_param}")
 
+        # Save to CSV / Parquet file
+        if oacommon.checkparam('tocsvfile', param):
+            tocsvfile_param = oacommon.get_param(param, 'tocsvfile', wallet)
+            _write_csv([(columns, resultset)], tocsvfile_param)
+            logger.info(f"Result saved to CSV file: {tocsvfile_param}")
+        if oacommon.checkparam('toparquetfile', param):
+            toparquetfile_param = oacommon.get_param(param, 'toparquetfile', wallet)
+            _write_parquet([(columns, resultset)], toparquetfile_param)
+            logger.info(f"Result saved to Parquet file: {toparquetfile_param}")
+
         # Output data for propagation
         output_data = {
             'rows': formatted_results,
@@ -314,6 +1043,246 @@ def select(self, param):
 
     return task_success, output_data
 
+def _select_stream(param, wallet, format_type, connection_args, statement):
+    """Stream mode of select: server-side cursor, bounded memory"""
+    itersize = int(param.get('itersize', 2000))
+    pool_options = _pool_options(param)
+    pgdatabase, pgdbhost = connection_args[0], connection_args[1]
+
+    output_data = {
+        'rows': None,
+        'row_count': None,
+        'columns': [],
+        'database': pgdatabase,
+        'host': pgdbhost,
+        'statement': statement,
+        'streamed': True
+    }
+
+    targets = [key for key in ('tojsonfile', 'tocsvfile', 'toparquetfile') if oacommon.checkparam(key, param)]
+    if len(targets) > 1:
+        raise ValueError(f"Stream mode writes a single file, got {', '.join(targets)}")
+
+    if targets:
+        tojsonfile_param = oacommon.get_param(param, targets[0], wallet) or param.get(targets[0])
+        if targets[0] == 'tocsvfile':
+            stream_format = 'csv'
+        elif targets[0] == 'toparquetfile':
+            stream_format = 'parquet'
+        else:
+            stream_format = param.get('stream_format', 'jsonl')
+            if stream_format not in ('jsonl', 'json'):
+                raise ValueError(f"Invalid stream_format '{stream_format}' (use 'jsonl' or 'json')")
+
+        partition_column, ranges = _partition_spec(param, connection_args, statement, pool_options)
+        shard_output = bool(ranges) and param.get('shard_output', False)
+        if ranges:
+            workers = _partition_workers(param, ranges, pool_options)
+            logger.info(f"Streaming {len(ranges)} partition(s) on '{partition_column}' with {workers} worker(s)")
+            columns, row_count, files = streamPartitions(
+                connection_args, statement, partition_column, ranges, workers, tojsonfile_param,
+                stream_format=stream_format, itersize=itersize,
+                shard_output=shard_output, pool_options=pool_options
+            )
+            output_data['files'] = files
+        else:
+            with pgconnection(*connection_args, pool_options=pool_options) as conn:
+                columns, row_count = _write_stream(
+                    iterFetchChunks(conn, statement, itersize), tojsonfile_param, stream_format
+                )
+
+        logger.info(f"Streamed {row_count} row(s) to {tojsonfile_param} ({stream_format})")
+        # With shard_output only the shards in 'files' exist, never the target itself
+        output_data.update(row_count=row_count, columns=columns, file=None if shard_output else tojsonfile_param)
+    elif param.get('partition_by'):
+        raise ValueError("Partitioned stream requires tojsonfile, tocsvfile or toparquetfile")
+    else:
+        stream = RowStream(connection_args, statement, itersize,
+                           as_dict=(format_type != 'rows'), pool_options=pool_options,
+                           columnar=(format_type == 'columnar'))
+        output_data['rows'] = stream
+        logger.info(f"Result passed on as a stream of chunks (itersize={itersize})")
+
+    if oacommon.checkparam('saveonvar', param):
+        gdict[param['saveonvar']] = output_data['rows']
+
+    return output_data
+
+# ----------------------------------------
+# Multi-statement units and transactions
+# ----------------------------------------
+
+def _statement_list(param, statement, wallet=None):
+    """
+    Normalizes the statements of an execute task
+
+    Each item of 'statements' is a SQL string or a dict with 'statement' and
+    optionally 'params' (one bound execution) or 'batch' (list of parameter
+    sets run with execute_batch). A single 'statement' may use 'params'/'batch'.
+    """
+    raw = param.get('statements')
+    if raw is None:
+        raw = [{'statement': statement, 'params': param.get('params'), 'batch': param.get('batch')}]
+    if not isinstance(raw, list) or not raw:
+        raise ValueError("'statements' must be a non-empty list")
+
+    items = []
+    for item in raw:
+        if isinstance(item, str):
+            item = {'statement': item}
+        if not isinstance(item, dict) or not item.get('statement'):
+            raise ValueError(f"Invalid statement entry: {item!r}")
+        items.append({
+            'statement': oacommon.get_param(item, 'statement', wallet),
+            'params': item.get('params'),
+            'batch': item.get('batch'),
+        })
+    return items
+
+
+def executeStatements(conn, statements, page_size=100):
+    """
+    Helper to run statements on a connection without committing
+
+    Returns:
+        list of {'statement', 'rows_affected'} ('executions' for batches)
+    """
+    results = []
+    cur = conn.cursor()
+    try:
+        for item in statements:
+            sql = item['statement']
+            if item.get('batch') is not None:
+                argslist = [tuple(args) if isinstance(args, list) else args for args in item['batch']]
+                psycopg2_extras.execute_batch(cur, sql, argslist, page_size=page_size)
+                # execute_batch only reports the rowcount of its last page
+                results.append({'statement': sql, 'rows_affected': None, 'executions': len(argslist)})
+            else:
+                params = item.get('params')
+                if params is None:
+                    cur.execute(sql)
+                else:
+                    cur.execute(sql, tuple(params) if isinstance(params, list) else params)
+                results.append({'statement': sql, 'rows_affected': cur.rowcount})
+    finally:
+        cur.close()
+    return results
+
+
+class _Transaction:
+    """Connection held open across consecutive tasks of a named transaction"""
+
+    def __init__(self, name, conn, release):
+        self.name = name
+        self.conn = conn
+        self._release = release
+        self.aborted = None
+        self.started = time.monotonic()
+
+    def finish(self, commit):
+        """Commits or rolls back and gives the connection back"""
+        conn, self.conn = self.conn, None
+        if conn is None:
+            return
+        try:
+            if commit:
+                conn.commit()
+            else:
+                conn.rollback()
+        finally:
+            self._release(conn, discard=not commit and self.aborted is not None)
+
+
+def _abandon_transaction(transaction):
+    """Rolls back a transaction left open when its workflow context goes away"""
+    if transaction.conn is not None:
+        logger.warning(f"Transaction '{transaction.name}' was never ended, rolling back")
+        try:
+            transaction.finish(commit=False)
+        except Exception as e:
+            logger.debug(f"Rollback of abandoned transaction failed: {e}")
+
+
+def _abandon_transactions(registry):
+    """Rolls back and releases every transaction still open in the registry"""
+    for name in list(registry):
+        _abandon_transaction(registry.pop(name))
+
+
+# Named transactions when no workflow context is available
+_transactions = {}
+
+
+def _transaction_registry(param):
+    """Registry of open transactions: per workflow context, else process-wide"""
+    context = param.get('workflow_context')
+    if context is not None and hasattr(context, 'get_global'):
+        registry = context.get_global('_pg_transactions')
+        if registry is None:
+            registry = {}
+            context.set_global('_pg_transactions', registry)
+            if hasattr(context, 'add_cleanup'):
+                context.add_cleanup(lambda: _abandon_transactions(registry))
+        return registry, context
+    return _transactions, None
+
+
+def _begin_transaction(param, name, connection_args, pool_options):
+    """Returns the open transaction 'name', starting it if needed"""
+    registry, context = _transaction_registry(param)
+    transaction = registry.get(name)
+
+    if transaction is not None and transaction.aborted:
+        if param.get('transaction_end'):
+            del registry[name]
+        raise RuntimeError(f"Transaction '{name}' was rolled back: {transaction.aborted}")
+    if transaction is not None:
+        return transaction
+
+    if pool_options.get('pool', True):
+        pool = get_pool(*connection_args, options=pool_options)
+        conn = pool.getconn()
+        release = pool.putconn
+    else:
+        pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport = connection_args
+        conn = psycopg2.connect(host=pgdbhost, port=pgdbport, database=pgdatabase,
+                                user=pgdbusername, password=pgdbpassword)
+        release = lambda c, discard=False: c.close()
+
+    transaction = _Transaction(name, conn, release)
+    registry[name] = transaction
+    if context is not None:
+        # Fallback for contexts that never run their cleanups
+        weakref.finalize(context, _abandon_transaction, transaction)
+    logger.info(f"Transaction '{name}' started")
+    return transaction
+
+
+def _run_in_transaction(param, name, connection_args, pool_options, statements, page_size):
+    """Runs statements inside the named transaction, ending it if requested"""
+    registry, _ = _transaction_registry(param)
+    transaction = _begin_transaction(param, name, connection_args, pool_options)
+    end = param.get('transaction_end')
+    if end not in (None, 'commit', 'rollback'):
+        raise ValueError(f"Invalid transaction_end '{end}' (use 'commit' or 'rollback')")
+
+    try:
+        results = executeStatements(transaction.conn, statements, page_size)
+    except Exception as e:
+        transaction.aborted = str(e)
+        transaction.finish(commit=False)
+        if end:
+            registry.pop(name, None)
+        logger.error(f"Transaction '{name}' rolled back")
+        raise
+
+    if end:
+        transaction.finish(commit=(end == 'commit'))
+        registry.pop(name, None)
+        logger.info(f"Transaction '{name}' ended with {end}")
+    return results
+
+
 @oacommon.trace
 def execute(self, param):
     """
@@ -328,7 +1297,21 @@ def execute(self, param):
             - pgdbport: port - supports {ENV:var}
             - statement: SQL statement (can use input from previous task) - supports {WALLET:key}, {ENV:var}
             - printout: (optional) print result, default False
+            - tojsonfile: (optional) JSON file path for the result
+            - pretty: (optional) indent the tojsonfile JSON, default False (compact)
             - fail_on_zero: (optional) fail if 0 rows affected, default False
+            - params: (optional) values bound to the %s placeholders of statement
+            - batch: (optional) list of parameter sets run with execute_batch
+            - statements: (optional) list of SQL strings or {statement, params, batch}
+              run on one connection with a single commit (all or nothing)
+            - page_size: (optional) execute_batch page size, default 100
+            - transaction: (optional) name of a transaction shared by consecutive tasks;
+              it stays open until a task sets transaction_end (rolled back if the workflow ends first)
+            - transaction_end: (optional) 'commit' or 'rollback' to end the transaction
+            - pool: (optional) reuse pooled connections, default True
+            - pool_max: (optional) max pooled connections per host/db/user, default 10
+            - pool_min: (optional) idle connections kept open, default 0
+            - pool_idle_timeout: (optional) seconds before idle connections are closed, default 300
             - input: (optional) data from previous task
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -431,6 +1414,47 @@ def execute(self, param):
           pgdbport: 5432
           # statement from previous task
 
+        # Several dependent statements, one round trip each, one commit
+        - name: close_period
+          module: oa-pg
+          function: execute
+          pgdatabase: "ledger"
+          pgdbhost: "db-server"
+          pgdbusername: "{WALLET:ledger_user}"
+          pgdbpassword: "{VAULT:ledger_pass}"
+          pgdbport: 5432
+          statements:
+            - "UPDATE periods SET closed = true WHERE id = 42"
+            - statement: "INSERT INTO audit (period_id, action) VALUES (%s, %s)"
+              params: [42, "close"]
+            - statement: "UPDATE balances SET amount = %s WHERE account = %s"
+              batch: [[100, "A"], [250, "B"], [75, "C"]]
+
+        # Transaction spanning consecutive tasks
+        - name: move_stock_out
+          module: oa-pg
+          function: execute
+          pgdatabase: "inventory"
+          pgdbhost: "db-server"
+          pgdbusername: "{WALLET:inv_user}"
+          pgdbpassword: "{VAULT:inv_pass}"
+          pgdbport: 5432
+          transaction: stock_move
+          statement: "UPDATE stock SET qty = qty - 5 WHERE sku = 'X1' AND site = 'A'"
+          on_success: move_stock_in
+
+        - name: move_stock_in
+          module: oa-pg
+          function: execute
+          pgdatabase: "inventory"
+          pgdbhost: "db-server"
+          pgdbusername: "{WALLET:inv_user}"
+          pgdbpassword: "{VAULT:inv_pass}"
+          pgdbport: 5432
+          transaction: stock_move
+          transaction_end: commit
+          statement: "UPDATE stock SET qty = qty + 5 WHERE sku = 'X1' AND site = 'B'"
+
         # Save result to JSON file
         - name: archive_old_data
           module: oa-pg
@@ -454,6 +1478,10 @@ def execute(self, param):
     output_data = None
 
     try:
+        # A statements list replaces the single statement
+        if 'statement' not in param and isinstance(param.get('statements'), list):
+            param['statement'] = None
+
         # If statement not specified, try to build from input
         if 'statement' not in param and 'input' in param:
             prev_input = param.get('input')
@@ -499,18 +1527,41 @@ def execute(self, param):
 
         printout = param.get('printout', False)
         fail_on_zero = param.get('fail_on_zero', False)
+        transaction_name = param.get('transaction')
+        results = None
 
         logger.info(f"Executing statement on {pgdbhost}:{pgdbport}/{pgdatabase}")
-        logger.debug(f"Statement: {statement[:100]}..." if len(statement) > 100 else f"Statement: {statement}")
 
-        rows_affected = executeStatement(
-            pgdatabase=pgdatabase,
-            pgdbhost=pgdbhost,
-            pgdbpassword=pgdbpassword,
-            pgdbport=pgdbport,
-            pgdbusername=pgdbusername,
-            statement=statement
-        )
+        if (param.get('statements') is None and param.get('params') is None
+                and param.get('batch') is None and not transaction_name):
+            logger.debug(f"Statement: {statement[:100]}..." if len(statement) > 100 else f"Statement: {statement}")
+
+            rows_affected = executeStatement(
+                pgdatabase=pgdatabase,
+                pgdbhost=pgdbhost,
+                pgdbpassword=pgdbpassword,
+                pgdbport=pgdbport,
+                pgdbusername=pgdbusername,
+                statement=statement,
+                pool_options=_pool_options(param)
+            )
+        else:
+            statements = _statement_list(param, statement, wallet)
+            connection_args = (pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport)
+            page_size = int(param.get('page_size', 100))
+            logger.info(f"Executing {len(statements)} statement(s)"
+                        + (f" in transaction '{transaction_name}'" if transaction_name else ""))
+
+            if transaction_name:
+                results = _run_in_transaction(param, transaction_name, connection_args,
+                                              _pool_options(param), statements, page_size)
+            else:
+                with pgconnection(*connection_args, pool_options=_pool_options(param)) as conn:
+                    results = executeStatements(conn, statements, page_size)
+                    conn.commit()
+
+            rows_affected = sum(r['rows_affected'] or 0 for r in results)
+            statement = statement or '; '.join(r['statement'] for r in results)
 
         logger.info(f"Statement affected {rows_affected} row(s)")
 
@@ -531,7 +1582,7 @@ def execute(self, param):
                 'statement': statement,
                 'database': pgdatabase
             }
-            oacommon.writefile(filename=tojsonfile_param, data=json.dumps(result_json, indent=2))
+            oacommon.writefile(filename=tojsonfile_param, data=oacommon.json_dumps(result_json, pretty=param.get('pretty', False)))
             logger.info(f"Result saved to JSON file: {tojsonfile_param}")
 
         # Output data for propagation
@@ -542,6 +1593,10 @@ def execute(self, param):
             'host': pgdbhost,
             'success': task_success
         }
+        if results is not None:
+            output_data['results'] = results
+        if transaction_name:
+            output_data['transaction'] = transaction_name
 
         logger.info(f"{func_name} completed successfully")
 
@@ -568,6 +1623,135 @@ def execute(self, param):
 
     return task_success, output_data
 
+INSERT_METHODS = ('executemany', 'values', 'copy')
+
+
+def _column_list(columns):
+    """Column names from a list or a comma-separated string ("id, name")"""
+    if isinstance(columns, str):
+        return [column.strip() for column in columns.split(',') if column.strip()]
+    return list(columns or [])
+
+
+def _insert_columns(rows, columns=None):
+    """
+    Column list for an insert: explicit, or the union of the row keys in
+    first-seen order (independent of the first row's key order)
+    """
+    if columns:
+        return _column_list(columns)
+    seen = {}
+    for row in rows:
+        for key in row:
+            seen.setdefault(key, None)
+    return list(seen)
+
+
+def _iter_insert_rows(data):
+    """Iterates rows of a list or of a streamed select result"""
+    if hasattr(data, 'iterrows'):
+        return data.iterrows()
+    return iter(data)
+
+
+def _prepend(first, rows):
+    """Puts back a row consumed from an iterator"""
+    yield first
+    yield from rows
+
+
+def _batches(rows, size):
+    """Splits an iterator of rows into lists of at most size rows"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _copy_value(value):
+    """Encodes a value for COPY text format (\\N = NULL)"""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = oacommon.json_dumps(value)
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _conflict_clause(columns, conflict_columns=None, on_conflict=None, update_columns=None):
+    """Builds the ON CONFLICT clause for upserts ('' when not requested)"""
+    if not on_conflict:
+        return ''
+    target = f" ({', '.join(conflict_columns)})" if conflict_columns else ''
+    if on_conflict == 'nothing':
+        return f" ON CONFLICT{target} DO NOTHING"
+    if on_conflict == 'update':
+        if not conflict_columns:
+            raise ValueError("on_conflict 'update' requires conflict_columns")
+        update_columns = update_columns or [c for c in columns if c not in conflict_columns]
+        if not update_columns:
+            return f" ON CONFLICT{target} DO NOTHING"
+        assignments = ', '.join(f"{c} = EXCLUDED.{c}" for c in update_columns)
+        return f" ON CONFLICT{target} DO UPDATE SET {assignments}"
+    raise ValueError(f"Invalid on_conflict '{on_conflict}' (use 'nothing' or 'update')")
+
+
+def bulkInsert(conn, table_name, rows, columns, method='executemany', batch_size=10000,
+               conflict=''):
+    """
+    Helper to load rows (dicts) into a table in a single transaction
+
+    Methods:
+        executemany: one parameterized INSERT per row
+        values: multi-row INSERT ... VALUES pages via execute_values
+        copy: COPY ... FROM STDIN (text format), streamed in batches
+
+    Returns:
+        rows inserted (as reported by the server)
+    """
+    if method not in INSERT_METHODS:
+        raise ValueError(f"Invalid insert method '{method}' (use one of {', '.join(INSERT_METHODS)})")
+    if method == 'copy' and conflict:
+        raise ValueError("COPY does not support on_conflict, use method 'values'")
+
+    column_list = ', '.join(columns)
+    cur = conn.cursor()
+    total = 0
+    try:
+        if method == 'copy':
+            copy_sql = f"COPY {table_name} ({column_list}) FROM STDIN"
+            for batch in _batches(rows, batch_size):
+                buffer = io.StringIO()
+                for row in batch:
+                    buffer.write('\t'.join(_copy_value(row.get(c)) for c in columns))
+                    buffer.write('\n')
+                buffer.seek(0)
+                cur.copy_expert(copy_sql, buffer)
+                total += cur.rowcount if cur.rowcount >= 0 else len(batch)
+        elif method == 'values':
+            statement = f"INSERT INTO {table_name} ({column_list}) VALUES %s{conflict}"
+            for batch in _batches(rows, batch_size):
+                values_list = [tuple(row.get(c) for c in columns) for row in batch]
+                psycopg2_extras.execute_values(cur, statement, values_list, page_size=len(values_list))
+                total += cur.rowcount
+        else:
+            placeholders = ', '.join(['%s'] * len(columns))
+            statement = f"INSERT INTO {table_name} ({column_list}) VALUES ({placeholders}){conflict}"
+            values_list = [tuple(row.get(c) for c in columns) for row in rows]
+            cur.executemany(statement, values_list)
+            total = cur.rowcount
+        conn.commit()
+    finally:
+        cur.close()
+    return total
+
+
 @oacommon.trace
 def insert(self, param):
     """
@@ -578,6 +1762,17 @@ def insert(self, param):
             - pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport - support {WALLET:key}, {ENV:var}
             - table: table name - supports {WALLET:key}, {ENV:var}
             - data: (optional) dict or list of dicts to insert
+            - method: (optional) 'executemany', 'values' (multi-row INSERT pages) or
+              'copy' (COPY FROM STDIN, fastest for bulk loads), default 'executemany'
+            - batch_size: (optional) rows per COPY / VALUES batch, default 10000
+            - columns: (optional) explicit column list (or "a, b"), default union of the row keys
+            - on_conflict: (optional) 'nothing' or 'update' for upserts (not with 'copy')
+            - conflict_columns: (optional) conflict target columns, required for 'update'
+            - update_columns: (optional) columns updated on conflict, default all but conflict_columns
+            - pool: (optional) reuse pooled connections, default True
+            - pool_max: (optional) max pooled connections per host/db/user, default 10
+            - pool_min: (optional) idle connections kept open, default 0
+            - pool_idle_timeout: (optional) seconds before idle connections are closed, default 300
             - input: (optional) data from previous task (if correctly formatted)
             - workflow_context: (optional) workflow context
             - task_id: (optional) unique task id
@@ -651,6 +1846,34 @@ def insert(self, param):
           table: "staging_data"
           # data from previous jsontransform task
 
+        # Nightly bulk load via COPY (also accepts a streamed select as input)
+        - name: load_events
+          module: oa-pg
+          function: insert
+          pgdatabase: "warehouse"
+          pgdbhost: "data-db"
+          pgdbusername: "{WALLET:etl_user}"
+          pgdbpassword: "{VAULT:etl_pass}"
+          pgdbport: 5432
+          table: "events"
+          method: copy
+          batch_size: 50000
+          columns: [id, kind, payload, created_at]
+
+        # Upsert by primary key
+        - name: upsert_products
+          module: oa-pg
+          function: insert
+          pgdatabase: "ecommerce"
+          pgdbhost: "prod-db"
+          pgdbusername: "{WALLET:admin_user}"
+          pgdbpassword: "{VAULT:admin_pass}"
+          pgdbport: 5432
+          table: "products"
+          method: values
+          on_conflict: update
+          conflict_columns: [sku]
+
         # Insert filtered results
         - name: insert_filtered_users
           module: oa-pg
@@ -717,38 +1940,40 @@ def insert(self, param):
         if isinstance(insert_data, dict):
             insert_data = [insert_data]
 
-        if not isinstance(insert_data, list) or len(insert_data) == 0:
+        streamed = hasattr(insert_data, 'iterrows')
+        if not streamed and (not isinstance(insert_data, list) or len(insert_data) == 0):
             raise ValueError("Insert data must be a non-empty list of dicts")
 
-        # Generate INSERT statement
-        first_row = insert_data[0]
-        columns = ', '.join(first_row.keys())
-
-        # Use parameterization for security
-        placeholders = ', '.join(['%s'] * len(first_row))
-        statement = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
-
-        logger.info(f"Inserting {len(insert_data)} row(s) into {table_name}")
-        logger.debug(f"Statement template: {statement}")
+        method = param.get('method', 'executemany')
+        batch_size = int(param.get('batch_size', 10000))
+        rows = _iter_insert_rows(insert_data)
+
+        # Column list: explicit, or union of keys (streams: keys of the first row)
+        columns = _column_list(param.get('columns'))
+        if not columns:
+            if streamed:
+                first_row = next(rows, None)
+                if first_row is None:
+                    raise ValueError("No data to insert (stream is empty)")
+                columns = list(first_row.keys())
+                rows = _prepend(first_row, rows)
+            else:
+                columns = _insert_columns(insert_data)
 
-        # Connection
-        conn = psycopg2.connect(
-            host=pgdbhost,
-            port=pgdbport,
-            database=pgdatabase,
-            user=pgdbusername,
-            password=pgdbpassword
+        conflict = _conflict_clause(
+            columns,
+            conflict_columns=_column_list(param.get('conflict_columns')),
+            on_conflict=param.get('on_conflict'),
+            update_columns=_column_list(param.get('update_columns'))
         )
-        cur = conn.cursor()
 
-        # Execute many for performance
-        values_list = [tuple(row.values()) for row in insert_data]
-        cur.executemany(statement, values_list)
-        conn.commit()
-        rows_affected = cur.rowcount
+        logger.info(f"Inserting into {table_name} with method '{method}' "
+                    f"({'streamed' if streamed else len(insert_data)} row(s), {len(columns)} column(s))")
 
-        cur.close()
-        conn.close()
+        with pgconnection(pgdatabase, pgdbhost, pgdbusername, pgdbpassword, pgdbport,
+                          _pool_options(param)) as conn:
+            rows_affected = bulkInsert(conn, table_name, rows, columns, method=method,
+                                       batch_size=batch_size, conflict=conflict)
 
         logger.info(f"Successfully inserted {rows_affected} row(s)")
 
@@ -756,6 +1981,8 @@ def insert(self, param):
         output_data = {
             'rows_inserted': rows_affected,
             'table': table_name,
+            'columns': columns,
+            'method': method,
             'database': pgdatabase,
             'host': pgdbhost
         }
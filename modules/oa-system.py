@@ -7,7 +7,6 @@ Support for wallet, placeholder {WALLET:key}, {ENV:var} and {VAULT:key}
 
 import oacommon
 import inspect
-from scp import SCPClient
 import os
 import subprocess
 import logging
@@ -16,6 +15,9 @@ from logger_config import AutomatorLogger
 # Logger for this module
 logger = AutomatorLogger.get_logger('oa-system')
 
+# Heavy dependencies are imported on first use
+SCPClient = oacommon.lazy_import('scp', 'SCPClient')
+
 gdict = {}
 myself = lambda: inspect.stack()[1][3]
 
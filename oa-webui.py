@@ -24,12 +24,15 @@ from logger_config import AutomatorLogger
 from automator import WorkflowEngine, WorkflowContext, TaskResult, TaskStatus
 from taskstore import TaskResultStore
 from wallet import Wallet, PlainWallet
+from module_index import get_module_index, extract_tasks, task_target
+from ratelimit import guard_stats
 
 # ========================================
 # IMPORT WORKFLOW MANAGER CENTRALIZZATO
 # ========================================
 from workflow_manager import (
     WorkflowManagerFacade,
+    WorkflowEngineManager,
     WorkflowExecutionStatus,
     WorkflowMetadata,
     WorkflowExecution
@@ -72,6 +75,7 @@ OA_LOG_LEVEL = os.getenv("OA_LOG_LEVEL", "INFO")
 OA_WORKFLOWS_DIR = os.getenv("OA_WORKFLOWS_DIR", os.path.join(os.getcwd(), "workflows"))
 OA_DATA_DIR = os.getenv("OA_DATA_DIR", os.path.join(os.getcwd(), "data"))
 OA_LOGS_DIR = os.getenv("OA_LOGS_DIR", os.path.join(os.getcwd(), "logs"))
+MODULES_DIR = os.path.join(os.getcwd(), "modules")
 
 MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "5"))
 JOB_TIMEOUT_SECONDS = int(os.getenv("JOB_TIMEOUT_SECONDS", "3600"))
@@ -86,10 +90,18 @@ for directory in [OA_WORKFLOWS_DIR, OA_DATA_DIR, OA_LOGS_DIR]:
 # ========================================
 # FASTAPI APP
 # ========================================
+class FastJSONResponse(JSONResponse):
+    """JSONResponse serializzata con oacommon.json_dumps_bytes (orjson se installato)"""
+
+    def render(self, content: Any) -> bytes:
+        return oacommon.json_dumps_bytes(content)
+
+
 app = FastAPI(
     title="Open-Automator Web UI",
     description="API per gestione workflow automation con Workflow Manager Centralizzato",
-    version=APP_VERSION
+    version=APP_VERSION,
+    default_response_class=FastJSONResponse
 )
 
 if ENABLE_CORS:
@@ -132,7 +144,7 @@ class ConnectionManager:
     async def send_update(self, workflow_id: str, message: dict):
         if workflow_id in self.active_connections:
             try:
-                await self.active_connections[workflow_id].send_json(message)
+                await self.active_connections[workflow_id].send_text(oacommon.json_dumps(message))
             except Exception as e:
                 logger.error(f"Failed to send WebSocket message: {e}")
 
@@ -148,27 +160,14 @@ def serialize_results(context: WorkflowContext) -> dict:
         results[name] = {
             "task_name": task_result.task_name,
             "status": task_result.status.value,
-            "output": make_serializable(task_result.output),
+            # Array NumPy/pyarrow in liste; il resto lo converte FastJSONResponse (default=str)
+            "output": WorkflowEngineManager._json_safe(task_result.output),
             "error": task_result.error,
             "duration": task_result.duration,
             "timestamp": task_result.timestamp.isoformat()
         }
     return results
 
-def make_serializable(obj):
-    """Converte oggetti in formato serializzabile JSON"""
-    if obj is None:
-        return None
-    if isinstance(obj, (str, int, float, bool)):
-        return obj
-    if isinstance(obj, dict):
-        return {k: make_serializable(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [make_serializable(item) for item in obj]
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    return str(obj)
-
 # ========================================
 # STARTUP FUNCTIONS
 # ========================================
@@ -669,7 +668,7 @@ async def execute_workflow(workflow_id: str):
         if active_wallet and active_wallet.loaded:
             from wallet import resolve_dict_placeholders
             logger.info(f"Resolving WALLET/ENV/VAULT placeholders for workflow {workflow_id}")
-            yaml_content = resolve_dict_placeholders(yaml_content, active_wallet)
+            yaml_content = resolve_dict_placeholders(yaml_content, active_wallet, cache_key=metadata.content_hash)
             logger.debug("Placeholders resolved")
 
         # STEP 2: Prepara gdict con variabili header
@@ -757,7 +756,7 @@ async def get_workflow_status(workflow_id: str):
             if execution and execution.context:
                 response["current_results"] = serialize_results(execution.context)
 
-    return response
+    return FastJSONResponse(response)
 
 @app.get("/api/workflows/{workflow_id}/results")
 async def get_workflow_results(workflow_id: str):
@@ -774,7 +773,8 @@ async def get_workflow_results(workflow_id: str):
     if not last_exec:
         raise HTTPException(404, "No execution results available")
 
-    return {
+    # Risposta diretta: i risultati sono già serializzabili, niente jsonable_encoder
+    return FastJSONResponse({
         "workflow_id": workflow_id,
         "execution_id": last_exec.execution_id,
         "status": last_exec.status.value,
@@ -782,7 +782,7 @@ async def get_workflow_results(workflow_id: str):
         "started_at": last_exec.started_at.isoformat() if last_exec.started_at else None,
         "completed_at": last_exec.completed_at.isoformat() if last_exec.completed_at else None,
         "duration": last_exec.duration
-    }
+    })
 
 @app.get("/api/workflows/{workflow_id}/history")
 async def get_workflow_history(workflow_id: str):
@@ -817,14 +817,14 @@ async def get_workflow_history(workflow_id: str):
 # EXECUTION ENDPOINTS (NUOVI)
 # ========================================
 @app.get("/api/executions/{execution_id}")
-async def get_execution_status(execution_id: str):
-    """Ottiene lo stato di una specifica esecuzione"""
+async def get_execution_status(execution_id: str, log_offset: int = 0, log_limit: int = 200):
+    """Ottiene lo stato di una specifica esecuzione (con una pagina dei log)"""
     execution = workflow_manager.get_execution(execution_id)
 
     if not execution:
         raise HTTPException(404, f"Execution not found: {execution_id}")
 
-    return {
+    return FastJSONResponse({
         "execution_id": execution.execution_id,
         "workflow_id": execution.workflow_id,
         "status": execution.status.value,
@@ -833,7 +833,20 @@ async def get_execution_status(execution_id: str):
         "duration": execution.duration,
         "error": execution.error,
         "results": execution.results,
-        "logs": execution.logs
+        "logs": workflow_manager.get_execution_logs(execution_id, log_offset, log_limit)
+    })
+
+@app.get("/api/executions/{execution_id}/logs")
+async def get_execution_logs(execution_id: str, offset: int = 0, limit: int = 200):
+    """Ottiene i log di un'esecuzione con paginazione offset/limit"""
+    logs = workflow_manager.get_execution_logs(execution_id, offset, limit)
+
+    if logs is None:
+        raise HTTPException(404, f"Execution not found: {execution_id}")
+
+    return {
+        "execution_id": execution_id,
+        **logs
     }
 
 # ========================================
@@ -850,7 +863,29 @@ async def get_stats():
         "system": {
             "wallet_loaded": active_wallet is not None and active_wallet.loaded,
             "max_concurrent_jobs": MAX_CONCURRENT_JOBS
-        }
+        },
+        # Rate limiter e circuit breaker per host upstream (oa-network / oa-notify)
+        "upstreams": guard_stats()
+    }
+
+@app.get("/api/modules")
+async def list_modules():
+    """Elenca moduli e funzioni disponibili (indice AST, nessun import)"""
+    return {"modules": get_module_index(MODULES_DIR).to_dict()}
+
+@app.get("/api/workflows/{workflow_id}/validate")
+async def validate_workflow(workflow_id: str):
+    """Valida moduli, funzioni e parametri obbligatori di un workflow"""
+    metadata = workflow_manager.get_workflow(workflow_id)
+
+    if not metadata:
+        raise HTTPException(404, f"Workflow not found: {workflow_id}")
+
+    issues = get_module_index(MODULES_DIR).validate_workflow(metadata.content)
+    return {
+        "workflow_id": workflow_id,
+        "valid": not any(i["level"] == "error" for i in issues),
+        "issues": issues
     }
 
 # ========================================
@@ -871,12 +906,12 @@ async def websocket_endpoint(websocket: WebSocket, workflow_id: str):
                 last_exec = history[-1] if history else None
 
                 if last_exec:
-                    await websocket.send_json({
+                    await websocket.send_text(oacommon.json_dumps({
                         "type": "status_update",
                         "execution_id": last_exec.execution_id,
                         "status": last_exec.status.value,
                         "results": last_exec.results
-                    })
+                    }))
                 else:
                     await websocket.send_json({
                         "type": "status_update",
@@ -898,20 +933,17 @@ async def get_workflow_graph(workflow_id: str):
         raise HTTPException(404, f"Workflow not found: {workflow_id}")
 
     try:
-        yaml_content = metadata.content
-        tasks = []
-        
-        # Nuova sintassi: {name: ..., variable: {...}, tasks: [...]}
-        if isinstance(yaml_content, dict) and "tasks" in yaml_content:
-            tasks = yaml_content["tasks"]
-        
-        # Vecchia sintassi: [{VAR1: ..., tasks: [...]}]
-        elif isinstance(yaml_content, list) and len(yaml_content) > 0 and "tasks" in yaml_content[0]:
-            tasks = yaml_content[0]["tasks"]
-        
-        else:
+        # Sintassi nuova {..., tasks: [...]} o vecchia [{VAR1: ..., tasks: [...]}]
+        tasks = extract_tasks(metadata.content)
+        if not tasks:
             raise HTTPException(400, "Invalid workflow structure - missing tasks")
 
+        # Indice moduli condiviso: docstring e validazione senza import dei moduli
+        module_index = get_module_index(MODULES_DIR)
+        issues_by_task = {}
+        for item in module_index.validate_tasks(tasks):
+            issues_by_task.setdefault(item["task"], []).append(item)
+
         # Trova entry point
         referenced = set()
         for task in tasks:
@@ -958,8 +990,10 @@ async def get_workflow_graph(workflow_id: str):
 
         for task in tasks:
             name = task.get("name", "unnamed")
-            module = task.get("module", "")
-            function = task.get("function", "")
+            module, function, _ = task_target(task)
+            module = module or ""
+            function = function or ""
+            func_info = module_index.get_function(module, function) if module else None
 
             # Stato del task
             status = None
@@ -974,7 +1008,9 @@ async def get_workflow_graph(workflow_id: str):
                 "module": sanitize_label(module),
                 "function": sanitize_label(function),
                 "status": status,
-                "is_entry": name == entry_point
+                "is_entry": name == entry_point,
+                "summary": sanitize_label(func_info.summary) if func_info else "",
+                "issues": issues_by_task.get(name, [])
             })
 
             if task.get("on_success"):
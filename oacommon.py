@@ -5,16 +5,65 @@ Funzioni condivise tra tutti i moduli con supporto logging
 
 import pprint
 import inspect
-import chardet
-import paramiko
+import importlib
+import importlib.util
 import logging
 from logger_config import AutomatorLogger
 import os
 import re
-from wallet import Wallet
+import json
+import gzip
+import contextvars
 # Logger per questo modulo
 logger = AutomatorLogger.get_logger('oacommon')
 
+
+class _LazyImport:
+    """Proxy che importa il modulo (o un suo attributo) al primo utilizzo"""
+
+    def __init__(self, module_name, attr=None):
+        self._module_name = module_name
+        self._attr = attr
+
+    def _target(self):
+        module = importlib.import_module(self._module_name)
+        return getattr(module, self._attr) if self._attr else module
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._target()(*args, **kwargs)
+
+    def __repr__(self):
+        name = f"{self._module_name}.{self._attr}" if self._attr else self._module_name
+        return f"<lazy import {name}>"
+
+
+def lazy_import(module_name, attr=None):
+    """
+    Import differito per dipendenze pesanti (psycopg2, requests, paramiko, ...)
+
+    Il modulo viene importato al primo accesso ad un attributo (o alla prima
+    chiamata se è indicato attr), così il costo di import lo paga solo chi lo usa.
+
+    Args:
+        module_name: nome del modulo da importare
+        attr: (opzionale) attributo del modulo da esporre (es. classe)
+
+    Returns:
+        proxy che inoltra attributi e chiamate all'oggetto reale
+
+    Example:
+        psycopg2 = oacommon.lazy_import('psycopg2')
+        SCPClient = oacommon.lazy_import('scp', 'SCPClient')
+    """
+    return _LazyImport(module_name, attr)
+
+
+paramiko = lazy_import('paramiko')
+chardet = lazy_import('chardet')
+
 gdict = {}
 
 
@@ -27,6 +76,21 @@ def trace(f):
     return wrap
 
 
+def in_context(f):
+    """
+    Lega f al contesto corrente (es. l'execution id dei log), per i worker
+    di un ThreadPoolExecutor che non ereditano le ContextVar
+
+    Ogni chiamata gira in una copia propria del contesto: più worker
+    concorrenti non possono entrare nello stesso oggetto Context.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(f, *args, **kwargs)
+    return run
+
+
 myself = lambda: inspect.stack()[1][3]
 
 # Cache del wallet (caricato una volta sola)
@@ -35,6 +99,7 @@ _wallet_instance = None
 def get_wallet():
     """Ottiene istanza del wallet (lazy loading)"""
     global _wallet_instance
+    from wallet import Wallet
     
     if _wallet_instance is None:
         try:
@@ -436,3 +501,253 @@ def _resolve_string_value(value, wallet=None):
 def resolve_param(param_dict, key, default=None, wallet=None):
     value = get_param(param_dict, key, wallet)
     return value if value is not None else default
+
+
+# ========================================
+# JSON (orjson opzionale)
+# ========================================
+
+orjson = lazy_import('orjson')
+
+# 'orjson' se installato, altrimenti 'json' (libreria standard)
+JSON_BACKEND = 'orjson' if importlib.util.find_spec('orjson') else 'json'
+
+
+def _orjson_options(pretty, sort_keys):
+    # Datetime e dataclass passano da default=str come con json.dumps
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if pretty:
+        options |= orjson.OPT_INDENT_2
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    return options
+
+
+def _stdlib_dumps(value, pretty, sort_keys):
+    # Stesso output di orjson: compatto (o indentato a 2 spazi), UTF-8 non escapato
+    return json.dumps(value, default=str, ensure_ascii=False, sort_keys=sort_keys,
+                      indent=2 if pretty else None, separators=None if pretty else (',', ':'))
+
+
+def json_dumps_bytes(value, pretty=False, sort_keys=False):
+    """
+    Serializza in JSON (bytes UTF-8), con orjson se installato
+
+    I valori non JSON (datetime, Decimal, UUID, oggetti) diventano str(),
+    come json.dumps(default=str). L'output è compatto: l'indentazione
+    (2 spazi) è solo su richiesta con pretty=True.
+    """
+    if JSON_BACKEND == 'orjson':
+        try:
+            return orjson.dumps(value, default=str, option=_orjson_options(pretty, sort_keys))
+        except TypeError:
+            # Interi oltre 64 bit, chiavi non supportate: ci pensa la libreria standard
+            pass
+    return _stdlib_dumps(value, pretty, sort_keys).encode('utf-8')
+
+
+def json_dumps(value, pretty=False, sort_keys=False):
+    """Come json_dumps_bytes, ma ritorna una str"""
+    if JSON_BACKEND == 'orjson':
+        return json_dumps_bytes(value, pretty, sort_keys).decode('utf-8')
+    return _stdlib_dumps(value, pretty, sort_keys)
+
+
+def json_loads(data):
+    """
+    Decodifica JSON da str o bytes, con orjson se installato
+
+    In caso di errore riprova con la libreria standard (NaN/Infinity, bytes
+    UTF-16/32) che solleva l'usuale json.JSONDecodeError.
+    """
+    if JSON_BACKEND == 'orjson':
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+# ========================================
+# JSON IN STREAMING (array JSON / JSON Lines)
+# ========================================
+
+JSON_STREAM_FORMATS = ('json', 'jsonl')
+JSON_STREAM_CHUNK = 1 << 20
+
+_JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+def json_stream_format(path, fmt=None):
+    """Formato 'json' o 'jsonl': esplicito, altrimenti dall'estensione (anche .gz)"""
+    if fmt and fmt != 'auto':
+        if fmt not in JSON_STREAM_FORMATS:
+            raise ValueError(f"Unsupported JSON format: {fmt} (supported: {', '.join(JSON_STREAM_FORMATS)})")
+        return fmt
+    name = str(path).lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'jsonl' if name.endswith(_JSONL_EXTENSIONS) else 'json'
+
+
+def _open_text(path, mode, compressed=None):
+    if compressed is None:
+        compressed = str(path).lower().endswith('.gz')
+    if compressed:
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _iter_json_values(handle, chunk_size):
+    """
+    Parser incrementale: un array JSON di primo livello oppure una sequenza
+    di valori JSON concatenati (JSON Lines, oggetto singolo)
+
+    Il buffer contiene solo la parte non ancora consumata; se un valore non
+    è completo si legge altro testo (almeno quanto il buffer, così i record
+    molto grandi non vengono riparsati più di O(log n) volte).
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    in_array = None
+    # Nell'array: subito dopo un elemento serve una sola ',' oppure ']'
+    after_value = after_comma = False
+
+    while True:
+        # Salta gli spazi, leggendo altri blocchi se serve
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            chunk = handle.read(chunk_size)
+            buffer, pos, eof = chunk, 0, not chunk
+
+        if pos >= len(buffer):
+            if in_array:
+                raise ValueError("Unterminated JSON array")
+            return
+
+        if in_array is None:
+            in_array = buffer[pos] == '['
+            if in_array:
+                pos += 1
+                continue
+
+        if in_array:
+            char = buffer[pos]
+            if after_value:
+                if char == ',':
+                    pos += 1
+                    after_value, after_comma = False, True
+                    continue
+                if char != ']':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, pos)
+            if char == ']':
+                if after_comma:
+                    raise json.JSONDecodeError("Trailing comma in array", buffer, pos)
+                return
+            if char == ',':
+                raise json.JSONDecodeError("Expecting value", buffer, pos)
+
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+            # Un numero (o true/false/null) è completo solo se seguito da un
+            # separatore: "1." o "1.5e" potrebbero continuare nel blocco successivo
+            complete = (eof or buffer[end - 1] in '}]"'
+                        or (end < len(buffer) and buffer[end] in ' \t\r\n,]'))
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+
+        if not complete:
+            chunk = handle.read(max(chunk_size, len(buffer) - pos))
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+
+        yield value
+        pos = end
+        after_value, after_comma = in_array, False
+
+
+def iter_json_records(path, fmt=None, chunk_size=JSON_STREAM_CHUNK):
+    """
+    Legge un file JSON o JSON Lines un record alla volta (generatore)
+
+    La memoria usata è quella di un blocco di lettura più un record, non
+    quella del file: adatto ad export di più GB.
+
+    Args:
+        path: file .json (array di primo livello o oggetto singolo),
+              .jsonl/.ndjson (un valore per riga), anche compressi .gz
+        fmt: (opzionale) 'json', 'jsonl' o 'auto' (default: dall'estensione)
+        chunk_size: (opzionale) caratteri letti per volta
+
+    Yields:
+        i valori JSON (per un array, i suoi elementi)
+    """
+    fmt = json_stream_format(path, fmt)
+    with _open_text(path, 'r') as handle:
+        if fmt == 'jsonl':
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json_loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number} of {path}: {e}") from e
+        else:
+            try:
+                yield from _iter_json_values(handle, chunk_size)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in {path}: {e.msg}") from e
+
+
+class JsonRecordWriter:
+    """
+    Scrive record uno alla volta in un array JSON o in JSON Lines
+
+    Scrive su <path>.part e lo rinomina solo a fine scrittura riuscita, così
+    un file parziale non viene mai scambiato per un risultato completo.
+
+    Example:
+        with oacommon.JsonRecordWriter('/data/out.jsonl') as writer:
+            for record in records:
+                writer.write(record)
+    """
+
+    def __init__(self, path, fmt=None):
+        self.path = str(path)
+        self.format = json_stream_format(path, fmt)
+        self.count = 0
+        self._handle = None
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._handle = _open_text(self.path + '.part', 'w', self.path.lower().endswith('.gz'))
+        if self.format == 'json':
+            self._handle.write('[')
+        return self
+
+    def write(self, record):
+        text = json_dumps(record)
+        if self.format == 'jsonl':
+            self._handle.write(text + '\n')
+        else:
+            self._handle.write(('\n' if not self.count else ',\n') + text)
+        self.count += 1
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            if exc_type is None and self.format == 'json':
+                self._handle.write('\n]\n' if self.count else ']\n')
+        finally:
+            self._handle.close()
+        if exc_type is None:
+            os.replace(self.path + '.part', self.path)
+        else:
+            os.remove(self.path + '.part')
+        return False
@@ -0,0 +1,378 @@
+"""
+Rate Limit - Token bucket e circuit breaker per host
+
+Stato condiviso a livello di processo (tutti i task e tutte le esecuzioni)
+per le chiamate HTTP di oa-network e oa-notify: le esecuzioni concorrenti
+verso lo stesso upstream rispettano un unico limite di richieste e, se
+l'upstream è giù, falliscono subito invece di accumulare retry.
+
+Configurazione da ambiente (default per tutti gli host):
+- OA_RATE_LIMIT: richieste/secondo per host (vuoto o 0 = illimitato)
+- OA_RATE_LIMITS: override per host, es. "api.telegram.org=30,api.example.com=5/10" (rate/burst)
+- OA_CIRCUIT_FAILURES: errori consecutivi che aprono il circuito (default 5, 0 = disattivato)
+- OA_CIRCUIT_RESET: secondi di circuito aperto prima di una richiesta di prova (default 30)
+- OA_RATE_WAIT: attesa massima di un token in secondi (default 60)
+
+Nel YAML un task può impostare rate_limit e rate_burst: limitano le sue
+richieste senza cambiare il limite dell'host (vale il più restrittivo dei
+due; i task con gli stessi valori condividono il bucket). circuit_failures,
+circuit_reset e rate_wait valgono invece per tutto l'host.
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+from logger_config import AutomatorLogger
+
+logger = AutomatorLogger.get_logger('oa-ratelimit')
+
+# Parametri dei task che configurano la guardia dell'host
+GUARD_PARAMS = ('rate_limit', 'rate_burst', 'circuit_failures', 'circuit_reset', 'rate_wait')
+
+
+class RateLimitError(Exception):
+    """Richiesta non inviata per protezione dell'upstream"""
+
+
+class CircuitOpenError(RateLimitError):
+    """Circuito aperto: l'upstream è considerato non disponibile"""
+
+
+class RateLimitTimeout(RateLimitError):
+    """Nessun token disponibile entro l'attesa massima"""
+
+
+# ========================================
+# TOKEN BUCKET
+# ========================================
+
+class TokenBucket:
+    """Token bucket thread-safe: 'rate' token/secondo, al massimo 'burst' accumulati"""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._tokens = None  # pieno alla prima configurazione
+        self.configure(rate, burst)
+
+    def configure(self, rate: Optional[float], burst: Optional[float] = None):
+        """
+        Aggiorna rate e burst (rate None/0 = illimitato)
+
+        I token accumulati restano (al più il nuovo burst): riconfigurare
+        non deve regalare un burst di richieste.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._tokens is not None:
+                self._refill(now)
+            self.rate = float(rate) if rate else None
+            self.burst = float(burst) if burst else max(1.0, self.rate or 1.0)
+            self._tokens = self.burst if self._tokens is None else min(self.burst, self._tokens)
+            self._updated = now
+
+    def _refill(self, now: float):
+        if self.rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout: Optional[float] = None) -> float:
+        """
+        Preleva un token, attendendo se necessario
+
+        Returns:
+            secondi di attesa
+
+        Raises:
+            RateLimitTimeout se il token non arriva entro timeout
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(0.0, self._blocked_until - now)
+                if not wait:
+                    if not self.rate:
+                        return now - start
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return now - start
+                    wait = (1 - self._tokens) / self.rate
+            if timeout is not None and now - start + wait > timeout:
+                raise RateLimitTimeout(f"No request slot within {timeout}s")
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Sospende l'invio per 'seconds' (es. Retry-After di un 429)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                'rate': self.rate,
+                'burst': self.burst,
+                'tokens': round(self._tokens, 2),
+                'paused_for': round(max(0.0, self._blocked_until - time.monotonic()), 2)
+            }
+
+
+# ========================================
+# CIRCUIT BREAKER
+# ========================================
+
+class CircuitBreaker:
+    """
+    Circuit breaker closed -> open -> half_open
+
+    Dopo 'failure_threshold' errori consecutivi il circuito si apre e le
+    richieste falliscono subito; trascorso 'reset_timeout' passa una sola
+    richiesta di prova, che lo richiude o lo riapre.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = ''):
+        self._lock = threading.Lock()
+        self.name = name
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout = float(reset_timeout)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """True se la richiesta può partire"""
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release_probe(self):
+        """Libera la prova half-open di una richiesta mai inviata"""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit closed for {self.name}")
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Circuit opened for {self.name} after {self.failures} consecutive failure(s)")
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def retry_in(self) -> float:
+        """Secondi prima della prossima richiesta di prova"""
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            status = {'state': self.state, 'failures': self.failures,
+                      'failure_threshold': self.failure_threshold}
+        if status['state'] == self.OPEN:
+            status['retry_in'] = round(self.retry_in(), 2)
+        return status
+
+
+# ========================================
+# GUARDIA PER HOST
+# ========================================
+
+def _env_float(name: str, default: Optional[float]) -> Optional[float]:
+    value = os.environ.get(name)
+    try:
+        return float(value) if value not in (None, '') else default
+    except ValueError:
+        logger.warning(f"Invalid {name}={value!r}, using {default}")
+        return default
+
+
+def _env_host_limits() -> Dict[str, tuple]:
+    """Override per host da OA_RATE_LIMITS ("host=rate[/burst],...")"""
+    limits = {}
+    for item in os.environ.get('OA_RATE_LIMITS', '').split(','):
+        host, _, spec = item.strip().partition('=')
+        if not host or not spec:
+            continue
+        rate, _, burst = spec.partition('/')
+        try:
+            limits[host.lower()] = (float(rate), float(burst) if burst else None)
+        except ValueError:
+            logger.warning(f"Invalid OA_RATE_LIMITS entry: {item!r}")
+    return limits
+
+
+class HostGuard:
+    """Token bucket + circuit breaker + contatori di un host"""
+
+    def __init__(self, host: str):
+        self.host = host
+        rate, burst = _env_host_limits().get(host, (_env_float('OA_RATE_LIMIT', None), None))
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(
+            int(_env_float('OA_CIRCUIT_FAILURES', 5)), _env_float('OA_CIRCUIT_RESET', 30.0), name=host
+        )
+        self.wait_timeout = _env_float('OA_RATE_WAIT', 60.0)
+        self._lock = threading.Lock()
+        self._task_buckets: Dict[tuple, TokenBucket] = {}
+        self.stats = {'requests': 0, 'failures': 0, 'rejected': 0, 'throttled': 0, 'waited_s': 0.0}
+
+    def task_bucket(self, options: Optional[Dict[str, Any]]) -> Optional[TokenBucket]:
+        """
+        Bucket del rate_limit/rate_burst di un task (None se non impostato)
+
+        Si aggiunge al bucket dell'host senza modificarlo; i task con gli
+        stessi valori lo condividono.
+        """
+        rate = float((options or {}).get('rate_limit') or 0)
+        if not rate:
+            return None
+        burst = (options or {}).get('rate_burst')
+        key = (rate, float(burst) if burst else None)
+        with self._lock:
+            bucket = self._task_buckets.get(key)
+            if bucket is None:
+                bucket = self._task_buckets[key] = TokenBucket(*key)
+        return bucket
+
+    def configure(self, options: Dict[str, Any]):
+        """Applica le opzioni di circuito e attesa di un task (solo quelle presenti)"""
+        if options.get('circuit_failures') is not None:
+            self.breaker.failure_threshold = int(options['circuit_failures'])
+        if options.get('circuit_reset') is not None:
+            self.breaker.reset_timeout = float(options['circuit_reset'])
+        if options.get('rate_wait') is not None:
+            self.wait_timeout = float(options['rate_wait'])
+
+    def _count(self, key: str, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def before(self, task_bucket: Optional[TokenBucket] = None):
+        """Da chiamare prima della richiesta: circuito, token del task e dell'host"""
+        if not self.breaker.allow():
+            self._count('rejected')
+            raise CircuitOpenError(
+                f"Circuit open for {self.host}, retry in {self.breaker.retry_in():.0f}s"
+            )
+        try:
+            waited = task_bucket.acquire(self.wait_timeout) if task_bucket is not None else 0.0
+            remaining = None if self.wait_timeout is None else max(0.0, self.wait_timeout - waited)
+            waited += self.bucket.acquire(remaining)
+        except RateLimitTimeout:
+            self._count('rejected')
+            self.breaker.release_probe()
+            raise RateLimitTimeout(f"Rate limit for {self.host}: no slot within {self.wait_timeout}s")
+        self._count('requests')
+        if waited > 0:
+            self._count('throttled')
+            self._count('waited_s', waited)
+
+    def after(self, status_code: Optional[int] = None, error: bool = False,
+              retry_after: Optional[str] = None):
+        """Da chiamare dopo la richiesta: esito per il circuit breaker"""
+        if status_code == 429 and retry_after:
+            try:
+                self.bucket.pause(float(retry_after))
+            except ValueError:
+                pass
+        if error or (status_code is not None and (status_code >= 500 or status_code == 429)):
+            self._count('failures')
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats, waited_s=round(self.stats['waited_s'], 3))
+            task_buckets = list(self._task_buckets.values())
+        status = {'limiter': self.bucket.status(), 'circuit': self.breaker.status(), **stats}
+        if task_buckets:
+            status['task_limiters'] = [bucket.status() for bucket in task_buckets]
+        return status
+
+
+_guards: Dict[str, HostGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    """Host (minuscolo) di una URL, o la stringa stessa se non è una URL"""
+    return (urlparse(url).hostname or url).lower()
+
+
+def guard_options(param: Dict[str, Any]) -> Dict[str, Any]:
+    """Estrae dai parametri del task le opzioni di rate limit / circuit breaker"""
+    return {key: param[key] for key in GUARD_PARAMS if param.get(key) is not None}
+
+
+def get_guard(url_or_host: str, options: Optional[Dict[str, Any]] = None) -> HostGuard:
+    """Ritorna la guardia condivisa dell'host, applicando le opzioni di circuito del task"""
+    host = host_of(url_or_host)
+    with _guards_lock:
+        guard = _guards.get(host)
+        if guard is None:
+            guard = _guards[host] = HostGuard(host)
+    if options:
+        guard.configure(options)
+    return guard
+
+
+def guarded(url: str, options: Optional[Dict[str, Any]], send):
+    """
+    Esegue send() sotto la guardia dell'host della URL
+
+    Errori di rete ed eccezioni contano come fallimenti del circuito;
+    le risposte 5xx/429 anche, le altre come successi.
+    """
+    guard = get_guard(url, options)
+    guard.before(guard.task_bucket(options))
+    try:
+        response = send()
+    except Exception:
+        guard.after(error=True)
+        raise
+    guard.after(getattr(response, 'status_code', None),
+                retry_after=getattr(response, 'headers', {}).get('Retry-After'))
+    return response
+
+
+def guard_stats() -> Dict[str, Any]:
+    """Stato di tutte le guardie, per host"""
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.host: guard.status() for guard in guards}
+
+
+def reset_guards():
+    """Dimentica tutte le guardie (usato nei test)"""
+    with _guards_lock:
+        _guards.clear()
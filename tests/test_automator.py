@@ -207,6 +207,24 @@ class TestWorkflowEngine(unittest.TestCase):
         self.assertEqual(func, 'copy')
         self.assertEqual(params['src'], '/tmp/file')
 
+    @patch('automator.logger')
+    def test_preflight(self, mock_logger):
+        """Test validazione preflight dei task senza esecuzione"""
+        tasks = [
+            {'name': 'copy', 'oa-io.copy': {'srcpath': '/a', 'dstpath': '/b', 'recursive': False},
+             'on_success': 'missing'},
+            {'name': 'unknown', 'oa-io.nothing': {}},
+        ]
+
+        engine = WorkflowEngine(tasks, self.gdict, self.task_store)
+        issues = engine.preflight()
+
+        messages = [i['message'] for i in issues if i['level'] == 'error']
+        self.assertEqual(messages, [
+            "on_success references unknown task 'missing'",
+            "Unknown function 'oa-io.nothing'",
+        ])
+
     @patch('automator.logger')
     def test_execute_task_success_with_tuple_return(self, mock_logger):
         """Test esecuzione task che ritorna tupla (success, output)"""
@@ -16,7 +16,7 @@ import os
 # Aggiungi la directory parent al path per importare i moduli
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from logger_config import AutomatorLogger, TaskLogger
+from logger_config import AutomatorLogger, TaskLogger, ExecutionLogHandler, current_execution_id
 
 
 class TestAutomatorLogger(unittest.TestCase):
@@ -266,5 +266,128 @@ class TestLoggingIntegration(unittest.TestCase):
         self.assertIn('ERROR', log_content)
 
 
+class TestExecutionLogHandler(unittest.TestCase):
+    """Test per la cattura dei log per singola esecuzione"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        self.test_log_dir = tempfile.mkdtemp()
+        self.handler = ExecutionLogHandler(
+            spill_dir=os.path.join(self.test_log_dir, 'executions'),
+            buffer_size=10
+        )
+        self.logger = logging.getLogger('execution_log_test')
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        """Cleanup dopo ogni test"""
+        self.logger.removeHandler(self.handler)
+        if os.path.exists(self.test_log_dir):
+            shutil.rmtree(self.test_log_dir)
+
+    def _log_for(self, execution_id, count, prefix='line'):
+        token = current_execution_id.set(execution_id)
+        try:
+            for i in range(count):
+                self.logger.info(f'{prefix} {i}')
+        finally:
+            current_execution_id.reset(token)
+
+    def test_ignores_records_without_execution(self):
+        """Test che i record fuori da un'esecuzione non vengano catturati"""
+        self.logger.info('no execution')
+
+        self.assertEqual(self.handler._buffers, {})
+
+    def test_separates_executions(self):
+        """Test che ogni esecuzione abbia i propri log"""
+        self._log_for('exec_a', 3, 'alpha')
+        self._log_for('exec_b', 2, 'beta')
+
+        logs_a = self.handler.get_logs('exec_a')
+        logs_b = self.handler.get_logs('exec_b')
+
+        self.assertEqual(logs_a['total'], 3)
+        self.assertEqual(logs_b['total'], 2)
+        self.assertTrue(all('alpha' in line for line in logs_a['lines']))
+        self.assertTrue(all('beta' in line for line in logs_b['lines']))
+
+    def test_buffer_is_bounded_and_spills_to_file(self):
+        """Test che il buffer resti limitato e le righe vecchie finiscano su file"""
+        self._log_for('exec_big', 55)
+
+        self.assertLessEqual(len(self.handler._buffers['exec_big']), 10)
+        self.assertTrue(os.path.exists(os.path.join(self.test_log_dir, 'executions', 'exec_big.log')))
+
+        logs = self.handler.get_logs('exec_big')
+        self.assertEqual(logs['total'], 55)
+        self.assertTrue(logs['lines'][0].endswith('line 0'))
+        self.assertTrue(logs['lines'][-1].endswith('line 54'))
+
+    def test_paging_across_file_and_buffer(self):
+        """Test paginazione offset/limit a cavallo tra file e buffer"""
+        self._log_for('exec_page', 25)
+
+        page = self.handler.get_logs('exec_page', offset=12, limit=10)
+
+        self.assertEqual(page['total'], 25)
+        self.assertEqual(len(page['lines']), 10)
+        self.assertTrue(page['lines'][0].endswith('line 12'))
+        self.assertTrue(page['lines'][-1].endswith('line 21'))
+
+    def test_finish_releases_memory(self):
+        """Test che finish svuoti il buffer su file mantenendo i log leggibili"""
+        self._log_for('exec_done', 5)
+        self.handler.finish('exec_done')
+
+        self.assertNotIn('exec_done', self.handler._buffers)
+
+        logs = self.handler.get_logs('exec_done', offset=3)
+        self.assertEqual(logs['total'], 5)
+        self.assertEqual(len(logs['lines']), 2)
+
+    def test_multiline_message_is_single_entry(self):
+        """Test che un messaggio multi-riga resti una singola voce"""
+        token = current_execution_id.set('exec_multi')
+        try:
+            self.logger.info('first\nsecond')
+        finally:
+            current_execution_id.reset(token)
+        self.handler.finish('exec_multi')
+
+        logs = self.handler.get_logs('exec_multi')
+        self.assertEqual(logs['total'], 1)
+        self.assertIn('first\nsecond', logs['lines'][0])
+
+    def test_discard_removes_spill_file(self):
+        """Test che discard cancelli anche il file dell'esecuzione"""
+        self._log_for('exec_old', 15)
+        self.handler.finish('exec_old')
+        path = os.path.join(self.test_log_dir, 'executions', 'exec_old.log')
+        self.assertTrue(os.path.exists(path))
+
+        self.handler.discard('exec_old')
+
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.handler.get_logs('exec_old')['total'], 0)
+        self.handler.discard('exec_never_logged')
+
+    def test_thread_pool_workers_keep_execution(self):
+        """Test che i worker di un ThreadPoolExecutor loggino sull'esecuzione (oacommon.in_context)"""
+        from concurrent.futures import ThreadPoolExecutor
+        import oacommon
+
+        token = current_execution_id.set('exec_pool')
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(oacommon.in_context(lambda i: self.logger.info(f'worker {i}')), range(8)))
+        finally:
+            current_execution_id.reset(token)
+
+        logs = self.handler.get_logs('exec_pool')
+        self.assertEqual(logs['total'], 8)
+
+
 if __name__ == '__main__':
     unittest.main()
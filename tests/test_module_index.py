@@ -0,0 +1,219 @@
+"""
+Test per module_index.py
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+import textwrap
+
+# Aggiungi directory del progetto al path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+from module_index import ModuleIndex, get_module_index, task_target, extract_tasks
+
+
+SAMPLE_MODULE = textwrap.dedent('''
+    """Sample module"""
+    import oacommon
+
+    def helper(value):
+        return value
+
+    @oacommon.trace
+    def query(self, param):
+        """
+        Run a query
+
+        Args:
+            statement: SQL
+        """
+        if 'statement' not in param and 'input' in param:
+            param['statement'] = param['input']
+        if not oacommon.checkandloadparam(self, myself, 'dbhost', 'statement', param=param):
+            raise ValueError("missing")
+        return True, None
+
+    @oacommon.trace
+    def copy(self, param):
+        """Copy files"""
+        required_params = ['srcpath', 'dstpath']
+        if not oacommon.checkandloadparam(self, myself, *required_params, param=param):
+            raise ValueError("missing")
+        return True, None
+
+    @oacommon.trace
+    def write(self, param):
+        """Write content"""
+        try:
+            if 'content' in param:
+                content = param['content']
+            elif 'varname' in param:
+                if not oacommon.checkandloadparam(self, myself, 'varname', param=param):
+                    raise ValueError("missing")
+            if not oacommon.checkandloadparam(self, myself, 'filename', param=param):
+                raise ValueError("missing")
+        except Exception:
+            oacommon.checkandloadparam(self, myself, 'fallback', param=param)
+        return True, None
+''')
+
+
+class TestModuleIndex(unittest.TestCase):
+    """Test indicizzazione moduli via AST"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.module_file = os.path.join(self.temp_dir, 'oa-sample.py')
+        with open(self.module_file, 'w') as f:
+            f.write(SAMPLE_MODULE)
+        self.index = ModuleIndex(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_functions_and_params(self):
+        """Test estrazione funzioni, docstring e parametri obbligatori"""
+        module = self.index.get_module('oa-sample')
+
+        self.assertEqual(module.docstring, "Sample module")
+        self.assertEqual(sorted(module.functions), ['copy', 'query', 'write'])
+        self.assertEqual(module.functions['query'].summary, "Run a query")
+        self.assertEqual(module.functions['query'].required_params, ['dbhost', 'statement'])
+        self.assertEqual(module.functions['query'].derived_params, ['statement'])
+        self.assertEqual(module.functions['copy'].required_params, ['srcpath', 'dstpath'])
+
+    def test_branch_params_are_optional(self):
+        """Test controlli dentro if/else o except: parametri opzionali, non obbligatori"""
+        write = self.index.get_function('oa-sample', 'write')
+
+        self.assertEqual(write.required_params, ['filename'])
+        self.assertEqual(write.optional_params, ['varname', 'fallback'])
+
+    def test_reuses_entries_until_mtime_changes(self):
+        """Test riuso dell'indice finché il file non cambia"""
+        self.index.refresh()
+        self.index.refresh()
+        self.assertEqual(self.index.stats['parsed'], 1)
+
+        with open(self.module_file, 'a') as f:
+            f.write("\n@oacommon.trace\ndef extra(self, param):\n    \"\"\"Extra\"\"\"\n    return True\n")
+        stat = os.stat(self.module_file)
+        os.utime(self.module_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        self.assertIsNotNone(self.index.get_function('oa-sample', 'extra'))
+        self.assertEqual(self.index.stats['parsed'], 2)
+
+    def test_persisted_cache(self):
+        """Test indice persistito riusato da una nuova istanza"""
+        self.index.refresh()
+        other = ModuleIndex(self.temp_dir).refresh()
+
+        self.assertEqual(other.stats, {'parsed': 0, 'reused': 1})
+        self.assertEqual(other.get_function('oa-sample', 'copy').required_params, ['srcpath', 'dstpath'])
+
+    def test_syntax_error_module(self):
+        """Test modulo non parsabile"""
+        with open(os.path.join(self.temp_dir, 'oa-broken.py'), 'w') as f:
+            f.write("def broken(:\n")
+
+        issues = self.index.validate_tasks([{"name": "t1", "oa-broken.run": {}}])
+
+        self.assertEqual(issues[0]['level'], 'error')
+        self.assertIn("cannot be parsed", issues[0]['message'])
+
+
+class TestWorkflowValidation(unittest.TestCase):
+    """Test validazione preflight dei workflow"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        with open(os.path.join(self.temp_dir, 'oa-sample.py'), 'w') as f:
+            f.write(SAMPLE_MODULE)
+        self.index = ModuleIndex(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_valid_workflow(self):
+        """Test workflow valido in entrambe le sintassi dei task"""
+        tasks = [
+            {"name": "t1", "module": "oa-sample", "function": "copy",
+             "srcpath": "/a", "dstpath": "/b", "on_success": "t2"},
+            {"name": "t2", "oa-sample.query": {"dbhost": "db", "statement": "SELECT 1"},
+             "on_success": "end"},
+        ]
+        self.assertEqual(self.index.validate_tasks(tasks), [])
+
+    def test_unknown_references(self):
+        """Test modulo, funzione e task successivo inesistenti"""
+        tasks = [
+            {"name": "t1", "oa-missing.run": {}},
+            {"name": "t2", "oa-sample.nothing": {}},
+            {"name": "t3", "oa-sample.copy": {"srcpath": "/a", "dstpath": "/b"}, "on_failure": "t9"},
+        ]
+        messages = [i['message'] for i in self.index.validate_tasks(tasks)]
+
+        self.assertIn("Unknown module 'oa-missing'", messages)
+        self.assertIn("Unknown function 'oa-sample.nothing'", messages)
+        self.assertIn("on_failure references unknown task 't9'", messages)
+
+    def test_missing_params(self):
+        """Test parametro mancante: errore, oppure warning se derivabile dall'input"""
+        tasks = [{"name": "t1", "oa-sample.query": {}}]
+        issues = {i['message']: i['level'] for i in self.index.validate_tasks(tasks)}
+
+        self.assertEqual(issues["Missing required parameter 'dbhost' for oa-sample.query"], 'error')
+        self.assertEqual(
+            issues["Parameter 'statement' not set, expected from previous task output"], 'warning'
+        )
+
+    def test_validate_workflow_structures(self):
+        """Test workflow con sintassi nuova, vecchia e non valida"""
+        tasks = [{"name": "t1", "oa-sample.copy": {"srcpath": "/a", "dstpath": "/b"}}]
+
+        self.assertEqual(self.index.validate_workflow({"tasks": tasks}), [])
+        self.assertEqual(self.index.validate_workflow([{"VAR": 1, "tasks": tasks}]), [])
+        self.assertEqual(self.index.validate_workflow({"name": "x"})[0]['level'], 'error')
+
+
+class TestRepositoryModules(unittest.TestCase):
+    """Test indice sui moduli reali del repository"""
+
+    def test_index_without_import(self):
+        """Test indicizzazione di modules/ senza importare i moduli"""
+        before = set(sys.modules)
+        index = get_module_index(os.path.join(project_root, 'modules'))
+
+        self.assertIn('copy', index.get_module('oa-io').functions)
+        self.assertIn('srcpath', index.get_function('oa-io', 'copy').required_params)
+        self.assertFalse({'oa-io', 'oa-pg', 'oa-network'} & (set(sys.modules) - before))
+
+    def test_branch_alternatives_pass_preflight(self):
+        """Test forme alternative dei moduli reali (writefile+content, where, aggregations)"""
+        index = get_module_index(os.path.join(project_root, 'modules'))
+        tasks = [
+            {"name": "write", "oa-io.writefile": {"filename": "/tmp/out.txt", "content": "x"}},
+            {"name": "filter", "oa-json.jsonfilter": {"where": {"field": "a", "operator": "exists"}}},
+            {"name": "aggregate", "oa-json.jsonaggregate": {"aggregations": [{"op": "count"}]}},
+        ]
+
+        self.assertEqual(index.validate_tasks(tasks), [])
+        issues = index.validate_tasks([{"name": "write", "oa-io.writefile": {"content": "x"}}])
+        self.assertEqual([i['level'] for i in issues], ['error'])
+
+    def test_task_helpers(self):
+        """Test estrazione task e target modulo.funzione"""
+        self.assertEqual(task_target({"name": "t", "oa-io.copy": {"srcpath": "/a"}}),
+                         ("oa-io", "copy", {"srcpath": "/a"}))
+        self.assertEqual(task_target({"name": "t", "module": "oa-io", "function": "copy", "x": 1}),
+                         ("oa-io", "copy", {"x": 1}))
+        self.assertEqual(task_target({"name": "t"}), (None, None, {}))
+        self.assertEqual(extract_tasks([{"tasks": [{"name": "t"}]}]), [{"name": "t"}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,654 @@
+"""
+Unit Tests per oa-json.py
+Test operazioni su dati JSON
+"""
+import unittest
+import sys
+import os
+import json
+import random
+import shutil
+import tempfile
+import importlib.util
+from unittest.mock import Mock, patch
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+HAS_NUMPY = importlib.util.find_spec('numpy') is not None
+HAS_JSONSCHEMA = importlib.util.find_spec('jsonschema') is not None
+
+
+class OaJsonTestCase(unittest.TestCase):
+    """Base: caricamento dinamico del modulo oa-json"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("oa_json", "./modules/oa-json.py")
+        self.oa_json = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.oa_json)
+
+        self.oa_json.gdict = {'_wallet': None}
+        self.mock_self = Mock()
+        self.mock_self.gdict = self.oa_json.gdict
+
+
+class TestJsonFilter(OaJsonTestCase):
+    """Test per jsonfilter e le espressioni compilate"""
+
+    USERS = [
+        {'name': 'Alice', 'age': 30, 'address': {'city': 'Rome'}, 'tags': ['admin']},
+        {'name': 'bob', 'age': '25', 'address': {'city': 'Milan'}},
+        {'name': 'Charlie', 'age': 35, 'vip': True},
+        'not-a-dict'
+    ]
+
+    def names(self, output):
+        return [item['name'] for item in output['filtered']]
+
+    def test_single_predicate(self):
+        """Test forma classica field/operator/value"""
+        success, output = self.oa_json.jsonfilter(self.mock_self, {
+            'data': self.USERS, 'field': 'age', 'operator': '>', 'value': 26
+        })
+
+        self.assertTrue(success)
+        self.assertEqual(self.names(output), ['Alice', 'Charlie'])
+        self.assertEqual(output['filter'], {'field': 'age', 'operator': '>', 'value': 26})
+
+    def test_where_expression(self):
+        """Test and/or/not con percorsi annidati"""
+        success, output = self.oa_json.jsonfilter(self.mock_self, {
+            'data': self.USERS,
+            'where': {'and': [
+                {'field': 'age', 'operator': '>=', 'value': '25'},
+                {'or': [
+                    {'field': 'address.city', 'operator': 'in', 'value': '["Milan", "Naples"]'},
+                    {'not': {'field': 'address', 'operator': 'exists'}}
+                ]}
+            ]}
+        })
+
+        self.assertTrue(success)
+        self.assertEqual(self.names(output), ['bob', 'Charlie'])
+
+    def test_case_insensitive_and_contains(self):
+        """Test case_sensitive globale e per predicato, contains su liste"""
+        _, output = self.oa_json.jsonfilter(self.mock_self, {
+            'data': self.USERS, 'case_sensitive': False,
+            'where': [{'field': 'name', 'operator': 'in', 'value': ['ALICE', 'BOB']}]
+        })
+        self.assertEqual(self.names(output), ['Alice', 'bob'])
+
+        _, output = self.oa_json.jsonfilter(self.mock_self, {
+            'data': self.USERS, 'field': 'tags', 'operator': 'contains', 'value': 'admin'
+        })
+        self.assertEqual(self.names(output), ['Alice'])
+
+    def test_chained_input(self):
+        """Test input da un jsonfilter precedente"""
+        _, output = self.oa_json.jsonfilter(self.mock_self, {
+            'input': {'filtered': self.USERS[:3]}, 'field': 'vip', 'operator': 'not_exists'
+        })
+
+        self.assertEqual(self.names(output), ['Alice', 'bob'])
+
+    def test_invalid_expression(self):
+        """Test operatore sconosciuto: task fallito"""
+        task_store = Mock()
+        success, output = self.oa_json.jsonfilter(self.mock_self, {
+            'data': self.USERS, 'where': {'field': 'age', 'operator': '~~'},
+            'task_id': 't1', 'task_store': task_store
+        })
+
+        self.assertFalse(success)
+        self.assertIsNone(output)
+        task_store.set_result.assert_called_once()
+
+    def test_compile_filter(self):
+        """Test predicato compilato riutilizzabile"""
+        predicate = self.oa_json.compileFilter([
+            {'field': 'items.0.sku', 'operator': 'startswith', 'value': 'AB'},
+            {'field': 'total', 'operator': '<', 'value': 10}
+        ])
+
+        self.assertTrue(predicate({'items': [{'sku': 'AB1'}], 'total': '9.5'}))
+        self.assertFalse(predicate({'items': [{'sku': 'AB1'}], 'total': None}))
+        self.assertFalse(predicate({'items': [], 'total': 1}))
+
+
+class TestJsonBackends(OaJsonTestCase):
+    """Test backend columnare NumPy e fallback pure-Python"""
+
+    def dataset(self):
+        rnd = random.Random(7)
+        regions = ['north', 'south', 'east', None]
+        return [
+            {'region': rnd.choice(regions), 'amount': rnd.choice([rnd.randint(-50, 500), str(rnd.random()), None, 'n/a']),
+             'name': rnd.choice(['Beta', 'alpha', 'Gamma', None])}
+            for _ in range(400)
+        ]
+
+    def run_both(self, function, param):
+        outputs = {}
+        for backend in ('python', 'numpy'):
+            success, output = getattr(self.oa_json, function)(self.mock_self, dict(param, backend=backend))
+            self.assertTrue(success)
+            self.assertEqual(output['backend'], backend)
+            outputs[backend] = output
+        return outputs['python'], outputs['numpy']
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy non installato")
+    def test_aggregate_equivalence(self):
+        """Test stessi risultati (e ordine dei gruppi) sui due backend"""
+        data = self.dataset()
+        for operation in ('sum', 'avg', 'min', 'max', 'count'):
+            for group_by in (None, 'region'):
+                if operation == 'count' and not group_by:
+                    continue
+                python, vectorized = self.run_both('jsonaggregate', {
+                    'data': data, 'operation': operation, 'field': 'amount', 'group_by': group_by
+                })
+                if group_by:
+                    self.assertEqual(list(python['result']), list(vectorized['result']))
+                    for group, value in python['result'].items():
+                        self.assertAlmostEqual(value, vectorized['result'][group])
+                else:
+                    self.assertAlmostEqual(python['result'], vectorized['result'])
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy non installato")
+    def test_aggregate_group_order_mixed_values(self):
+        """Test ordine dei gruppi dal primo valore non nullo, anche non numerico"""
+        data = [{'g': 'b', 'v': 1}, {'g': None, 'v': 2}, {'g': 'a', 'v': 'n/a'}, {'g': 3, 'v': 4},
+                {'g': 'a', 'v': 5}, {'g': 'c', 'v': None}, {'g': 'c', 'v': 6}, {'g': 'd', 'v': 'x'}]
+        for operation in ('sum', 'avg', 'min', 'max'):
+            python, vectorized = self.run_both('jsonaggregate', {
+                'data': data, 'operation': operation, 'field': 'v', 'group_by': 'g'
+            })
+            self.assertEqual(list(python['result']), ['b', 'None', 'a', '3', 'c'])
+            self.assertEqual(list(vectorized['result']), list(python['result']))
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy non installato")
+    def test_sort_and_filter_equivalence(self):
+        """Test ordinamento stabile e filtro con maschere"""
+        data = self.dataset()
+        for sort_by, numeric in (('amount', True), ('name', False)):
+            for reverse in (False, True):
+                python, vectorized = self.run_both('jsonsort', {
+                    'data': data, 'sort_by': sort_by, 'numeric': numeric, 'reverse': reverse
+                })
+                self.assertEqual([id(item) for item in python['sorted']], [id(item) for item in vectorized['sorted']])
+
+        python, vectorized = self.run_both('jsonfilter', {'data': data, 'where': {'or': [
+            {'and': [{'field': 'amount', 'operator': '>', 'value': 100}, {'field': 'amount', 'operator': '<=', 'value': '300'}]},
+            {'not': {'field': 'name', 'operator': 'in', 'value': ['Beta', 'alpha']}}
+        ]}})
+        self.assertEqual(python['filtered'], vectorized['filtered'])
+
+    def test_numpy_missing_fallback(self):
+        """Test backend numpy richiesto senza NumPy: pure-Python"""
+        with patch.object(self.oa_json, '_numpy_available', return_value=False):
+            success, output = self.oa_json.jsonaggregate(self.mock_self, {
+                'data': [{'g': 'a', 'v': 1}, {'g': 'a', 'v': '2'}, {'g': 'b', 'v': 5}],
+                'operation': 'sum', 'field': 'v', 'group_by': 'g', 'backend': 'numpy'
+            })
+
+        self.assertTrue(success)
+        self.assertEqual(output['backend'], 'python')
+        self.assertEqual(output['result'], {'a': 3.0, 'b': 5.0})
+
+    def test_invalid_backend(self):
+        """Test backend sconosciuto: task fallito"""
+        success, _ = self.oa_json.jsonsort(self.mock_self, {'data': [{'a': 1}], 'sort_by': 'a', 'backend': 'gpu'})
+
+        self.assertFalse(success)
+
+
+
+class TestJsonAggregations(OaJsonTestCase):
+    """Test aggregazioni multiple in un solo passaggio e sketch"""
+
+    SALES = [
+        {'region': 'EU', 'product': 'A', 'amount': 10, 'customer': 'c1'},
+        {'region': 'EU', 'product': 'A', 'amount': '30', 'customer': 'c2'},
+        {'region': 'US', 'product': 'B', 'amount': 5, 'customer': 'c1'},
+        {'region': 'EU', 'product': 'B', 'amount': None, 'customer': 'c1'},
+        {'region': 'EU', 'product': 'A', 'amount': 'n/a', 'customer': 'c1'},
+    ]
+
+    def test_multi_aggregation_group_by(self):
+        """Test righe per (region, product) con più aggregazioni"""
+        success, output = self.oa_json.jsonaggregate(self.mock_self, {
+            'data': self.SALES, 'group_by': ['region', 'product'],
+            'aggregations': [
+                {'op': 'count', 'as': 'orders'},
+                {'op': 'sum', 'field': 'amount', 'as': 'revenue'},
+                {'op': 'avg', 'field': 'amount'},
+                {'op': 'max', 'field': 'amount'},
+                {'op': 'median', 'field': 'amount'},
+                {'op': 'distinct', 'field': 'customer', 'as': 'customers'}
+            ]
+        })
+
+        self.assertTrue(success)
+        self.assertEqual(output['groups'], 3)
+        self.assertEqual(output['result'][0], {
+            'region': 'EU', 'product': 'A', 'orders': 3, 'revenue': 40.0, 'avg_amount': 20.0,
+            'max_amount': 30.0, 'p50_amount': 20.0, 'customers': 2
+        })
+        self.assertEqual(output['result'][2]['avg_amount'], None)
+
+    def test_without_group_by(self):
+        """Test aggregazioni sull'intero dataset: un solo dizionario"""
+        _, output = self.oa_json.jsonaggregate(self.mock_self, {
+            'data': self.SALES,
+            'aggregations': [{'op': 'min', 'field': 'amount'}, {'op': 'percentile', 'field': 'amount', 'p': 100}]
+        })
+
+        self.assertEqual(output['result'], {'min_amount': 5, 'p100_amount': 30})
+
+    def test_invalid_aggregation(self):
+        """Test operazione sconosciuta o nomi duplicati: task fallito"""
+        for aggregations in ([{'op': 'mode', 'field': 'amount'}], [{'op': 'sum', 'field': 'a'}, {'op': 'sum', 'field': 'a'}]):
+            success, _ = self.oa_json.jsonaggregate(self.mock_self, {'data': self.SALES, 'aggregations': aggregations})
+            self.assertFalse(success)
+
+    def test_quantile_sketch_bounded(self):
+        """Test sketch quantili: memoria limitata ed errore di rango contenuto"""
+        sketch = self.oa_json.QuantileSketch(k=128)
+        values = list(range(100000))
+        random.Random(1).shuffle(values)
+        for value in values:
+            sketch.add(value)
+
+        self.assertFalse(sketch.exact)
+        self.assertLess(sum(len(level) for level in sketch.levels), 128 * 20)
+        for q in (0.5, 0.95, 0.99):
+            self.assertAlmostEqual(sketch.quantile(q) / 100000, q, delta=0.02)
+
+    def test_distinct_sketch(self):
+        """Test conteggio distinti esatto e poi HyperLogLog"""
+        sketch = self.oa_json.DistinctSketch(precision=12)
+        for value in range(1000):
+            sketch.add(value)
+            sketch.add(str(value))
+        self.assertTrue(sketch.exact)
+        self.assertEqual(sketch.count(), 2000)
+
+        for value in range(50000):
+            sketch.add(value)
+        self.assertFalse(sketch.exact)
+        self.assertAlmostEqual(sketch.count() / 51000, 1, delta=0.05)
+
+
+
+class TestJsonJoin(OaJsonTestCase):
+    """Test per jsonjoin"""
+
+    ORDERS = [
+        {'id': 1, 'customer_id': 'c1', 'total': 10},
+        {'id': 2, 'customer_id': 'c2', 'total': 20},
+        {'id': 3, 'customer_id': 'c9', 'total': 30},
+        {'id': 4, 'customer_id': None, 'total': 40},
+    ]
+    CUSTOMERS = [
+        {'customer_id': 'c1', 'name': 'Alice', 'total': 100},
+        {'customer_id': 'c2', 'name': 'Bob'},
+        {'customer_id': 'c3', 'name': 'Carol'},
+    ]
+
+    def join(self, **param):
+        success, output = self.oa_json.jsonjoin(self.mock_self, param)
+        self.assertTrue(success)
+        return output
+
+    def test_join_types(self):
+        """Test inner/left/right/outer, suffisso e chiavi nulle"""
+        inner = self.join(left=self.ORDERS, right=self.CUSTOMERS, on='customer_id')
+        self.assertEqual(inner['joined'][0], {'id': 1, 'customer_id': 'c1', 'total': 10, 'name': 'Alice', 'total_right': 100})
+        self.assertEqual([row['id'] for row in inner['joined']], [1, 2])
+
+        left = self.join(left=self.ORDERS, right=self.CUSTOMERS, on='customer_id', how='left')
+        self.assertEqual([row['id'] for row in left['joined']], [1, 2, 3, 4])
+
+        right = self.join(left=self.ORDERS, right=self.CUSTOMERS, on='customer_id', how='right')
+        self.assertEqual([row.get('id') for row in right['joined']], [1, 2, None])
+
+        outer = self.join(left=self.ORDERS, right=self.CUSTOMERS, on='customer_id', how='outer')
+        self.assertEqual(outer['count'], 5)
+
+    def test_index_on_smaller_side(self):
+        """Test indice sul lato più piccolo, stesso risultato e ordine"""
+        many = [{'k': i % 3, 'v': i} for i in range(10)]
+        few = [{'k': 0, 'tag': 'zero'}, {'k': 1, 'tag': 'one'}, {'k': 1, 'tag': 'uno'}]
+
+        small_right = self.join(left=many, right=few, on='k')
+        small_left = self.join(left=few, right=many, on='k')
+
+        self.assertEqual(small_right['index']['index_side'], 'right')
+        self.assertEqual(small_left['index']['index_side'], 'left')
+        self.assertEqual([(row['tag'], row['v']) for row in small_left['joined']],
+                         [('zero', 0), ('zero', 3), ('zero', 6), ('zero', 9), ('one', 1), ('one', 4), ('one', 7),
+                          ('uno', 1), ('uno', 4), ('uno', 7)])
+        self.assertEqual(small_right['count'], small_left['count'])
+
+    def test_composite_keys_and_task_source(self):
+        """Test chiavi composte con nomi diversi e lato destro da un task precedente"""
+        context = Mock()
+        context.get_task_output.return_value = {'rows': [{'sku': 'A', 'wh': 'MI', 'qty': 4}]}
+
+        output = self.join(
+            left=[{'code': 'A', 'store': 'MI'}, {'code': 'A', 'store': 'RM'}], right='stock_query',
+            left_on=['code', 'store'], right_on=['sku', 'wh'], how='left', workflow_context=context
+        )
+
+        context.get_task_output.assert_called_once_with('stock_query')
+        self.assertEqual(output['joined'], [
+            {'code': 'A', 'store': 'MI', 'sku': 'A', 'wh': 'MI', 'qty': 4},
+            {'code': 'A', 'store': 'RM'}
+        ])
+
+    def test_persisted_index(self):
+        """Test indice salvato nel workflow context e riusato"""
+        from automator import WorkflowContext
+        context = WorkflowContext()
+
+        first = self.join(left=self.ORDERS, right=self.CUSTOMERS, on='customer_id',
+                          index_name='customers', workflow_context=context)
+        with patch.object(self.oa_json, 'JoinIndex', side_effect=AssertionError("rebuilt")):
+            second = self.join(input=[{'customer_id': 'c3'}], on='customer_id',
+                               index_name='customers', workflow_context=context)
+
+        self.assertFalse(first['index']['reused'])
+        self.assertTrue(second['index']['reused'])
+        self.assertEqual(second['joined'], [{'customer_id': 'c3', 'name': 'Carol'}])
+
+    def test_explicit_right_replaces_index(self):
+        """Test 'right' esplicito: indice ricostruito e sostituito, mai dati vecchi"""
+        from automator import WorkflowContext
+        context = WorkflowContext()
+        self.join(left=self.ORDERS, right=self.CUSTOMERS, on='customer_id',
+                  index_name='customers', workflow_context=context)
+
+        second = self.join(left=self.ORDERS, right=[{'customer_id': 'c2', 'name': 'New'}],
+                           on='customer_id', index_name='customers', workflow_context=context)
+        third = self.join(left=[{'customer_id': 'c1'}, {'customer_id': 'c2'}], on='customer_id',
+                          index_name='customers', workflow_context=context)
+
+        self.assertFalse(second['index']['reused'])
+        self.assertEqual({row['name'] for row in second['joined']}, {'New'})
+        self.assertTrue(third['index']['reused'])
+        self.assertEqual(third['joined'], [{'customer_id': 'c2', 'name': 'New'}])
+
+    def test_invalid_join(self):
+        """Test tipo di join sconosciuto o chiavi mancanti"""
+        for param in ({'how': 'cross', 'on': 'customer_id'}, {}):
+            success, _ = self.oa_json.jsonjoin(self.mock_self, dict(param, left=self.ORDERS, right=self.CUSTOMERS))
+            self.assertFalse(success)
+
+
+
+class TestJsonSort(OaJsonTestCase):
+    """Test ordinamento multi-chiave e top-K"""
+
+    def records(self):
+        rnd = random.Random(3)
+        return [{'id': i, 'region': rnd.choice(['EU', 'us', 'Asia', None]), 'amount': rnd.choice([rnd.randint(0, 20), None])}
+                for i in range(300)]
+
+    def sort(self, **param):
+        success, output = self.oa_json.jsonsort(self.mock_self, dict(param, backend='python'))
+        self.assertTrue(success)
+        return output
+
+    def test_mixed_directions(self):
+        """Test chiavi con direzioni diverse, stabile come sort successivi"""
+        data = self.records()
+        output = self.sort(data=data, sort_by=['region', {'field': 'amount', 'order': 'desc'}])
+
+        expected = sorted(data, key=lambda item: float('inf') if item['amount'] is None else item['amount'], reverse=True)
+        expected = sorted(expected, key=lambda item: (item['region'] or '').lower())
+        self.assertEqual(output['sorted'], expected)
+        self.assertEqual(output['numeric'], [False, True])
+
+        prefixed = self.sort(data=data, sort_by='region,-amount')
+        self.assertEqual(prefixed['sorted'], expected)
+
+    def test_limit_matches_full_sort(self):
+        """Test top-K uguale al prefisso dell'ordinamento completo"""
+        data = self.records()
+        for sort_by, reverse in (('amount', True), (['-amount', 'region'], False), ('region', True)):
+            full = self.sort(data=data, sort_by=sort_by, reverse=reverse)
+            top = self.sort(data=data, sort_by=sort_by, reverse=reverse, limit=25)
+
+            self.assertEqual(top['sorted'], full['sorted'][:25])
+            self.assertEqual((top['count'], top['input_count']), (25, 300))
+
+    def test_numeric_autodetect_all_values(self):
+        """Test rilevamento numerico su tutti i valori, non solo il primo"""
+        data = [{'v': 10}, {'v': 9}, {'v': 'n/a'}, {'v': 100}]
+        output = self.sort(data=data, sort_by='v')
+
+        self.assertFalse(output['numeric'])
+        self.assertEqual([item['v'] for item in output['sorted']], [10, 100, 9, 'n/a'])
+
+        output = self.sort(data=data[:2] + data[3:], sort_by='v')
+        self.assertEqual([item['v'] for item in output['sorted']], [9, 10, 100])
+
+    def test_numeric_strings_autodetect(self):
+        """Test stringhe numeriche ordinate come numeri"""
+        data = [{'v': 100}, {'v': '25'}, {'v': None}, {'v': 9}]
+        output = self.sort(data=data, sort_by='v')
+
+        self.assertTrue(output['numeric'])
+        self.assertEqual([item['v'] for item in output['sorted']], [9, '25', 100, None])
+
+        output = self.sort(data=data, sort_by='-v')
+        self.assertEqual([item['v'] for item in output['sorted']], [None, 100, '25', 9])
+
+    def test_nan_sorted_last(self):
+        """Test NaN (anche come stringa) ordinato in fondo, come con NumPy"""
+        data = [{'c': 3}, {'c': 'nan'}, {'c': 1}, {'c': float('nan')}, {'c': 2}, {'c': 0}]
+        output = self.sort(data=data, sort_by='c')
+        self.assertTrue(output['numeric'])
+        self.assertEqual([item['c'] for item in output['sorted']][:5], [0, 1, 2, 3, 'nan'])
+
+        top = self.sort(data=data, sort_by='c', limit=3)
+        self.assertEqual([item['c'] for item in top['sorted']], [0, 1, 2])
+
+        if HAS_NUMPY:
+            _, vectorized = self.oa_json.jsonsort(self.mock_self, {'data': data, 'sort_by': 'c', 'backend': 'numpy'})
+            self.assertEqual(vectorized['sorted'][:5], output['sorted'][:5])
+
+
+
+class TestJsonStreaming(OaJsonTestCase):
+    """Test per fromfile/tofile (lettura e scrittura in streaming)"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        super().setUp()
+        self.test_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.test_dir, ignore_errors=True)
+
+        self.records = [{'id': i, 'region': ['EU', 'US'][i % 2], 'amount': i, 'email': f'U{i}@X.COM'}
+                        for i in range(100)]
+        self.source = os.path.join(self.test_dir, 'orders.jsonl')
+        with open(self.source, 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in self.records)
+
+    def read(self, name):
+        with open(os.path.join(self.test_dir, name)) as f:
+            return json.load(f)
+
+    def test_filter_file_to_file(self):
+        """Test filtro da JSON Lines a file JSON, senza risultati in memoria"""
+        success, output = self.oa_json.jsonfilter(self.mock_self, {
+            'fromfile': self.source, 'field': 'amount', 'operator': '>=', 'value': 90,
+            'tofile': os.path.join(self.test_dir, 'big.json')
+        })
+
+        self.assertTrue(success)
+        self.assertIsNone(output['filtered'])
+        self.assertEqual((output['count'], output['original_count']), (10, 100))
+        self.assertEqual(self.read('big.json'), self.records[90:])
+
+    def test_extract_and_transform_stream(self):
+        """Test extract e transform su un file, con risultato in memoria"""
+        success, output = self.oa_json.jsonextract(self.mock_self, {
+            'fromfile': self.source, 'fields': 'id,email'
+        })
+        self.assertTrue(success)
+        self.assertEqual(output['extracted'][3], {'id': 3, 'email': 'U3@X.COM'})
+
+        success, output = self.oa_json.jsontransform(self.mock_self, {
+            'fromfile': self.source, 'mapping': {'email': 'lower:email'}, 'remove_fields': ['region'],
+            'tofile': os.path.join(self.test_dir, 'clean.json')
+        })
+        self.assertTrue(success)
+        self.assertEqual(output['count'], 100)
+        self.assertEqual(self.read('clean.json')[3], {'email': 'u3@x.com', 'id': 3, 'amount': 3})
+
+    def test_aggregate_stream(self):
+        """Test aggregazione in un passaggio su file (anche forma operation/field)"""
+        success, output = self.oa_json.jsonaggregate(self.mock_self, {
+            'fromfile': self.source, 'group_by': 'region',
+            'aggregations': [{'op': 'count', 'as': 'orders'}, {'op': 'sum', 'field': 'amount'}]
+        })
+        self.assertTrue(success)
+        self.assertEqual(output['result'], [{'region': 'EU', 'orders': 50, 'sum_amount': 2450.0},
+                                            {'region': 'US', 'orders': 50, 'sum_amount': 2500.0}])
+        self.assertEqual(output['input_count'], 100)
+
+        success, output = self.oa_json.jsonaggregate(self.mock_self, {
+            'fromfile': self.source, 'operation': 'max', 'field': 'amount'
+        })
+        self.assertTrue(success)
+        self.assertEqual(output['result'], 99)
+
+        success, _ = self.oa_json.jsonaggregate(self.mock_self, {
+            'fromfile': self.source, 'operation': 'group', 'group_by': 'region'
+        })
+        self.assertFalse(success)
+
+    def test_aggregate_stream_legacy_shape(self):
+        """Test forma operation/field: stesso risultato da data e da fromfile"""
+        records = self.records[:20] + [{'id': 100, 'amount': 'n/a'}, {'id': 101, 'region': 'APAC', 'amount': 'n/a'}]
+        source = os.path.join(self.test_dir, 'mixed.jsonl')
+        with open(source, 'w') as f:
+            f.writelines(json.dumps(record) + '\n' for record in records)
+
+        for operation in ('count', 'sum', 'avg', 'min', 'max'):
+            for group_by in (None, 'region'):
+                param = {'operation': operation, 'field': 'amount', 'backend': 'python'}
+                if group_by:
+                    param['group_by'] = group_by
+                _, expected = self.oa_json.jsonaggregate(self.mock_self, dict(param, data=records))
+                success, output = self.oa_json.jsonaggregate(self.mock_self, dict(param, fromfile=source))
+
+                self.assertTrue(success)
+                self.assertEqual(output['result'], expected['result'], (operation, group_by))
+                self.assertEqual(set(output), set(expected))
+
+        success, output = self.oa_json.jsonaggregate(self.mock_self, {
+            'fromfile': source, 'operation': 'sum', 'field': 'missing'
+        })
+        self.assertEqual(output['result'], 0)
+
+    def test_row_stream_input_read_once(self):
+        """Test input con righe in streaming (oa-pg stream: true): un solo passaggio"""
+        records = self.records
+
+        class FakeRowStream:
+            iterations = 0
+
+            def iterrows(self):
+                FakeRowStream.iterations += 1
+                return iter(records)
+
+        rows = FakeRowStream()
+        success, output = self.oa_json.jsonfilter(self.mock_self, {
+            'input': {'rows': rows, 'streamed': True}, 'field': 'region', 'operator': '==', 'value': 'EU'
+        })
+        self.assertTrue(success)
+        self.assertEqual((output['count'], output['original_count']), (50, 100))
+
+        success, output = self.oa_json.jsonaggregate(self.mock_self, {
+            'input': {'rows': rows}, 'aggregations': [{'op': 'count'}]
+        })
+        self.assertEqual(output['result'], {'count': 100})
+        self.assertEqual(FakeRowStream.iterations, 2)
+
+
+class TestJsonValidate(OaJsonTestCase):
+    """Test per jsonvalidate: validatori in cache, fast path e batch"""
+
+    SCHEMA = {
+        'type': 'object',
+        'required': ['id', 'email'],
+        'properties': {'id': {'type': 'integer'}, 'email': {'type': 'string'},
+                       'tags': {'type': 'array', 'items': {'type': 'string'}}}
+    }
+    ROWS = [
+        {'id': 1, 'email': 'a@x.com'},
+        {'id': 2.0, 'email': 'b@x.com', 'tags': ['x']},
+        {'id': True, 'email': 'c@x.com'},
+        {'id': 4},
+        {'id': 5, 'email': 'e@x.com', 'tags': ['ok', 7]},
+        'not-an-object'
+    ]
+
+    def test_fast_path_batch(self):
+        """Test schema semplice senza jsonschema, tutti gli item invalidi in un passaggio"""
+        with patch.object(self.oa_json, '_jsonschema_validator') as fallback:
+            success, output = self.oa_json.jsonvalidate(self.mock_self, {
+                'data': self.ROWS, 'schema': self.SCHEMA, 'batch': True, 'strict': False
+            })
+
+        fallback.assert_not_called()
+        self.assertTrue(success)
+        self.assertFalse(output['valid'])
+        self.assertEqual(output['backend'], 'python')
+        self.assertEqual(output['invalid'], [2, 3, 4, 5])
+        self.assertEqual([(error['index'], error['path'], error['validator']) for error in output['errors']], [
+            (2, ['id'], 'type'), (3, [], 'required'), (4, ['tags', 1], 'type'), (5, [], 'type')
+        ])
+
+    def test_strict_failure_and_cache(self):
+        """Test strict: task fallito; validatore compilato una sola volta per schema"""
+        success, output = self.oa_json.jsonvalidate(self.mock_self, {'data': self.ROWS[3], 'schema': self.SCHEMA})
+
+        self.assertFalse(success)
+        self.assertEqual(output['errors'][0]['message'], "'email' is a required property")
+
+        first = self.oa_json.schemaValidator(self.SCHEMA)
+        self.assertIs(self.oa_json.schemaValidator(dict(reversed(list(self.SCHEMA.items())))), first)
+
+    @unittest.skipUnless(HAS_JSONSCHEMA, "jsonschema non installato")
+    def test_jsonschema_backend_matches_fast_path(self):
+        """Test keyword complesse via jsonschema, stesso esito del fast path"""
+        fast, _ = self.oa_json.schemaValidator(self.SCHEMA)
+        full = self.oa_json._jsonschema_validator(self.SCHEMA)
+        for row in self.ROWS:
+            self.assertEqual(sorted(map(str, fast(row))), sorted(map(str, full(row))))
+
+        success, output = self.oa_json.jsonvalidate(self.mock_self, {
+            'data': [{'age': 3}, {'age': -1}], 'batch': True, 'strict': False,
+            'schema': {'type': 'object', 'properties': {'age': {'type': 'integer', 'minimum': 0}}}
+        })
+        self.assertEqual((output['backend'], output['invalid']), ('jsonschema', [1]))
+
+    def test_legacy_drafts_skip_fast_path(self):
+        """Test $schema draft-03/04 (1.0 non è integer): niente fast path"""
+        legacy = dict(self.SCHEMA, **{'$schema': 'http://json-schema.org/draft-04/schema#'})
+        current = dict(self.SCHEMA, **{'$schema': 'https://json-schema.org/draft/2020-12/schema'})
+
+        self.assertFalse(self.oa_json._is_simple_schema(legacy))
+        self.assertTrue(self.oa_json._is_simple_schema(current))
+        if HAS_JSONSCHEMA:
+            validate, backend = self.oa_json.schemaValidator(legacy)
+            self.assertEqual(backend, 'jsonschema')
+            self.assertEqual([error['path'] for error in validate(self.ROWS[1])], [['id']])
+
+if __name__ == '__main__':
+    unittest.main()
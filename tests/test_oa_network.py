@@ -12,6 +12,8 @@ import requests
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import ratelimit
+
 # Simula il modulo prima dell'import
 #sys.modules['oacommon'] = MagicMock()
 #sys.modules['logger_config'] = MagicMock()
@@ -152,5 +154,484 @@ class TestNetworkIntegration(unittest.TestCase):
         pass
 
 
+def make_response(status=200, body=b'', headers=None, reason='OK'):
+    """Crea una requests.Response come restituita dall'adapter HTTP"""
+    response = requests.models.Response()
+    response.status_code = status
+    response.reason = reason
+    response._content = body
+    response.headers.update(headers or {})
+    return response
+
+
+class TestHTTPSessions(unittest.TestCase):
+    """Test per il registro di sessioni HTTP keep-alive"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("oa_network", "./modules/oa-network.py")
+        self.oa_network = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.oa_network)
+
+        self.oa_network.gdict = {'_wallet': None}
+        self.mock_self = Mock()
+        self.mock_self.gdict = self.oa_network.gdict
+
+    def tearDown(self):
+        self.oa_network.close_sessions()
+        ratelimit.reset_guards()
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_session_reused_per_host(self, mock_send):
+        """Test stessa sessione per host, sessioni diverse per host diversi"""
+        mock_send.return_value = make_response(200, b'{"ok": true}', {'Content-Type': 'application/json'})
+
+        for _ in range(3):
+            success, output = self.oa_network.httpsget(
+                self.mock_self, {'host': 'api.example.com', 'port': 443, 'get': '/v1/items'}
+            )
+            self.assertTrue(success)
+        self.oa_network.httpspost(
+            self.mock_self, {'host': 'other.example.com', 'port': 443, 'path': '/x', 'data': {'a': 1}}
+        )
+
+        self.assertEqual(output['json'], {'ok': True})
+        self.assertEqual(mock_send.call_count, 4)
+        self.assertEqual(self.oa_network.session_status(),
+                         ['https://api.example.com:443', 'https://other.example.com:443'])
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_httpget_headers_and_status(self, mock_send):
+        """Test httpget con header custom e stato di errore"""
+        mock_send.return_value = make_response(404, b'missing', reason='Not Found')
+
+        success, output = self.oa_network.httpget(self.mock_self, {
+            'host': 'localhost', 'port': 8080, 'get': '/api', 'headers': {'X-Token': 'abc'}
+        })
+
+        self.assertFalse(success)
+        self.assertEqual(output['status_code'], 404)
+        self.assertEqual(output['url'], 'http://localhost:8080/api')
+        request = mock_send.call_args.args[0]
+        self.assertEqual(request.headers['X-Token'], 'abc')
+
+    def test_session_options(self):
+        """Test dimensione pool, nessun cookie memorizzato e keep_alive disattivato"""
+        session = self.oa_network.get_session('https://api.example.com/a', {'pool_maxsize': 3})
+
+        self.assertIs(session, self.oa_network.get_session('https://api.example.com:443/b', {'pool_maxsize': 2}))
+        self.assertEqual(session.get_adapter('https://api.example.com/').poolmanager.connection_pool_kw['maxsize'], 3)
+        self.assertEqual(session.cookies.get_policy().allowed_domains(), ())
+
+        with patch('requests.adapters.HTTPAdapter.send', return_value=make_response()) as mock_send:
+            self.oa_network.http_request('GET', 'https://api.example.com/a', {'keep_alive': False})
+        self.assertEqual(mock_send.call_args.args[0].headers['Connection'], 'close')
+
+    def test_session_pool_grows(self):
+        """Test pool_maxsize maggiore (es. httpbatch): sessione ricreata con il pool più grande"""
+        session = self.oa_network.get_session('https://api.example.com/a', {'pool_maxsize': 10})
+
+        with patch('requests.adapters.HTTPAdapter.send', return_value=make_response()):
+            success, output = self.oa_network.httpbatch(self.mock_self, {
+                'requests': ['https://api.example.com/x', 'https://api.example.com/y'], 'concurrency': 16
+            })
+        self.assertTrue(success)
+
+        grown = self.oa_network.get_session('https://api.example.com/a')
+        self.assertIsNot(grown, session)
+        self.assertEqual(grown.get_adapter('https://api.example.com/').poolmanager.connection_pool_kw['maxsize'], 16)
+        self.assertEqual(self.oa_network.session_status(), ['https://api.example.com:443'])
+
+
+class TestHTTPBatch(unittest.TestCase):
+    """Test per httpbatch (richieste concorrenti in un task)"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("oa_network", "./modules/oa-network.py")
+        self.oa_network = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.oa_network)
+
+        self.oa_network.gdict = {'_wallet': None}
+        self.mock_self = Mock()
+        self.mock_self.gdict = self.oa_network.gdict
+
+    def tearDown(self):
+        self.oa_network.close_sessions()
+        ratelimit.reset_guards()
+
+    @staticmethod
+    def _serve(request, **kwargs):
+        """Risponde con l'id della URL, lentamente per gli id bassi"""
+        import time
+        item_id = int(request.url.rstrip('/').rsplit('/', 1)[-1])
+        time.sleep(0.01 * (5 - item_id % 5))
+        if item_id == 13:
+            return make_response(500, b'boom', reason='Server Error')
+        return make_response(200, ('{"id": %d}' % item_id).encode(), {'Content-Type': 'application/json'})
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_template_results_in_order(self, mock_send):
+        """Test URL template con risultati ordinati e concorrenza"""
+        mock_send.side_effect = self._serve
+
+        success, output = self.oa_network.httpbatch(self.mock_self, {
+            'url_template': 'https://api.example.com/items/{value}',
+            'values': list(range(10)),
+            'concurrency': 5,
+        })
+
+        self.assertTrue(success)
+        self.assertEqual([r['json']['id'] for r in output['results']], list(range(10)))
+        self.assertEqual(output['succeeded'], 10)
+        self.assertTrue(all('elapsed_ms' in r for r in output['results']))
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_failures_and_values_from_input(self, mock_send):
+        """Test valori dal task precedente e richieste fallite"""
+        mock_send.side_effect = self._serve
+
+        success, output = self.oa_network.httpbatch(self.mock_self, {
+            'url_template': 'https://api.example.com/items/{id}',
+            'input': {'rows': [{'id': 12}, {'id': 13}]},
+        })
+
+        self.assertFalse(success)
+        self.assertEqual(output['failed'], 1)
+        self.assertEqual(output['results'][1]['status_code'], 500)
+        self.assertEqual(output['results'][1]['content'], 'boom')
+
+        success, _ = self.oa_network.httpbatch(self.mock_self, {
+            'requests': ['https://api.example.com/items/13'], 'fail_on_error': False
+        })
+        self.assertTrue(success)
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_request_specs(self, mock_send):
+        """Test lista di richieste esplicite con metodo, header e body"""
+        mock_send.return_value = make_response(201, b'created')
+
+        success, output = self.oa_network.httpbatch(self.mock_self, {
+            'headers': {'X-Token': 'abc'},
+            'requests': [{'url': 'https://api.example.com/items', 'method': 'post', 'json': {'a': 1}}],
+        })
+
+        self.assertTrue(success)
+        request = mock_send.call_args.args[0]
+        self.assertEqual((request.method, request.body), ('POST', b'{"a": 1}'))
+        self.assertEqual(request.headers['X-Token'], 'abc')
+        self.assertEqual(output['results'][0]['content'], 'created')
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_rate_limit_scoped_to_task(self, mock_send):
+        """Test rate_limit del task in aggiunta al limitatore dell'host, senza modificarlo"""
+        mock_send.return_value = make_response(200, b'ok')
+
+        with patch('ratelimit.time.sleep') as mock_sleep:
+            self.oa_network.httpbatch(self.mock_self, {
+                'requests': ['https://a.example.com/1', 'https://a.example.com/2'],
+                'rate_limit': 1000, 'concurrency': 1,
+            })
+
+        stats = ratelimit.guard_stats()['a.example.com']
+        self.assertIsNone(stats['limiter']['rate'])
+        self.assertEqual([limiter['rate'] for limiter in stats['task_limiters']], [1000])
+        self.assertEqual(stats['requests'], 2)
+        self.assertLessEqual(mock_sleep.call_count, 1)
+
+
+class TestHTTPDownload(unittest.TestCase):
+    """Test per il download in streaming su file (tofile)"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import importlib.util
+        import tempfile
+        spec = importlib.util.spec_from_file_location("oa_network", "./modules/oa-network.py")
+        self.oa_network = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.oa_network)
+
+        self.oa_network.gdict = {'_wallet': None}
+        self.mock_self = Mock()
+        self.mock_self.gdict = self.oa_network.gdict
+        self.temp_dir = tempfile.mkdtemp()
+        self.param = {'host': 'artifacts.example.com', 'port': 443, 'get': '/app.tar.gz'}
+
+    def tearDown(self):
+        import shutil
+        self.oa_network.close_sessions()
+        ratelimit.reset_guards()
+        shutil.rmtree(self.temp_dir)
+
+    @staticmethod
+    def _streamed(status, chunks, reason='OK'):
+        """Risposta il cui body è disponibile solo a chunk"""
+        import io
+        response = make_response(status, reason=reason)
+        response._content = False
+        response.raw = io.BytesIO(b''.join(chunks))
+        return response
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_download_with_hash(self, mock_send):
+        """Test body scritto su file a chunk con hash calcolato in streaming"""
+        import hashlib
+        body = b'x' * 5000
+        mock_send.return_value = self._streamed(200, [body])
+        target = os.path.join(self.temp_dir, 'sub', 'app.tar.gz')
+
+        success, output = self.oa_network.httpsget(self.mock_self, dict(
+            self.param, tofile=target, hash='sha256', chunk_size=1024
+        ))
+
+        self.assertTrue(success)
+        self.assertTrue(mock_send.call_args.kwargs['stream'])
+        self.assertNotIn('content', output)
+        self.assertEqual(output['size'], 5000)
+        self.assertEqual(output['hash'], hashlib.sha256(body).hexdigest())
+        with open(target, 'rb') as f:
+            self.assertEqual(f.read(), body)
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_hash_mismatch_removes_file(self, mock_send):
+        """Test hash atteso diverso: task fallito e nessun file lasciato"""
+        mock_send.return_value = self._streamed(200, [b'data'])
+        target = os.path.join(self.temp_dir, 'app.tar.gz')
+
+        success, _ = self.oa_network.httpget(self.mock_self, dict(
+            self.param, port=80, tofile=target, hash='md5', expected_hash='0' * 32
+        ))
+
+        self.assertFalse(success)
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_http_error_writes_nothing(self, mock_send):
+        """Test stato di errore: nessun file scritto"""
+        mock_send.return_value = self._streamed(404, [b'not here'], reason='Not Found')
+
+        success, output = self.oa_network.httpsget(self.mock_self, dict(
+            self.param, tofile=os.path.join(self.temp_dir, 'app.tar.gz')
+        ))
+
+        self.assertFalse(success)
+        self.assertIsNone(output['file'])
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+
+class TestHTTPCache(unittest.TestCase):
+    """Test per la cache HTTP con richieste condizionali"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import importlib.util
+        import tempfile
+        spec = importlib.util.spec_from_file_location("oa_network", "./modules/oa-network.py")
+        self.oa_network = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.oa_network)
+
+        self.oa_network.gdict = {'_wallet': None}
+        self.mock_self = Mock()
+        self.mock_self.gdict = self.oa_network.gdict
+        self.temp_dir = tempfile.mkdtemp()
+        self.param = {'host': 'api.example.com', 'port': 443, 'get': '/v1/prices', 'cache': self.temp_dir}
+
+    def tearDown(self):
+        import shutil
+        self.oa_network.close_sessions()
+        ratelimit.reset_guards()
+        shutil.rmtree(self.temp_dir)
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_revalidation_with_etag(self, mock_send):
+        """Test ETag inviato come If-None-Match e body servito dalla cache su 304"""
+        mock_send.side_effect = [
+            make_response(200, b'{"price": 1}', {'Content-Type': 'application/json', 'ETag': '"v1"'}),
+            make_response(304, b'', {'ETag': '"v1"'}, reason='Not Modified'),
+        ]
+
+        _, first = self.oa_network.httpsget(self.mock_self, dict(self.param))
+        success, second = self.oa_network.httpsget(self.mock_self, dict(self.param))
+
+        self.assertEqual((first['cache'], first['from_cache']), ('miss', False))
+        self.assertTrue(success)
+        self.assertEqual((second['cache'], second['from_cache']), ('revalidated', True))
+        self.assertEqual(second['status_code'], 200)
+        self.assertEqual(second['json'], {'price': 1})
+        self.assertEqual(mock_send.call_args.args[0].headers['If-None-Match'], '"v1"')
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_fresh_entry_skips_network(self, mock_send):
+        """Test Cache-Control max-age: nessuna richiesta finché la risposta è fresca"""
+        mock_send.return_value = make_response(200, b'data', {'Cache-Control': 'public, max-age=60'})
+
+        self.oa_network.httpsget(self.mock_self, dict(self.param))
+        _, output = self.oa_network.httpsget(self.mock_self, dict(self.param))
+
+        self.assertEqual(mock_send.call_count, 1)
+        self.assertEqual(output['cache'], 'fresh')
+        self.assertEqual(output['content'], 'data')
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_not_stored(self, mock_send):
+        """Test no-store, risposte senza validatori e header diversi"""
+        mock_send.return_value = make_response(200, b'a', {'Cache-Control': 'no-store', 'ETag': '"x"'})
+        self.oa_network.httpsget(self.mock_self, dict(self.param))
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+        mock_send.return_value = make_response(200, b'a', {'Cache-Control': 'max-age=60'})
+        self.oa_network.httpsget(self.mock_self, dict(self.param, headers={'Authorization': 'one'}))
+        _, output = self.oa_network.httpsget(self.mock_self, dict(self.param, headers={'Authorization': 'two'}))
+        self.assertEqual(output['cache'], 'miss')
+
+    def test_refresh_keeps_max_age(self):
+        """Test 304 senza Cache-Control: max-age memorizzato mantenuto"""
+        cache = self.oa_network.HTTPCache(self.temp_dir)
+        url = 'https://api.example.com/v1/prices'
+        cache.put(url, {}, make_response(200, b'a', {'ETag': '"v1"', 'Cache-Control': 'max-age=60'}))
+
+        cache.refresh(url, {}, cache.get(url), make_response(304, b'', {'ETag': '"v1"'}))
+        entry = cache.get(url)
+        self.assertEqual(entry['max_age'], 60)
+        self.assertTrue(self.oa_network.HTTPCache.is_fresh(entry))
+
+        cache.refresh(url, {}, entry, make_response(304, b'', {'Cache-Control': 'no-cache'}))
+        self.assertFalse(self.oa_network.HTTPCache.is_fresh(cache.get(url)))
+
+    def test_prune_oldest_entries(self):
+        """Test limite di voci: rimosse le meno recenti (metadati e body)"""
+        cache = self.oa_network.HTTPCache(self.temp_dir, max_entries=2)
+        for index, name in enumerate(('a', 'b', 'c')):
+            url = f'https://api.example.com/{name}'
+            cache.put(url, {}, make_response(200, name.encode(), {'ETag': f'"{name}"'}))
+            meta_path, _ = cache._paths(cache._key(url, {}))
+            os.utime(meta_path, (1000 + index, 1000 + index))
+
+        cache.put('https://api.example.com/d', {}, make_response(200, b'd', {'ETag': '"d"'}))
+
+        self.assertIsNone(cache.get('https://api.example.com/a'))
+        self.assertIsNone(cache.get('https://api.example.com/b'))
+        self.assertEqual(cache.get('https://api.example.com/c')['body'], b'c')
+        self.assertEqual(len(os.listdir(self.temp_dir)), 4)
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_cache_off_by_default(self, mock_send):
+        """Test cache disattivata senza l'opzione cache"""
+        mock_send.return_value = make_response(200, b'a', {'Cache-Control': 'max-age=60'})
+        param = dict(self.param)
+        del param['cache']
+
+        _, output = self.oa_network.httpsget(self.mock_self, param)
+
+        self.assertNotIn('cache', output)
+
+
+class TestHTTPPagination(unittest.TestCase):
+    """Test per la paginazione automatica di httpsget"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("oa_network", "./modules/oa-network.py")
+        self.oa_network = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.oa_network)
+
+        self.oa_network.gdict = {'_wallet': None}
+        self.mock_self = Mock()
+        self.mock_self.gdict = self.oa_network.gdict
+        self.param = {'host': 'api.example.com', 'port': 443, 'get': '/v1/items'}
+        self.items = list(range(25))
+
+    def tearDown(self):
+        self.oa_network.close_sessions()
+        ratelimit.reset_guards()
+
+    def _json(self, data, headers=None):
+        import json
+        return make_response(200, json.dumps(data).encode(),
+                             dict({'Content-Type': 'application/json'}, **(headers or {})))
+
+    def _query(self, request):
+        from urllib.parse import urlparse, parse_qs
+        return {k: v[0] for k, v in parse_qs(urlparse(request.url).query).items()}
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_offset_pages(self, mock_send):
+        """Test offset/limit con stop sulla pagina incompleta"""
+        def serve(request, **kwargs):
+            query = self._query(request)
+            offset, limit = int(query['offset']), int(query['limit'])
+            return self._json({'data': {'rows': self.items[offset:offset + limit]}})
+        mock_send.side_effect = serve
+
+        success, output = self.oa_network.httpsget(self.mock_self, dict(
+            self.param, paginate={'style': 'offset', 'limit': 10, 'items': 'data.rows'}
+        ))
+
+        self.assertTrue(success)
+        self.assertEqual(output['items'], self.items)
+        self.assertEqual(output['pages'], 3)
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_link_header(self, mock_send):
+        """Test pagine seguite tramite header Link rel=next"""
+        def serve(request, **kwargs):
+            page = int(self._query(request).get('page', 1))
+            headers = {}
+            if page < 3:
+                headers['Link'] = f'<https://api.example.com/v1/items?page={page + 1}>; rel="next"'
+            return self._json(self.items[(page - 1) * 10:page * 10], headers)
+        mock_send.side_effect = serve
+
+        success, output = self.oa_network.httpsget(self.mock_self, dict(self.param, paginate='link'))
+
+        self.assertTrue(success)
+        self.assertEqual(output['items'], self.items)
+        self.assertEqual(mock_send.call_count, 3)
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_cursor_to_file(self, mock_send):
+        """Test cursore nel body e item scritti in JSON Lines"""
+        import tempfile
+        import json
+        def serve(request, **kwargs):
+            cursor = int(self._query(request).get('after', 0))
+            page = self.items[cursor:cursor + 10]
+            next_cursor = cursor + 10 if cursor + 10 < len(self.items) else None
+            return self._json({'results': page, 'meta': {'next': next_cursor}})
+        mock_send.side_effect = serve
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            target = os.path.join(temp_dir, 'items.jsonl')
+            success, output = self.oa_network.httpsget(self.mock_self, dict(
+                self.param, tofile=target,
+                paginate={'style': 'cursor', 'cursor_path': 'meta.next', 'cursor_param': 'after'}
+            ))
+            with open(target) as f:
+                written = [json.loads(line) for line in f]
+
+        self.assertTrue(success)
+        self.assertIsNone(output['items'])
+        self.assertEqual((output['count'], output['pages']), (25, 3))
+        self.assertEqual(written, self.items)
+
+    @patch('requests.adapters.HTTPAdapter.send')
+    def test_page_error_and_max_pages(self, mock_send):
+        """Test errore HTTP su una pagina e limite max_pages"""
+        mock_send.side_effect = [self._json([1, 2]), make_response(503, b'', reason='Unavailable')]
+        success, output = self.oa_network.httpsget(self.mock_self, dict(self.param, paginate='page'))
+        self.assertFalse(success)
+        self.assertIn('on page 2', output['error'])
+
+        mock_send.side_effect = lambda request, **kwargs: self._json([1, 2])
+        success, output = self.oa_network.httpsget(self.mock_self, dict(
+            self.param, paginate={'style': 'page', 'max_pages': 4}
+        ))
+        self.assertTrue(success)
+        self.assertEqual(output['count'], 8)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -297,5 +297,768 @@ class TestOaPg(unittest.TestCase):
 
         self.assertFalse(success)
 
+
+class OaPgTestCase(unittest.TestCase):
+    """Base: caricamento dinamico di oa-pg e parametri di connessione comuni"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import importlib.util
+        spec = importlib.util.spec_from_file_location("oa_pg", "./modules/oa-pg.py")
+        self.oa_pg = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.oa_pg)
+
+        self.oa_pg.gdict = {'_wallet': None}
+        self.mock_self = Mock()
+        self.mock_self.gdict = self.oa_pg.gdict
+
+        self.param = {
+            'pgdatabase': 'testdb',
+            'pgdbhost': 'localhost',
+            'pgdbusername': 'user',
+            'pgdbpassword': 'pass',
+            'pgdbport': '5432',
+        }
+
+    def tearDown(self):
+        self.oa_pg.close_pools()
+
+
+class TestOaPgPool(OaPgTestCase):
+    """Test per il connection pool di oa-pg"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        super().setUp()
+        self.param['statement'] = 'SELECT 1'
+
+    def _mock_connection(self):
+        """Connessione mock 'aperta' (closed == 0 come psycopg2)"""
+        conn = MagicMock()
+        conn.closed = 0
+        cursor = MagicMock()
+        cursor.description = [('id',)]
+        cursor.fetchall.return_value = [(1,)]
+        conn.cursor.return_value = cursor
+        return conn
+
+    @patch('psycopg2.connect')
+    def test_connection_reused_across_tasks(self, mock_connect):
+        """Test riuso della connessione tra task successivi"""
+        conn = self._mock_connection()
+        mock_connect.return_value = conn
+
+        for _ in range(3):
+            success, _ = self.oa_pg.select(self.mock_self, dict(self.param))
+            self.assertTrue(success)
+
+        mock_connect.assert_called_once()
+        conn.close.assert_not_called()
+        status = list(self.oa_pg.pool_status().values())[0]
+        self.assertEqual(status['reused'], 2)
+        self.assertEqual(status['idle'], 1)
+
+    @patch('psycopg2.connect')
+    def test_pool_disabled(self, mock_connect):
+        """Test pool: false apre e chiude una connessione per task"""
+        conn = self._mock_connection()
+        mock_connect.return_value = conn
+
+        for _ in range(2):
+            self.oa_pg.select(self.mock_self, dict(self.param, pool=False))
+
+        self.assertEqual(mock_connect.call_count, 2)
+        self.assertEqual(conn.close.call_count, 2)
+        self.assertEqual(self.oa_pg.pool_status(), {})
+
+    @patch('psycopg2.connect')
+    def test_pool_disabled_as_string(self, mock_connect):
+        """Test pool: "false" (stringa) disabilita il pool"""
+        conn = self._mock_connection()
+        mock_connect.return_value = conn
+
+        for value in ('false', 'False', 'no', '0'):
+            self.oa_pg.select(self.mock_self, dict(self.param, pool=value))
+
+        self.assertEqual(conn.close.call_count, 4)
+        self.assertEqual(self.oa_pg.pool_status(), {})
+        self.assertTrue(self.oa_pg._pool_options({'pool': 'true'})['pool'])
+        self.assertTrue(self.oa_pg._pool_options({})['pool'])
+
+    @patch('psycopg2.connect')
+    def test_broken_connection_discarded(self, mock_connect):
+        """Test connessione scartata dopo un errore di connessione"""
+        import psycopg2
+        broken = self._mock_connection()
+        broken.cursor.return_value.execute.side_effect = psycopg2.OperationalError('server closed')
+        healthy = self._mock_connection()
+        mock_connect.side_effect = [broken, healthy]
+
+        success, _ = self.oa_pg.select(self.mock_self, dict(self.param))
+        self.assertFalse(success)
+        broken.close.assert_called_once()
+
+        success, _ = self.oa_pg.select(self.mock_self, dict(self.param))
+        self.assertTrue(success)
+        self.assertEqual(mock_connect.call_count, 2)
+
+    @patch('psycopg2.connect')
+    def test_idle_health_check(self, mock_connect):
+        """Test ping delle connessioni inattive e scarto di quelle morte"""
+        import psycopg2
+        stale = self._mock_connection()
+        fresh = self._mock_connection()
+        mock_connect.side_effect = [stale, fresh]
+
+        pool = self.oa_pg.ConnectionPool({}, check_after=0)
+        pool.putconn(pool.getconn())
+        stale.cursor.return_value.execute.side_effect = psycopg2.OperationalError('gone')
+
+        self.assertIs(pool.getconn(), fresh)
+        stale.close.assert_called_once()
+        self.assertEqual(pool.status()['discarded'], 1)
+
+    @patch('psycopg2.connect')
+    def test_idle_eviction_keeps_min(self, mock_connect):
+        """Test chiusura delle connessioni inattive oltre idle_timeout"""
+        conns = [self._mock_connection() for _ in range(3)]
+        mock_connect.side_effect = conns
+
+        pool = self.oa_pg.ConnectionPool({}, minconn=1, idle_timeout=0)
+        borrowed = [pool.getconn() for _ in range(3)]
+        for conn in borrowed:
+            pool.putconn(conn)
+
+        status = pool.status()
+        self.assertEqual(status['idle'], 1)
+        self.assertEqual(status['evicted'], 2)
+
+    @patch('psycopg2.connect')
+    def test_pool_exhausted(self, mock_connect):
+        """Test timeout quando il pool è pieno"""
+        mock_connect.side_effect = lambda **kwargs: self._mock_connection()
+
+        pool = self.oa_pg.ConnectionPool({}, maxconn=1, timeout=0.05)
+        conn = pool.getconn()
+
+        with self.assertRaises(self.oa_pg.PoolTimeoutError):
+            pool.getconn()
+
+        pool.putconn(conn)
+        self.assertIs(pool.getconn(), conn)
+
+
+
+class TestOaPgStream(OaPgTestCase):
+    """Test per la modalità stream (server-side cursor) di select"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import tempfile
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+
+        self.param.update({
+            'statement': 'SELECT id, name FROM users',
+            'stream': True,
+            'itersize': 2
+        })
+
+    def tearDown(self):
+        import shutil
+        super().tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def _mock_connection(self):
+        """Connessione con cursor server-side che restituisce 3 righe in 2 chunk"""
+        conn = MagicMock()
+        conn.closed = 0
+        cursor = MagicMock()
+        cursor.description = [('id',), ('name',)]
+        cursor.fetchmany.side_effect = [[(1, 'a'), (2, 'b')], [(3, 'c')], []]
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    @patch('psycopg2.connect')
+    def test_stream_to_jsonl(self, mock_connect):
+        """Test scrittura incrementale in JSON Lines"""
+        import json
+        conn, cursor = self._mock_connection()
+        mock_connect.return_value = conn
+        out_file = os.path.join(self.temp_dir, 'users.jsonl')
+
+        success, output = self.oa_pg.select(self.mock_self, dict(self.param, tojsonfile=out_file))
+
+        self.assertTrue(success)
+        self.assertEqual(output['row_count'], 3)
+        self.assertEqual(output['columns'], ['id', 'name'])
+        self.assertIsNone(output['rows'])
+        self.assertIn('name', conn.cursor.call_args.kwargs)
+        self.assertEqual(cursor.itersize, 2)
+        cursor.fetchall.assert_not_called()
+
+        with open(out_file) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(rows, [{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}, {'id': 3, 'name': 'c'}])
+
+    @patch('psycopg2.connect')
+    def test_stream_to_json_array(self, mock_connect):
+        """Test scrittura incrementale come array JSON"""
+        import json
+        conn, _ = self._mock_connection()
+        mock_connect.return_value = conn
+        out_file = os.path.join(self.temp_dir, 'users.json')
+
+        success, output = self.oa_pg.select(
+            self.mock_self, dict(self.param, tojsonfile=out_file, stream_format='json')
+        )
+
+        self.assertTrue(success)
+        with open(out_file) as f:
+            self.assertEqual([r['id'] for r in json.load(f)], [1, 2, 3])
+
+    @patch('psycopg2.connect')
+    def test_stream_chunks_to_next_task(self, mock_connect):
+        """Test stream lazy di chunk passato al task successivo"""
+        conn, _ = self._mock_connection()
+        mock_connect.return_value = conn
+
+        success, output = self.oa_pg.select(self.mock_self, dict(self.param))
+
+        self.assertTrue(success)
+        mock_connect.assert_not_called()
+        self.assertNotIn('pass', repr(output['rows']))
+
+        chunks = list(output['rows'])
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(chunks[1], [{'id': 3, 'name': 'c'}])
+        self.assertEqual(list(self.oa_pg.pool_status().values())[0]['in_use'], 0)
+
+
+
+class TestOaPgBulkInsert(OaPgTestCase):
+    """Test per il caricamento bulk di oa-pg.insert"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        super().setUp()
+
+        self.conn = MagicMock()
+        self.conn.closed = 0
+        self.cursor = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+
+        self.param.update({
+            'table': 'events',
+            'data': [
+                {'id': 1, 'name': 'a\tb', 'tags': ['x']},
+                {'name': None, 'id': 2, 'active': True},
+            ]
+        })
+
+    @patch('psycopg2.connect')
+    def test_copy_batches(self, mock_connect):
+        """Test COPY FROM STDIN in batch con encoding text format"""
+        mock_connect.return_value = self.conn
+        payloads = []
+        self.cursor.copy_expert.side_effect = lambda sql, buf: payloads.append((sql, buf.read()))
+        self.cursor.rowcount = 1
+
+        success, output = self.oa_pg.insert(
+            self.mock_self, dict(self.param, method='copy', batch_size=1)
+        )
+
+        self.assertTrue(success)
+        self.assertEqual(output['rows_inserted'], 2)
+        self.assertEqual(output['columns'], ['id', 'name', 'tags', 'active'])
+        self.assertEqual(len(payloads), 2)
+        self.assertEqual(payloads[0][0], "COPY events (id, name, tags, active) FROM STDIN")
+        self.assertEqual(payloads[0][1], '1\ta\\tb\t["x"]\t\\N\n')
+        self.assertEqual(payloads[1][1], '2\t\\N\t\\N\tt\n')
+        self.conn.commit.assert_called_once()
+
+    @patch('psycopg2.extras.execute_values')
+    @patch('psycopg2.connect')
+    def test_values_upsert(self, mock_connect, mock_execute_values):
+        """Test execute_values con ON CONFLICT e colonne esplicite"""
+        mock_connect.return_value = self.conn
+        self.cursor.rowcount = 2
+
+        success, output = self.oa_pg.insert(self.mock_self, dict(
+            self.param, method='values', columns=['id', 'name'],
+            on_conflict='update', conflict_columns=['id']
+        ))
+
+        self.assertTrue(success)
+        self.assertEqual(output['rows_inserted'], 2)
+        _, statement, values = mock_execute_values.call_args.args
+        self.assertEqual(
+            statement,
+            "INSERT INTO events (id, name) VALUES %s ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name"
+        )
+        self.assertEqual(values, [(1, 'a\tb'), (2, None)])
+
+    @patch('psycopg2.connect')
+    def test_executemany_column_order(self, mock_connect):
+        """Test valori allineati alle colonne anche con chiavi in ordine diverso"""
+        mock_connect.return_value = self.conn
+        self.cursor.rowcount = 2
+
+        success, _ = self.oa_pg.insert(self.mock_self, dict(self.param, columns=['id', 'name']))
+
+        self.assertTrue(success)
+        statement, values = self.cursor.executemany.call_args.args
+        self.assertEqual(statement, "INSERT INTO events (id, name) VALUES (%s, %s)")
+        self.assertEqual(values, [(1, 'a\tb'), (2, None)])
+
+    @patch('psycopg2.extras.execute_values')
+    @patch('psycopg2.connect')
+    def test_columns_as_string(self, mock_connect, mock_execute_values):
+        """Test colonne come stringa separata da virgole"""
+        mock_connect.return_value = self.conn
+        self.cursor.rowcount = 2
+
+        success, output = self.oa_pg.insert(self.mock_self, dict(
+            self.param, method='values', columns='id, name',
+            on_conflict='update', conflict_columns='id'
+        ))
+
+        self.assertTrue(success)
+        self.assertEqual(output['columns'], ['id', 'name'])
+        _, statement, values = mock_execute_values.call_args.args
+        self.assertEqual(
+            statement,
+            "INSERT INTO events (id, name) VALUES %s ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name"
+        )
+        self.assertEqual(values, [(1, 'a\tb'), (2, None)])
+
+    @patch('psycopg2.connect')
+    def test_copy_rejects_upsert(self, mock_connect):
+        """Test COPY non compatibile con on_conflict"""
+        mock_connect.return_value = self.conn
+
+        success, _ = self.oa_pg.insert(
+            self.mock_self, dict(self.param, method='copy', on_conflict='nothing')
+        )
+
+        self.assertFalse(success)
+        self.cursor.copy_expert.assert_not_called()
+
+    @patch('psycopg2.connect')
+    def test_copy_from_stream(self, mock_connect):
+        """Test COPY alimentato da uno stream di select"""
+        mock_connect.return_value = self.conn
+        self.cursor.rowcount = -1
+        payloads = []
+        self.cursor.copy_expert.side_effect = lambda sql, buf: payloads.append(buf.read())
+
+        stream = MagicMock()
+        stream.iterrows.return_value = iter([{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b'}])
+        param = dict(self.param, method='copy', input={'rows': stream})
+        del param['data']
+
+        success, output = self.oa_pg.insert(self.mock_self, param)
+
+        self.assertTrue(success)
+        self.assertEqual(output['rows_inserted'], 2)
+        self.assertEqual(payloads, ['1\ta\n2\tb\n'])
+
+
+
+class FakePartitionCursor:
+    """Cursor fittizio: righe id 1..10 filtrate per i parametri della partizione"""
+
+    ROWS = [(i, f"row{i}") for i in range(1, 11)] + [(None, 'no-id')]
+
+    def __init__(self, executed):
+        self.executed = executed
+        self.description = [('id',), ('name',)]
+        self.itersize = None
+        self._result = []
+        self._fetched = False
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        where = sql.split('AS oa_part WHERE ')[-1]
+        if 'min(id)' in sql:
+            self._result = [(1, 10)]
+        elif where == 'id IS NULL':
+            self._result = [r for r in self.ROWS if r[0] is None]
+        else:
+            values = list(params or ())
+            low = values.pop(0) if 'id >= %s' in where else None
+            high = values.pop(0) if 'id < %s' in where else None
+            self._result = [r for r in self.ROWS if r[0] is not None
+                            and (low is None or r[0] >= low) and (high is None or r[0] < high)]
+
+    def fetchall(self):
+        return list(self._result)
+
+    def fetchmany(self, size):
+        if self._fetched:
+            return []
+        self._fetched = True
+        return list(self._result)
+
+    def close(self):
+        pass
+
+
+class TestOaPgPartitions(OaPgTestCase):
+    """Test per la SELECT partizionata e parallela"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import tempfile
+        import threading
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+        self.executed = []
+        self.lock = threading.Lock()
+
+        self.param.update({
+            'statement': 'SELECT id, name FROM items WHERE name LIKE \'row%\' OR id IS NULL;',
+            'partition_by': 'id',
+            'partitions': 3
+        })
+
+    def tearDown(self):
+        import shutil
+        super().tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    def _connect(self, **kwargs):
+        conn = MagicMock()
+        conn.closed = 0
+        conn.cursor.side_effect = lambda *a, **kw: FakePartitionCursor(self.executed)
+        return conn
+
+    @patch('psycopg2.connect')
+    def test_partitions_merged_in_order(self, mock_connect):
+        """Test partizioni automatiche unite nell'ordine delle partizioni"""
+        mock_connect.side_effect = self._connect
+
+        success, output = self.oa_pg.select(self.mock_self, dict(self.param, format='rows'))
+
+        self.assertTrue(success)
+        self.assertEqual([r[0] for r in output['rows']], list(range(1, 11)) + [None])
+        part_sql = [sql for sql, _ in self.executed if 'oa_part' in sql]
+        self.assertEqual(len(part_sql), 4)  # 3 range + NULL
+        self.assertTrue(all("LIKE 'row%%'" in sql for sql in part_sql))
+        self.assertTrue(all(';' not in sql for sql in part_sql))
+
+    def test_decimal_bounds(self):
+        """Test colonne NUMERIC: estremi Decimal interi o frazionari"""
+        from decimal import Decimal
+        args = ('testdb', 'localhost', 'user', 'pass', '5432')
+        with patch.object(self.oa_pg, 'executeFatchAll', return_value=([(Decimal('1'), Decimal('10'))], [])):
+            ranges = self.oa_pg._partition_ranges(args, 'SELECT 1', 'id', 3)
+        self.assertEqual(ranges, [(1, 5), (5, 9), (9, None), None])
+
+        with patch.object(self.oa_pg, 'executeFatchAll', return_value=([(Decimal('0.1'), Decimal('0.7'))], [])):
+            ranges = self.oa_pg._partition_ranges(args, 'SELECT 1', 'id', 3)
+        self.assertEqual(ranges, [(Decimal('0.1'), Decimal('0.3')), (Decimal('0.3'), Decimal('0.5')),
+                                  (Decimal('0.5'), None), None])
+
+        with patch.object(self.oa_pg, 'executeFatchAll', return_value=([(Decimal('1'), Decimal('NaN'))], [])):
+            with self.assertRaises(ValueError):
+                self.oa_pg._partition_ranges(args, 'SELECT 1', 'id', 3)
+
+    @patch('psycopg2.connect')
+    def test_explicit_ranges(self, mock_connect):
+        """Test range espliciti (estremi null = illimitati)"""
+        mock_connect.side_effect = self._connect
+
+        success, output = self.oa_pg.select(self.mock_self, dict(
+            self.param, ranges=[[None, 4], [4, None]], format='rows'
+        ))
+
+        self.assertTrue(success)
+        self.assertEqual([r[0] for r in output['rows']], list(range(1, 11)))
+        self.assertFalse(any('min(id)' in sql for sql, _ in self.executed))
+
+    @patch('psycopg2.connect')
+    def test_stream_sharded_output(self, mock_connect):
+        """Test stream parallelo con un file per partizione"""
+        mock_connect.side_effect = self._connect
+        out_file = os.path.join(self.temp_dir, 'items.jsonl')
+
+        success, output = self.oa_pg.select(self.mock_self, dict(
+            self.param, stream=True, shard_output=True, tojsonfile=out_file
+        ))
+
+        self.assertTrue(success)
+        self.assertEqual(output['row_count'], 11)
+        self.assertEqual(len(output['files']), 4)
+        self.assertTrue(output['files'][0].endswith('items.part000.jsonl'))
+        self.assertTrue(all(os.path.exists(f) for f in output['files']))
+        self.assertIsNone(output['file'])
+        self.assertFalse(os.path.exists(out_file))
+
+    @patch('psycopg2.connect')
+    def test_stream_merged_json_array(self, mock_connect):
+        """Test stream parallelo unito in un unico array JSON"""
+        import json
+        mock_connect.side_effect = self._connect
+        out_file = os.path.join(self.temp_dir, 'items.json')
+
+        success, output = self.oa_pg.select(self.mock_self, dict(
+            self.param, stream=True, stream_format='json', tojsonfile=out_file
+        ))
+
+        self.assertTrue(success)
+        with open(out_file) as f:
+            self.assertEqual([r['id'] for r in json.load(f)], list(range(1, 11)) + [None])
+        self.assertEqual(os.listdir(self.temp_dir), ['items.json'])
+
+
+class TestOaPgColumnar(OaPgTestCase):
+    """Test per formato colonnare e output CSV/Parquet di select"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        import tempfile
+        super().setUp()
+        self.temp_dir = tempfile.mkdtemp()
+
+        self.conn = MagicMock()
+        self.conn.closed = 0
+        self.cursor = MagicMock()
+        self.cursor.description = [('id',), ('name',)]
+        self.cursor.fetchall.return_value = [(1, 'a'), (2, None), (3, 'c,d')]
+        self.cursor.fetchmany.side_effect = [[(1, 'a'), (2, None)], [(3, 'c,d')], []]
+        self.conn.cursor.return_value = self.cursor
+
+        self.param['statement'] = 'SELECT id, name FROM users'
+
+    def tearDown(self):
+        import shutil
+        super().tearDown()
+        shutil.rmtree(self.temp_dir)
+
+    @patch('psycopg2.connect')
+    def test_columnar_format(self, mock_connect):
+        """Test risultato come dizionario di colonne"""
+        mock_connect.return_value = self.conn
+
+        success, output = self.oa_pg.select(self.mock_self, dict(self.param, format='columnar'))
+
+        self.assertTrue(success)
+        self.assertEqual(output['rows'], {'id': [1, 2, 3], 'name': ['a', None, 'c,d']})
+        self.assertEqual(output['row_count'], 3)
+
+    def test_columnar_empty_and_invalid_backend(self):
+        """Test colonne vuote e backend non valido"""
+        self.assertEqual(self.oa_pg.toColumnar(['id', 'name'], []), {'id': [], 'name': []})
+        with self.assertRaises(ValueError):
+            self.oa_pg.toColumnar(['id'], [(1,)], backend='pandas')
+
+    @patch('psycopg2.connect')
+    def test_csv_file(self, mock_connect):
+        """Test scrittura CSV con header e quoting"""
+        mock_connect.return_value = self.conn
+        out_file = os.path.join(self.temp_dir, 'users.csv')
+
+        success, _ = self.oa_pg.select(self.mock_self, dict(self.param, tocsvfile=out_file))
+
+        self.assertTrue(success)
+        with open(out_file) as f:
+            self.assertEqual(f.read().splitlines(), ['id,name', '1,a', '2,', '3,"c,d"'])
+
+    @patch('psycopg2.connect')
+    def test_stream_to_csv(self, mock_connect):
+        """Test scrittura CSV incrementale in modalità stream"""
+        mock_connect.return_value = self.conn
+        out_file = os.path.join(self.temp_dir, 'users.csv')
+
+        success, output = self.oa_pg.select(
+            self.mock_self, dict(self.param, stream=True, itersize=2, tocsvfile=out_file)
+        )
+
+        self.assertTrue(success)
+        self.assertEqual(output['row_count'], 3)
+        self.cursor.fetchall.assert_not_called()
+        with open(out_file) as f:
+            self.assertEqual(f.read().splitlines(), ['id,name', '1,a', '2,', '3,"c,d"'])
+
+    @patch('psycopg2.connect')
+    def test_stream_to_parquet_row_groups(self, mock_connect):
+        """Test Parquet scritto un row group per chunk"""
+        mock_connect.return_value = self.conn
+        self.oa_pg.pyarrow = MagicMock()
+        self.oa_pg.pyarrow_parquet = MagicMock()
+        writer = self.oa_pg.pyarrow_parquet.ParquetWriter.return_value
+
+        success, output = self.oa_pg.select(self.mock_self, dict(
+            self.param, stream=True, itersize=2, toparquetfile=os.path.join(self.temp_dir, 'u.parquet')
+        ))
+
+        self.assertTrue(success)
+        self.assertEqual(output['row_count'], 3)
+        self.assertEqual(writer.write_table.call_count, 2)
+        first, second = self.oa_pg.pyarrow.table.call_args_list
+        self.assertEqual(first.args[0], {'id': [1, 2], 'name': ['a', None]})
+        self.assertEqual(second.kwargs['schema'], writer.schema)
+        writer.close.assert_called_once()
+
+    @patch('psycopg2.connect')
+    def test_stream_single_file_target(self, mock_connect):
+        """Test stream con più file di output rifiutato"""
+        mock_connect.return_value = self.conn
+
+        success, _ = self.oa_pg.select(self.mock_self, dict(
+            self.param, stream=True, tojsonfile='a.json', tocsvfile='a.csv'
+        ))
+
+        self.assertFalse(success)
+        mock_connect.assert_not_called()
+
+    @patch('psycopg2.connect')
+    def test_stream_columnar_chunks(self, mock_connect):
+        """Test stream lazy con chunk colonnari"""
+        mock_connect.return_value = self.conn
+
+        success, output = self.oa_pg.select(
+            self.mock_self, dict(self.param, stream=True, itersize=2, format='columnar')
+        )
+
+        self.assertTrue(success)
+        self.assertEqual(list(output['rows'])[1], {'id': [3], 'name': ['c,d']})
+        self.cursor.fetchmany.side_effect = [[(1, 'a')], []]
+        self.assertEqual(list(output['rows'].iterrows()), [{'id': 1, 'name': 'a'}])
+
+
+class FakeContext:
+    """Context minimale con variabili globali come WorkflowContext"""
+
+    def __init__(self):
+        self.global_data = {}
+
+    def set_global(self, key, value):
+        self.global_data[key] = value
+
+    def get_global(self, key, default=None):
+        return self.global_data.get(key, default)
+
+
+class TestOaPgStatements(OaPgTestCase):
+    """Test per statement multipli e transazioni di oa-pg.execute"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        super().setUp()
+
+        self.conn = MagicMock()
+        self.conn.closed = 0
+        self.cursor = MagicMock()
+        self.cursor.rowcount = 1
+        self.conn.cursor.return_value = self.cursor
+
+    @patch('psycopg2.extras.execute_batch')
+    @patch('psycopg2.connect')
+    def test_statements_single_commit(self, mock_connect, mock_execute_batch):
+        """Test lista di statement con parametri e batch in un solo commit"""
+        mock_connect.return_value = self.conn
+
+        success, output = self.oa_pg.execute(self.mock_self, dict(self.param, statements=[
+            "UPDATE periods SET closed = true",
+            {'statement': "INSERT INTO audit VALUES (%s, %s)", 'params': [42, 'close']},
+            {'statement': "UPDATE balances SET amount = %s WHERE account = %s",
+             'batch': [[100, 'A'], [250, 'B']]},
+        ]))
+
+        self.assertTrue(success)
+        self.assertEqual(output['rows_affected'], 2)
+        self.assertEqual([r.get('executions') for r in output['results']], [None, None, 2])
+        self.assertEqual(self.cursor.execute.call_args_list[1].args,
+                         ("INSERT INTO audit VALUES (%s, %s)", (42, 'close')))
+        self.assertEqual(mock_execute_batch.call_args.args[2], [(100, 'A'), (250, 'B')])
+        self.conn.commit.assert_called_once()
+
+    @patch('psycopg2.connect')
+    def test_statements_rollback_on_error(self, mock_connect):
+        """Test nessun commit se uno statement fallisce"""
+        mock_connect.return_value = self.conn
+        self.cursor.execute.side_effect = [None, Exception("constraint violated")]
+
+        success, _ = self.oa_pg.execute(self.mock_self, dict(
+            self.param, statements=["UPDATE a SET x = 1", "UPDATE b SET y = 2"]
+        ))
+
+        self.assertFalse(success)
+        self.conn.commit.assert_not_called()
+        self.conn.rollback.assert_called()
+
+    @patch('psycopg2.connect')
+    def test_transaction_across_tasks(self, mock_connect):
+        """Test transazione condivisa da task consecutivi con commit finale"""
+        mock_connect.return_value = self.conn
+        context = FakeContext()
+
+        self.oa_pg.execute(self.mock_self, dict(self.param, workflow_context=context,
+                                                transaction='move', statement="UPDATE a SET x = 1"))
+        self.conn.commit.assert_not_called()
+
+        success, output = self.oa_pg.execute(self.mock_self, dict(
+            self.param, workflow_context=context, transaction='move',
+            transaction_end='commit', statement="UPDATE b SET y = 2"
+        ))
+
+        self.assertTrue(success)
+        self.assertEqual(output['transaction'], 'move')
+        self.assertEqual(mock_connect.call_count, 1)
+        self.conn.commit.assert_called_once()
+        self.assertEqual(context.get_global('_pg_transactions'), {})
+
+    @patch('psycopg2.connect')
+    def test_transaction_aborted(self, mock_connect):
+        """Test task successivi a un errore falliscono finché la transazione non viene chiusa"""
+        mock_connect.return_value = self.conn
+        context = FakeContext()
+        self.cursor.execute.side_effect = Exception("deadlock")
+        task = dict(self.param, workflow_context=context, transaction='move', statement="UPDATE a SET x = 1")
+
+        self.assertFalse(self.oa_pg.execute(self.mock_self, dict(task))[0])
+        self.conn.rollback.assert_called()
+
+        self.cursor.execute.side_effect = None
+        self.assertFalse(self.oa_pg.execute(self.mock_self, dict(task))[0])
+        self.assertFalse(self.oa_pg.execute(self.mock_self, dict(task, transaction_end='commit'))[0])
+
+        self.assertEqual(self.cursor.execute.call_count, 1)
+        self.assertEqual(context.get_global('_pg_transactions'), {})
+        self.conn.commit.assert_not_called()
+
+    @patch('psycopg2.connect')
+    def test_transaction_rolled_back_when_workflow_fails(self, mock_connect):
+        """Test rollback e rilascio della transazione se un task fallisce prima del commit"""
+        from automator import WorkflowEngine
+        from taskstore import TaskResultStore
+        mock_connect.return_value = self.conn
+
+        tasks_module = Mock()
+        tasks_module.gdict = self.oa_pg.gdict
+        tasks_module.execute = self.oa_pg.execute
+        tasks_module.fail = Mock(return_value=False)
+        tasks = [
+            dict(self.param, name='begin', module='pg_tasks', function='execute',
+                 transaction='move', statement="UPDATE a SET x = 1", on_success='check'),
+            {'name': 'check', 'module': 'pg_tasks', 'function': 'fail', 'on_success': 'commit'},
+            dict(self.param, name='commit', module='pg_tasks', function='execute',
+                 transaction='move', transaction_end='commit', statement="UPDATE b SET y = 2"),
+        ]
+        engine = WorkflowEngine(tasks, {}, TaskResultStore())
+
+        with patch.dict(sys.modules, {'pg_tasks': tasks_module}):
+            success, context = engine.execute()
+
+        self.assertFalse(success)
+        self.assertNotIn('commit', context.results)
+        self.conn.commit.assert_not_called()
+        self.conn.rollback.assert_called()
+        self.assertEqual(context.get_global('_pg_transactions'), {})
+        self.assertEqual([p['in_use'] for p in self.oa_pg.pool_status().values()], [0])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,6 +6,10 @@ Test delle funzioni utility comuni
 import unittest
 import tempfile
 import os
+import json
+import math
+import datetime
+import decimal
 import sys
 from unittest.mock import Mock, patch, MagicMock
 import paramiko
@@ -252,6 +256,118 @@ class TestFileOperations(unittest.TestCase):
         mock_detect.assert_called_once()
 
 
+class TestJsonFacade(unittest.TestCase):
+    """Test per json_dumps/json_loads (orjson opzionale)"""
+
+    VALUE = {
+        'when': datetime.datetime(2024, 1, 2, 3, 4, 5),
+        'amount': decimal.Decimal('1.50'),
+        'city': 'Città', 1: [True, None, 2.5], 'big': 2 ** 70
+    }
+
+    def backends(self):
+        backends = ['json'] + (['orjson'] if oacommon.JSON_BACKEND == 'orjson' else [])
+        for backend in backends:
+            with patch.object(oacommon, 'JSON_BACKEND', backend), self.subTest(backend=backend):
+                yield backend
+
+    def test_dumps_default_str_and_compact(self):
+        """Test default=str, output compatto e identico con entrambi i backend"""
+        expected = json.dumps(self.VALUE, default=str, ensure_ascii=False, separators=(',', ':'))
+        for _ in self.backends():
+            self.assertEqual(oacommon.json_dumps(self.VALUE), expected)
+            self.assertEqual(oacommon.json_dumps_bytes(self.VALUE), expected.encode('utf-8'))
+            self.assertEqual(oacommon.json_dumps({'b': 1, 'a': [1]}, pretty=True, sort_keys=True),
+                             '{\n  "a": [\n    1\n  ],\n  "b": 1\n}')
+
+    def test_loads_fallback(self):
+        """Test str/bytes, NaN e JSONDecodeError della libreria standard"""
+        for _ in self.backends():
+            self.assertEqual(oacommon.json_loads(b'{"a": [1, "x"]}'), {'a': [1, 'x']})
+            self.assertTrue(math.isnan(oacommon.json_loads('[NaN]')[0]))
+            with self.assertRaises(json.JSONDecodeError):
+                oacommon.json_loads('{bad')
+
+
+class TestJsonStreaming(unittest.TestCase):
+    """Test per lettura/scrittura JSON in streaming"""
+
+    RECORDS = [{'id': i, 'name': f'n{i}', 'value': i * 0.5, 'tags': ['a', 'b']} for i in range(50)] + \
+              [123456789, 1.5e10, 'text', None, [], {}]
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Cleanup dopo ogni test"""
+        import shutil
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.test_dir, name)
+
+    def test_array_with_small_chunks(self):
+        """Test array JSON letto a blocchi piccoli (valori spezzati tra blocchi)"""
+        with open(self.path('data.json'), 'w') as f:
+            json.dump(self.RECORDS, f, indent=2)
+
+        for chunk_size in (1, 3, 16, 4096):
+            records = list(oacommon.iter_json_records(self.path('data.json'), chunk_size=chunk_size))
+            self.assertEqual(records, self.RECORDS)
+
+    def test_jsonl_and_gzip_roundtrip(self):
+        """Test scrittura e rilettura JSON Lines compresso e array"""
+        for name in ('data.jsonl.gz', 'data.json'):
+            with oacommon.JsonRecordWriter(self.path(name)) as writer:
+                for record in self.RECORDS:
+                    writer.write(record)
+
+            self.assertEqual(writer.count, len(self.RECORDS))
+            self.assertEqual(list(oacommon.iter_json_records(self.path(name))), self.RECORDS)
+        self.assertEqual(oacommon.json_stream_format(self.path('data.jsonl.gz')), 'jsonl')
+
+    def test_concatenated_values_and_errors(self):
+        """Test valori concatenati senza array ed errori di sintassi"""
+        with open(self.path('lines.json'), 'w') as f:
+            f.write('{"a": 1}\n{"a": 2}\n3')
+        self.assertEqual(list(oacommon.iter_json_records(self.path('lines.json'), chunk_size=2)),
+                         [{'a': 1}, {'a': 2}, 3])
+
+        for content in ('[1, 2', '[1, }', '{"a": 1}\n{"a": '):
+            with open(self.path('bad.json'), 'w') as f:
+                f.write(content)
+            with self.assertRaises(ValueError):
+                list(oacommon.iter_json_records(self.path('bad.json'), chunk_size=2))
+
+    def test_array_delimiters(self):
+        """Test virgole tra gli elementi: esattamente una, nessuna finale"""
+        for content in ('[1 2,3]', '[1,,2]', '[1,]', '[,1]', '[{"a": 1} {"a": 2}]'):
+            with open(self.path('bad.json'), 'w') as f:
+                f.write(content)
+            for chunk_size in (1, 4096):
+                with self.assertRaises(ValueError, msg=content):
+                    list(oacommon.iter_json_records(self.path('bad.json'), chunk_size=chunk_size))
+
+        with open(self.path('ok.json'), 'w') as f:
+            f.write('[ 1 ,\n 2 ,3 , {"a": [4, 5]} ]')
+        for chunk_size in (1, 2, 4096):
+            self.assertEqual(list(oacommon.iter_json_records(self.path('ok.json'), chunk_size=chunk_size)),
+                             [1, 2, 3, {'a': [4, 5]}])
+        with open(self.path('empty.json'), 'w') as f:
+            f.write('[ ]')
+        self.assertEqual(list(oacommon.iter_json_records(self.path('empty.json'), chunk_size=1)), [])
+
+    def test_writer_failure_leaves_no_file(self):
+        """Test errore durante la scrittura: nessun file (nemmeno parziale)"""
+        with self.assertRaises(RuntimeError):
+            with oacommon.JsonRecordWriter(self.path('out.json')) as writer:
+                writer.write({'a': 1})
+                raise RuntimeError('boom')
+
+        self.assertEqual(os.listdir(self.test_dir), [])
+
+
 class TestTraceDecorator(unittest.TestCase):
     """Test per il decorator @trace"""
 
@@ -0,0 +1,210 @@
+"""
+Test per ratelimit.py
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+# Aggiungi directory del progetto al path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import ratelimit
+from ratelimit import TokenBucket, CircuitBreaker, CircuitOpenError, RateLimitTimeout
+
+
+class FakeClock:
+    """Orologio controllato per time.monotonic / time.sleep"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Test del token bucket"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch.multiple('ratelimit.time', monotonic=self.clock.monotonic, sleep=self.clock.sleep)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_rate(self):
+        """Test burst iniziale, poi un token ogni 1/rate secondi"""
+        bucket = TokenBucket(rate=2, burst=3)
+
+        waits = [bucket.acquire() for _ in range(5)]
+
+        self.assertEqual(waits[:3], [0, 0, 0])
+        self.assertEqual(self.clock.slept, [0.5, 0.5])
+
+    def test_unlimited_and_timeout(self):
+        """Test rate nullo illimitato e timeout di attesa"""
+        self.assertEqual([TokenBucket().acquire() for _ in range(100)], [0] * 100)
+
+        bucket = TokenBucket(rate=0.1)
+        bucket.acquire()
+        with self.assertRaises(RateLimitTimeout):
+            bucket.acquire(timeout=5)
+
+    def test_configure_keeps_tokens(self):
+        """Test riconfigurazione: token accumulati mantenuti (al più il nuovo burst)"""
+        bucket = TokenBucket(rate=2, burst=4)
+        for _ in range(4):
+            bucket.acquire()
+
+        bucket.configure(3, 6)
+        self.assertEqual(bucket.status()['tokens'], 0)
+        bucket.configure(2, 4)
+        self.assertEqual(bucket.acquire(), 0.5)
+
+        self.clock.now += 100
+        bucket.configure(1, 2)
+        self.assertEqual(bucket.status()['tokens'], 2)
+
+    def test_pause(self):
+        """Test sospensione (Retry-After) anche con token disponibili"""
+        bucket = TokenBucket(rate=10, burst=10)
+        bucket.pause(3)
+
+        self.assertEqual(bucket.acquire(), 3)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test del circuit breaker"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch('ratelimit.time.monotonic', self.clock.monotonic)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_open_half_open_close(self):
+        """Test apertura dopo N errori, prova singola e chiusura"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+        self.clock.now += 30
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertTrue(breaker.allow())
+
+    def test_failed_probe_reopens(self):
+        """Test prova fallita: circuito di nuovo aperto per reset_timeout"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10)
+        breaker.record_failure()
+        self.clock.now += 10
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(breaker.retry_in(), 10)
+
+    def test_disabled(self):
+        """Test soglia 0: circuito disattivato"""
+        breaker = CircuitBreaker(failure_threshold=0)
+        for _ in range(10):
+            breaker.record_failure()
+        self.assertTrue(breaker.allow())
+
+
+class TestHostGuards(unittest.TestCase):
+    """Test delle guardie per host condivise"""
+
+    def tearDown(self):
+        ratelimit.reset_guards()
+
+    def test_guarded_fails_fast_when_open(self):
+        """Test 5xx ed eccezioni aprono il circuito, poi nessuna chiamata"""
+        send = Mock(return_value=Mock(status_code=503, headers={}))
+        options = {'circuit_failures': 2}
+
+        ratelimit.guarded('https://api.example.com/a', options, send)
+        send.side_effect = ConnectionError("down")
+        with self.assertRaises(ConnectionError):
+            ratelimit.guarded('https://api.example.com/b', options, send)
+        with self.assertRaises(CircuitOpenError):
+            ratelimit.guarded('https://API.example.com/c', options, send)
+
+        self.assertEqual(send.call_count, 2)
+        stats = ratelimit.guard_stats()['api.example.com']
+        self.assertEqual(stats['circuit']['state'], 'open')
+        self.assertEqual((stats['failures'], stats['rejected']), (2, 1))
+
+    def test_client_errors_do_not_trip(self):
+        """Test 4xx (tranne 429) non contano come guasti dell'upstream"""
+        send = Mock(return_value=Mock(status_code=404, headers={}))
+        for _ in range(10):
+            ratelimit.guarded('https://api.example.com/x', {'circuit_failures': 2}, send)
+
+        self.assertEqual(ratelimit.guard_stats()['api.example.com']['circuit']['state'], 'closed')
+
+    def test_retry_after_pauses_host(self):
+        """Test 429 con Retry-After sospende il limitatore dell'host"""
+        send = Mock(return_value=Mock(status_code=429, headers={'Retry-After': '7'}))
+        ratelimit.guarded('https://api.example.com/x', None, send)
+
+        self.assertGreater(ratelimit.get_guard('api.example.com').bucket.status()['paused_for'], 6)
+
+    def test_task_limits_do_not_reset_each_other(self):
+        """Test due task con rate_limit diversi sullo stesso host: nessun riempimento reciproco"""
+        clock = FakeClock()
+        with patch.multiple('ratelimit.time', monotonic=clock.monotonic, sleep=clock.sleep):
+            send = Mock(return_value=Mock(status_code=200, headers={}))
+            for index in range(40):
+                options = {'rate_limit': 2 if index % 2 else 3}
+                ratelimit.guarded('https://h.example/x', options, send)
+
+            # 40 richieste: burst iniziali (2 + 3), poi al più 2 + 3 al secondo in totale
+            self.assertGreaterEqual(clock.now - 1000.0, 35 / 5 - 0.01)
+            guard = ratelimit.get_guard('h.example')
+            self.assertIsNone(guard.bucket.rate)
+            self.assertEqual(sorted(l['rate'] for l in guard.status()['task_limiters']), [2, 3])
+
+    @patch.dict(os.environ, {'OA_RATE_LIMIT': '4'})
+    def test_task_limit_capped_by_host(self):
+        """Test limite effettivo: il minore tra task e host"""
+        clock = FakeClock()
+        with patch.multiple('ratelimit.time', monotonic=clock.monotonic, sleep=clock.sleep):
+            send = Mock(return_value=Mock(status_code=200, headers={}))
+            for _ in range(24):
+                ratelimit.guarded('https://h.example/x', {'rate_limit': 100}, send)
+
+            guard = ratelimit.get_guard('h.example')
+            self.assertEqual(guard.bucket.rate, 4)
+            # 24 richieste a 4/s (burst 4): almeno 5 secondi
+            self.assertGreaterEqual(clock.now - 1000.0, 5 - 0.01)
+
+    @patch.dict(os.environ, {'OA_RATE_LIMIT': '5', 'OA_RATE_LIMITS': 'api.telegram.org=30/60',
+                             'OA_CIRCUIT_FAILURES': '0'})
+    def test_environment_defaults(self):
+        """Test configurazione da variabili d'ambiente"""
+        telegram = ratelimit.get_guard('https://api.telegram.org/botX/sendMessage')
+        other = ratelimit.get_guard('other.example.com')
+
+        self.assertEqual((telegram.bucket.rate, telegram.bucket.burst), (30, 60))
+        self.assertEqual(other.bucket.rate, 5)
+        self.assertEqual(other.breaker.failure_threshold, 0)
+        self.assertEqual(sorted(ratelimit.guard_stats()), ['api.telegram.org', 'other.example.com'])
+
+
+if __name__ == '__main__':
+    unittest.main()
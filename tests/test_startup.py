@@ -0,0 +1,112 @@
+"""
+Test tempi di startup per Open-Automator
+
+Usa `python -X importtime` in un processo separato per verificare che le
+dipendenze pesanti (paramiko, cryptography, psycopg2, requests, ...) non
+vengano importate all'avvio ma solo al primo utilizzo.
+"""
+
+import unittest
+import subprocess
+import sys
+import os
+from unittest.mock import patch
+
+# Aggiungi directory del progetto al path
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+
+import oacommon
+
+# Dipendenze che non devono comparire nello startup della CLI
+HEAVY_DEPENDENCIES = (
+    'paramiko', 'cryptography', 'psycopg2', 'requests',
+    'chardet', 'scp', 'tabulate', 'jinja2',
+)
+
+# Budget (ms) per il tempo cumulativo di import di automator, sovrascrivibile da env
+STARTUP_BUDGET_MS = float(os.environ.get('OA_STARTUP_BUDGET_MS', '1500'))
+
+
+def importtime(code):
+    """
+    Esegue code con -X importtime e ritorna {modulo: cumulativo_us}
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=project_root, capture_output=True, text=True, timeout=120
+    )
+    if result.returncode != 0:
+        raise AssertionError(f"Import failed:\n{result.stderr}")
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def top_level(timings):
+    """Nomi dei package top-level importati"""
+    return {name.split('.')[0] for name in timings}
+
+
+class TestStartupImports(unittest.TestCase):
+    """Test import differiti delle dipendenze pesanti"""
+
+    def test_automator_startup_is_light(self):
+        """Test import automator senza dipendenze pesanti"""
+        timings = importtime('import automator')
+        loaded = top_level(timings) & set(HEAVY_DEPENDENCIES)
+        self.assertEqual(loaded, set(), f"Heavy dependencies imported at startup: {sorted(loaded)}")
+
+    def test_modules_import_is_light(self):
+        """Test import dei moduli oa-* senza dipendenze pesanti"""
+        code = (
+            "import sys; sys.path.append('modules'); "
+            "[__import__(m) for m in ('oa-pg', 'oa-network', 'oa-notify', 'oa-system', 'oa-io')]"
+        )
+        timings = importtime(code)
+        loaded = top_level(timings) & set(HEAVY_DEPENDENCIES)
+        self.assertEqual(loaded, set(), f"Heavy dependencies imported by modules: {sorted(loaded)}")
+
+    def test_automator_startup_budget(self):
+        """Test tempo cumulativo di import di automator entro il budget"""
+        timings = importtime('import automator')
+        elapsed_ms = timings['automator'] / 1000
+        self.assertLess(
+            elapsed_ms, STARTUP_BUDGET_MS,
+            f"import automator took {elapsed_ms:.1f}ms (budget {STARTUP_BUDGET_MS:.0f}ms)"
+        )
+
+
+class TestLazyImport(unittest.TestCase):
+    """Test oacommon.lazy_import"""
+
+    def test_forwards_attributes(self):
+        """Test accesso ad attributi del modulo reale"""
+        json_proxy = oacommon.lazy_import('json')
+        self.assertEqual(json_proxy.dumps({'a': 1}), '{"a": 1}')
+
+    def test_attribute_is_callable(self):
+        """Test proxy di un attributo invocabile"""
+        ordered = oacommon.lazy_import('collections', 'OrderedDict')
+        self.assertEqual(list(ordered([('a', 1)]).keys()), ['a'])
+
+    def test_sees_patched_attributes(self):
+        """Test che il proxy veda i patch applicati al modulo reale"""
+        json_proxy = oacommon.lazy_import('json')
+        with patch('json.dumps', return_value='patched'):
+            self.assertEqual(json_proxy.dumps({}), 'patched')
+
+    def test_missing_module_raises_on_use(self):
+        """Test modulo inesistente: errore solo al primo utilizzo"""
+        proxy = oacommon.lazy_import('oa_module_that_does_not_exist')
+        with self.assertRaises(ImportError):
+            proxy.anything
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -12,6 +12,7 @@ from unittest.mock import Mock, patch, mock_open
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from wallet import Wallet, PlainWallet, resolve_placeholders, resolve_dict_placeholders
+from wallet import WalletAgent, clear_key_cache, clear_resolved_cache, workflow_hash
 
 class TestWallet(unittest.TestCase):
     """Test per la classe Wallet (criptato)"""
@@ -105,6 +106,94 @@ class TestWallet(unittest.TestCase):
         with self.assertRaises(ValueError):
             wallet2.load_wallet('wrong_password')
 
+class TestWalletKeyCache(unittest.TestCase):
+    """Test per la cache delle chiavi derivate e l'unlock agent"""
+
+    def setUp(self):
+        """Setup prima di ogni test"""
+        self.test_dir = tempfile.mkdtemp()
+        self.wallet_file = os.path.join(self.test_dir, 'cached_wallet.enc')
+        self.master_password = 'cache_password'
+        clear_key_cache()
+        Wallet(self.wallet_file, self.master_password).create_wallet({'k': 'v'}, self.master_password)
+        clear_key_cache()
+
+    def tearDown(self):
+        """Cleanup dopo ogni test"""
+        import shutil
+        clear_key_cache()
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+
+    def test_key_derived_once_per_process(self):
+        """Test che il KDF venga eseguito una sola volta per più load"""
+        with patch.object(Wallet, '_derive_key', autospec=True, side_effect=Wallet._derive_key) as mock_kdf:
+            Wallet(self.wallet_file, self.master_password).load_wallet()
+            Wallet(self.wallet_file, self.master_password).load_wallet()
+
+        self.assertEqual(mock_kdf.call_count, 1)
+
+    def test_cache_does_not_bypass_password(self):
+        """Test che una password errata fallisca anche con chiave in cache"""
+        Wallet(self.wallet_file, self.master_password).load_wallet()
+
+        with self.assertRaises(ValueError):
+            Wallet(self.wallet_file, 'wrong_password').load_wallet()
+
+    def test_cache_invalidated_when_file_changes(self):
+        """Test che un wallet riscritto venga caricato con i nuovi segreti"""
+        Wallet(self.wallet_file, self.master_password).load_wallet()
+
+        Wallet(self.wallet_file, self.master_password).create_wallet({'k': 'new'}, self.master_password)
+
+        wallet = Wallet(self.wallet_file, self.master_password)
+        wallet.load_wallet()
+        self.assertEqual(wallet.get_secret('k'), 'new')
+
+    def test_agent_ttl_and_clear(self):
+        """Test put/get/clear e scadenza TTL dell'unlock agent"""
+        agent = WalletAgent(os.path.join(self.test_dir, 'agent.sock'), ttl=60)
+
+        self.assertTrue(agent.dispatch({'op': 'put', 'id': 'abc', 'key': 'secret-key'})['ok'])
+        self.assertEqual(agent.dispatch({'op': 'get', 'id': 'abc'})['key'], 'secret-key')
+
+        agent.ttl = -1
+        agent.dispatch({'op': 'put', 'id': 'expired', 'key': 'old'})
+        self.assertFalse(agent.dispatch({'op': 'get', 'id': 'expired'})['ok'])
+
+        agent.dispatch({'op': 'clear'})
+        self.assertFalse(agent.dispatch({'op': 'get', 'id': 'abc'})['ok'])
+
+    @unittest.skipUnless(hasattr(__import__('socket'), 'AF_UNIX'), 'Unix socket non disponibili')
+    def test_agent_serves_key_across_processes(self):
+        """Test che una chiave depositata nell'agent eviti il KDF dopo il reset della cache"""
+        import threading
+        import time
+
+        socket_path = os.path.join(self.test_dir, 'agent.sock')
+        agent = WalletAgent(socket_path, ttl=60)
+        thread = threading.Thread(target=agent.serve_forever, daemon=True)
+        thread.start()
+        for _ in range(50):
+            if os.path.exists(socket_path):
+                break
+            time.sleep(0.02)
+
+        try:
+            with patch.dict(os.environ, {'OA_WALLET_AGENT_SOCK': socket_path}):
+                Wallet(self.wallet_file, self.master_password).load_wallet()
+                clear_key_cache()  # simula un nuovo processo
+
+                with patch.object(Wallet, '_derive_key') as mock_kdf:
+                    wallet = Wallet(self.wallet_file, self.master_password)
+                    wallet.load_wallet()
+
+                mock_kdf.assert_not_called()
+                self.assertEqual(wallet.get_secret('k'), 'v')
+        finally:
+            agent.shutdown()
+            thread.join(timeout=2)
+
 class TestPlainWallet(unittest.TestCase):
     """Test per PlainWallet (non criptato)"""
 
@@ -213,6 +302,77 @@ class TestPlaceholderResolution(unittest.TestCase):
         self.assertEqual(result['database']['password'], 'db_secret')
         self.assertEqual(result['list'][1], 'db_secret')
 
+    def test_resolve_dict_shares_unchanged_subtrees(self):
+        """Test che i sotto-alberi senza placeholder non vengano copiati"""
+        mock_wallet = Mock()
+        mock_wallet.get_secret.return_value = 'db_secret'
+
+        data = {
+            'variables': {'password': '${WALLET:db_pass}'},
+            'tasks': [{'name': 't1', 'data': [{'id': i} for i in range(100)]}]
+        }
+
+        result = resolve_dict_placeholders(data, mock_wallet)
+
+        self.assertIsNot(result, data)
+        self.assertEqual(result['variables']['password'], 'db_secret')
+        self.assertIs(result['tasks'], data['tasks'])
+        self.assertEqual(data['variables']['password'], '${WALLET:db_pass}')
+
+    def test_resolve_dict_without_placeholders_returns_input(self):
+        """Test che un documento senza placeholder venga restituito invariato"""
+        data = {'tasks': [{'name': 'a', 'value': 'plain'}]}
+
+        self.assertIs(resolve_dict_placeholders(data, None), data)
+
+    @patch.dict(os.environ, {'OA_TEST_HOST': 'first'})
+    def test_resolve_dict_cache_hit_and_invalidation(self):
+        """Test cache dei documenti risolti e invalidazione al cambio di ENV/wallet"""
+        clear_resolved_cache()
+        mock_wallet = Mock()
+        mock_wallet.get_secret.return_value = 'secret'
+        mock_wallet.has_secret.return_value = True
+
+        data = {'host': '${ENV:OA_TEST_HOST}', 'pass': '${WALLET:db}'}
+        key = workflow_hash(data)
+
+        first = resolve_dict_placeholders(data, mock_wallet, cache_key=key)
+        with patch('wallet._resolve_tree') as resolve_tree:
+            second = resolve_dict_placeholders(data, mock_wallet, cache_key=key)
+        resolve_tree.assert_not_called()
+        self.assertEqual(first, second)
+
+        os.environ['OA_TEST_HOST'] = 'second'
+        third = resolve_dict_placeholders(data, mock_wallet, cache_key=key)
+        self.assertEqual(third['host'], 'second')
+
+        mock_wallet.get_secret.return_value = 'rotated'
+        fourth = resolve_dict_placeholders(data, mock_wallet, cache_key=key)
+        self.assertEqual(fourth['pass'], 'rotated')
+        clear_resolved_cache()
+
+    def test_resolve_dict_cache_returns_copies(self):
+        """Test che modificare un documento dalla cache non alteri le esecuzioni successive"""
+        clear_resolved_cache()
+        mock_wallet = Mock()
+        mock_wallet.get_secret.return_value = 'secret'
+        mock_wallet.has_secret.return_value = True
+
+        data = {'tasks': [{'headers': {'token': '${WALLET:api}'}, 'data': [{'id': 1}]}]}
+        key = workflow_hash(data)
+
+        first = resolve_dict_placeholders(data, mock_wallet, cache_key=key)
+        first['tasks'][0]['headers']['extra'] = 'x'
+        first['tasks'][0]['data'].append({'id': 2})
+
+        second = resolve_dict_placeholders(data, mock_wallet, cache_key=key)
+        second['tasks'][0]['data'].clear()
+
+        third = resolve_dict_placeholders(data, mock_wallet, cache_key=key)
+        self.assertEqual(third, {'tasks': [{'headers': {'token': 'secret'}, 'data': [{'id': 1}]}]})
+        self.assertEqual(data['tasks'][0]['data'], [{'id': 1}])
+        clear_resolved_cache()
+
     def test_resolve_no_wallet_provided(self):
         """Test risoluzione senza wallet (placeholder non risolto)"""
         result = resolve_placeholders('${WALLET:key}', None)
@@ -11,7 +11,7 @@ import os
 from getpass import getpass
 
 try:
-    from wallet import Wallet, PlainWallet
+    from wallet import Wallet, PlainWallet, WalletAgent, AGENT_SOCKET_ENV, DEFAULT_AGENT_TTL, _agent_request
 except ImportError:
     print("ERROR: wallet.py module not found")
     sys.exit(1)
@@ -257,6 +257,28 @@ def info_wallet(args):
         return False
 
 
+def run_agent(args):
+    """Avvia l'unlock agent locale (chiavi derivate in memoria con TTL)"""
+    socket_path = args.socket or os.environ.get(AGENT_SOCKET_ENV) or os.path.expanduser('~/.oa-wallet-agent.sock')
+
+    if args.clear:
+        response = _agent_request({'op': 'clear'}, socket_path=socket_path)
+        if not response or not response.get('ok'):
+            print(f"❌ ERROR: Wallet agent not reachable on {socket_path}")
+            return False
+        print("✅ Wallet agent cache cleared")
+        return True
+
+    print(f"🔑 Starting wallet agent on {socket_path} (ttl: {args.ttl}s)")
+    print(f"   export {AGENT_SOCKET_ENV}={socket_path}")
+
+    try:
+        WalletAgent(socket_path, ttl=args.ttl).serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Wallet agent stopped")
+    return True
+
+
 def load_wallet(args):
     """Helper per caricare un wallet"""
     if not os.path.exists(args.wallet_file):
@@ -343,6 +365,12 @@ def main():
     info_parser.add_argument('wallet_file', help='Wallet file path')
     info_parser.add_argument('-p', '--password', help='Master password (for encrypted)')
 
+    # Agent command
+    agent_parser = subparsers.add_parser('agent', help='Run local unlock agent (caches derived keys)')
+    agent_parser.add_argument('-s', '--socket', help=f'Unix socket path (default: ${AGENT_SOCKET_ENV} or ~/.oa-wallet-agent.sock)')
+    agent_parser.add_argument('-t', '--ttl', type=int, default=DEFAULT_AGENT_TTL, help='Key lifetime in seconds')
+    agent_parser.add_argument('--clear', action='store_true', help='Clear keys held by a running agent')
+
     args = parser.parse_args()
 
     if not args.command:
@@ -358,7 +386,8 @@ def main():
         'get': get_secret,
         'change-password': change_password,
         'export': export_secrets,
-        'info': info_wallet
+        'info': info_wallet,
+        'agent': run_agent
     }
 
     success = commands[args.command](args)
@@ -388,3 +417,7 @@ if __name__ == '__main__':
 # # Con wallet criptato, passa password via env
 # export OA_WALLET_PASSWORD="your_master_password"
 # python3.12 ./automator.py ./mywf.yaml
+
+# # Unlock agent: i run da cron riusano la chiave derivata (niente KDF)
+# python3.12 wallet-tool.py agent --ttl 3600 &
+# export OA_WALLET_AGENT_SOCK=~/.oa-wallet-agent.sock
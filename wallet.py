@@ -5,18 +5,78 @@ Gestisce password e segreti in modo sicuro
 """
 
 import os
+import re
 import json
 import base64
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.backends import default_backend
+import hashlib
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
 import getpass
 import logging
 from logger_config import AutomatorLogger
 
 logger = AutomatorLogger.get_logger('oa-wallet')
 
+# Socket dell'unlock agent (opzionale): se impostato le chiavi derivate vengono
+# chieste/depositate all'agent, così i run CLI successivi saltano il KDF
+AGENT_SOCKET_ENV = 'OA_WALLET_AGENT_SOCK'
+DEFAULT_AGENT_TTL = 3600
+
+# Cache process-wide delle chiavi derivate: {cache_id: key}
+_key_cache = {}
+_key_cache_lock = threading.Lock()
+
+
+def _key_cache_id(wallet_file, salt, password):
+    """
+    Identificativo di una chiave derivata: path reale + mtime + salt + verifier password.
+    Una modifica del file o una password diversa producono un id diverso.
+    """
+    try:
+        mtime = os.stat(wallet_file).st_mtime_ns
+    except OSError:
+        mtime = 0
+    verifier = hashlib.sha256(salt + password.encode()).hexdigest()
+    raw = f"{os.path.realpath(wallet_file)}|{mtime}|{base64.b64encode(salt).decode()}|{verifier}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def clear_key_cache():
+    """Svuota la cache process-wide delle chiavi derivate"""
+    with _key_cache_lock:
+        _key_cache.clear()
+
+
+def _agent_request(payload, socket_path=None, timeout=0.5):
+    """
+    Invia una richiesta all'unlock agent
+
+    Returns:
+        dict di risposta, oppure None se l'agent non è configurato/raggiungibile
+    """
+    socket_path = socket_path or os.environ.get(AGENT_SOCKET_ENV)
+    if not socket_path or not hasattr(socket, 'AF_UNIX'):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(payload).encode() + b'\n')
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = sock.recv(4096)
+                if not chunk:
+                    break
+                data += chunk
+        return json.loads(data.decode()) if data else None
+    except (OSError, ValueError) as e:
+        logger.debug(f"Wallet agent not available ({socket_path}): {e}")
+        return None
+
 
 class Wallet:
     """Gestisce un wallet di password criptato"""
@@ -29,6 +89,11 @@ class Wallet:
         
     def _derive_key(self, password, salt):
         """Deriva una chiave di cifratura dalla password"""
+        # cryptography importato solo quando serve davvero (startup CLI più rapido)
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+        from cryptography.hazmat.backends import default_backend
+
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
@@ -38,7 +103,38 @@ class Wallet:
         )
         key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
         return key
-    
+
+    def _get_key(self, password, salt):
+        """
+        Ritorna (chiave, origine) usando, nell'ordine, la cache di processo,
+        l'unlock agent (se configurato) e infine il KDF
+        """
+        cache_id = _key_cache_id(self.wallet_file, salt, password)
+
+        with _key_cache_lock:
+            key = _key_cache.get(cache_id)
+        if key is not None:
+            logger.debug("Wallet key served from process cache")
+            return key, 'cache'
+
+        response = _agent_request({'op': 'get', 'id': cache_id})
+        if response and response.get('ok') and response.get('key'):
+            logger.debug("Wallet key served from unlock agent")
+            return response['key'].encode(), 'agent'
+
+        return self._derive_key(password, salt), 'kdf'
+
+    def _remember_key(self, password, salt, key, publish=False):
+        """
+        Memorizza in cache una chiave verificata per lo stato attuale del file
+        e, se richiesto, la deposita nell'unlock agent
+        """
+        cache_id = _key_cache_id(self.wallet_file, salt, password)
+        with _key_cache_lock:
+            _key_cache[cache_id] = key
+        if publish:
+            _agent_request({'op': 'put', 'id': cache_id, 'key': key.decode()})
+
     def create_wallet(self, secrets_dict, master_password=None):
         """
         Crea un nuovo wallet criptato
@@ -52,6 +148,8 @@ class Wallet:
             confirm = getpass.getpass("Confirm master password: ")
             if master_password != confirm:
                 raise ValueError("Passwords do not match")
+
+        from cryptography.fernet import Fernet
         
         # Genera salt casuale
         salt = os.urandom(16)
@@ -72,6 +170,9 @@ class Wallet:
         
         with open(self.wallet_file, 'w') as f:
             json.dump(wallet_data, f, indent=2)
+
+        # La chiave appena derivata è valida per il nuovo file: evita un secondo KDF al load
+        self._remember_key(master_password, salt, key, publish=True)
         
         logger.info(f"Wallet created: {self.wallet_file}")
         return True
@@ -92,6 +193,8 @@ class Wallet:
         if master_password is None:
             master_password = getpass.getpass(f"Enter master password for {self.wallet_file}: ")
         
+        from cryptography.fernet import Fernet, InvalidToken
+
         # Leggi wallet
         with open(self.wallet_file, 'r') as f:
             wallet_data = json.load(f)
@@ -99,13 +202,21 @@ class Wallet:
         salt = base64.b64decode(wallet_data['salt'])
         encrypted_data = wallet_data['data'].encode()
         
-        # Deriva chiave e decripta
+        # Deriva chiave (o la recupera da cache/agent) e decripta
         try:
-            key = self._derive_key(master_password, salt)
-            fernet = Fernet(key)
-            decrypted = fernet.decrypt(encrypted_data)
+            key, source = self._get_key(master_password, salt)
+            try:
+                decrypted = Fernet(key).decrypt(encrypted_data)
+            except InvalidToken:
+                if source == 'kdf':
+                    raise
+                # Chiave in cache/agent non più valida: ripiega sul KDF
+                logger.debug(f"Cached wallet key rejected ({source}), deriving again")
+                key, source = self._derive_key(master_password, salt), 'kdf'
+                decrypted = Fernet(key).decrypt(encrypted_data)
             self.secrets = json.loads(decrypted.decode())
             self.loaded = True
+            self._remember_key(master_password, salt, key, publish=(source == 'kdf'))
             logger.info(f"Wallet loaded: {len(self.secrets)} secrets available")
             return True
         except Exception as e:
@@ -127,6 +238,85 @@ class Wallet:
         return self.loaded and key in self.secrets
 
 
+class _AgentRequestHandler(socketserver.StreamRequestHandler):
+    """Gestisce una richiesta JSON (una riga) verso l'unlock agent"""
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode())
+            response = self.server.agent.dispatch(request)
+        except ValueError:
+            response = {'ok': False, 'error': 'invalid request'}
+        self.wfile.write(json.dumps(response).encode() + b'\n')
+
+
+class WalletAgent:
+    """
+    Unlock agent locale: mantiene in memoria le chiavi derivate dei wallet
+    per un TTL e le serve via Unix socket (permessi 0600) ai processi CLI.
+
+    Protocollo (una riga JSON per richiesta):
+        {"op": "get", "id": ...}              -> {"ok": true, "key": ...}
+        {"op": "put", "id": ..., "key": ...}  -> {"ok": true}
+        {"op": "clear"}                       -> {"ok": true}
+    """
+
+    def __init__(self, socket_path, ttl=DEFAULT_AGENT_TTL):
+        self.socket_path = socket_path
+        self.ttl = ttl
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def dispatch(self, request):
+        op = request.get('op')
+        now = time.monotonic()
+
+        with self._lock:
+            # Scarta le chiavi scadute
+            for cache_id in [k for k, (_, expires) in self._keys.items() if expires <= now]:
+                del self._keys[cache_id]
+
+            if op == 'get':
+                entry = self._keys.get(request.get('id'))
+                return {'ok': entry is not None, 'key': entry[0] if entry else None}
+            if op == 'put' and request.get('id') and request.get('key'):
+                self._keys[request['id']] = (request['key'], now + self.ttl)
+                return {'ok': True}
+            if op == 'clear':
+                self._keys.clear()
+                return {'ok': True}
+
+        return {'ok': False, 'error': f"unsupported op: {op}"}
+
+    def serve_forever(self):
+        """Avvia l'agent (bloccante)"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        old_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, _AgentRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+        self._server.daemon_threads = True
+        self._server.agent = self
+        logger.info(f"Wallet agent listening on {self.socket_path} (ttl: {self.ttl}s)")
+
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def shutdown(self):
+        """Ferma l'agent"""
+        if self._server:
+            self._server.shutdown()
+
+
 class PlainWallet:
     """Wallet non criptato (per sviluppo/test)"""
     
@@ -162,6 +352,53 @@ class PlainWallet:
         return self.loaded and key in self.secrets
 
 
+# Pattern precompilato per placeholder ${WALLET:key}, ${VAULT:key}, ${ENV:VAR}
+PLACEHOLDER_PATTERN = re.compile(r'\$\{(WALLET|VAULT|ENV):([^}]+)\}')
+
+# Cache dei documenti risolti: {(cache_key, id(wallet)): (wallet, dipendenze, documento)}
+_RESOLVED_CACHE_SIZE = 32
+_resolved_cache = OrderedDict()
+_resolved_cache_lock = threading.Lock()
+_MISSING = object()
+
+
+def _lookup_placeholder(source, key, wallet):
+    """Valore di un placeholder, oppure _MISSING se non risolvibile"""
+    if source in ('WALLET', 'VAULT'):
+        if wallet is None:
+            logger.warning(f"Placeholder ${{{source}:{key}}} found but no wallet loaded")
+            return _MISSING
+        try:
+            return wallet.get_secret(key)
+        except KeyError:
+            logger.error(f"Secret '{key}' not found in wallet")
+            return _MISSING
+
+    if source == 'ENV':
+        env_value = os.environ.get(key)
+        if env_value is None:
+            logger.warning(f"Environment variable '{key}' not found")
+            return _MISSING
+        return env_value
+
+    return _MISSING
+
+
+def _resolve_string(value, wallet, deps=None):
+    """Risolve i placeholder di una stringa registrando le dipendenze usate in deps"""
+    if '${' not in value:
+        return value
+
+    def replace_placeholder(match):
+        source, key = match.group(1), match.group(2)
+        resolved = _lookup_placeholder(source, key, wallet)
+        if deps is not None:
+            deps[('ENV' if source == 'ENV' else 'WALLET', key)] = resolved
+        return match.group(0) if resolved is _MISSING else resolved
+
+    return PLACEHOLDER_PATTERN.sub(replace_placeholder, value)
+
+
 def resolve_placeholders(value, wallet=None):
     """
     Risolve i placeholder in una stringa
@@ -178,57 +415,118 @@ def resolve_placeholders(value, wallet=None):
     Returns:
         stringa con placeholder risolti
     """
-    import re
-    
     if not isinstance(value, str):
         return value
-    
-    # Pattern per placeholder
-    pattern = r'\$\{(WALLET|VAULT|ENV):([^}]+)\}'
-    
-    def replace_placeholder(match):
-        source = match.group(1)
-        key = match.group(2)
-        
-        if source in ['WALLET', 'VAULT']:
-            if wallet is None:
-                logger.warning(f"Placeholder ${{{source}:{key}}} found but no wallet loaded")
-                return match.group(0)  # lascia invariato
-            
-            try:
-                return wallet.get_secret(key)
-            except KeyError:
-                logger.error(f"Secret '{key}' not found in wallet")
-                return match.group(0)
-        
-        elif source == 'ENV':
-            env_value = os.environ.get(key)
-            if env_value is None:
-                logger.warning(f"Environment variable '{key}' not found")
-                return match.group(0)
-            return env_value
-        
-        return match.group(0)
-    
-    return re.sub(pattern, replace_placeholder, value)
+
+    return _resolve_string(value, wallet)
 
 
-def resolve_dict_placeholders(data, wallet=None):
+def _resolve_tree(data, wallet, deps):
+    """
+    Risolve ricorsivamente; ritorna lo stesso oggetto se nessun placeholder
+    è stato sostituito, così i sotto-alberi invariati vengono condivisi
+    """
+    if isinstance(data, str):
+        return _resolve_string(data, wallet, deps)
+
+    if isinstance(data, dict):
+        resolved = None
+        for k, v in data.items():
+            new_v = _resolve_tree(v, wallet, deps)
+            if new_v is not v:
+                if resolved is None:
+                    resolved = dict(data)
+                resolved[k] = new_v
+        return data if resolved is None else resolved
+
+    if isinstance(data, list):
+        resolved = None
+        for i, item in enumerate(data):
+            new_item = _resolve_tree(item, wallet, deps)
+            if new_item is not item:
+                if resolved is None:
+                    resolved = list(data)
+                resolved[i] = new_item
+        return data if resolved is None else resolved
+
+    return data
+
+
+def _copy_containers(data):
+    """Copia dict e liste (le foglie, immutabili, restano condivise)"""
+    if isinstance(data, dict):
+        return {k: _copy_containers(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_copy_containers(item) for item in data]
+    return data
+
+
+def _deps_unchanged(deps, wallet):
+    """Verifica che segreti e variabili d'ambiente usati abbiano ancora lo stesso valore"""
+    for (source, key), value in deps.items():
+        if source == 'ENV':
+            current = os.environ.get(key, _MISSING)
+        elif wallet is not None and wallet.has_secret(key):
+            current = wallet.get_secret(key)
+        else:
+            current = _MISSING
+        if current != value:
+            return False
+    return True
+
+
+def workflow_hash(data):
+    """Hash stabile del contenuto di un workflow (chiave per la cache dei documenti risolti)"""
+    payload = json.dumps(data, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def clear_resolved_cache():
+    """Svuota la cache dei documenti risolti"""
+    with _resolved_cache_lock:
+        _resolved_cache.clear()
+
+
+def resolve_dict_placeholders(data, wallet=None, cache_key=None):
     """
     Risolve i placeholder in un dizionario ricorsivamente
     
+    Senza cache_key copia solo i contenitori che contengono placeholder: i
+    sotto-alberi invariati sono condivisi con l'input (non modificarli in place).
+    
     Args:
         data: dizionario con potenziali placeholder
         wallet: istanza Wallet
+        cache_key: (opzionale) hash del contenuto (es. workflow_hash); se
+            presente il documento risolto viene riusato finché i segreti e
+            le variabili d'ambiente referenziati non cambiano. La cache ne
+            tiene una copia privata e ogni chiamata ritorna una nuova copia
+            dei contenitori, senza sotto-alberi condivisi con l'input né con
+            altre esecuzioni
     
     Returns:
         dizionario con placeholder risolti
     """
-    if isinstance(data, dict):
-        return {k: resolve_dict_placeholders(v, wallet) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [resolve_dict_placeholders(item, wallet) for item in data]
-    elif isinstance(data, str):
-        return resolve_placeholders(data, wallet)
-    else:
-        return data
\ No newline at end of file
+    if cache_key is None:
+        return _resolve_tree(data, wallet, None)
+
+    entry_key = (cache_key, id(wallet))
+    with _resolved_cache_lock:
+        entry = _resolved_cache.get(entry_key)
+        if entry is not None:
+            _resolved_cache.move_to_end(entry_key)
+
+    if entry is not None and entry[0] is wallet and _deps_unchanged(entry[1], wallet):
+        logger.debug(f"Resolved workflow served from cache ({cache_key[:12]})")
+        return _copy_containers(entry[2])
+
+    deps = {}
+    resolved = _copy_containers(_resolve_tree(data, wallet, deps))
+
+    with _resolved_cache_lock:
+        _resolved_cache[entry_key] = (wallet, deps, resolved)
+        _resolved_cache.move_to_end(entry_key)
+        while len(_resolved_cache) > _RESOLVED_CACHE_SIZE:
+            _resolved_cache.popitem(last=False)
+
+    return _copy_containers(resolved)
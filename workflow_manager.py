@@ -7,12 +7,15 @@ FIXED: Nessun circular import con automator.py
 import threading
 import time
 import uuid
-from datetime import datetime
+from datetime import datetime, date, time as dt_time
+from decimal import Decimal
 from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass, field
 import logging
 
+from logger_config import AutomatorLogger, current_execution_id
+
 # ========================================
 # IMPORT CONDIZIONALE PER EVITARE CIRCULAR IMPORT
 # ========================================
@@ -30,6 +33,9 @@ registry_logger = logging.getLogger("workflow-registry")
 engine_logger = logging.getLogger("workflow-engine-manager")
 facade_logger = logging.getLogger("workflow-facade")
 
+# Tipi che l'encoder JSON delle API gestisce nativamente
+_JSON_SAFE_TYPES = (str, int, float, bool, datetime, date, dt_time, Decimal, uuid.UUID)
+
 # ========================================
 # ENUMS E DATACLASSES
 # ========================================
@@ -55,6 +61,7 @@ class WorkflowMetadata:
     task_count: int
     description: Optional[str] = None
     tags: List[str] = field(default_factory=list)
+    content_hash: Optional[str] = None
 
     def to_dict(self) -> dict:
         """Converte in dizionario serializzabile"""
@@ -189,6 +196,7 @@ class WorkflowEngineManager:
             self._executions: Dict[str, WorkflowExecution] = {}
             self._execution_history: List[WorkflowExecution] = []
             self._max_history_size = 100
+            self._log_tail_size = 200
             self._semaphore = threading.Semaphore(max_concurrent_executions)
             self._max_concurrent = max_concurrent_executions
             self._initialized = True
@@ -288,6 +296,10 @@ class WorkflowEngineManager:
                 raise ValueError(f"Execution {execution_id} already started (status: {execution.status.value})")
 
         def run_execution():
+            # Tagga i log di questo thread con l'execution id
+            log_handler = AutomatorLogger.get_execution_handler()
+            log_token = current_execution_id.set(execution_id)
+
             try:
                 # Acquisisce semaforo per concorrenza
                 acquired = self._semaphore.acquire(timeout=1)
@@ -340,6 +352,11 @@ class WorkflowEngineManager:
                 # Rilascia semaforo
                 self._semaphore.release()
 
+                # Chiude la cattura log: coda recente in memoria, resto su file
+                current_execution_id.reset(log_token)
+                execution.logs = log_handler.tail(execution_id, self._log_tail_size)
+                log_handler.finish(execution_id)
+
         if async_mode:
             # Esecuzione asincrona in thread separato
             thread = threading.Thread(target=run_execution, daemon=True)
@@ -363,6 +380,16 @@ class WorkflowEngineManager:
 
             return None
 
+    def get_execution_logs(self, execution_id: str, offset: int = 0,
+                           limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Ritorna una pagina dei log catturati per un'esecuzione
+        Returns: dict con 'lines', 'offset', 'limit', 'total' oppure None se l'esecuzione non esiste
+        """
+        if self.get_execution(execution_id) is None:
+            return None
+        return AutomatorLogger.get_execution_logs(execution_id, offset, limit)
+
     def get_active_executions(self) -> List[WorkflowExecution]:
         """Ritorna tutte le esecuzioni attive"""
         with self._lock:
@@ -429,8 +456,39 @@ class WorkflowEngineManager:
             # Limita dimensione history
             if len(self._execution_history) > self._max_history_size:
                 removed = self._execution_history.pop(0)
+                AutomatorLogger.get_execution_handler().discard(removed.execution_id)
                 engine_logger.debug(f"Removed old execution from history: {removed.execution_id}")
 
+    @staticmethod
+    def _json_safe(value: Any) -> Any:
+        """
+        Rende un output serializzabile: oggetti non JSON (es. stream lazy di
+        righe) diventano str(). Copy-on-write: se nulla cambia ritorna l'input.
+        """
+        if value is None or isinstance(value, _JSON_SAFE_TYPES):
+            return value
+        if isinstance(value, dict):
+            changed = False
+            result = {}
+            for key, item in value.items():
+                safe = WorkflowEngineManager._json_safe(item)
+                changed = changed or safe is not item
+                result[key] = safe
+            return result if changed else value
+        if isinstance(value, (list, tuple)):
+            items = [WorkflowEngineManager._json_safe(item) for item in value]
+            if all(a is b for a, b in zip(items, value)):
+                return value
+            return items
+        # Array colonnari (NumPy / pyarrow) convertiti in liste
+        for converter in ('to_pylist', 'tolist'):
+            if callable(getattr(value, converter, None)):
+                converted = getattr(value, converter)()
+                if isinstance(converted, (list, *_JSON_SAFE_TYPES)):
+                    return WorkflowEngineManager._json_safe(converted)
+                break
+        return str(value)
+
     def _serialize_context(self, context: Any) -> Dict[str, Any]:
         """Serializza i risultati del context"""
         try:
@@ -441,7 +499,7 @@ class WorkflowEngineManager:
                 output_serialized = None
                 if task_result.output:
                     if isinstance(task_result.output, (dict, list)):
-                        output_serialized = task_result.output  # ✅ Mantieni dict/list
+                        output_serialized = self._json_safe(task_result.output)  # ✅ Mantieni dict/list
                     elif isinstance(task_result.output, (str, int, float, bool)):
                         output_serialized = task_result.output
                     else:
@@ -477,6 +535,7 @@ class WorkflowEngineManager:
                 if exec.completed_at:
                     age = (now - exec.completed_at).total_seconds()
                     if age > max_age_seconds:
+                        AutomatorLogger.get_execution_handler().discard(exec.execution_id)
                         removed_count += 1
                         continue
 
@@ -531,6 +590,7 @@ class WorkflowManagerFacade:
         tags: Optional[List[str]] = None
     ) -> WorkflowMetadata:
         """Registra un nuovo workflow"""
+        from wallet import workflow_hash
 
         # Estrai task count
         if isinstance(content, dict) and 'tasks' in content:
@@ -548,7 +608,8 @@ class WorkflowManagerFacade:
             created_at=datetime.now(),
             task_count=task_count,
             description=description,
-            tags=tags or []
+            tags=tags or [],
+            content_hash=workflow_hash(content)
         )
 
         self.registry.register(workflow_id, metadata)
@@ -601,6 +662,11 @@ class WorkflowManagerFacade:
         """Recupera stato esecuzione"""
         return self.engine_manager.get_execution(execution_id)
 
+    def get_execution_logs(self, execution_id: str, offset: int = 0,
+                           limit: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Recupera una pagina dei log di un'esecuzione"""
+        return self.engine_manager.get_execution_logs(execution_id, offset, limit)
+
     def get_workflow_history(self, workflow_id: str) -> List[WorkflowExecution]:
         """Recupera storico esecuzioni di un workflow"""
         return self.engine_manager.get_workflow_executions(workflow_id)